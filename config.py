@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import atexit
 import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -10,6 +12,8 @@ from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
 from logging_config import get_logger
+from metricas import ouvintes_mongo
+from monitoramento_mongo import OuvinteComandosLentos
 
 
 # Diretório raiz do projeto (onde está este config.py e o .env)
@@ -32,6 +36,14 @@ def _get_env(name: str, *, default: str | None = None, required: bool = False) -
     return value
 
 
+def _get_env_bool(name: str, *, default: bool = False) -> bool:
+    """Lê variável de ambiente booleana (1/true/sim/yes = verdadeiro)."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "sim", "yes", "on")
+
+
 # URL de conexão com o MongoDB (OBRIGATÓRIA, sem hardcode)
 MONGO_URI: str = _get_env("MONGO_URI", required=True)
 
@@ -40,6 +52,129 @@ MONGO_DB_NAME: str = _get_env("MONGO_DB_NAME", default="empresa_db")
 MONGO_COLLECTION_CLIENTES: str = _get_env(
     "MONGO_COLLECTION_CLIENTES", default="clientes"
 )
+# Totais por status / UF / cidade mantidos a cada escrita (ver src/contadores.py)
+MONGO_COLLECTION_CONTADORES: str = _get_env(
+    "MONGO_COLLECTION_CONTADORES", default="contadores"
+)
+# Jobs de relatórios em segundo plano (ver src/jobs.py)
+MONGO_COLLECTION_JOBS: str = _get_env("MONGO_COLLECTION_JOBS", default="jobs")
+# Linhas pré-agregadas dos relatórios (ver src/relatorios_materializados.py)
+MONGO_COLLECTION_RELATORIOS: str = _get_env(
+    "MONGO_COLLECTION_RELATORIOS", default="relatorios_materializados"
+)
+
+# Pool de conexões do MongoClient compartilhado (um por processo)
+MONGO_MAX_POOL_SIZE: int = int(_get_env("MONGO_MAX_POOL_SIZE", default="100"))
+MONGO_MIN_POOL_SIZE: int = int(_get_env("MONGO_MIN_POOL_SIZE", default="0"))
+MONGO_MAX_IDLE_TIME_MS: str | None = _get_env("MONGO_MAX_IDLE_TIME_MS")
+MONGO_WAIT_QUEUE_TIMEOUT_MS: str | None = _get_env("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+# Ex.: "zstd,snappy,zlib" (o driver negocia com o servidor o primeiro suportado)
+MONGO_COMPRESSORS: str | None = _get_env("MONGO_COMPRESSORS")
+
+# Tamanho padrão dos lotes de insert_many em POST /clientes/bulk
+BULK_BATCH_SIZE: int = int(_get_env("BULK_BATCH_SIZE", default="1000"))
+# Limites do corpo de POST /clientes/bulk (acima disso: 413)
+BULK_MAX_BYTES: int = int(_get_env("BULK_MAX_BYTES", default=str(128 * 1024 * 1024)))
+BULK_MAX_ITENS: int = int(_get_env("BULK_MAX_ITENS", default="500000"))
+
+# Tamanho do batch do cursor (docs por round trip) em GET /clientes/export
+EXPORT_BATCH_SIZE: int = int(_get_env("EXPORT_BATCH_SIZE", default="2000"))
+
+# Snapshot em memória usado pelos endpoints de /relatorios
+SNAPSHOT_INTERVALO_SEGUNDOS: float = float(
+    _get_env("SNAPSHOT_INTERVALO_SEGUNDOS", default="300")
+)
+# Intervalo mínimo entre recargas disparadas por escritas (agrupa rajadas)
+SNAPSHOT_INTERVALO_MINIMO_SEGUNDOS: float = float(
+    _get_env("SNAPSHOT_INTERVALO_MINIMO_SEGUNDOS", default="5")
+)
+SNAPSHOT_ATUALIZAR_EM_ESCRITA: bool = _get_env_bool(
+    "SNAPSHOT_ATUALIZAR_EM_ESCRITA", default=True
+)
+
+# Intervalo da rematerialização dos relatórios pela API (0 = só sob demanda)
+RELATORIOS_MATERIALIZAR_INTERVALO_SEGUNDOS: float = float(
+    _get_env("RELATORIOS_MATERIALIZAR_INTERVALO_SEGUNDOS", default="600")
+)
+
+# Cache LRU dos prefixos mais buscados em GET /clientes/busca
+BUSCA_CACHE_TAMANHO: int = int(_get_env("BUSCA_CACHE_TAMANHO", default="1024"))
+BUSCA_CACHE_TTL_SEGUNDOS: float = float(
+    _get_env("BUSCA_CACHE_TTL_SEGUNDOS", default="30")
+)
+
+# Coalescência de GET /clientes/{cpf}: buscas que chegam juntas viram um só $in
+COALESCER_CPF_ATIVO: bool = _get_env_bool("COALESCER_CPF_ATIVO", default=False)
+COALESCER_JANELA_MS: float = float(_get_env("COALESCER_JANELA_MS", default="2"))
+COALESCER_MAX_CHAVES: int = int(_get_env("COALESCER_MAX_CHAVES", default="100"))
+
+# Cache de clientes por CPF (GET /clientes/{cpf} e ClienteCRUD.buscar_por_cpf)
+# CACHE_CPF_TAMANHO=0 desliga o cache
+CACHE_CPF_TAMANHO: int = int(_get_env("CACHE_CPF_TAMANHO", default="10000"))
+CACHE_CPF_TTL_SEGUNDOS: float = float(_get_env("CACHE_CPF_TTL_SEGUNDOS", default="60"))
+# Invalida também por change stream (escritas de outros processos; exige replica set)
+CACHE_CPF_CHANGE_STREAM: bool = _get_env_bool("CACHE_CPF_CHANGE_STREAM", default=False)
+
+# Executor dos relatórios de /relatorios (src/executor_relatorios.py)
+# RELATORIOS_EXECUTOR_PROCESSOS=0 roda no threadpool do próprio processo
+RELATORIOS_EXECUTOR_PROCESSOS: int = int(_get_env("RELATORIOS_EXECUTOR_PROCESSOS", default="2"))
+# Pedidos que podem esperar na fila além dos que estão rodando (acima disso: 503)
+RELATORIOS_EXECUTOR_FILA_MAX: int = int(_get_env("RELATORIOS_EXECUTOR_FILA_MAX", default="8"))
+RELATORIOS_TIMEOUT_SEGUNDOS: float = float(_get_env("RELATORIOS_TIMEOUT_SEGUNDOS", default="30"))
+# Timeouts por relatório, ex.: "faixa_etaria=60,dominios_email=10"
+RELATORIOS_TIMEOUTS: str = _get_env("RELATORIOS_TIMEOUTS", default="")
+# Pedidos idênticos simultâneos compartilham um cálculo; o resultado ainda é
+# servido por este TTL (0 = só compartilha o que está em andamento)
+RELATORIOS_RESULTADO_TTL_SEGUNDOS: float = float(
+    _get_env("RELATORIOS_RESULTADO_TTL_SEGUNDOS", default="2")
+)
+
+# Jobs de relatórios em segundo plano (src/jobs.py, rotas /jobs)
+JOBS_MAX_CONCORRENTES: int = int(_get_env("JOBS_MAX_CONCORRENTES", default="2"))
+# Jobs aguardando além dos que estão rodando (acima disso: 503)
+JOBS_FILA_MAX: int = int(_get_env("JOBS_FILA_MAX", default="20"))
+# Onde ficam os arquivos gerados (precisa ser compartilhado entre réplicas da API)
+JOBS_DIRETORIO: Path = Path(_get_env("JOBS_DIRETORIO", default=str(ROOT / "dados" / "jobs")))
+# Horas que um job concluído (e seu arquivo) fica disponível antes de ser
+# apagado; 0 guarda para sempre
+JOBS_RETENCAO_HORAS: float = float(_get_env("JOBS_RETENCAO_HORAS", default="24"))
+
+# Comandos do MongoDB acima deste tempo vão para o log (mongo_comando_lento);
+# 0 desliga
+MONGO_SLOW_MS: float = float(_get_env("MONGO_SLOW_MS", default="100"))
+# Fração (0 a 1) dos comandos lentos repetidos com explain para saber
+# documentos examinados vs retornados (0 = nunca)
+MONGO_EXPLAIN_AMOSTRA: float = float(_get_env("MONGO_EXPLAIN_AMOSTRA", default="0"))
+
+# Backups em streaming (src/motor_backup.py, src/backup_banco.py)
+BACKUP_DIRETORIO: Path = Path(_get_env("BACKUP_DIRETORIO", default=str(ROOT / "backups")))
+# ndjson (Extended JSON, uma linha por documento) ou bson (documentos BSON concatenados)
+BACKUP_FORMATO: str = _get_env("BACKUP_FORMATO", default="ndjson")
+# gzip, zstd (exige o pacote zstandard) ou nenhuma
+BACKUP_COMPRESSAO: str = _get_env("BACKUP_COMPRESSAO", default="gzip")
+BACKUP_DOCS_POR_CHUNK: int = int(_get_env("BACKUP_DOCS_POR_CHUNK", default="100000"))
+BACKUP_BATCH_SIZE: int = int(_get_env("BACKUP_BATCH_SIZE", default="2000"))
+# Backup paralelo: faixas de _id exportadas ao mesmo tempo e processos usados
+# (BACKUP_PROCESSOS=0 usa threads do próprio processo)
+BACKUP_PARTICOES: int = int(_get_env("BACKUP_PARTICOES", default="4"))
+BACKUP_PROCESSOS: int = int(_get_env("BACKUP_PROCESSOS", default="4"))
+# Backup incremental: recua a marca d'água por esta folga (relógios diferentes
+# entre réplicas e escritas em andamento); repetir documentos é inofensivo
+BACKUP_INCREMENTAL_FOLGA_SEGUNDOS: float = float(
+    _get_env("BACKUP_INCREMENTAL_FOLGA_SEGUNDOS", default="300")
+)
+
+# Restauração de backups (src/restaurar_backup.py): documentos por bulk_write
+# e workers em paralelo (chunks de backups com manifesto vão para processos,
+# a menos que RESTAURACAO_PROCESSOS=false)
+RESTAURACAO_LOTE: int = int(_get_env("RESTAURACAO_LOTE", default="1000"))
+RESTAURACAO_WORKERS: int = int(_get_env("RESTAURACAO_WORKERS", default="4"))
+RESTAURACAO_PROCESSOS: bool = _get_env_bool("RESTAURACAO_PROCESSOS", default=True)
+
+# Gerador de clientes em massa para benchmarks (src/gerador_massa.py):
+# processos gerando/inserindo e documentos por insert_many
+GERADOR_PROCESSOS: int = int(_get_env("GERADOR_PROCESSOS", default=str(os.cpu_count() or 4)))
+GERADOR_LOTE: int = int(_get_env("GERADOR_LOTE", default="5000"))
 
 # Alias para compatibilidade com código antigo
 
@@ -65,9 +200,101 @@ class _CollectionBundle:
         return f"<CollectionBundle db={self.db.name!r} collection={self.collection.name!r}>"
 
 
+def _opcoes_pool() -> dict[str, Any]:
+    """Opções de pool/compressão do MongoClient, vindas das variáveis de ambiente."""
+    opcoes: dict[str, Any] = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+    }
+    if MONGO_MAX_IDLE_TIME_MS:
+        opcoes["maxIdleTimeMS"] = int(MONGO_MAX_IDLE_TIME_MS)
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        opcoes["waitQueueTimeoutMS"] = int(MONGO_WAIT_QUEUE_TIMEOUT_MS)
+    if MONGO_COMPRESSORS:
+        opcoes["compressors"] = MONGO_COMPRESSORS
+    return opcoes
+
+
+# Registro de clients compartilhados do processo (um por URI)
+_clients: dict[str, MongoClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _resetar_clients_apos_fork() -> None:
+    """
+    No processo filho de um fork, os clients herdados do pai não podem ser
+    usados (sockets e threads de monitoramento são do pai). Descartamos o
+    registro sem fechar nada; o filho cria o próprio client no primeiro uso.
+    """
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_resetar_clients_apos_fork)
+
+
+def get_mongo_client(uri: str | None = None) -> MongoClient:
+    """
+    Retorna o MongoClient compartilhado do processo (criado no primeiro uso).
+
+    Todas as partes do sistema (API, ClienteCRUD, relatórios, scripts)
+    reaproveitam o mesmo pool de conexões. Não feche o client retornado;
+    o encerramento fica com close_mongo_clients(), no shutdown.
+    """
+    uri = uri or MONGO_URI
+
+    with _clients_lock:
+        client = _clients.get(uri)
+        if client is None:
+            # Ouvintes de comandos e do pool alimentam GET /metrics (metricas.py);
+            # o de comandos lentos soma o tempo por requisição (monitoramento_mongo.py)
+            ouvinte_lentos = OuvinteComandosLentos(
+                limite_lento_ms=MONGO_SLOW_MS,
+                amostra_explain=MONGO_EXPLAIN_AMOSTRA,
+                executar_explain=lambda database, comando, uri=uri: get_mongo_client(uri)[
+                    database
+                ].command({"explain": comando, "verbosity": "executionStats"}),
+            )
+            client = MongoClient(
+                uri,
+                event_listeners=[*ouvintes_mongo(), ouvinte_lentos],
+                **_opcoes_pool(),
+            )
+            _clients[uri] = client
+
+            # Log estruturado da criação da conexão (sem expor URI)
+            logger.info(
+                "MongoDB connection created",
+                extra={
+                    "event": "mongo_connection_created",
+                    "database": MONGO_DB_NAME,
+                    "collection": MONGO_COLLECTION_CLIENTES,
+                },
+            )
+
+    return client
+
+
+def close_mongo_clients() -> None:
+    """Fecha todos os clients compartilhados do processo (usar só no shutdown)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_mongo_clients)
+
+
 def get_collection() -> _CollectionBundle:
     """Retorna client, db e coleção principal de clientes.
 
+    O client é o compartilhado do processo (ver get_mongo_client()).
+
     Exemplos de uso:
 
         bundle = get_collection()
@@ -75,18 +302,8 @@ def get_collection() -> _CollectionBundle:
 
         client, db, col = get_collection()
     """
-    client = MongoClient(MONGO_URI)
+    client = get_mongo_client()
     db = client[MONGO_DB_NAME]
     collection = db[MONGO_COLLECTION_CLIENTES]
 
-    # Log estruturado da criação da conexão (sem expor URI)
-    logger.info(
-        "MongoDB connection created",
-        extra={
-            "event": "mongo_connection_created",
-            "database": MONGO_DB_NAME,
-            "collection": MONGO_COLLECTION_CLIENTES,
-        },
-    )
-
     return _CollectionBundle(client=client, db=db, collection=collection)
@@ -1,8 +1,45 @@
+import atexit
+import copy
 import logging
 import json
+import os
+import queue
+import random
 import sys
 from datetime import datetime
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from metricas import Contador
+
+try:
+    # Serializador mais rápido (em requirements.txt); sem ele, cai no json da stdlib
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Logs em fila, escritos no stdout por uma thread própria (LOG_ASSINCRONO=false
+# volta a escrever direto na thread que loga)
+LOG_ASSINCRONO = os.getenv("LOG_ASSINCRONO", "true").strip().lower() in ("1", "true", "yes", "on")
+# Registros aguardando escrita; com a fila cheia, os novos são descartados
+LOG_FILA_MAX = int(os.getenv("LOG_FILA_MAX", "10000"))
+# Fração dos registros mantidos por event, ex.: "cliente_get_success=0.01,http_request=0.1".
+# WARNING ou acima sempre são mantidos.
+LOG_AMOSTRAGEM = os.getenv("LOG_AMOSTRAGEM", "")
+
+
+logs_descartados = Contador(
+    "log_records_dropped_total",
+    "Registros de log descartados, por motivo (fila_cheia, amostragem).",
+    ("reason",),
+)
+
+
+def _serializar(log_record: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(log_record, default=str).decode("utf-8")
+    return json.dumps(log_record, ensure_ascii=False, default=str)
 
 
 class JsonFormatter(logging.Formatter):
@@ -27,42 +64,172 @@ class JsonFormatter(logging.Formatter):
             "collection",
             "total_clientes",
             "event",
+            "mongo_ms",
+            "mongo_comandos",
+            "mongo_command",
+            "mongo_collection",
+            "mongo_filtro",
+            "mongo_sort",
+            "mongo_operacoes",
+            "mongo_falhou",
+            "docs_examinados",
+            "chaves_examinadas",
+            "docs_retornados",
+            "plano",
         ):
             if hasattr(record, attr):
                 log_record[attr] = getattr(record, attr)
 
-        # Stacktrace em caso de erro
+        # Stacktrace em caso de erro (já formatado, se o registro veio da fila)
         if record.exc_info:
             log_record["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record["exc_info"] = record.exc_text
+
+        return _serializar(log_record)
+
+
+def _ler_amostragem(texto: str) -> Dict[str, float]:
+    """'cliente_get_success=0.01,http_request=0.1' -> {'cliente_get_success': 0.01, ...}."""
+    taxas = {}
+    for item in (texto or "").split(","):
+        if not item.strip():
+            continue
+        nome, _, valor = item.partition("=")
+        try:
+            taxas[nome.strip()] = min(max(float(valor), 0.0), 1.0)
+        except ValueError:
+            print(f"LOG_AMOSTRAGEM: item inválido ignorado: {item.strip()!r}", file=sys.stderr)
+    return taxas
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Mantém só uma fração dos registros de cada event configurado.
+    Registros WARNING ou acima e events sem taxa passam sempre.
+    """
+
+    def __init__(self, taxas: Dict[str, float]):
+        super().__init__()
+        self.taxas = taxas
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.taxas:
+            return True
+        taxa = self.taxas.get(getattr(record, "event", None))
+        if taxa is None or taxa >= 1.0 or random.random() < taxa:
+            return True
+        logs_descartados.inc(reason="amostragem")
+        return False
+
+
+class _QueueHandlerLimitado(QueueHandler):
+    """
+    QueueHandler que descarta (e conta) quando a fila está cheia, em vez
+    de bloquear a requisição ou imprimir erro a cada registro.
+    """
+
+    def __init__(self, fila: queue.Queue):
+        super().__init__(fila)
+        self._formatador_excecao = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só o mínimo na thread que loga: fixa a mensagem (args podem mudar
+        # depois) e converte a exceção em texto; o JSON é montado na thread
+        # de escrita, com todos os campos extras preservados
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._formatador_excecao.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            logs_descartados.inc(reason="fila_cheia")
 
-        return json.dumps(log_record, ensure_ascii=False)
+
+class _StreamHandlerEmLote(logging.StreamHandler):
+    """Escreve sem flush a cada linha: só quando a fila esvazia."""
+
+    def __init__(self, stream, fila: queue.Queue):
+        super().__init__(stream)
+        self._fila = fila
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if self._fila.empty():
+                self.flush()
+        except Exception:
+            self.handleError(record)
 
 
 _configured = False
+_listener: Optional[QueueListener] = None
+
+
+def _iniciar_fila(root: logging.Logger, filtro: logging.Filter) -> None:
+    global _listener
+
+    fila: queue.Queue = queue.Queue(maxsize=LOG_FILA_MAX)
+    saida = _StreamHandlerEmLote(sys.stdout, fila)
+    saida.setFormatter(JsonFormatter())
+
+    handler = _QueueHandlerLimitado(fila)
+    handler.addFilter(filtro)
+    root.handlers = [handler]
+
+    _listener = QueueListener(fila, saida)
+    _listener.start()
 
 
 def _configure_root_logger() -> None:
     """
     Configura o logger raiz apenas uma vez, usando JSON no stdout.
 
+    Com LOG_ASSINCRONO (padrão), os registros vão para uma fila limitada
+    (LOG_FILA_MAX) e uma thread faz a serialização e a escrita; a
+    requisição não espera pelo stdout. Registros descartados (fila cheia
+    ou LOG_AMOSTRAGEM) aparecem em log_records_dropped_total (/metrics).
+
     Isso é chamado automaticamente pelo get_logger().
     """
     global _configured
     if _configured:
         return
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(JsonFormatter())
-
     root = logging.getLogger()
     root.setLevel(logging.INFO)
+    filtro = FiltroAmostragem(_ler_amostragem(LOG_AMOSTRAGEM))
 
     # Zera handlers anteriores e coloca só o nosso handler JSON
-    root.handlers = [handler]
+    if LOG_ASSINCRONO:
+        _iniciar_fila(root, filtro)
+        atexit.register(parar_logging)
+        if hasattr(os, "register_at_fork"):
+            # A thread de escrita não sobrevive ao fork: o filho cria a sua
+            os.register_at_fork(after_in_child=lambda: _iniciar_fila(root, filtro))
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(filtro)
+        root.handlers = [handler]
 
     _configured = True
 
 
+def parar_logging() -> None:
+    """Escreve o que está na fila e para a thread de escrita (shutdown)."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     """
     Retorna um logger já configurado para emitir JSON.
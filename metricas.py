@@ -0,0 +1,344 @@
+"""
+Métricas no formato texto do Prometheus (exposto em GET /metrics).
+
+Registro simples em memória, sem dependências externas:
+
+- Contador: só cresce (ex.: requisições por rota e status);
+- Medidor: sobe e desce (ex.: requisições em andamento, conexões no pool);
+- Histograma: distribuição em faixas cumulativas (`le`), com soma e
+  contagem (ex.: latência por rota, duração dos comandos do MongoDB).
+
+Também traz os ouvintes do PyMongo (comandos e pool de conexões),
+registrados no MongoClient compartilhado em config.get_mongo_client().
+
+Cada processo tem o seu registro: com vários workers do uvicorn, cada um
+expõe os próprios números (os processos do executor de relatórios não
+aparecem em /metrics).
+
+Uso:
+    from metricas import Contador, registro
+    erros = Contador("meus_erros_total", "Erros de algo.", ("tipo",))
+    erros.inc(tipo="timeout")
+    texto = registro.expor()
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+
+# Faixas padrão (segundos) para latência de requisições HTTP
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Comandos do MongoDB costumam ser bem mais rápidos
+BUCKETS_MONGO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    partes = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = (), registrar: bool = True):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos: Tuple[str, ...] = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._valores: Dict[Tuple[str, ...], object] = {}
+        if registrar:
+            registro.registrar(self)
+
+    def _chave(self, rotulos: dict) -> Tuple[str, ...]:
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(
+                f"Métrica {self.nome} espera os rótulos {self.rotulos}, recebeu {tuple(rotulos)}"
+            )
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def _linhas(self) -> List[str]:
+        raise NotImplementedError
+
+    def expor(self) -> List[str]:
+        return [
+            f"# HELP {self.nome} {self.ajuda}",
+            f"# TYPE {self.nome} {self.tipo}",
+            *self._linhas(),
+        ]
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (reinicia com o processo)."""
+
+    tipo = "counter"
+
+    def inc(self, valor: float = 1.0, **rotulos) -> None:
+        if valor < 0:
+            raise ValueError("Contador não pode diminuir")
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def valor(self, **rotulos) -> float:
+        with self._lock:
+            return self._valores.get(self._chave(rotulos), 0.0)
+
+    def _linhas(self) -> List[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}"
+            for chave, valor in itens
+        ]
+
+
+class Medidor(Contador):
+    """Valor que sobe e desce."""
+
+    tipo = "gauge"
+
+    def inc(self, valor: float = 1.0, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def dec(self, valor: float = 1.0, **rotulos) -> None:
+        self.inc(-valor, **rotulos)
+
+    def set(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = float(valor)
+
+
+class Histograma(_Metrica):
+    """Contagem por faixas cumulativas (`le`), soma e total de observações."""
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Iterable[str] = (),
+        buckets: Sequence[float] = BUCKETS_HTTP,
+        registrar: bool = True,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(nome, ajuda, rotulos, registrar)
+
+    def observe(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            serie = self._valores.get(chave)
+            if serie is None:
+                # [contagem por faixa (não cumulativa)..., +Inf, soma]
+                serie = [0] * (len(self.buckets) + 1) + [0.0]
+                self._valores[chave] = serie
+            for posicao, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    break
+            else:
+                posicao = len(self.buckets)
+            serie[posicao] += 1
+            serie[-1] += valor
+
+    def contagem(self, **rotulos) -> int:
+        with self._lock:
+            serie = self._valores.get(self._chave(rotulos))
+            return sum(serie[:-1]) if serie else 0
+
+    def _linhas(self) -> List[str]:
+        with self._lock:
+            itens = sorted((chave, list(serie)) for chave, serie in self._valores.items())
+
+        linhas = []
+        for chave, serie in itens:
+            acumulado = 0
+            for limite, quantidade in zip((*self.buckets, math.inf), serie[:-1]):
+                acumulado += quantidade
+                le = f'le="{_formatar_numero(limite)}"'
+                linhas.append(
+                    f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, le)} {acumulado}"
+                )
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_numero(serie[-1])}")
+            linhas.append(f"{self.nome}_count{rotulos} {acumulado}")
+        return linhas
+
+
+class Registro:
+    """Conjunto de métricas do processo, na ordem em que foram criadas."""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metrica: _Metrica) -> None:
+        with self._lock:
+            if metrica.nome in self._metricas:
+                raise ValueError(f"Métrica já registrada: {metrica.nome}")
+            self._metricas[metrica.nome] = metrica
+
+    def obter(self, nome: str) -> _Metrica:
+        return self._metricas[nome]
+
+    def expor(self) -> str:
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        linhas: List[str] = []
+        for metrica in metricas:
+            linhas.extend(metrica.expor())
+        return "\n".join(linhas) + "\n"
+
+
+registro = Registro()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ----------------------------------------------------------------------
+# HTTP (preenchidas pelo middleware da API)
+# ----------------------------------------------------------------------
+
+http_requisicoes = Contador(
+    "http_requests_total",
+    "Requisições HTTP atendidas, por método, rota (template) e status.",
+    ("method", "route", "status_code"),
+)
+http_duracao = Histograma(
+    "http_request_duration_seconds",
+    "Duração das requisições HTTP, por método e rota (template).",
+    ("method", "route"),
+    buckets=BUCKETS_HTTP,
+)
+http_em_andamento = Medidor(
+    "http_requests_in_progress",
+    "Requisições HTTP em andamento, por método.",
+    ("method",),
+)
+
+
+# ----------------------------------------------------------------------
+# MongoDB (ouvintes do PyMongo)
+# ----------------------------------------------------------------------
+
+mongo_comandos_duracao = Histograma(
+    "mongodb_command_duration_seconds",
+    "Duração dos comandos enviados ao MongoDB, por comando.",
+    ("command",),
+    buckets=BUCKETS_MONGO,
+)
+mongo_comandos_falhas = Contador(
+    "mongodb_command_failures_total",
+    "Comandos do MongoDB que falharam, por comando.",
+    ("command",),
+)
+mongo_pool_conexoes = Medidor(
+    "mongodb_pool_connections",
+    "Conexões abertas no pool, por servidor.",
+    ("address",),
+)
+mongo_pool_em_uso = Medidor(
+    "mongodb_pool_connections_in_use",
+    "Conexões do pool emprestadas a operações, por servidor.",
+    ("address",),
+)
+mongo_pool_aguardando = Medidor(
+    "mongodb_pool_checkouts_waiting",
+    "Operações aguardando uma conexão do pool, por servidor.",
+    ("address",),
+)
+mongo_pool_falhas_checkout = Contador(
+    "mongodb_pool_checkout_failures_total",
+    "Falhas ao obter conexão do pool (timeout, pool fechado...), por servidor e motivo.",
+    ("address", "reason"),
+)
+mongo_pool_limpezas = Contador(
+    "mongodb_pool_cleared_total",
+    "Vezes em que o pool foi esvaziado (ex.: servidor caiu), por servidor.",
+    ("address",),
+)
+
+
+def _endereco(evento) -> str:
+    host, porta = evento.address
+    return f"{host}:{porta}"
+
+
+class OuvinteComandos(monitoring.CommandListener):
+    """Duração e falhas de cada comando (find, insert, aggregate, getMore...)."""
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        mongo_comandos_duracao.observe(event.duration_micros / 1_000_000, command=event.command_name)
+
+    def failed(self, event) -> None:
+        mongo_comandos_duracao.observe(event.duration_micros / 1_000_000, command=event.command_name)
+        mongo_comandos_falhas.inc(command=event.command_name)
+
+
+class OuvintePool(monitoring.ConnectionPoolListener):
+    """Conexões abertas, em uso e aguardando no pool de cada servidor."""
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        mongo_pool_limpezas.inc(address=_endereco(event))
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        mongo_pool_conexoes.inc(address=_endereco(event))
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        mongo_pool_conexoes.dec(address=_endereco(event))
+
+    def connection_check_out_started(self, event) -> None:
+        mongo_pool_aguardando.inc(address=_endereco(event))
+
+    def connection_check_out_failed(self, event) -> None:
+        endereco = _endereco(event)
+        mongo_pool_aguardando.dec(address=endereco)
+        mongo_pool_falhas_checkout.inc(address=endereco, reason=str(event.reason))
+
+    def connection_checked_out(self, event) -> None:
+        endereco = _endereco(event)
+        mongo_pool_aguardando.dec(address=endereco)
+        mongo_pool_em_uso.inc(address=endereco)
+
+    def connection_checked_in(self, event) -> None:
+        mongo_pool_em_uso.dec(address=_endereco(event))
+
+
+def ouvintes_mongo() -> list:
+    """Ouvintes para `MongoClient(event_listeners=...)`."""
+    return [OuvinteComandos(), OuvintePool()]
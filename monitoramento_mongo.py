@@ -0,0 +1,272 @@
+"""
+Atribuição dos comandos do MongoDB às requisições HTTP e log de comandos lentos.
+
+- O middleware log_requests da API abre um contexto por requisição
+  (iniciar_requisicao) com o request_id, guardado em um contextvar. Os
+  handlers síncronos rodam no threadpool com uma cópia desse contexto,
+  então cada comando executado por eles é somado à requisição: o log de
+  acesso sai com `mongo_ms` e `mongo_comandos`.
+- Comandos acima de MONGO_SLOW_MS geram um log `mongo_comando_lento` com
+  comando, coleção, formato do filtro (valores trocados por "?") e o
+  request_id.
+- Com MONGO_EXPLAIN_AMOSTRA > 0, uma fração dos comandos lentos
+  (find/aggregate/count/distinct) é repetida com `explain`
+  (executionStats) em uma thread separada. O log
+  `mongo_comando_lento_explain` traz documentos/chaves examinados vs
+  retornados e o estágio do plano (ex.: COLLSCAN).
+
+Comandos feitos fora de uma requisição (threads de fundo, scripts,
+processos do executor de relatórios) saem sem request_id.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+# Comandos que aceitam explain com executionStats
+_COMANDOS_EXPLICAVEIS = ("find", "aggregate", "count", "distinct")
+# Campos de sessão/protocolo que não fazem parte do comando em si
+_CAMPOS_PROTOCOLO = ("lsid", "txnNumber", "autocommit", "startTransaction", "readConcern")
+# Profundidade máxima ao montar o formato do filtro
+_PROFUNDIDADE_MAXIMA = 6
+
+
+class _AcumuladorRequisicao:
+    """Tempo e quantidade de comandos do MongoDB de uma requisição."""
+
+    __slots__ = ("request_id", "comandos", "duracao_ms", "_lock")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.comandos = 0
+        self.duracao_ms = 0.0
+        self._lock = threading.Lock()
+
+    def somar(self, duracao_ms: float) -> None:
+        # Uma requisição pode rodar comandos em mais de uma thread
+        with self._lock:
+            self.comandos += 1
+            self.duracao_ms += duracao_ms
+
+
+_requisicao_atual: ContextVar[Optional[_AcumuladorRequisicao]] = ContextVar(
+    "requisicao_mongo", default=None
+)
+
+
+def iniciar_requisicao(request_id: str) -> Token:
+    """Abre o contexto da requisição; devolve o token para encerrar_requisicao."""
+    return _requisicao_atual.set(_AcumuladorRequisicao(request_id))
+
+
+def encerrar_requisicao(token: Token) -> dict:
+    """Fecha o contexto e devolve os campos do log de acesso."""
+    acumulador = _requisicao_atual.get()
+    _requisicao_atual.reset(token)
+    if acumulador is None:
+        return {}
+    return {
+        "mongo_comandos": acumulador.comandos,
+        "mongo_ms": round(acumulador.duracao_ms, 2),
+    }
+
+
+def request_id_atual() -> Optional[str]:
+    acumulador = _requisicao_atual.get()
+    return acumulador.request_id if acumulador is not None else None
+
+
+def formato_filtro(valor, profundidade: int = 0):
+    """
+    Formato de um filtro/pipeline sem os valores: mantém campos e
+    operadores e troca os valores por "?" (não vaza CPFs/e-mails no log).
+    """
+    if profundidade >= _PROFUNDIDADE_MAXIMA:
+        return "..."
+    if isinstance(valor, dict):
+        return {chave: formato_filtro(item, profundidade + 1) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        if valor and all(isinstance(item, dict) for item in valor):
+            return [formato_filtro(item, profundidade + 1) for item in valor]
+        return ["?"] if valor else []
+    return "?"
+
+
+def _resumo_comando(comando_nome: str, comando: dict) -> dict:
+    """Coleção e formato do filtro/pipeline do comando, para o log."""
+    colecao = comando.get(comando_nome)
+    resumo = {"mongo_collection": colecao if isinstance(colecao, str) else None}
+
+    if comando_nome == "aggregate":
+        resumo["mongo_filtro"] = formato_filtro(comando.get("pipeline", []))
+    elif comando_nome in ("find", "count", "distinct"):
+        resumo["mongo_filtro"] = formato_filtro(comando.get("filter", comando.get("query", {})))
+        if comando.get("sort"):
+            resumo["mongo_sort"] = list(comando["sort"])
+    elif comando_nome in ("update", "delete"):
+        operacoes = comando.get("updates") or comando.get("deletes") or []
+        if operacoes:
+            resumo["mongo_filtro"] = formato_filtro(operacoes[0].get("q", {}))
+        resumo["mongo_operacoes"] = len(operacoes)
+    elif comando_nome == "findAndModify":
+        resumo["mongo_filtro"] = formato_filtro(comando.get("query", {}))
+    elif comando_nome == "insert":
+        resumo["mongo_operacoes"] = len(comando.get("documents") or [])
+    return resumo
+
+
+def _estatisticas_explain(resultado: dict) -> dict:
+    """Extrai executionStats de um explain (find/count/distinct ou aggregate)."""
+    estatisticas = resultado.get("executionStats")
+    plano = (resultado.get("queryPlanner") or {}).get("winningPlan") or {}
+    if estatisticas is None:
+        # aggregate: o primeiro estágio ($cursor) traz o plano da consulta
+        for estagio in resultado.get("stages") or []:
+            cursor = estagio.get("$cursor") if isinstance(estagio, dict) else None
+            if cursor:
+                estatisticas = cursor.get("executionStats")
+                plano = (cursor.get("queryPlanner") or {}).get("winningPlan") or {}
+                break
+    if estatisticas is None:
+        return {}
+
+    estagios = []
+    while isinstance(plano, dict) and plano:
+        if plano.get("stage"):
+            estagios.append(plano["stage"])
+        plano = plano.get("inputStage") or (plano.get("queryPlan") or {})
+    return {
+        "docs_examinados": estatisticas.get("totalDocsExamined"),
+        "chaves_examinadas": estatisticas.get("totalKeysExamined"),
+        "docs_retornados": estatisticas.get("nReturned"),
+        "plano": " <- ".join(estagios) or None,
+    }
+
+
+class OuvinteComandosLentos(monitoring.CommandListener):
+    """
+    Soma cada comando à requisição atual e loga os lentos.
+
+    Args:
+        limite_lento_ms: duração a partir da qual o comando é logado
+            (<= 0 desliga o log de lentos).
+        amostra_explain: fração (0 a 1) dos comandos lentos repetidos com explain.
+        executar_explain: (database, comando) -> resultado do explain; roda
+            em thread própria, nunca dentro do ouvinte.
+    """
+
+    def __init__(
+        self,
+        limite_lento_ms: float = 100.0,
+        amostra_explain: float = 0.0,
+        executar_explain: Optional[Callable[[str, dict], dict]] = None,
+    ):
+        self._limite_ms = limite_lento_ms
+        self._amostra = min(max(amostra_explain, 0.0), 1.0)
+        self._executar_explain = executar_explain
+
+        # Comandos em andamento: (conexão, request_id do driver) -> (comando, requisição)
+        self._em_andamento: Dict[Tuple, Tuple[dict, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+        self._explains = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mongo-explain")
+        self._explain_ocupado = threading.Event()
+
+    def started(self, event) -> None:
+        if self._limite_ms <= 0:
+            return
+        with self._lock:
+            self._em_andamento[(event.connection_id, event.request_id)] = (
+                event.command,
+                request_id_atual(),
+            )
+
+    def succeeded(self, event) -> None:
+        self._concluir(event, falhou=False)
+
+    def failed(self, event) -> None:
+        self._concluir(event, falhou=True)
+
+    def _concluir(self, event, falhou: bool) -> None:
+        duracao_ms = event.duration_micros / 1000
+        acumulador = _requisicao_atual.get()
+        if acumulador is not None:
+            acumulador.somar(duracao_ms)
+
+        if self._limite_ms <= 0:
+            return
+        with self._lock:
+            comando, request_id = self._em_andamento.pop(
+                (event.connection_id, event.request_id), (None, None)
+            )
+        if comando is None or duracao_ms < self._limite_ms:
+            return
+
+        resumo = _resumo_comando(event.command_name, comando)
+        logger.warning(
+            f"mongo_comando_lento comando={event.command_name} "
+            f"colecao={resumo.get('mongo_collection')} duracao_ms={duracao_ms:.1f}",
+            extra={
+                "event": "mongo_comando_lento",
+                "request_id": request_id,
+                "duration_ms": round(duracao_ms, 2),
+                "mongo_command": event.command_name,
+                "mongo_falhou": falhou,
+                **resumo,
+            },
+        )
+
+        if (
+            not falhou
+            and self._executar_explain is not None
+            and event.command_name in _COMANDOS_EXPLICAVEIS
+            and random.random() < self._amostra
+        ):
+            self._agendar_explain(event.database_name, event.command_name, comando, request_id, resumo)
+
+    def _agendar_explain(self, database: str, comando_nome: str, comando: dict, request_id, resumo: dict) -> None:
+        # Um explain por vez: com o anterior ainda rodando, este é descartado
+        if self._explain_ocupado.is_set():
+            return
+        self._explain_ocupado.set()
+
+        comando_limpo = {
+            chave: valor
+            for chave, valor in comando.items()
+            if not chave.startswith("$") and chave not in _CAMPOS_PROTOCOLO
+        }
+        self._explains.submit(self._explicar, database, comando_nome, comando_limpo, request_id, resumo)
+
+    def _explicar(self, database: str, comando_nome: str, comando: dict, request_id, resumo: dict) -> None:
+        inicio = time.perf_counter()
+        try:
+            resultado = self._executar_explain(database, comando)
+            logger.warning(
+                f"mongo_comando_lento_explain comando={comando_nome} "
+                f"colecao={resumo.get('mongo_collection')}",
+                extra={
+                    "event": "mongo_comando_lento_explain",
+                    "request_id": request_id,
+                    "mongo_command": comando_nome,
+                    "duration_ms": round((time.perf_counter() - inicio) * 1000, 2),
+                    **resumo,
+                    **_estatisticas_explain(resultado),
+                },
+            )
+        except Exception:
+            logger.exception(
+                "mongo_comando_lento_explain_erro",
+                extra={"event": "mongo_comando_lento_explain_erro", "request_id": request_id},
+            )
+        finally:
+            self._explain_ocupado.clear()
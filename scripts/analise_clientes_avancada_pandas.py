@@ -1,52 +1,79 @@
 """
-Análises avançadas de clientes usando Pandas em cima do MongoDB.
+Análises avançadas de clientes usando Pandas em cima dos relatórios
+materializados no MongoDB (ver src/relatorios_materializados.py).
 
-Este script reaproveita a função carregar_clientes_dataframe() do
-scripts.analise_clientes_pandas e produz:
+Em vez de carregar a coleção inteira de clientes em um DataFrame, lê as
+linhas já agregadas (cidades_status, faixa_etaria, dominios_email) e
+produz:
 
 - Visão geral de distribuição de status (contagem e %).
 - Tabela de status por estado (UF), com % de inativos.
 - Top 10 estados com maior % de inativos.
 - Top 20 cidades com maior número de clientes inativos.
-- Salva resultados em CSV na pasta 'backups'.
+- Top cidades por % de inativos (mínimo de clientes por cidade).
+- Distribuição por faixa etária e top 10 domínios de e-mail.
+- Salva resultados em CSV na pasta 'backups' (ou na pasta informada).
 """
 
-from pprint import pprint
+from pathlib import Path
+from typing import Dict, List, Optional
 
 import pandas as pd
 
-from scripts.analise_clientes_pandas import carregar_clientes_dataframe
+from src.relatorios_materializados import ler_ou_materializar
 
 
-def analise_avancada(df: pd.DataFrame) -> None:
-    # Normalizar valores nulos
-    df = df.copy()
-    df["status"] = df["status"].fillna("desconhecido")
-    df["estado"] = df["estado"].fillna("(sem estado)")
-    df["cidade"] = df["cidade"].fillna("(sem cidade)")
+RELATORIOS_USADOS = ("cidades_status", "faixa_etaria", "dominios_email")
+
+
+def carregar_relatorios_materializados() -> Dict[str, pd.DataFrame]:
+    """Um DataFrame por relatório materializado (materializa se faltar)."""
+    tabelas = {}
+    for nome in RELATORIOS_USADOS:
+        relatorio = ler_ou_materializar(nome)
+        print(f"Relatório {nome!r}: {len(relatorio.linhas)} linhas "
+              f"(calculado em {relatorio.metadados()['computed_at']})")
+        tabelas[nome] = pd.DataFrame(relatorio.linhas)
+    return tabelas
+
+
+def analise_avancada(
+    tabelas: Dict[str, pd.DataFrame],
+    destino: Optional[Path] = None,
+) -> List[Path]:
+    """Imprime as análises e grava os CSVs em `destino`; devolve os arquivos gerados."""
+    destino = Path(destino) if destino is not None else Path("backups")
+    destino.mkdir(parents=True, exist_ok=True)
+
+    # Linhas por estado + cidade, com ativo/inativo e total de clientes
+    df_cidades = tabelas["cidades_status"]
+    if df_cidades.empty:
+        print("✗ Nenhum cliente encontrado nos relatórios materializados.")
+        return []
+
+    df_cidades = df_cidades.copy()
+    # Status diferentes de ativo/inativo (ou ausente) ficam em "outros"
+    df_cidades["outros"] = df_cidades["clientes"] - df_cidades["ativo"] - df_cidades["inativo"]
 
     print("\n===== VISÃO GERAL (STATUS) =====")
-    status_counts = df["status"].value_counts(dropna=False)
-    status_percent = (df["status"].value_counts(normalize=True) * 100).round(2)
+    status_counts = df_cidades[["ativo", "inativo", "outros"]].sum()
+    status_counts = status_counts[status_counts > 0].sort_values(ascending=False)
+    status_percent = (status_counts / status_counts.sum() * 100).round(2)
 
     print("\nContagem por status:")
     print(status_counts)
     print("\nPercentual por status (%):")
     print(status_percent)
 
-        # ----- Status por estado (UF) -----
+    # ----- Status por estado (UF) -----
     print("\n===== STATUS POR ESTADO (UF) =====")
     tabela_estado_status = (
-            df.groupby(["estado", "status"])
-            .size()
-            .unstack(fill_value=0)
-            .sort_index()
-        
-        )
-
-    # Garante que a coluna 'inativo' exista (caso raro de não haver inativos em algum estado)
-    if "inativo" not in tabela_estado_status.columns:
-        tabela_estado_status["inativo"] = 0
+        df_cidades.groupby("estado")[["ativo", "inativo", "outros"]]
+        .sum()
+        .sort_index()
+    )
+    if not tabela_estado_status["outros"].any():
+        tabela_estado_status = tabela_estado_status.drop(columns="outros")
 
     tabela_estado_status["total"] = tabela_estado_status.sum(axis=1)
     tabela_estado_status["perc_inativos"] = (
@@ -65,37 +92,18 @@ def analise_avancada(df: pd.DataFrame) -> None:
     print(top_estados_inativos[["inativo", "total", "perc_inativos"]])
 
     print("\n===== TOP 20 CIDADES POR NÚMERO DE INATIVOS =====")
-    df_inativos = df[df["status"] == "inativo"].copy()
-
-  # Agrupa por ESTADO + CIDADE
     top_cidades_inativos = (
-    df_inativos
-    .groupby(["estado", "cidade"])
-    .size()
-    .reset_index(name="quantidade_inativos")
-    .sort_values(by="quantidade_inativos", ascending=False)
-    .head(20)
-    .reset_index(drop=True)   # índice 0..19 sem nome
-)
-
-    print(top_cidades_inativos)
-
-    print("\n===== TOP 20 CIDADES POR % DE INATIVOS (mín. 50 clientes) =====")
-
-    # Tabela com contagem de ativo/inativo por estado + cidade
-    tabela_cidade_status = (
-        df
-        .groupby(["estado", "cidade"])["status"]
-        .value_counts()
-        .unstack(fill_value=0)  # vira colunas 'ativo', 'inativo'
-        .reset_index()
+        df_cidades[df_cidades["inativo"] > 0]
+        .rename(columns={"inativo": "quantidade_inativos"})
+        .sort_values(by="quantidade_inativos", ascending=False)
+        .head(20)
+        .reset_index(drop=True)[["estado", "cidade", "quantidade_inativos"]]
     )
+    print(top_cidades_inativos)
 
-    # Garante que as colunas exista mesmo se não houver ninguém ativo/inativo em alguma cidade
-    for col in ["ativo", "inativo"]:
-        if col not in tabela_cidade_status.columns:
-            tabela_cidade_status[col] = 0
+    print("\n===== TOP 20 CIDADES POR % DE INATIVOS (mín. 20 clientes) =====")
 
+    tabela_cidade_status = df_cidades[["estado", "cidade", "ativo", "inativo"]].copy()
     tabela_cidade_status["total"] = (
         tabela_cidade_status["ativo"] + tabela_cidade_status["inativo"]
     )
@@ -114,7 +122,7 @@ def analise_avancada(df: pd.DataFrame) -> None:
         tabela_filtrada
         .sort_values(by="perc_inativos", ascending=False)
         .head(50)
-        .reset_index(drop=True)   # índice 0..19 sem nome
+        .reset_index(drop=True)
     )
 
     # Mostra só colunas relevantes na tela
@@ -124,16 +132,13 @@ def analise_avancada(df: pd.DataFrame) -> None:
         ]
     )
 
-    # Salva CSV
     top_cidades_perc_inativos.to_csv(
-        "backups/top_cidades_percentual_inativos_pandas.csv",
+        destino / "top_cidades_percentual_inativos_pandas.csv",
         index=False,
     )
 
-
-
     # ----- Salvar CSVs em backups/ -----
-    print("\nSalvando resultados em CSV na pasta 'backups'...")
+    print(f"\nSalvando resultados em CSV na pasta '{destino}'...")
 
     # 1) Status geral (contagem e percentuais)
     status_df = pd.DataFrame(
@@ -142,129 +147,80 @@ def analise_avancada(df: pd.DataFrame) -> None:
             "percentual": status_percent,
         }
     )
-    status_df.to_csv("backups/analise_status_geral_pandas.csv", index_label="status")
+    status_df.to_csv(destino / "analise_status_geral_pandas.csv", index_label="status")
 
     # 2) Status por estado (com total e % inativos)
     tabela_estado_status.to_csv(
-        "backups/analise_status_por_estado_pandas.csv",
+        destino / "analise_status_por_estado_pandas.csv",
         index_label="estado",
     )
 
     # 3) Top 10 estados com maior % de inativos
     top_estados_inativos.to_csv(
-        "backups/top_estados_percentual_inativos_pandas.csv",
+        destino / "top_estados_percentual_inativos_pandas.csv",
         index_label="estado",
     )
 
     # 4) Top 20 cidades com maior número de inativos
     top_cidades_inativos.to_csv(
-    "backups/top_cidades_inativos_pandas.csv",
-    index=False  # salva estado, cidade e quantidade_inativos como colunas normais
-)
-    
-        # Se não existe coluna 'idade', mas existe 'data_nascimento',
-    # calcula idade em anos a partir da data de nascimento.
-    if "idade" not in df.columns and "data_nascimento" in df.columns:
-        df = df.copy()
-        df["data_nascimento"] = pd.to_datetime(
-    df["data_nascimento"],
-    format="%Y-%m-%d",  # formato do nosso schema
-    errors="coerce",
-)
-
-
-        hoje = pd.Timestamp("today").normalize()
-        df["idade"] = ((hoje - df["data_nascimento"]).dt.days // 365)
-
-    
+        destino / "top_cidades_inativos_pandas.csv",
+        index=False,  # salva estado, cidade e quantidade_inativos como colunas normais
+    )
+
     print("\n===== DISTRIBUIÇÃO POR FAIXA ETÁRIA =====")
 
-    if "idade" not in df.columns:
-                    print("⚠ Campo 'idade' não encontrado no DataFrame; relatório por faixa etária ignorado.")
+    df_faixas = tabelas["faixa_etaria"]
+    if df_faixas.empty:
+        print("⚠ Nenhum cliente com data_nascimento válida; relatório por faixa etária ignorado.")
     else:
-                    df_idade = df.copy()
-
-                    # Garante que idade é numérico
-                    df_idade["idade"] = pd.to_numeric(df_idade["idade"], errors="coerce")
-                    df_idade = df_idade.dropna(subset=["idade"])
-                    df_idade = df_idade[df_idade["idade"] >= 0]
-
-                    # Define faixas etárias
-                    bins = [0, 18, 26, 36, 51, 66, 200]
-                    labels = ["0-17", "18-25", "26-35", "36-50", "51-65", "66+"]
-
-                    df_idade["faixa_etaria"] = pd.cut(
-                        df_idade["idade"],
-                        bins=bins,
-                        labels=labels,
-                        right=False,        # inclui o limite inferior, exclui o superior
-                        include_lowest=True,
-                    )
-
-                    # Agrupa por faixa etária
-                    tabela_faixa = (
-                        df_idade["faixa_etaria"]
-                        .value_counts()
-                        .sort_index()
-                        .rename_axis("faixa_etaria")
-                        .to_frame("quantidade")
-                    )
-
-                    total_clientes = tabela_faixa["quantidade"].sum()
-                    tabela_faixa["percentual"] = (
-                        tabela_faixa["quantidade"] / total_clientes * 100
-                    ).round(2)
-
-                    print(tabela_faixa)
-
-                    tabela_faixa.to_csv(
-                        "backups/analise_faixa_etaria_pandas.csv",
-                        index_label="faixa_etaria",
-                    )
+        tabela_faixa = (
+            df_faixas.set_index("faixa_etaria")[["quantidade"]]
+            .sort_index()
+        )
 
+        total_clientes = tabela_faixa["quantidade"].sum()
+        tabela_faixa["percentual"] = (
+            tabela_faixa["quantidade"] / total_clientes * 100
+        ).round(2)
 
-    print("\n===== TOP 10 DOMÍNIOS DE E-MAIL =====")
+        print(tabela_faixa)
 
-    # Extrai o domínio do e-mail: tudo depois do '@'
-    df_emails = df.copy()
-    df_emails["dominio_email"] = (
-        df_emails["email"]
-        .fillna("")
-        .str.strip()
-        .str.lower()
-        .str.split("@")
-        .str[-1]
-    )
+        tabela_faixa.to_csv(
+            destino / "analise_faixa_etaria_pandas.csv",
+            index_label="faixa_etaria",
+        )
 
-    # Considera apenas domínios que parecem válidos (contêm um ponto, ex: gmail.com)
-    df_emails_validos = df_emails[
-        df_emails["dominio_email"].str.contains(r"\.", regex=True)
-    ]
-
-    top_dominios_email = (
-        df_emails_validos["dominio_email"]
-        .value_counts()
-        .head(10)
-        .rename_axis("dominio")
-        .to_frame("quantidade")
-    )
+    print("\n===== TOP 10 DOMÍNIOS DE E-MAIL =====")
+
+    df_dominios = tabelas["dominios_email"]
+    if df_dominios.empty:
+        top_dominios_email = pd.DataFrame(columns=["quantidade"]).rename_axis("dominio")
+    else:
+        # Considera apenas domínios que parecem válidos (contêm um ponto, ex: gmail.com)
+        df_dominios_validos = df_dominios[
+            df_dominios["dominio"].str.contains(r"\.", regex=True)
+        ]
+        top_dominios_email = (
+            df_dominios_validos
+            .sort_values(by="quantidade", ascending=False)
+            .head(10)
+            .set_index("dominio")[["quantidade"]]
+        )
 
     print(top_dominios_email)
 
     top_dominios_email.to_csv(
-        "backups/top_dominios_email_pandas.csv",
+        destino / "top_dominios_email_pandas.csv",
         index_label="dominio",
     )
 
-
-
-
-    print("✅ Arquivos CSV gerados com sucesso em 'backups/'.")
+    print(f"✅ Arquivos CSV gerados com sucesso em '{destino}/'.")
+    return sorted(destino.glob("*_pandas.csv"))
 
 
 def main():
-    df = carregar_clientes_dataframe()
-    analise_avancada(df)
+    tabelas = carregar_relatorios_materializados()
+    analise_avancada(tabelas)
 
 
 if __name__ == "__main__":
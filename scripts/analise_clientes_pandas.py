@@ -15,50 +15,44 @@ from config import get_collection
 
 
 def carregar_clientes_dataframe() -> pd.DataFrame:
-    bundle = get_collection()
-    col = bundle.collection
-    client = bundle.client
-
-    try:
-        print("Buscando documentos da coleção 'clientes' (ignorando marcados para exclusão)...")
-        cursor = col.find(
-            {"marcado_para_exclusao": {"$ne": True}},
+    # Usa o client compartilhado do processo: não fechamos a conexão aqui
+    col = get_collection().collection
+
+    print("Buscando documentos da coleção 'clientes' (ignorando marcados para exclusão)...")
+    cursor = col.find(
+        {"marcado_para_exclusao": {"$ne": True}},
+        {
+            "_id": 0,
+            "cpf": 1,
+            "nome": 1,
+            "data_nascimento": 1,
+            "email": 1,
+            "telefone": 1,
+            "status": 1,
+            "endereco": 1,
+        },
+    )
+
+    rows = []
+    for doc in cursor:
+        endereco = doc.get("endereco") or {}
+        rows.append(
             {
-                "_id": 0,
-                "cpf": 1,
-                "nome": 1,
-                "data_nascimento": 1,
-                "email": 1,
-                "telefone": 1,
-                "status": 1,
-                "endereco": 1,
-            },
+                "cpf": doc.get("cpf"),
+                "nome": doc.get("nome"),
+                "data_nascimento": doc.get("data_nascimento"),
+                "email": doc.get("email"),
+                "telefone": doc.get("telefone"),
+                "status": doc.get("status"),
+                "cidade": endereco.get("cidade"),
+                "estado": endereco.get("estado"),
+                "cep": endereco.get("cep"),
+            }
         )
 
-        rows = []
-        for doc in cursor:
-            endereco = doc.get("endereco") or {}
-            rows.append(
-                {
-                    "cpf": doc.get("cpf"),
-                    "nome": doc.get("nome"),
-                    "data_nascimento": doc.get("data_nascimento"),
-                    "email": doc.get("email"),
-                    "telefone": doc.get("telefone"),
-                    "status": doc.get("status"),
-                    "cidade": endereco.get("cidade"),
-                    "estado": endereco.get("estado"),
-                    "cep": endereco.get("cep"),
-                }
-            )
-
-        df = pd.DataFrame(rows)
-        print(f"Total de clientes carregados no DataFrame: {len(df)}")
-        return df
-
-    finally:
-        client.close()
-        print("Conexão com o MongoDB fechada.")
+    df = pd.DataFrame(rows)
+    print(f"Total de clientes carregados no DataFrame: {len(df)}")
+    return df
 
 
 def analise_basica(df: pd.DataFrame) -> None:
@@ -0,0 +1,90 @@
+"""
+Preenche os campos normalizados (ver src/normalizacao.py) em documentos
+antigos, gravados antes de a API/CRUD passarem a mantê-los.
+
+Campos preenchidos:
+- nome_norm
+- endereco.cidade_norm
+
+Só documentos sem o campo (ou com valor desatualizado em relação ao
+campo original) são alterados. Os updates são enviados em lotes com bulk_write.
+
+Uso:
+
+    python -m scripts.backfill_campos_normalizados
+"""
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config import BULK_BATCH_SIZE, get_collection
+from src.normalizacao import carimbar_atualizacao, normalizar_texto
+
+
+PROJECAO = {
+    "nome": 1,
+    "nome_norm": 1,
+    "endereco.cidade": 1,
+    "endereco.cidade_norm": 1,
+}
+
+
+def _campos_pendentes(doc: dict) -> dict:
+    """Campos normalizados que faltam (ou estão desatualizados) no documento."""
+    pendentes = {}
+
+    nome_norm = normalizar_texto(doc.get("nome")) or None
+    if doc.get("nome_norm") != nome_norm:
+        pendentes["nome_norm"] = nome_norm
+
+    endereco = doc.get("endereco")
+    if isinstance(endereco, dict):
+        cidade_norm = normalizar_texto(endereco.get("cidade")) or None
+        if endereco.get("cidade_norm") != cidade_norm:
+            pendentes["endereco.cidade_norm"] = cidade_norm
+
+    return pendentes
+
+
+def _enviar_lote(col, operacoes: list) -> int:
+    try:
+        resultado = col.bulk_write(operacoes, ordered=False)
+        return resultado.modified_count
+    except BulkWriteError as e:
+        detalhes = e.details or {}
+        print(f"❌ Falha em {len(detalhes.get('writeErrors', []))} updates do lote.")
+        return detalhes.get("nModified", 0)
+
+
+def main():
+    col = get_collection().collection
+
+    print(f"Coleção: {col.name!r} (db={col.database.name!r})")
+    print("Preenchendo campos normalizados...\n")
+
+    analisados = 0
+    atualizados = 0
+    lote = []
+
+    for doc in col.find({}, PROJECAO, batch_size=BULK_BATCH_SIZE):
+        analisados += 1
+        pendentes = _campos_pendentes(doc)
+        if not pendentes:
+            continue
+
+        # atualizado_em: o backfill também precisa entrar nos backups incrementais
+        lote.append(UpdateOne({"_id": doc["_id"]}, {"$set": carimbar_atualizacao(pendentes)}))
+        if len(lote) >= BULK_BATCH_SIZE:
+            atualizados += _enviar_lote(col, lote)
+            lote = []
+
+    if lote:
+        atualizados += _enviar_lote(col, lote)
+
+    print("===== RESUMO DO BACKFILL DE CAMPOS NORMALIZADOS =====")
+    print(f"Documentos analisados: {analisados}")
+    print(f"✅ Documentos atualizados: {atualizados}")
+
+
+if __name__ == "__main__":
+    main()
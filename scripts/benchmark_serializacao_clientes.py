@@ -0,0 +1,113 @@
+"""
+Compara o custo de serializar uma página de GET /clientes nos dois
+caminhos, sem MongoDB (documentos sintéticos com o formato da coleção):
+
+- antigo: um ClienteOut por documento (_doc_to_cliente_out, revalidando
+  o e-mail) + validação/serialização pelo response_model
+  (List[ClienteOut]) + json.dumps do JSONResponse;
+- rápido: src/serializacao.py (dicionário direto do documento + JSON em
+  bytes, com orjson se instalado).
+
+Antes de medir, confere que os dois caminhos geram o mesmo JSON.
+
+Uso:
+
+    python -m scripts.benchmark_serializacao_clientes
+    python -m scripts.benchmark_serializacao_clientes --tamanho 200 --repeticoes 500
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.api import ClienteOut, _doc_to_cliente_out
+from src import serializacao
+
+
+def gerar_documentos(quantidade: int, semente: int = 42) -> List[dict]:
+    rng = random.Random(semente)
+    cidades = [("São Paulo", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"), ("Curitiba", "PR")]
+    docs = []
+    for i in range(quantidade):
+        cidade, estado = rng.choice(cidades)
+        docs.append(
+            {
+                "_id": ObjectId(),
+                "cpf": f"{rng.randrange(10**11):011d}",
+                "nome": f"Cliente Benchmark {i:05d}",
+                "nome_norm": f"cliente benchmark {i:05d}",
+                "email": f"cliente{i}@example.com",
+                "telefone": f"11{rng.randrange(10**9):09d}",
+                "status": rng.choice(["ativo", "inativo"]),
+                "data_nascimento": "1985-03-10",
+                "endereco": {
+                    "rua": "Rua das Flores",
+                    "numero": str(rng.randrange(1, 2000)),
+                    "bairro": "Centro",
+                    "cidade": cidade,
+                    "cidade_norm": cidade.lower(),
+                    "estado": estado,
+                    "cep": f"{rng.randrange(10**8):08d}",
+                },
+            }
+        )
+    return docs
+
+
+_adaptador_resposta = TypeAdapter(List[ClienteOut])
+
+
+def caminho_antigo(docs: List[dict]) -> bytes:
+    clientes = [_doc_to_cliente_out(doc) for doc in docs]
+    validados = _adaptador_resposta.validate_python(clientes, from_attributes=True)
+    conteudo = _adaptador_resposta.dump_python(validados, mode="json")
+    return JSONResponse(conteudo).body
+
+
+def caminho_rapido(docs: List[dict]) -> bytes:
+    return serializacao.resposta_json(serializacao.clientes_out(docs)).body
+
+
+def medir(funcao, docs: List[dict], repeticoes: int) -> float:
+    """Menor tempo médio por página (ms) entre 3 rodadas."""
+    melhores = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao(docs)
+        melhores.append((time.perf_counter() - inicio) / repeticoes * 1000)
+    return min(melhores)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanho", type=int, default=200, help="clientes por página (padrão: 200)")
+    parser.add_argument("--repeticoes", type=int, default=300, help="páginas por rodada (padrão: 300)")
+    args = parser.parse_args(argv)
+
+    docs = gerar_documentos(args.tamanho)
+
+    if json.loads(caminho_antigo(docs)) != json.loads(caminho_rapido(docs)):
+        print("✗ Os dois caminhos geraram JSON diferente")
+        return 1
+    print("✓ Mesmo JSON nos dois caminhos")
+
+    antigo_ms = medir(caminho_antigo, docs, args.repeticoes)
+    rapido_ms = medir(caminho_rapido, docs, args.repeticoes)
+
+    encoder = "orjson" if serializacao.orjson is not None else "json"
+    print(f"Página com {args.tamanho} clientes ({args.repeticoes} repetições, encoder {encoder}):")
+    print(f"  antigo (ClienteOut + response_model): {antigo_ms:8.3f} ms/página")
+    print(f"  rápido (src/serializacao.py):         {rapido_ms:8.3f} ms/página")
+    print(f"  ganho: {antigo_ms / rapido_ms:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -22,7 +22,7 @@ def explain_listar_clientes():
 
         cursor = (
             col.find(filtro)
-            .sort("nome", 1)
+            .sort([("nome", 1), ("_id", 1)])
             .limit(20)
         )
 
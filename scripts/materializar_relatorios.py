@@ -0,0 +1,36 @@
+"""
+Materializa os relatórios de clientes na coleção relatorios_materializados
+(pipelines com $merge, ver src/relatorios_materializados.py).
+
+Útil para rodar via cron quando a API sobe com
+RELATORIOS_MATERIALIZAR_INTERVALO_SEGUNDOS=0.
+
+Uso:
+
+    python -m scripts.materializar_relatorios              # todos
+    python -m scripts.materializar_relatorios faixa_etaria # só os informados
+"""
+
+import sys
+
+from src.relatorios_materializados import RELATORIOS, materializar
+
+
+def main(argv=None):
+    nomes = list(argv if argv is not None else sys.argv[1:]) or None
+
+    desconhecidos = [nome for nome in nomes or [] if nome not in RELATORIOS]
+    if desconhecidos:
+        print(f"✗ Relatório(s) desconhecido(s): {', '.join(desconhecidos)}")
+        print(f"  Opções: {', '.join(RELATORIOS)}")
+        sys.exit(1)
+
+    for execucao in materializar(nomes):
+        print(
+            f"✓ {execucao['relatorio']}: {execucao['linhas']} linhas "
+            f"em {execucao['duracao_ms']:.0f} ms (computed_at={execucao['computed_at']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ import re
 from pprint import pprint
 from pymongo.errors import WriteError
 from config import get_collection
+from src.normalizacao import carimbar_atualizacao
 
 # 🔒 Começamos SEM alterar nada. Mude para True quando estiver seguro.
 APLICAR_ALTERACOES = False
@@ -84,7 +85,7 @@ def main():
             try:
                 res = col.update_one(
                     {"_id": doc["_id"]},
-                    {"$set": {"cpf": novo_cpf}},
+                    {"$set": carimbar_atualizacao({"cpf": novo_cpf})},
                 )
                 if res.modified_count == 1:
                     atualizados += 1
@@ -12,6 +12,7 @@ import random
 from pymongo import UpdateOne
 
 from config import get_collection
+from src.normalizacao import carimbar_atualizacao
 
 
 APLICAR_ALTERACOES = True  # mude para True depois de revisar o dry run
@@ -92,7 +93,7 @@ def main() -> None:
             operacoes.append(
                 UpdateOne(
                     {"_id": doc["_id"]},
-                    {"$set": {"data_nascimento": nova_data}},
+                    {"$set": carimbar_atualizacao({"data_nascimento": nova_data})},
                 )
             )
 
@@ -0,0 +1,50 @@
+"""
+Recalcula os contadores incrementais de clientes (coleção contadores, ver
+src/contadores.py) a partir da coleção de clientes e corrige as
+divergências.
+
+Rode uma vez depois de implantar os contadores (até lá a API e os
+relatórios continuam contando a coleção) e periodicamente via cron para
+corrigir diferenças de escritas interrompidas ou feitas por fora da API.
+
+Uso:
+
+    python -m scripts.reconciliar_contadores            # corrige
+    python -m scripts.reconciliar_contadores --dry-run  # só mostra
+"""
+
+import argparse
+
+from src.contadores import reconciliar
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="apenas lista as divergências, sem gravar",
+    )
+    args = parser.parse_args(argv)
+
+    resultado = reconciliar(aplicar=not args.dry_run)
+
+    divergencias = resultado["divergencias"]
+    print(f"✓ {resultado['contadores']} contadores recalculados")
+    if not divergencias:
+        print("✓ Nenhuma divergência encontrada")
+        return
+
+    for item in divergencias:
+        print(
+            f"✗ {item['contador']}: gravado={item['gravado']['total']} "
+            f"esperado={item['esperado']['total']} ({item['diferenca_total']:+d})"
+        )
+    if resultado["aplicado"]:
+        print(f"✓ {len(divergencias)} contador(es) corrigido(s)")
+    else:
+        print(f"⚠ {len(divergencias)} divergência(s) (dry-run, nada gravado)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Reconstrói um backup completo a partir de um backup completo e da cadeia
+de incrementais que termina no backup informado (ver src/motor_backup.py).
+
+O resultado é um backup completo novo (mesmo formato de manifesto), com a
+versão mais recente de cada documento, pronto para verificar/restaurar.
+
+Uso:
+
+    python -m scripts.reconstruir_backup backups/backup_clientes_20250107_020000_inc
+    python -m scripts.reconstruir_backup backups/backup_clientes_20250107_020000_inc \\
+        --ate 2025-01-05T03:00:00+00:00 --destino /tmp/reconstrucao
+"""
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from src.motor_backup import (
+    BackupInvalidoError,
+    cadeia_backups,
+    reconstruir_backup,
+    verificar_backup_streaming,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("backup", type=Path, help="último backup da cadeia (diretório ou manifesto.json)")
+    parser.add_argument(
+        "--ate",
+        type=datetime.fromisoformat,
+        default=None,
+        help="usar só backups com marca d'água até este instante (ISO 8601; sem fuso = UTC)",
+    )
+    parser.add_argument("--destino", type=Path, default=None, help="onde criar o backup reconstruído")
+    args = parser.parse_args(argv)
+
+    try:
+        cadeia = cadeia_backups(args.backup)
+        print(f"✓ Cadeia com {len(cadeia)} backup(s):")
+        for diretorio, manifesto in cadeia:
+            print(
+                f"   {manifesto['tipo']:<11} {diretorio.name} "
+                f"marca_dagua={manifesto['marca_dagua']} documentos={manifesto['total_documentos']:,}"
+            )
+
+        manifesto_novo = reconstruir_backup(args.backup, destino=args.destino, ate=args.ate)
+    except BackupInvalidoError as e:
+        print(f"✗ {e}")
+        return 1
+
+    resultado = verificar_backup_streaming(manifesto_novo)
+    if not resultado["ok"]:
+        for erro in resultado["erros"]:
+            print(f"✗ {erro}")
+        return 1
+
+    print(f"✓ Backup reconstruído: {manifesto_novo}")
+    print(f"✓ {resultado['documentos']:,} documentos em {resultado['chunks']} chunk(s), verificado")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
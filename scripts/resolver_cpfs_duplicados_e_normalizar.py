@@ -22,6 +22,7 @@ Recomendações ANTES de rodar:
 import re
 from pprint import pprint
 from config import get_collection
+from src.normalizacao import carimbar_atualizacao
 
 
 def normalizar_cpf(cpf_str: str) -> str:
@@ -114,7 +115,7 @@ def main():
             if cpf_principal_atual != cpf_norm:
                 res_up = col.update_one(
                     {"_id": principal["_id"]},
-                    {"$set": {"cpf": cpf_norm}},
+                    {"$set": carimbar_atualizacao({"cpf": cpf_norm})},
                 )
                 if res_up.modified_count == 1:
                     atualizados_total += 1
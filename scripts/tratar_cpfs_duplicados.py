@@ -17,6 +17,7 @@ from pprint import pprint
 from bson.objectid import ObjectId
 from pymongo.errors import WriteError
 from config import get_collection
+from src.normalizacao import carimbar_atualizacao
 
 DRY_RUN = False  # ✅ agora APLICA as alterações
 
@@ -135,11 +136,13 @@ def main():
                     res = col.update_one(
                         {"_id": d["_id"]},
                         {
-                            "$set": {
-                                "status": "inativo",
-                                "marcado_para_exclusao": True,
-                                "cpf_principal_id": principal_id,
-                            }
+                            "$set": carimbar_atualizacao(
+                                {
+                                    "status": "inativo",
+                                    "marcado_para_exclusao": True,
+                                    "cpf_principal_id": principal_id,
+                                }
+                            )
                         },
                     )
                     if res.modified_count == 1:
@@ -1,27 +1,83 @@
-from typing import List, Optional
+import csv
+import io
+import json
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
 from pymongo.collection import ReturnDocument
-import pandas as pd
-from datetime import date
-from scripts.analise_clientes_pandas import carregar_clientes_dataframe
-from fastapi import FastAPI, HTTPException, Response, Query, Request
-from pydantic import BaseModel, EmailStr, Field
-from pymongo.errors import DuplicateKeyError
+from fastapi import Body, FastAPI, HTTPException, Response, Query, Request
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi import status
 from fastapi import FastAPI
 from fastapi.encoders import jsonable_encoder
 from fastapi.requests import Request
 from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
-
-
-from config import get_collection
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+
+from config import (
+    BULK_BATCH_SIZE,
+    BULK_MAX_BYTES,
+    BULK_MAX_ITENS,
+    BUSCA_CACHE_TAMANHO,
+    BUSCA_CACHE_TTL_SEGUNDOS,
+    CACHE_CPF_CHANGE_STREAM,
+    COALESCER_CPF_ATIVO,
+    COALESCER_JANELA_MS,
+    COALESCER_MAX_CHAVES,
+    EXPORT_BATCH_SIZE,
+    RELATORIOS_RESULTADO_TTL_SEGUNDOS,
+    SNAPSHOT_ATUALIZAR_EM_ESCRITA,
+    close_mongo_clients,
+    get_collection,
+)
 from logging_config import get_logger
+import metricas
+import monitoramento_mongo
+from src.executor_relatorios import FilaCheiaError, TempoEsgotadoError, executor_relatorios
+from src.jobs import (
+    RELATORIOS_JOBS,
+    STATUS_CONCLUIDO,
+    Progresso,
+    RelatorioJob,
+    gerenciador_jobs,
+    registrar_relatorio,
+)
+from src.relatorios_calculos import RelatorioVazioError
+from src.relatorios_materializados import (
+    RELATORIOS as RELATORIOS_MATERIALIZADOS,
+    agendador_materializacao,
+    materializar,
+)
+from src.serializacao import PROJECAO_CLIENTE_OUT, clientes_out, resposta_json
+from src.single_flight import SingleFlight
+from src.snapshot_clientes import gerenciador_snapshot
+from src.cache import CacheLRU
+from src import contadores
+from src import cache_clientes
+from src.coalescencia import CoalescedorBuscas, CoalescedorParadoError
+from src.normalizacao import (
+    adicionar_campos_normalizados,
+    carimbar_atualizacao,
+    filtro_prefixo,
+    normalizar_texto,
+)
+from src.paginacao import (
+    ORDENACAO_KEYSET,
+    CursorInvalidoError,
+    codificar_cursor,
+    decodificar_cursor,
+    filtro_apos_cursor,
+)
 
 
-# Obter conexão com MongoDB (um único client para toda a API)
+# Obter conexão com MongoDB (client compartilhado do processo, ver config.py)
 _bundle = get_collection()
 _client = _bundle.client
 _db = _bundle.db
@@ -74,6 +130,41 @@ class ClienteOut(ClienteBase):
     cpf: str
 
 
+class ClienteResumo(BaseModel):
+    """Dados mínimos de um cliente para listas de sugestão (autocomplete)."""
+
+    cpf: str
+    nome: str
+    cidade: Optional[str] = None
+    estado: Optional[str] = None
+    status: Optional[str] = None
+
+
+# Máximo de CPFs por chamada de POST /clientes/lookup
+_LOOKUP_MAX_CPFS = 1000
+
+
+class LookupCpfs(BaseModel):
+    cpfs: List[str] = Field(..., min_length=1, max_length=_LOOKUP_MAX_CPFS)
+
+
+class LookupResultado(BaseModel):
+    encontrados: List[ClienteOut]
+    nao_encontrados: List[str]
+
+
+class ParametrosExportJob(BaseModel):
+    """Parâmetros do job export_clientes (mesmos filtros de GET /clientes/export)."""
+
+    model_config = {"extra": "forbid"}
+
+    formato: str = Field("csv", pattern="^(ndjson|csv)$")
+    status: Optional[str] = Field(None, pattern="^(ativo|inativo)$")
+    estado: Optional[str] = Field(None, min_length=2, max_length=2)
+    cidade: Optional[str] = None
+    cidade_exata: bool = False
+
+
 def _doc_to_cliente_out(doc) -> ClienteOut:
     return ClienteOut(
         id=str(doc.get("_id")),
@@ -86,13 +177,79 @@ def _doc_to_cliente_out(doc) -> ClienteOut:
     )
 
 
+def _cliente_create_to_doc(cliente: ClienteCreate) -> dict:
+    """Converte o payload validado no documento gravado no MongoDB."""
+    data = cliente.model_dump()
+    # endereço vem como Endereco → convertemos para dict bruto
+    data["endereco"] = cliente.endereco.model_dump()
+    return carimbar_atualizacao(adicionar_campos_normalizados(data))
+
+
+# Prefixos mais buscados em GET /clientes/busca (limpo a cada escrita)
+_cache_busca_nome = CacheLRU(
+    tamanho_maximo=BUSCA_CACHE_TAMANHO,
+    ttl_segundos=BUSCA_CACHE_TTL_SEGUNDOS,
+)
+
+
+# Pedidos idênticos e simultâneos de /relatorios compartilham um cálculo
+_single_flight_relatorios = SingleFlight(ttl_segundos=RELATORIOS_RESULTADO_TTL_SEGUNDOS)
+
+
+def _apos_escrita(cpfs: Iterable[str] = ()) -> None:
+    """Avisa os componentes que dependem dos dados que houve escrita."""
+    cache_clientes.invalidar_cpf(*cpfs)
+    _cache_busca_nome.limpar()
+    _single_flight_relatorios.invalidar()
+    if SNAPSHOT_ATUALIZAR_EM_ESCRITA:
+        if not executor_relatorios.usa_processos:
+            gerenciador_snapshot.marcar_desatualizado()
+        executor_relatorios.marcar_escrita()
+
+
+def _buscar_lote_por_cpf(cpfs: List[str]) -> dict:
+    """Resolve um lote de GET /clientes/{cpf} com um único $in em cpf_1."""
+    return {doc["cpf"]: doc for doc in _collection.find({"cpf": {"$in": cpfs}})}
+
+
+# Só é usado quando COALESCER_CPF_ATIVO=true (thread iniciada no lifespan)
+_coalescedor_cpf = CoalescedorBuscas(
+    _buscar_lote_por_cpf,
+    janela_ms=COALESCER_JANELA_MS,
+    max_chaves=COALESCER_MAX_CHAVES,
+    nome="coalescedor-cpf",
+)
+
+# Tempo máximo que uma requisição espera pelo seu lote
+_COALESCER_TIMEOUT_SEGUNDOS = 10
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # STARTUP (se no futuro precisar)
+    # STARTUP: snapshot dos relatórios passa a ser recarregado em segundo plano
+    # (só quando os relatórios rodam neste processo; no pool, cada processo
+    # mantém o seu)
+    if not executor_relatorios.usa_processos:
+        gerenciador_snapshot.iniciar()
+    # Relatórios materializados recalculados periodicamente (0 = desligado)
+    agendador_materializacao.iniciar()
+    # Processos que calculam os relatórios de /relatorios
+    executor_relatorios.iniciar()
+    # Jobs de relatórios demorados (recupera os interrompidos)
+    gerenciador_jobs.iniciar()
+    if COALESCER_CPF_ATIVO:
+        _coalescedor_cpf.iniciar()
+    if CACHE_CPF_CHANGE_STREAM:
+        cache_clientes.ouvinte_alteracoes.iniciar(_collection)
     yield
-    # SHUTDOWN (equivalente ao on_event("shutdown"))
-    if hasattr(app.state, "mongo_client"):
-        app.state.mongo_client.close()
+    cache_clientes.ouvinte_alteracoes.parar()
+    agendador_materializacao.parar()
+    _coalescedor_cpf.parar()
+    gerenciador_jobs.parar()
+    executor_relatorios.parar()
+    gerenciador_snapshot.parar()
+    # SHUTDOWN (equivalente ao on_event("shutdown")): único ponto que fecha o pool
+    close_mongo_clients()
 
 
 app = FastAPI(
@@ -117,28 +274,52 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """
-    Middleware para logar todas as requisições HTTP em formato estruturado.
+    Middleware para logar todas as requisições HTTP em formato estruturado
+    e alimentar as métricas de GET /metrics.
+
+    As métricas usam o template da rota (ex.: /clientes/{cpf}), não o
+    caminho, para que CPFs e ids não virem séries novas.
+
+    Cada requisição ganha um request_id (o do header X-Request-ID, se
+    vier, ou um novo), devolvido no mesmo header. Os comandos do MongoDB
+    feitos durante a requisição são somados a ele (monitoramento_mongo.py)
+    e o log de acesso sai com mongo_ms e mongo_comandos.
     """
     import time
 
     start = time.perf_counter()
     response = None
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = monitoramento_mongo.iniciar_requisicao(request_id)
+    metricas.http_em_andamento.inc(method=request.method)
     try:
         response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
         return response
     finally:
-        duration_ms = (time.perf_counter() - start) * 1000
+        duracao = time.perf_counter() - start
+        duration_ms = duracao * 1000
         status_code = getattr(response, "status_code", None)
+        campos_mongo = monitoramento_mongo.encerrar_requisicao(token)
+
+        metricas.http_em_andamento.dec(method=request.method)
+        rota = getattr(request.scope.get("route"), "path", None) or "sem_rota"
+        metricas.http_requisicoes.inc(
+            method=request.method, route=rota, status_code=status_code or 500
+        )
+        metricas.http_duracao.observe(duracao, method=request.method, route=rota)
 
         logger.info(
             "HTTP request",
             extra={
                 "event": "http_request",
+                "request_id": request_id,
                 "method": request.method,
                 "path": request.url.path,
                 "status_code": status_code,
                 "client_ip": request.client.host if request.client else None,
                 "duration_ms": round(duration_ms, 2),
+                **campos_mongo,
             },
         )
 
@@ -150,8 +331,11 @@ def health_check():
         # Verifica se o MongoDB está respondendo
         _db.command("ping")
 
-        # Conta clientes não marcados para exclusão (ajuste se o seu filtro for outro)
-        total = _collection.count_documents({"marcado_para_exclusao": {"$ne": True}})
+        # Clientes não marcados para exclusão: lê o contador global (O(1));
+        # sem contadores ainda, conta na coleção
+        total = contadores.total_clientes(colecao_clientes=_collection)
+        if total is None:
+            total = _collection.count_documents({"marcado_para_exclusao": {"$ne": True}})
 
         # Log de sucesso estruturado
         logger.info(
@@ -181,10 +365,274 @@ def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics", include_in_schema=False)
+def expor_metricas():
+    """Métricas HTTP e do MongoDB no formato texto do Prometheus."""
+    return Response(content=metricas.registro.expor(), media_type=metricas.CONTENT_TYPE)
+
+
+@app.get("/diagnostico/cache-cpf")
+def diagnostico_cache_cpf():
+    """Tamanho e taxa de acerto do cache de clientes por CPF."""
+    return cache_clientes.estatisticas()
+
+
+@app.get("/diagnostico/coalescencia")
+def diagnostico_coalescencia():
+    """Contadores da coalescência de GET /clientes/{cpf} (tamanho de lote e espera)."""
+    return {"ativo": COALESCER_CPF_ATIVO, **_coalescedor_cpf.estatisticas()}
+
+
+@app.get("/diagnostico/relatorios")
+def diagnostico_relatorios():
+    """Fila do executor de relatórios, contadores por relatório e single-flight."""
+    return {
+        **executor_relatorios.estatisticas(),
+        "single_flight": _single_flight_relatorios.estatisticas(),
+    }
+
+
+# Projeção usada na exportação: só o que vai para o arquivo
+_PROJECAO_EXPORT = {
+    "_id": 1,
+    "cpf": 1,
+    "nome": 1,
+    "email": 1,
+    "telefone": 1,
+    "status": 1,
+    "data_nascimento": 1,
+    "data_cadastro": 1,
+    "endereco": 1,
+}
+
+_CAMPOS_ENDERECO_EXPORT = ["rua", "numero", "complemento", "bairro", "cidade", "estado", "cep"]
+
+_COLUNAS_CSV_EXPORT = [
+    "id",
+    "cpf",
+    "nome",
+    "email",
+    "telefone",
+    "status",
+    "data_nascimento",
+    "data_cadastro",
+    *_CAMPOS_ENDERECO_EXPORT,
+]
+
+# Quantas linhas acumular antes de enviar um pedaço da resposta
+_LINHAS_POR_CHUNK_EXPORT = 500
+
+
+def _doc_para_export(doc: dict) -> dict:
+    """Converte o documento do Mongo no registro exportado (sem tipos BSON)."""
+    endereco = doc.get("endereco") or {}
+    data_cadastro = doc.get("data_cadastro")
+    return {
+        "id": str(doc["_id"]),
+        "cpf": doc.get("cpf"),
+        "nome": doc.get("nome"),
+        "email": doc.get("email"),
+        "telefone": doc.get("telefone"),
+        "status": doc.get("status", "ativo"),
+        "data_nascimento": doc.get("data_nascimento"),
+        "data_cadastro": data_cadastro.isoformat()
+        if hasattr(data_cadastro, "isoformat")
+        else data_cadastro,
+        "endereco": {campo: endereco.get(campo) for campo in _CAMPOS_ENDERECO_EXPORT},
+    }
+
+
+def _gerar_export(filtro: dict, formato: str) -> Iterator[bytes]:
+    """
+    Gera o arquivo de exportação em pedaços, a partir de um cursor do servidor.
+
+    Só um batch do cursor e um pedaço de saída ficam em memória por vez,
+    então o consumo não cresce com o tamanho da coleção.
+    """
+    cursor = _collection.find(filtro, _PROJECAO_EXPORT, batch_size=EXPORT_BATCH_SIZE)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";") if formato == "csv" else None
+
+    def esvaziar() -> bytes:
+        dados = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return dados
+
+    try:
+        if writer is not None:
+            writer.writerow(_COLUNAS_CSV_EXPORT)
+            # Cabeçalho sai imediatamente, antes do primeiro batch do Mongo
+            yield esvaziar()
+
+        linhas = 0
+        for doc in cursor:
+            registro = _doc_para_export(doc)
+            if writer is not None:
+                endereco = registro.pop("endereco")
+                writer.writerow(
+                    [*registro.values(), *(endereco[c] for c in _CAMPOS_ENDERECO_EXPORT)]
+                )
+            else:
+                buffer.write(json.dumps(registro, ensure_ascii=False))
+                buffer.write("\n")
+
+            linhas += 1
+            if linhas == 1 or linhas % _LINHAS_POR_CHUNK_EXPORT == 0:
+                yield esvaziar()
+
+        resto = esvaziar()
+        if resto:
+            yield resto
+
+        logger.info(
+            f"cliente_export_success formato={formato} total={linhas}",
+            extra={"event": "cliente_export_success"},
+        )
+    finally:
+        cursor.close()
+
+
+# Rotas fixas em /clientes/... precisam vir antes de /clientes/{cpf}
+@app.get("/clientes/export")
+def exportar_clientes(
+    formato: str = Query(
+        "ndjson",
+        alias="format",
+        pattern="^(ndjson|csv)$",
+        description="Formato do arquivo: ndjson (um JSON por linha) ou csv.",
+    ),
+    status: Optional[str] = Query(
+        None,
+        pattern="^(ativo|inativo)$",
+        description="Filtrar por status do cliente (ativo ou inativo).",
+    ),
+    estado: Optional[str] = Query(
+        None,
+        min_length=2,
+        max_length=2,
+        description="Filtrar por estado (UF), ex: SP, RJ.",
+    ),
+    cidade: Optional[str] = Query(
+        None,
+        description="Filtrar por cidade (início do nome; ignora maiúsculas e acentos).",
+    ),
+    cidade_exata: bool = Query(
+        False,
+        description="Se true, a cidade precisa ser igual (ignorando maiúsculas e acentos).",
+    ),
+):
+    """
+    Exporta os clientes (mesmos filtros de GET /clientes) em streaming,
+    direto de um cursor do MongoDB, sem montar a coleção em memória.
+    """
+    filtro = _montar_filtro_listagem(status, estado, cidade, cidade_exata)
+
+    if formato == "csv":
+        media_type = "text/csv; charset=utf-8"
+    else:
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        _gerar_export(filtro, formato),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="clientes_export.{formato}"'
+        },
+    )
+
+
+_PROJECAO_BUSCA = {
+    "_id": 0,
+    "cpf": 1,
+    "nome": 1,
+    "status": 1,
+    "endereco.cidade": 1,
+    "endereco.estado": 1,
+}
+
+
+@app.get("/clientes/busca", response_model=List[ClienteResumo])
+def buscar_clientes_por_nome(
+    response: Response,
+    nome: str = Query(
+        ...,
+        min_length=1,
+        description="Início do nome (ignora maiúsculas e acentos).",
+    ),
+    limit: int = Query(
+        10,
+        ge=1,
+        le=50,
+        description="Quantidade máxima de sugestões.",
+    ),
+):
+    """
+    Busca por prefixo do nome, para autocomplete.
+
+    Consulta nome_norm com prefixo ancorado (seek no índice nome_norm_1),
+    já na ordem do índice, trazendo só os campos do resumo. Os prefixos
+    mais buscados ficam em um cache LRU curto, limpo a cada escrita.
+    """
+    prefixo = normalizar_texto(nome)
+    if not prefixo:
+        raise HTTPException(status_code=400, detail="Parâmetro nome vazio.")
+
+    chave = (prefixo, limit)
+    itens = _cache_busca_nome.obter(chave)
+    if itens is not None:
+        response.headers["X-Cache"] = "HIT"
+        return itens
+
+    filtro = {
+        "nome_norm": filtro_prefixo(prefixo),
+        "marcado_para_exclusao": {"$ne": True},
+    }
+    cursor = (
+        _collection.find(filtro, _PROJECAO_BUSCA)
+        .sort("nome_norm", 1)
+        .limit(limit)
+    )
+    itens = []
+    for doc in cursor:
+        endereco = doc.get("endereco") or {}
+        itens.append(
+            {
+                "cpf": doc["cpf"],
+                "nome": doc["nome"],
+                "cidade": endereco.get("cidade"),
+                "estado": endereco.get("estado"),
+                "status": doc.get("status"),
+            }
+        )
+
+    _cache_busca_nome.guardar(chave, itens)
+    response.headers["X-Cache"] = "MISS"
+    return itens
+
+
+def _buscar_doc_por_cpf(cpf: str) -> Optional[dict]:
+    """
+    Busca no MongoDB, via coalescedor quando ele estiver ligado. Com o
+    coalescedor encerrando (shutdown) ou o lote atrasado, busca direto.
+    """
+    if _coalescedor_cpf.em_execucao:
+        try:
+            return _coalescedor_cpf.buscar(cpf, timeout=_COALESCER_TIMEOUT_SEGUNDOS)
+        except CoalescedorParadoError:
+            pass
+        except FuturesTimeoutError:
+            logger.warning(
+                f"coalescencia_timeout cpf={cpf} timeout_s={_COALESCER_TIMEOUT_SEGUNDOS}",
+                extra={"event": "coalescencia_timeout"},
+            )
+    return _collection.find_one({"cpf": cpf})
+
+
 @app.get("/clientes/{cpf}", response_model=ClienteOut)
 def obter_cliente_por_cpf(cpf: str):
-    """Obtém um cliente pelo CPF."""
-    doc = _collection.find_one({"cpf": cpf})
+    """Obtém um cliente pelo CPF (cache read-through na frente do MongoDB)."""
+    doc = cache_clientes.obter_por_cpf(cpf, _buscar_doc_por_cpf)
 
     if not doc:
         # Log estruturado quando não encontra o cliente
@@ -205,6 +653,33 @@ def obter_cliente_por_cpf(cpf: str):
     return _doc_to_cliente_out(doc)
 
 
+def _montar_filtro_listagem(
+    status: Optional[str],
+    estado: Optional[str],
+    cidade: Optional[str],
+    cidade_exata: bool = False,
+) -> dict:
+    """Monta o filtro de GET /clientes a partir dos parâmetros de query."""
+    # Filtro base: ignorar clientes marcados para exclusão (se esse campo existir)
+    filtro: dict = {"marcado_para_exclusao": {"$ne": True}}
+
+    if status:
+        filtro["status"] = status
+
+    if estado:
+        filtro["endereco.estado"] = estado.strip().upper()
+
+    if cidade:
+        # Busca no campo normalizado (sem acento/minúsculo): igualdade ou
+        # prefixo ancorado, ambos resolvidos com seek no índice
+        if cidade_exata:
+            filtro["endereco.cidade_norm"] = normalizar_texto(cidade)
+        else:
+            filtro["endereco.cidade_norm"] = filtro_prefixo(cidade)
+
+    return filtro
+
+
 @app.get("/clientes", response_model=List[ClienteOut])
 def listar_clientes(
     status: Optional[str] = Query(
@@ -220,7 +695,11 @@ def listar_clientes(
     ),
     cidade: Optional[str] = Query(
         None,
-        description="Filtrar por cidade (nome completo ou parcial).",
+        description="Filtrar por cidade (início do nome; ignora maiúsculas e acentos).",
+    ),
+    cidade_exata: bool = Query(
+        False,
+        description="Se true, a cidade precisa ser igual (ignorando maiúsculas e acentos).",
     ),
     limit: int = Query(
         50,
@@ -231,221 +710,124 @@ def listar_clientes(
     offset: int = Query(
         0,
         ge=0,
-        description="Quantidade de clientes a pular (para paginação).",
+        description="Quantidade de clientes a pular (para paginação). "
+        "Prefira 'cursor' para páginas profundas.",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor opaco devolvido no header X-Next-Cursor da página "
+        "anterior. Continua a listagem logo após o último cliente entregue.",
     ),
 ):
-    # Filtro base: ignorar clientes marcados para exclusão (se esse campo existir)
-    filtro: dict = {"marcado_para_exclusao": {"$ne": True}}
-
-    if status:
-        filtro["status"] = status
-
-    if estado:
-        filtro["endereco.estado"] = estado.strip().upper()
+    filtro = _montar_filtro_listagem(status, estado, cidade, cidade_exata)
 
-    if cidade:
-        filtro["endereco.cidade"] = {
-            "$regex": cidade.strip(),
-            "$options": "i",  # case-insensitive
-        }
-
-    cursor = (
-        _collection.find(filtro)
-        .sort("nome", 1)  # ordena por nome ascendente
-        .skip(offset)  # paginação: pula 'offset' registros
-        .limit(limit)  # pega no máximo 'limit' registros
-    )
-
-    # Aproveitar o helper que você já tem (_doc_to_cliente_out)
-    clientes: List[ClienteOut] = [_doc_to_cliente_out(doc) for doc in cursor]
-
-    return clientes
-
-
-@app.get("/relatorios/faixa-etaria")
-def relatorio_faixa_etaria():
-    """
-    Retorna a distribuição de clientes por faixa etária,
-    usando a coluna data_nascimento dos clientes do MongoDB.
-    """
-    df = carregar_clientes_dataframe()
-
-    # Garante que data_nascimento é datetime do Pandas
-    df["data_nascimento"] = pd.to_datetime(df["data_nascimento"], errors="coerce")
-
-    # Remove linhas sem data_nascimento válida (NaT)
-    df = df.dropna(subset=["data_nascimento"])
-
-    # Usa um Timestamp do Pandas como "hoje"
-    hoje = pd.Timestamp(date.today())
-
-    # Calcula idade em anos (aprox.)
-    df["idade"] = ((hoje - df["data_nascimento"]).dt.days / 365.25).astype("float")
-
-    # Mantém só quem tem idade válida (não nula, não NaN)
-    df_validos = df[df["idade"].notna()]
-
-    if df_validos.empty:
-        return {
-            "mensagem": "Nenhum cliente com data_nascimento válida.",
-            "total_clientes": 0,
-            "faixas": [],
-        }
-
-    # Define as faixas etárias (mesma ideia dos relatórios em Pandas)
-    bins = [0, 18, 26, 36, 51, 66, 200]
-    labels = ["0-17", "18-25", "26-35", "36-50", "51-65", "66+"]
-
-    df_validos["faixa_etaria"] = pd.cut(
-        df_validos["idade"],
-        bins=bins,
-        labels=labels,
-        right=False,
-    )
-
-    @app.get("/relatorios/cidades-mais-inativos")
-    def relatorio_cidades_mais_inativos(limite: int = 10):
-        """
-        Retorna as top N cidades com maior número de clientes inativos,
-        usando os dados carregados do MongoDB via Pandas.
-        """
-        # Limite de segurança para não devolver uma lista gigante
-        if limite <= 0 or limite > 100:
+    if cursor:
+        if offset:
             raise HTTPException(
                 status_code=400,
-                detail="Parâmetro 'limite' deve estar entre 1 e 100.",
-            )
-
-        # Carrega todos os clientes (ignorando marcados para exclusão)
-        df = carregar_clientes_dataframe()
-
-        if "status" not in df.columns:
-            raise HTTPException(
-                status_code=500,
-                detail="DataFrame não possui coluna 'status'.",
+                detail="Use 'cursor' ou 'offset' para paginar, não os dois.",
             )
+        try:
+            nome_cursor, id_cursor = decodificar_cursor(cursor)
+        except CursorInvalidoError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        filtro = {"$and": [filtro, filtro_apos_cursor(nome_cursor, id_cursor)]}
+
+    # Busca 1 documento a mais só para saber se existe próxima página
+    docs = list(
+        _collection.find(filtro, PROJECAO_CLIENTE_OUT)
+        .sort(ORDENACAO_KEYSET)  # nome ASC, _id ASC (desempate estável)
+        .skip(offset)  # paginação legada por offset (0 quando há cursor)
+        .limit(limit + 1)
+    )
 
-        # Filtra apenas clientes inativos
-        df_inativos = df[df["status"] == "inativo"].copy()
+    tem_proxima = len(docs) > limit
+    docs = docs[:limit]
 
-        # Caso não haja nenhum inativo, retorna resposta vazia, mas estruturada
-        if df_inativos.empty:
-            return {
-                "mensagem": "Nenhum cliente inativo encontrado.",
-                "total_inativos": 0,
-                "limite": limite,
-                "cidades": [],
-            }
+    headers = {}
+    if tem_proxima:
+        headers["X-Next-Cursor"] = codificar_cursor(docs[-1])
 
-        # Normaliza campos de cidade/estado para evitar valores NaN
-        df_inativos["estado"] = df_inativos["estado"].fillna("(sem estado)")
-        df_inativos["cidade"] = df_inativos["cidade"].fillna("(sem cidade)")
+    # Documentos do banco vão direto para JSON no formato de ClienteOut,
+    # sem um modelo Pydantic por item (src/serializacao.py)
+    return resposta_json(clientes_out(docs), headers=headers)
 
-        # Agrupa por estado + cidade e conta quantos inativos há em cada combinação
-        agrupado = (
-            df_inativos.groupby(["estado", "cidade"])
-            .size()
-            .reset_index(name="quantidade_inativos")
-            .sort_values(by="quantidade_inativos", ascending=False)
-        )
 
-        # Total de clientes inativos (para cálculo de percentual)
-        total_inativos = int(df_inativos.shape[0])
+async def _relatorio(relatorio: str, fresh: bool, **parametros) -> dict:
+    """
+    Calcula o relatório no executor de relatórios (src/executor_relatorios.py),
+    fora do event loop e do threadpool das rotas de CRUD.
 
-        # Percentual de inativos daquela cidade em relação ao total de inativos
-        agrupado["percentual"] = (
-            agrupado["quantidade_inativos"] / total_inativos * 100
-        ).round(2)
+    Pedidos simultâneos com o mesmo relatório e parâmetros compartilham
+    um único cálculo (single-flight), reaproveitado por
+    RELATORIOS_RESULTADO_TTL_SEGUNDOS; fresh=true sempre calcula de novo.
 
-        # Aplica o limite e converte para lista de dicts
-        top_cidades = agrupado.head(limite).to_dict(orient="records")
+    A resposta informa a origem (`fonte`: materializado ou snapshot) e
+    quando os dados foram calculados (`computed_at`).
+    """
+    chave = (relatorio, tuple(sorted(parametros.items())))
+    try:
+        resultado = await _single_flight_relatorios.executar(
+            chave,
+            lambda: executor_relatorios.executar(relatorio, parametros, fresh),
+            usar_cache=not fresh,
+        )
+        if fresh:
+            # Linhas rematerializadas: resultados guardados ficaram velhos
+            _single_flight_relatorios.invalidar()
+        return resultado
+    except RelatorioVazioError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except FilaCheiaError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except TempoEsgotadoError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+_QUERY_FRESH = Query(
+    False,
+    description="Se true, recalcula o relatório agora em vez de usar a última materialização.",
+)
 
-        return {
-            "mensagem": "Top cidades com mais clientes inativos calculado com sucesso.",
-            "total_inativos": total_inativos,
-            "limite": limite,
-            "cidades": top_cidades,
-        }
 
-    # Contagem por faixa
-    tabela = (
-        df_validos["faixa_etaria"]
-        .value_counts()
-        .sort_index()
-        .rename_axis("faixa_etaria")
-        .reset_index(name="quantidade")
-    )
+@app.get("/relatorios/faixa-etaria")
+async def relatorio_faixa_etaria(fresh: bool = _QUERY_FRESH):
+    """
+    Retorna a distribuição de clientes por faixa etária
+    (a partir de data_nascimento).
+    """
+    return await _relatorio("faixa_etaria", fresh)
 
-    total = int(tabela["quantidade"].sum())
-    tabela["percentual"] = (tabela["quantidade"] / total * 100).round(2)
 
-    # Monta resposta em formato JSON
-    faixas = tabela.to_dict(orient="records")
+@app.get("/relatorios/cidades-mais-inativos")
+async def relatorio_cidades_mais_inativos(limite: int = 10, fresh: bool = _QUERY_FRESH):
+    """
+    Retorna as top N cidades com maior número de clientes inativos.
+    """
+    # Limite de segurança para não devolver uma lista gigante
+    if limite <= 0 or limite > 100:
+        raise HTTPException(
+            status_code=400,
+            detail="Parâmetro 'limite' deve estar entre 1 e 100.",
+        )
 
-    return {
-        "mensagem": "Distribuição por faixa etária calculada com sucesso.",
-        "total_clientes": total,
-        "faixas": faixas,
-    }
+    return await _relatorio("cidades_mais_inativos", fresh, limite=limite)
 
 
 @app.get("/relatorios/dominios-email")
-async def relatorio_dominios_email():
+async def relatorio_dominios_email(fresh: bool = _QUERY_FRESH):
     """
     Retorna o top 10 de domínios de e-mail dos clientes,
     com quantidade e percentual em relação ao total de e-mails válidos.
     """
-    # Carrega todos os clientes em um DataFrame (reutilizando a função de scripts)
-    df = carregar_clientes_dataframe().copy()
-
-    # Garante que a coluna de e-mail existe (por segurança)
-    if "email" not in df.columns:
-        raise HTTPException(
-            status_code=500,
-            detail="Coluna 'email' não encontrada no DataFrame de clientes.",
-        )
-
-    # Limpa e-mails vazios ou nulos
-    df["email"] = df["email"].fillna("").str.strip()
-    df = df[df["email"] != ""]
-
-    if df.empty:
-        raise HTTPException(
-            status_code=404, detail="Nenhum cliente com e-mail definido."
-        )
-
-    # Extrai o domínio do e-mail (parte depois do @)
-    df["dominio_email"] = df["email"].str.split("@").str[-1].str.lower().str.strip()
-
-    # Conta quantos clientes por domínio
-    contagem_dominios = df["dominio_email"].value_counts()
-
-    total_com_email = int(contagem_dominios.sum())
-    top10 = contagem_dominios.head(10)
-
-    # Monta a resposta em forma de lista de dicts
-    top_dominios = []
-    for dominio, quantidade in top10.items():
-        percentual = round(quantidade / total_com_email * 100, 2)
-        top_dominios.append(
-            {
-                "dominio": dominio,
-                "quantidade": int(quantidade),
-                "percentual": percentual,
-            }
-        )
-
-    return {
-        "mensagem": "Top domínios de e-mail calculado com sucesso.",
-        "total_clientes_com_email": total_com_email,
-        "top_dominios": top_dominios,
-    }
+    return await _relatorio("dominios_email", fresh)
 
 
 @app.get("/relatorios/cidades-inativos")
 async def relatorio_cidades_inativos(
     min_clientes: int = 50,
     limite: int = 20,
+    fresh: bool = _QUERY_FRESH,
 ):
     """
     Retorna as cidades com maior percentual de clientes inativos.
@@ -453,171 +835,141 @@ async def relatorio_cidades_inativos(
     - min_clientes: número mínimo de clientes por cidade para entrar no ranking.
     - limite: quantidade de cidades no resultado (default: top 20).
     """
-    # Carrega os clientes em DataFrame
-    df = carregar_clientes_dataframe().copy()
-
-    # Garante colunas necessárias
-    colunas_necessarias = {"status", "estado", "cidade"}
-    if not colunas_necessarias.issubset(df.columns):
-        raise HTTPException(
-            status_code=500,
-            detail=f"Colunas necessárias não encontradas no DataFrame: {colunas_necessarias}",
-        )
-
-    # Preenche valores nulos
-    df["status"] = df["status"].fillna("desconhecido")
-    df["estado"] = df["estado"].fillna("(sem estado)")
-    df["cidade"] = df["cidade"].fillna("(sem cidade)")
-
-    # Tabela status por cidade/estado
-    tabela_cidade_status = (
-        df.groupby(["estado", "cidade", "status"]).size().unstack(fill_value=0)
+    return await _relatorio(
+        "cidades_inativos", fresh, min_clientes=min_clientes, limite=limite
     )
 
-    # Garante colunas 'ativo' e 'inativo' existindo
-    if "ativo" not in tabela_cidade_status.columns:
-        tabela_cidade_status["ativo"] = 0
-    if "inativo" not in tabela_cidade_status.columns:
-        tabela_cidade_status["inativo"] = 0
-
-    # Total por cidade e quantidade de inativos
-    tabela_cidade_status["total"] = (
-        tabela_cidade_status["ativo"] + tabela_cidade_status["inativo"]
-    )
-
-    # Filtra por mínimo de clientes
-    tabela_filtrada = tabela_cidade_status[
-        tabela_cidade_status["total"] >= min_clientes
-    ].copy()
-
-    if tabela_filtrada.empty:
-        raise HTTPException(
-            status_code=404,
-            detail="Nenhuma cidade com quantidade mínima de clientes para o relatório.",
-        )
-
-    # Percentual de inativos
-    tabela_filtrada["perc_inativos"] = (
-        tabela_filtrada["inativo"] / tabela_filtrada["total"] * 100
-    ).round(2)
-
-    # Ordena por percentual de inativos (desc) e pega top N
-    top_cidades = (
-        tabela_filtrada.sort_values(
-            by="perc_inativos",
-            ascending=False,
-        )
-        .head(limite)
-        .reset_index()
-    )
-
-    # Monta a resposta
-    cidades = []
-    for _, row in top_cidades.iterrows():
-        cidades.append(
-            {
-                "estado": row["estado"],
-                "cidade": row["cidade"],
-                "inativo": int(row["inativo"]),
-                "total": int(row["total"]),
-                "perc_inativos": float(row["perc_inativos"]),
-            }
-        )
-
-    return {
-        "mensagem": "Ranking de cidades por percentual de inativos calculado com sucesso.",
-        "min_clientes": int(min_clientes),
-        "limite": int(limite),
-        "total_cidades_no_ranking": len(cidades),
-        "cidades": cidades,
-    }
-
 
 @app.get("/relatorios/status-por-estado")
-async def relatorio_status_por_estado(min_clientes: int = 0):
+async def relatorio_status_por_estado(min_clientes: int = 0, fresh: bool = _QUERY_FRESH):
     """
     Retorna, por estado (UF), a quantidade de clientes ativos/inativos,
     total e percentual em cada status.
 
     - min_clientes: se > 0, só retorna estados com pelo menos essa quantidade de clientes.
     """
-    df = carregar_clientes_dataframe().copy()
+    return await _relatorio("status_por_estado", fresh, min_clientes=min_clientes)
 
-    # Garante as colunas necessárias
-    colunas_necessarias = {"status", "estado"}
-    if not colunas_necessarias.issubset(df.columns):
+
+@app.post("/relatorios/materializar")
+def materializar_relatorios(
+    relatorio: Optional[str] = Query(
+        None,
+        description="Relatório a materializar (default: todos).",
+    ),
+):
+    """Recalcula agora os relatórios materializados (um ou todos)."""
+    if relatorio is not None and relatorio not in RELATORIOS_MATERIALIZADOS:
         raise HTTPException(
-            status_code=500,
-            detail=f"Colunas necessárias não encontradas: {colunas_necessarias}",
+            status_code=400,
+            detail=f"Relatório desconhecido. Opções: {', '.join(RELATORIOS_MATERIALIZADOS)}.",
         )
 
-    # Limpa dados
-    df["status"] = df["status"].fillna("desconhecido").str.strip().str.lower()
-    df["estado"] = df["estado"].fillna("(sem estado)").str.strip().str.upper()
+    execucoes = materializar([relatorio] if relatorio else None, _collection)
+    _single_flight_relatorios.invalidar()
+    return {
+        "mensagem": "Relatórios materializados com sucesso.",
+        "relatorios": execucoes,
+    }
 
-    # Agrupa por estado e status
-    tabela = df.groupby(["estado", "status"]).size().unstack(fill_value=0)
 
-    # Garante as colunas padrão
-    if "ativo" not in tabela.columns:
-        tabela["ativo"] = 0
-    if "inativo" not in tabela.columns:
-        tabela["inativo"] = 0
+def _executar_export_job(parametros: dict, pasta: Path, progresso: Progresso) -> Path:
+    """Job export_clientes: grava o mesmo arquivo de GET /clientes/export em disco."""
+    filtro = _montar_filtro_listagem(
+        parametros["status"], parametros["estado"], parametros["cidade"], parametros["cidade_exata"]
+    )
+    total = _collection.count_documents(filtro)
+    caminho = pasta / f"clientes_export.{parametros['formato']}"
+
+    linhas = 0
+    with caminho.open("wb") as arquivo:
+        for pedaco in _gerar_export(filtro, parametros["formato"]):
+            arquivo.write(pedaco)
+            linhas += pedaco.count(b"\n")
+            progresso(min(linhas / total * 100, 99.0) if total else 99.0, f"{linhas} de {total} linhas")
+    return caminho
+
+
+registrar_relatorio(
+    "export_clientes",
+    RelatorioJob(
+        executar=_executar_export_job,
+        validar=lambda parametros: ParametrosExportJob.model_validate(parametros).model_dump(),
+        descricao="Exportação completa de clientes em CSV ou NDJSON (filtros de GET /clientes).",
+    ),
+)
 
-    # Total por estado
-    tabela["total"] = tabela["ativo"] + tabela["inativo"]
 
-    # Aplica filtro de mínimo de clientes, se informado
-    if min_clientes > 0:
-        tabela = tabela[tabela["total"] >= min_clientes]
+@app.post("/jobs/{relatorio}", status_code=202)
+def criar_job(
+    relatorio: str,
+    response: Response,
+    parametros: Optional[dict] = Body(None, description="Parâmetros do relatório (JSON)."),
+):
+    """
+    Dispara um relatório demorado em segundo plano e devolve o job.
 
-    if tabela.empty:
+    Um pedido idêntico (mesmo relatório e parâmetros) a um job ainda em
+    andamento devolve esse job (200, `deduplicado: true`) em vez de criar outro.
+    """
+    if relatorio not in RELATORIOS_JOBS:
         raise HTTPException(
             status_code=404,
-            detail="Nenhum estado com clientes para o critério informado.",
+            detail=f"Relatório desconhecido. Opções: {', '.join(RELATORIOS_JOBS)}.",
         )
-
-    # Percentuais dentro de cada estado
-    tabela["perc_ativos"] = (tabela["ativo"] / tabela["total"] * 100).round(2)
-    tabela["perc_inativos"] = (tabela["inativo"] / tabela["total"] * 100).round(2)
-
-    # Ordena por total de clientes (maior primeiro)
-    tabela = tabela.sort_values(by="total", ascending=False).reset_index()
-
-    # Monta resposta
-    estados = []
-    for _, row in tabela.iterrows():
-        estados.append(
-            {
-                "estado": row["estado"],
-                "ativo": int(row["ativo"]),
-                "inativo": int(row["inativo"]),
-                "total": int(row["total"]),
-                "perc_ativos": float(row["perc_ativos"]),
-                "perc_inativos": float(row["perc_inativos"]),
-            }
+    try:
+        job, criado = gerenciador_jobs.criar(relatorio, parametros)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=jsonable_encoder(e.errors()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FilaCheiaError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    if not criado:
+        response.status_code = 200
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return {**job, "deduplicado": not criado}
+
+
+@app.get("/jobs/{job_id}")
+def obter_job(job_id: str):
+    """Estado e progresso de um job."""
+    job = gerenciador_jobs.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job["status"] == STATUS_CONCLUIDO:
+        job["resultado_url"] = f"/jobs/{job_id}/result"
+    return job
+
+
+@app.get("/jobs/{job_id}/result")
+def baixar_resultado_job(job_id: str):
+    """Baixa o arquivo gerado pelo job (409 enquanto não terminar)."""
+    encontrado = gerenciador_jobs.resultado(job_id)
+    if encontrado is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    job, artefato, media_type = encontrado
+    if job["status"] != STATUS_CONCLUIDO:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job ainda não concluído (status: {job['status']}).",
         )
+    if artefato is None or not artefato.exists():
+        raise HTTPException(status_code=410, detail="Arquivo do job não está mais disponível")
 
-    total_geral = int(df.shape[0])
-
-    return {
-        "mensagem": "Status de clientes por estado calculado com sucesso.",
-        "total_geral_clientes": total_geral,
-        "min_clientes": int(min_clientes),
-        "total_estados_no_relatorio": len(estados),
-        "estados": estados,
-    }
+    return FileResponse(artefato, media_type=media_type, filename=artefato.name)
 
 
 @app.post("/clientes", response_model=ClienteOut, status_code=201)
 def criar_cliente(cliente: ClienteCreate):
     """Cria um novo cliente. CPF deve ser único."""
-    data = cliente.model_dump()
-    # endereço vem como Endereco → convertemos para dict bruto
-    data["endereco"] = cliente.endereco.model_dump()
+    data = _cliente_create_to_doc(cliente)
 
     try:
         result = _collection.insert_one(data)
+        contadores.registrar_escrita(None, data, _collection)
 
         # Log de sucesso da criação do cliente
         logger.info(
@@ -639,15 +991,245 @@ def criar_cliente(cliente: ClienteCreate):
             detail="Já existe um cliente cadastrado com esse CPF.",
         )
 
+    _apos_escrita([cliente.cpf])
+
     doc = _collection.find_one({"_id": result.inserted_id})
     return _doc_to_cliente_out(doc)
 
 
+class _LinhaNdjsonInvalida:
+    """Marcador para linhas NDJSON que não são JSON válido."""
+
+
+def _itens_ndjson(corpo: bytes) -> Iterator:
+    """Gera um item por linha não vazia do corpo NDJSON."""
+    for linha in corpo.splitlines():
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            yield json.loads(linha)
+        except ValueError:
+            # Linha inválida vira um item inválido, sem derrubar o lote inteiro
+            yield _LinhaNdjsonInvalida()
+
+
+def _inserir_lote(docs: List[dict], indices: List[int], resultados: List[dict]) -> None:
+    """
+    Insere um lote com insert_many(ordered=False) e registra o resultado
+    de cada item em `resultados` (na posição original do payload).
+    """
+    erros_por_posicao: dict = {}
+    try:
+        _collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for erro in e.details.get("writeErrors", []):
+            erros_por_posicao[erro["index"]] = erro
+
+    contadores.registrar_escritas(
+        ((None, doc) for posicao, doc in enumerate(docs) if posicao not in erros_por_posicao),
+        _collection,
+    )
+
+    for posicao, (doc, indice) in enumerate(zip(docs, indices)):
+        erro = erros_por_posicao.get(posicao)
+        if erro is None:
+            resultados[indice] = {
+                "indice": indice,
+                "cpf": doc["cpf"],
+                "status": "criado",
+                "id": str(doc["_id"]),
+            }
+        elif erro.get("code") == 11000:
+            resultados[indice] = {
+                "indice": indice,
+                "cpf": doc["cpf"],
+                "status": "conflito",
+                "detalhe": "Já existe um cliente cadastrado com esse CPF.",
+            }
+        else:
+            resultados[indice] = {
+                "indice": indice,
+                "cpf": doc["cpf"],
+                "status": "erro",
+                "detalhe": erro.get("errmsg", "Erro ao inserir cliente."),
+            }
+
+
+def _corpo_grande_demais(detalhe: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=detalhe)
+
+
+async def _ler_corpo_limitado(request: Request, limite: int) -> bytes:
+    """
+    Lê o corpo da requisição em pedaços, recusando com 413 assim que
+    passar de `limite` bytes (sem esperar o corpo inteiro chegar).
+    """
+    tamanho_declarado = request.headers.get("content-length")
+    if tamanho_declarado and tamanho_declarado.isdigit() and int(tamanho_declarado) > limite:
+        raise _corpo_grande_demais(f"Corpo acima do limite de {limite} bytes.")
+
+    partes: List[bytes] = []
+    recebido = 0
+    async for parte in request.stream():
+        recebido += len(parte)
+        if recebido > limite:
+            raise _corpo_grande_demais(f"Corpo acima do limite de {limite} bytes.")
+        partes.append(parte)
+    return b"".join(partes)
+
+
+def _processar_lote(corpo: bytes, ndjson: bool, batch_size: int) -> List[dict]:
+    """
+    Faz o parse, a validação e a gravação em lotes de POST /clientes/bulk.
+
+    Roda no threadpool: json.loads e ClienteCreate.model_validate em
+    centenas de milhares de itens são CPU puro e travariam o event loop.
+    """
+    if ndjson:
+        itens: list = []
+        for item in _itens_ndjson(corpo):
+            if len(itens) >= BULK_MAX_ITENS:
+                raise _corpo_grande_demais(f"Mais de {BULK_MAX_ITENS} itens no lote.")
+            itens.append(item)
+    else:
+        try:
+            itens = json.loads(corpo)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Corpo JSON inválido.")
+        if not isinstance(itens, list):
+            raise HTTPException(
+                status_code=400,
+                detail="Envie um array JSON de clientes ou NDJSON.",
+            )
+        if len(itens) > BULK_MAX_ITENS:
+            raise _corpo_grande_demais(f"Mais de {BULK_MAX_ITENS} itens no lote.")
+
+    resultados: List[Optional[dict]] = [None] * len(itens)
+    lote_docs: List[dict] = []
+    lote_indices: List[int] = []
+
+    for indice, item in enumerate(itens):
+        if isinstance(item, _LinhaNdjsonInvalida):
+            resultados[indice] = {
+                "indice": indice,
+                "status": "invalido",
+                "erros": [{"msg": "Linha NDJSON não é um JSON válido."}],
+            }
+            continue
+
+        try:
+            cliente = ClienteCreate.model_validate(item)
+        except ValidationError as e:
+            resultados[indice] = {
+                "indice": indice,
+                "cpf": item.get("cpf") if isinstance(item, dict) else None,
+                "status": "invalido",
+                "erros": e.errors(include_url=False, include_context=False),
+            }
+            continue
+
+        lote_docs.append(_cliente_create_to_doc(cliente))
+        lote_indices.append(indice)
+
+        if len(lote_docs) >= batch_size:
+            _inserir_lote(lote_docs, lote_indices, resultados)
+            lote_docs, lote_indices = [], []
+
+    if lote_docs:
+        _inserir_lote(lote_docs, lote_indices, resultados)
+
+    return resultados
+
+
+@app.post("/clientes/bulk")
+async def criar_clientes_em_lote(
+    request: Request,
+    batch_size: int = Query(
+        BULK_BATCH_SIZE,
+        ge=1,
+        le=10000,
+        description="Quantidade de clientes por insert_many (1-10000).",
+    ),
+):
+    """
+    Cria clientes em lote a partir de um array JSON ou de NDJSON
+    (Content-Type: application/x-ndjson, um cliente por linha).
+
+    Cada item é validado com ClienteCreate e gravado em lotes de
+    `batch_size` com insert_many(ordered=False). CPFs duplicados e itens
+    inválidos são reportados por item, sem falhar a requisição inteira.
+    Corpos acima de BULK_MAX_BYTES ou com mais de BULK_MAX_ITENS itens
+    são recusados com 413.
+    """
+    corpo = await _ler_corpo_limitado(request, BULK_MAX_BYTES)
+    content_type = request.headers.get("content-type", "")
+    ndjson = "ndjson" in content_type or "jsonl" in content_type
+
+    resultados = await run_in_threadpool(_processar_lote, corpo, ndjson, batch_size)
+
+    contagem = {"criado": 0, "conflito": 0, "invalido": 0, "erro": 0}
+    for r in resultados:
+        contagem[r["status"]] += 1
+
+    if contagem["criado"]:
+        _apos_escrita(r["cpf"] for r in resultados if r["status"] == "criado")
+
+    logger.info(
+        f"cliente_bulk_create total={len(resultados)} criados={contagem['criado']} "
+        f"conflitos={contagem['conflito']} invalidos={contagem['invalido']} "
+        f"erros={contagem['erro']}",
+        extra={"event": "cliente_bulk_create"},
+    )
+
+    return {
+        "mensagem": "Carga em lote processada.",
+        "total": len(resultados),
+        "criados": contagem["criado"],
+        "conflitos": contagem["conflito"],
+        "invalidos": contagem["invalido"],
+        "erros": contagem["erro"],
+        "itens": resultados,
+    }
+
+
+@app.post("/clientes/lookup", response_model=LookupResultado)
+def buscar_clientes_por_cpfs(corpo: LookupCpfs):
+    """
+    Busca vários clientes pelo CPF em uma única consulta.
+
+    Um só `$in` sobre o índice único cpf_1, com a mesma regra de
+    exclusão lógica da listagem (marcado_para_exclusao != true).
+    `encontrados` segue a ordem dos CPFs enviados (sem repetições);
+    `nao_encontrados` traz os CPFs sem cliente ativo na base.
+    """
+    # Remove repetidos preservando a ordem de entrada
+    cpfs = list(dict.fromkeys(cpf.strip() for cpf in corpo.cpfs))
+
+    docs = _collection.find(
+        {"cpf": {"$in": cpfs}, "marcado_para_exclusao": {"$ne": True}},
+        PROJECAO_CLIENTE_OUT,
+    )
+    por_cpf = {doc["cpf"]: doc for doc in docs}
+
+    encontrados = clientes_out(por_cpf[cpf] for cpf in cpfs if cpf in por_cpf)
+    nao_encontrados = [cpf for cpf in cpfs if cpf not in por_cpf]
+
+    logger.info(
+        f"cliente_lookup solicitados={len(cpfs)} encontrados={len(encontrados)}",
+        extra={"event": "cliente_lookup"},
+    )
+
+    return resposta_json({"encontrados": encontrados, "nao_encontrados": nao_encontrados})
+
+
 @app.patch("/clientes/{cpf}", response_model=ClienteOut)
 def atualizar_cliente(cpf: str, cliente_update: ClienteUpdate):
     """Atualiza parcialmente um cliente pelo CPF."""
     # Monta apenas os campos enviados no corpo da requisição
-    update_data = cliente_update.model_dump(exclude_unset=True)
+    update_data = adicionar_campos_normalizados(
+        cliente_update.model_dump(exclude_unset=True)
+    )
 
     if not update_data:
         # Nada foi enviado para atualizar
@@ -660,14 +1242,15 @@ def atualizar_cliente(cpf: str, cliente_update: ClienteUpdate):
             detail="Nenhum dado enviado para atualização.",
         )
 
-    # Executa o update e já retorna o documento atualizado
-    updated_doc = _collection.find_one_and_update(
+    # Executa o update trazendo o documento de ANTES: o de depois é
+    # montado aplicando o $set, e a transição atualiza os contadores
+    doc_antes = _collection.find_one_and_update(
         {"cpf": cpf},
-        {"$set": update_data},
-        return_document=ReturnDocument.AFTER,
+        {"$set": carimbar_atualizacao(update_data)},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if not updated_doc:
+    if not doc_antes:
         # CPF não encontrado
         logger.warning(
             f"cliente_update_not_found cpf={cpf}",
@@ -678,6 +1261,10 @@ def atualizar_cliente(cpf: str, cliente_update: ClienteUpdate):
             detail="Cliente não encontrado.",
         )
 
+    updated_doc = contadores.aplicar_set(doc_antes, update_data)
+    contadores.registrar_escrita(doc_antes, updated_doc, _collection)
+    _apos_escrita([cpf])
+
     # Sucesso na atualização
     logger.info(
         f"cliente_update_success cpf={cpf}",
@@ -693,15 +1280,20 @@ def deletar_cliente(cpf: str):
     Soft delete de cliente pelo CPF.
     O cliente NÃO é removido fisicamente do banco.
     """
-    result = _collection.update_one(
+    doc_antes = _collection.find_one_and_update(
         {"cpf": cpf, "marcado_para_exclusao": {"$ne": True}},
-        {"$set": {"marcado_para_exclusao": True}},
+        {"$set": carimbar_atualizacao({"marcado_para_exclusao": True})},
+        projection=contadores.PROJECAO_CONTADORES,
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if result.matched_count == 0:
+    if doc_antes is None:
         raise HTTPException(
             status_code=404,
             detail="Cliente não encontrado ou já excluído",
         )
 
+    contadores.registrar_escrita(doc_antes, None, _collection)
+    _apos_escrita([cpf])
+
     return None
@@ -1,56 +1,97 @@
-from cliente_crud import ClienteCRUD
+"""
+Backup da coleção de clientes (usa o motor em streaming de src/motor_backup.py).
+
+Uso:
+
+    python -m src.backup_banco
+    python -m src.backup_banco --formato bson --compressao zstd
+    python -m src.backup_banco --particoes 8    # faixas de _id em paralelo
+    python -m src.backup_banco --incremental backups/backup_clientes_20250101_020000
+"""
+
+import argparse
 from datetime import datetime
-import json
 import os
+from pathlib import Path
+
+from config import BACKUP_COMPRESSAO, BACKUP_FORMATO
+from src.motor_backup import (
+    BackupInvalidoError,
+    caminho_manifesto,
+    fazer_backup_incremental,
+    fazer_backup_paralelo,
+    fazer_backup_streaming,
+    ler_manifesto,
+    verificar_backup_streaming,
+)
+from src.restaurar_backup import iterar_array_json
+
 
-def fazer_backup():
+def fazer_backup(
+    destino=None, formato=BACKUP_FORMATO, compressao=BACKUP_COMPRESSAO, particoes=1, base=None
+):
     """
     Faz backup completo do banco de dados MongoDB
-    Exporta todos os clientes para arquivo JSON
+    Exporta todos os clientes em chunks comprimidos, com manifesto
+    (memória constante, qualquer tamanho de base)
+    Com particoes > 1, cada faixa de _id é exportada por um processo
+    Com base, faz backup incremental (só o que mudou desde a base)
     """
     print("\n" + "="*80)
     print(" "*25 + "BACKUP DO BANCO DE DADOS")
     print(" "*30 + "Sistema de TI")
     print("="*80 + "\n")
     
-    # Conectar ao banco
-    crud = ClienteCRUD()
-    
     print("📊 Iniciando backup...")
+    print(f"📥 Exportando dados do MongoDB ({formato or 'formato da base'}, compressão {compressao or 'da base'})...")
     inicio = datetime.now()
     
-    # Buscar todos os clientes
-    print("📥 Coletando dados do MongoDB...")
-    todos_clientes = crud.listar_todos()
-    total = len(todos_clientes)
-    
-    print(f"✓ {total:,} clientes encontrados\n")
-    
-    # Converter para dicionários (formato JSON)
-    print("🔄 Convertendo para formato JSON...")
-    dados_backup = []
-    
-    for i, cliente in enumerate(todos_clientes, 1):
-        dados_backup.append(cliente.to_dict())
+    if base is not None:
+        def mostrar_progresso(processados):
+            print(f"   Exportados: {processados:,}")
         
-        # Mostrar progresso a cada 10000
-        if i % 10000 == 0:
-            print(f"   Processados: {i:,}/{total:,} ({(i/total)*100:.1f}%)")
-    
-    print(f"✓ Todos os {total:,} clientes convertidos\n")
-    
-    # Nome do arquivo com timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nome_arquivo = f"backup_clientes_{timestamp}.json"
-    
-    # Salvar em JSON
-    print(f"💾 Salvando backup em: {nome_arquivo}")
-    
-    with open(nome_arquivo, 'w', encoding='utf-8') as f:
-        json.dump(dados_backup, f, ensure_ascii=False, indent=2, default=str)
-    
-    # Verificar tamanho do arquivo
-    tamanho_bytes = os.path.getsize(nome_arquivo)
+        print(f"🔁 Incremental sobre: {base}")
+        nome_arquivo = str(
+            fazer_backup_incremental(
+                base,
+                destino,
+                formato=formato,
+                compressao=compressao,
+                progresso=mostrar_progresso,
+            )
+        )
+    elif particoes > 1:
+        def mostrar_particao(indice, resultado):
+            print(
+                f"   Partição {indice}: {resultado['documentos']:,} registros "
+                f"em {resultado['segundos']:.1f}s"
+            )
+        
+        nome_arquivo = str(
+            fazer_backup_paralelo(
+                destino,
+                formato=formato,
+                compressao=compressao,
+                particoes=particoes,
+                progresso=mostrar_particao,
+            )
+        )
+    else:
+        def mostrar_progresso(processados):
+            print(f"   Exportados: {processados:,}")
+        
+        nome_arquivo = str(
+            fazer_backup_streaming(
+                destino, formato=formato, compressao=compressao, progresso=mostrar_progresso
+            )
+        )
+    manifesto = ler_manifesto(nome_arquivo)
+    total = manifesto["total_documentos"]
+    
+    print(f"✓ {total:,} clientes exportados em {len(manifesto['chunks'])} chunk(s)\n")
+    
+    # Tamanho total dos chunks
+    tamanho_bytes = sum(chunk["bytes"] for chunk in manifesto["chunks"])
     tamanho_mb = tamanho_bytes / (1024 * 1024)
     
     fim = datetime.now()
@@ -64,13 +105,14 @@ def fazer_backup():
     print(f"\n✅ Backup concluído com sucesso!")
     print(f"\n📊 Estatísticas:")
     print(f"   • Total de registros: {total:,}")
-    print(f"   • Arquivo gerado: {nome_arquivo}")
+    print(f"   • Manifesto: {nome_arquivo}")
+    print(f"   • Chunks: {len(manifesto['chunks'])}")
     print(f"   • Tamanho: {tamanho_mb:.2f} MB ({tamanho_bytes:,} bytes)")
     print(f"   • Tempo de execução: {tempo_decorrido:.2f} segundos")
-    print(f"   • Velocidade: {total/tempo_decorrido:.0f} registros/segundo")
+    print(f"   • Velocidade: {total/max(tempo_decorrido, 0.001):.0f} registros/segundo")
     
     # Informações adicionais
-    print(f"\n📁 Localização: {os.path.abspath(nome_arquivo)}")
+    print(f"\n📁 Localização: {os.path.abspath(os.path.dirname(nome_arquivo))}")
     print(f"📅 Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     
     # Instruções de restauração
@@ -78,9 +120,9 @@ def fazer_backup():
     print("INSTRUÇÕES PARA RESTAURAÇÃO")
     print("="*80)
     print(f"\nPara restaurar este backup:")
-    print(f"1. Abra o arquivo: {nome_arquivo}")
-    print(f"2. Use o script de importação (a ser criado)")
-    print(f"3. Ou importe manualmente via MongoDB Compass")
+    print(f"1. Verifique o backup: verificar_backup({nome_arquivo!r})")
+    print(f"2. Os chunks são NDJSON (Extended JSON) ou BSON comprimidos, um por arquivo")
+    print(f"3. Restaure (retomável): python -m src.restaurar_backup {os.path.dirname(nome_arquivo)}")
     
     # Recomendações
     print("\n" + "="*80)
@@ -94,34 +136,51 @@ def fazer_backup():
     
     print("\n" + "="*80 + "\n")
     
-    crud.fechar_conexao()
-    
     return nome_arquivo
 
 def verificar_backup(nome_arquivo):
     """
     Verifica integridade de um arquivo de backup
+    Backups com manifesto são conferidos chunk a chunk (checksum e
+    contagem) e arquivos .json antigos elemento a elemento, ambos em
+    memória constante
     """
     print(f"\n🔍 Verificando backup: {nome_arquivo}\n")
     
+    if caminho_manifesto(nome_arquivo).name == "manifesto.json":
+        resultado = verificar_backup_streaming(nome_arquivo)
+        if not resultado["ok"]:
+            for erro in resultado["erros"]:
+                print(f"❌ Erro: {erro}")
+            return False
+        
+        print(f"✅ Backup válido!")
+        print(f"📊 Registros encontrados: {resultado['documentos']:,}")
+        print(f"📦 Chunks conferidos: {resultado['chunks']}")
+        return True
+    
+    # Formato antigo: um único array JSON, lido em fluxo
     try:
-        with open(nome_arquivo, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
+        total = 0
+        primeiro = None
+        for doc, _ in iterar_array_json(Path(nome_arquivo)):
+            if primeiro is None:
+                primeiro = doc
+            total += 1
         
         print(f"✅ Arquivo válido!")
-        print(f"📊 Registros encontrados: {len(dados):,}")
+        print(f"📊 Registros encontrados: {total:,}")
         
         # Verificar estrutura do primeiro registro
-        if dados:
-            primeiro = dados[0]
+        if primeiro is not None:
             campos = list(primeiro.keys())
             print(f"📋 Campos por registro: {len(campos)}")
             print(f"🔑 Campos: {', '.join(campos[:5])}...")
         
         return True
         
-    except json.JSONDecodeError:
-        print("❌ Erro: Arquivo JSON inválido!")
+    except BackupInvalidoError as e:
+        print(f"❌ Erro: Arquivo JSON inválido! ({e})")
         return False
     except FileNotFoundError:
         print("❌ Erro: Arquivo não encontrado!")
@@ -131,8 +190,32 @@ def verificar_backup(nome_arquivo):
         return False
 
 if __name__ == "__main__":
-    # Fazer backup
-    arquivo_backup = fazer_backup()
+    parser = argparse.ArgumentParser(description="Backup da coleção de clientes")
+    parser.add_argument("--destino", type=Path, default=None, help="diretório dos backups")
+    parser.add_argument("--formato", choices=("ndjson", "bson"), default=None)
+    parser.add_argument("--compressao", choices=("gzip", "zstd", "nenhuma"), default=None)
+    parser.add_argument(
+        "--particoes", type=int, default=1, help="faixas de _id exportadas em paralelo (padrão: 1)"
+    )
+    parser.add_argument(
+        "--incremental",
+        type=Path,
+        default=None,
+        metavar="BASE",
+        help="backup anterior da cadeia: exporta só o que mudou desde ele",
+    )
+    args = parser.parse_args()
+    
+    # Fazer backup (incremental herda formato/compressão da base, se não informados)
+    padrao_formato = None if args.incremental else BACKUP_FORMATO
+    padrao_compressao = None if args.incremental else BACKUP_COMPRESSAO
+    arquivo_backup = fazer_backup(
+        args.destino,
+        args.formato or padrao_formato,
+        args.compressao or padrao_compressao,
+        args.particoes,
+        args.incremental,
+    )
     
     # Verificar integridade
     print("\n" + "="*80)
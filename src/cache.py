@@ -0,0 +1,79 @@
+"""
+Cache LRU em memória, com expiração por tempo (TTL) e contadores de uso.
+
+Seguro para uso entre threads (a API roda handlers síncronos no
+threadpool). Cada processo tem o seu cache; escritas feitas por outro
+processo só aparecem depois do TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Guarda até `tamanho_maximo` entradas; ao encher, descarta a usada há
+    mais tempo. Entradas mais velhas que `ttl_segundos` são tratadas como
+    ausentes (ttl_segundos <= 0 = sem expiração).
+    """
+
+    def __init__(self, tamanho_maximo: int = 1024, ttl_segundos: float = 30.0):
+        self._tamanho_maximo = tamanho_maximo
+        self._ttl = ttl_segundos
+        self._dados: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor guardado (ou None se ausente/expirado)."""
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+
+            criado_em, valor = item
+            if self._ttl > 0 and time.monotonic() - criado_em > self._ttl:
+                del self._dados[chave]
+                self.falhas += 1
+                return None
+
+            self._dados.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave: Hashable, valor: Any) -> None:
+        """Guarda o valor, descartando a entrada menos usada se necessário."""
+        if self._tamanho_maximo <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (time.monotonic(), valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self._tamanho_maximo:
+                self._dados.popitem(last=False)
+
+    def remover(self, chave: Hashable) -> None:
+        """Remove uma entrada (se existir)."""
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def limpar(self) -> None:
+        """Descarta todas as entradas (mantém os contadores)."""
+        with self._lock:
+            self._dados.clear()
+
+    def estatisticas(self) -> dict:
+        """Tamanho atual, limites e taxa de acerto."""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "entradas": len(self._dados),
+                "tamanho_maximo": self._tamanho_maximo,
+                "ttl_segundos": self._ttl,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            }
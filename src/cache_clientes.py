@@ -0,0 +1,166 @@
+"""
+Cache read-through de clientes por CPF, compartilhado no processo pela
+API (GET /clientes/{cpf}) e pelo ClienteCRUD (buscar_por_cpf).
+
+- Guarda o documento bruto do MongoDB (sem filtro de exclusão lógica);
+  cada consumidor aplica a sua regra sobre o documento.
+- CPFs inexistentes não são guardados.
+- Toda escrita feita pela API/CRUD invalida o CPF na hora
+  (invalidar_cpf). Escritas de outros processos (outra réplica da API,
+  scripts/ de migração) são vistas após CACHE_CPF_TTL_SEGUNDOS ou, com
+  CACHE_CPF_CHANGE_STREAM=true, assim que o change stream as entrega.
+- CACHE_CPF_TAMANHO=0 desliga o cache.
+"""
+
+import threading
+from typing import Callable, Optional
+
+from pymongo.errors import PyMongoError
+
+from config import CACHE_CPF_TAMANHO, CACHE_CPF_TTL_SEGUNDOS
+from logging_config import get_logger
+from src.cache import CacheLRU
+
+
+logger = get_logger(__name__)
+
+cache_cpf = CacheLRU(
+    tamanho_maximo=CACHE_CPF_TAMANHO,
+    ttl_segundos=CACHE_CPF_TTL_SEGUNDOS,
+)
+
+# Incrementada a cada invalidação: uma leitura que começou antes de uma
+# escrita não pode repor no cache o documento antigo
+_geracao = 0
+_lock_geracao = threading.Lock()
+
+
+def obter_por_cpf(cpf: str, buscar: Callable[[str], Optional[dict]]) -> Optional[dict]:
+    """
+    Retorna o documento do CPF, do cache ou via `buscar(cpf)` (que deve
+    consultar o MongoDB sem filtro de exclusão lógica).
+
+    O documento devolvido é compartilhado: não altere.
+    """
+    doc = cache_cpf.obter(cpf)
+    if doc is not None:
+        return doc
+
+    geracao_vista = _geracao
+    doc = buscar(cpf)
+    if doc is not None:
+        with _lock_geracao:
+            if _geracao == geracao_vista:
+                cache_cpf.guardar(cpf, doc)
+    return doc
+
+
+def invalidar_cpf(*cpfs: str) -> None:
+    """Remove os CPFs do cache (chamar logo após escrever esses clientes)."""
+    global _geracao
+    with _lock_geracao:
+        _geracao += 1
+        for cpf in cpfs:
+            cache_cpf.remover(cpf)
+
+
+def invalidar_tudo() -> None:
+    """Descarta o cache inteiro."""
+    global _geracao
+    with _lock_geracao:
+        _geracao += 1
+        cache_cpf.limpar()
+
+
+def estatisticas() -> dict:
+    return {
+        **cache_cpf.estatisticas(),
+        "change_stream_ativo": ouvinte_alteracoes.em_execucao,
+    }
+
+
+class OuvinteAlteracoes:
+    """
+    Invalida o cache a partir do change stream da coleção de clientes,
+    cobrindo escritas feitas por outros processos.
+
+    - insert/update/replace: invalida o CPF do documento (lido com
+      full_document="updateLookup"); se o próprio CPF mudou, o valor
+      antigo é desconhecido e o cache inteiro é descartado.
+    - delete e demais eventos: o evento só traz o _id, então descarta
+      o cache inteiro (a API faz exclusão lógica; delete é raro).
+
+    Change streams exigem replica set; sem ele, o erro é logado e a
+    thread tenta de novo periodicamente.
+    """
+
+    _OPERACOES = ["insert", "update", "replace", "delete", "drop", "rename", "invalidate"]
+    _ESPERA_RECONEXAO_SEGUNDOS = 5
+
+    def __init__(self):
+        self._colecao = None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def em_execucao(self) -> bool:
+        return self._thread is not None
+
+    def iniciar(self, colecao) -> None:
+        """Começa a acompanhar `colecao` em uma thread (idempotente)."""
+        if self._thread is not None:
+            return
+        self._colecao = colecao
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="cache-cpf-change-stream", daemon=True
+        )
+        self._thread.start()
+
+    def parar(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._parar.set()
+        thread.join(timeout=5)
+        self._thread = None
+
+    def _tratar(self, evento: dict) -> None:
+        operacao = evento.get("operationType")
+        if operacao in ("insert", "update", "replace"):
+            campos = (evento.get("updateDescription") or {}).get("updatedFields") or {}
+            documento = evento.get("fullDocument") or {}
+            if "cpf" not in campos and documento.get("cpf"):
+                invalidar_cpf(documento["cpf"])
+                return
+        invalidar_tudo()
+
+    def _loop(self) -> None:
+        pipeline = [{"$match": {"operationType": {"$in": self._OPERACOES}}}]
+        while not self._parar.is_set():
+            try:
+                with self._colecao.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    max_await_time_ms=1000,
+                ) as stream:
+                    # Eventos perdidos durante a (re)conexão: começa limpo
+                    invalidar_tudo()
+                    logger.info(
+                        "cache_cpf_change_stream_iniciado",
+                        extra={"event": "cache_cpf_change_stream_iniciado"},
+                    )
+                    while not self._parar.is_set() and stream.alive:
+                        evento = stream.try_next()
+                        if evento is not None:
+                            self._tratar(evento)
+            except PyMongoError:
+                logger.exception(
+                    "cache_cpf_change_stream_erro",
+                    extra={"event": "cache_cpf_change_stream_erro"},
+                )
+                self._parar.wait(self._ESPERA_RECONEXAO_SEGUNDOS)
+
+
+# Instância única do processo (iniciada pela API se CACHE_CPF_CHANGE_STREAM=true)
+ouvinte_alteracoes = OuvinteAlteracoes()
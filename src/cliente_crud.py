@@ -1,11 +1,24 @@
-from typing import List, Optional
+import copy
+from typing import Dict, List, Optional
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import ASCENDING, ReturnDocument
 from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 
+from . import cache_clientes, contadores
 from .cliente_model import Cliente
-from config import MONGO_URI, MONGO_DB_NAME, MONGO_COLLECTION_CLIENTES  # type: ignore
+from .normalizacao import (
+    adicionar_campos_normalizados,
+    carimbar_atualizacao,
+    filtro_prefixo,
+    normalizar_texto,
+)
+from config import (  # type: ignore
+    MONGO_COLLECTION_CLIENTES,
+    MONGO_DB_NAME,
+    close_mongo_clients,
+    get_mongo_client,
+)
 
 
 class ClienteCRUD:
@@ -20,13 +33,13 @@ class ClienteCRUD:
         """
         Inicializa a conexão com MongoDB.
 
+        Reaproveita o MongoClient compartilhado do processo (um pool por
+        processo), em vez de abrir um pool novo a cada instância.
+
         Args:
             uri: String de conexão do MongoDB; se None, usa MONGO_URI do config.py.
         """
-        if uri is None:
-            uri = MONGO_URI
-
-        self.cliente_mongo = MongoClient(uri)
+        self.cliente_mongo = get_mongo_client(uri)
         self.db = self.cliente_mongo[MONGO_DB_NAME]
         self.colecao = self.db[MONGO_COLLECTION_CLIENTES]
 
@@ -57,7 +70,10 @@ class ClienteCRUD:
     def criar_cliente(self, cliente: Cliente) -> bool:
         """Insere um novo cliente na coleção."""
         try:
-            resultado = self.colecao.insert_one(cliente.to_dict())
+            doc = carimbar_atualizacao(adicionar_campos_normalizados(cliente.to_dict()))
+            resultado = self.colecao.insert_one(doc)
+            contadores.registrar_escrita(None, doc, self.colecao)
+            cache_clientes.invalidar_cpf(cliente.cpf)
             print(
                 f"✓ Cliente {cliente.nome} cadastrado com ID: {resultado.inserted_id}"
             )
@@ -73,19 +89,39 @@ class ClienteCRUD:
         """
         Busca um cliente pelo CPF (apenas não marcados_para_exclusao).
 
+        Passa pelo cache de CPF do processo (src/cache_clientes.py); a
+        regra de exclusão lógica é aplicada sobre o documento guardado.
+
         Returns:
             Cliente ou None.
         """
         try:
-            filtro = self._filtro_nao_excluido({"cpf": cpf})
-            resultado = self.colecao.find_one(filtro)
-            if resultado:
-                return Cliente.from_dict(resultado)
+            resultado = cache_clientes.obter_por_cpf(
+                cpf, lambda c: self.colecao.find_one({"cpf": c})
+            )
+            if resultado and resultado.get("marcado_para_exclusao") is not True:
+                # Cópia: o documento do cache é compartilhado
+                return Cliente.from_dict(copy.deepcopy(resultado))
             return None
         except Exception as e:
             print(f"✗ Erro ao buscar cliente por CPF: {e}")
             return None
 
+    def buscar_por_cpfs(self, cpfs: List[str]) -> Dict[str, Cliente]:
+        """
+        Busca vários clientes pelo CPF em uma única consulta ($in),
+        ignorando marcados_para_exclusao.
+
+        Returns:
+            Dicionário cpf -> Cliente só com os CPFs encontrados.
+        """
+        try:
+            filtro = self._filtro_nao_excluido({"cpf": {"$in": list(cpfs)}})
+            return {doc["cpf"]: Cliente.from_dict(doc) for doc in self.colecao.find(filtro)}
+        except Exception as e:
+            print(f"✗ Erro ao buscar clientes por CPFs: {e}")
+            return {}
+
     def buscar_por_nome(self, nome: str) -> List[Cliente]:
         """
         Busca clientes por nome (parcial, case-insensitive), ignorando
@@ -100,6 +136,31 @@ class ClienteCRUD:
             print(f"✗ Erro ao buscar clientes por nome: {e}")
             return []
 
+    def buscar_por_prefixo_nome(
+        self,
+        prefixo: str,
+        limite: Optional[int] = None,
+    ) -> List[Cliente]:
+        """
+        Busca clientes cujo nome começa com `prefixo` (ignorando maiúsculas
+        e acentos), ignorando marcados_para_exclusao.
+
+        Usa o campo normalizado nome_norm com prefixo ancorado (seek no
+        índice nome_norm_1), em vez de varrer todos os nomes.
+
+        Args:
+            limite: número máximo de clientes a retornar (None ou <= 0 = todos).
+        """
+        try:
+            filtro = self._filtro_nao_excluido({"nome_norm": filtro_prefixo(prefixo)})
+            cursor = self.colecao.find(filtro).sort("nome_norm", ASCENDING)
+            if limite is not None and limite > 0:
+                cursor = cursor.limit(limite)
+            return [Cliente.from_dict(doc) for doc in cursor]
+        except Exception as e:
+            print(f"✗ Erro ao buscar clientes por prefixo do nome: {e}")
+            return []
+
     def listar_todos(self, limite: Optional[int] = None) -> List[Cliente]:
         """
         Lista todos os clientes não marcados_para_exclusao, ordenados por nome.
@@ -124,12 +185,17 @@ class ClienteCRUD:
         Apenas marcamos como excluído.
         """
         try:
-            resultado = self.colecao.update_one(
+            antes = self.colecao.find_one_and_update(
                 {"cpf": cpf, "marcado_para_exclusao": {"$ne": True}},
-                {"$set": {"marcado_para_exclusao": True}},
+                {"$set": carimbar_atualizacao({"marcado_para_exclusao": True})},
+                projection=contadores.PROJECAO_CONTADORES,
+                return_document=ReturnDocument.BEFORE,
             )
+            if antes is not None:
+                contadores.registrar_escrita(antes, None, self.colecao)
+            cache_clientes.invalidar_cpf(cpf)
 
-            if resultado.matched_count == 0:
+            if antes is None:
                 print(f"✗ Cliente com CPF {cpf} não encontrado ou já excluído")
                 return False
 
@@ -146,8 +212,19 @@ class ClienteCRUD:
         """
         try:
             filtro = self._filtro_nao_excluido({"cpf": cpf})
-            resultado = self.colecao.update_one(filtro, {"$set": novos_dados})
-            if resultado.matched_count > 0:
+            novos_dados = carimbar_atualizacao(adicionar_campos_normalizados(dict(novos_dados)))
+            antes = self.colecao.find_one_and_update(
+                filtro,
+                {"$set": novos_dados},
+                projection=contadores.PROJECAO_CONTADORES,
+                return_document=ReturnDocument.BEFORE,
+            )
+            if antes is not None:
+                contadores.registrar_escrita(
+                    antes, contadores.aplicar_set(antes, novos_dados), self.colecao
+                )
+            cache_clientes.invalidar_cpf(cpf)
+            if antes is not None:
                 print(f"✓ Cliente com CPF {cpf} atualizado com sucesso")
                 return True
             else:
@@ -161,11 +238,13 @@ class ClienteCRUD:
 
     def buscar_por_cidade(self, cidade: str) -> List[Cliente]:
         """
-        Busca clientes por cidade (campo endereco.cidade),
+        Busca clientes por cidade (igualdade, ignorando maiúsculas e acentos),
         ignorando marcados_para_exclusao.
+
+        Usa o campo normalizado endereco.cidade_norm (indexado).
         """
         try:
-            filtro_base = {"endereco.cidade": cidade}
+            filtro_base = {"endereco.cidade_norm": normalizar_texto(cidade)}
             filtro = self._filtro_nao_excluido(filtro_base)
             resultados = self.colecao.find(filtro)
             return [Cliente.from_dict(doc) for doc in resultados]
@@ -173,6 +252,38 @@ class ClienteCRUD:
             print(f"✗ Erro ao buscar clientes por cidade: {e}")
             return []
 
+    def buscar_por_cidade_uf(
+        self,
+        cidade: str = "",
+        uf: str = "",
+        limite: Optional[int] = None,
+    ) -> List[Cliente]:
+        """
+        Busca clientes cuja cidade começa com `cidade` (ignorando maiúsculas
+        e acentos) e, opcionalmente, da UF informada; ordena por nome.
+
+        Consulta o prefixo de endereco.cidade_norm, resolvido com seek nos
+        índices criados em src/post_setup_indices.py.
+
+        Args:
+            limite: número máximo de clientes a retornar (None ou <= 0 = todos).
+        """
+        try:
+            filtro_base: dict = {}
+            if cidade and cidade.strip():
+                filtro_base["endereco.cidade_norm"] = filtro_prefixo(cidade)
+            if uf and uf.strip():
+                filtro_base["endereco.estado"] = uf.strip().upper()
+
+            filtro = self._filtro_nao_excluido(filtro_base)
+            cursor = self.colecao.find(filtro).sort([("nome", ASCENDING), ("_id", ASCENDING)])
+            if limite is not None and limite > 0:
+                cursor = cursor.limit(limite)
+            return [Cliente.from_dict(doc) for doc in cursor]
+        except Exception as e:
+            print(f"✗ Erro ao buscar clientes por cidade/UF: {e}")
+            return []
+
     def buscar_por_status(self, status: str) -> List[Cliente]:
         """
         Busca clientes pelo status (ativo/inativo), ignorando duplicados marcados.
@@ -189,8 +300,17 @@ class ClienteCRUD:
     def contar_clientes(self, filtro: Optional[dict] = None) -> int:
         """
         Conta clientes considerando apenas registros não marcados_para_exclusao.
+
+        Sem filtro (ou só com {"status": ...}) lê o contador global
+        (src/contadores.py) em vez de contar a coleção.
         """
         try:
+            if not filtro or (set(filtro) == {"status"} and isinstance(filtro["status"], str)):
+                status = filtro["status"] if filtro else None
+                total = contadores.total_clientes(status, self.colecao)
+                if total is not None:
+                    return total
+
             filtro_final = self._filtro_nao_excluido(filtro)
             return self.colecao.count_documents(filtro_final)
         except Exception as e:
@@ -198,8 +318,13 @@ class ClienteCRUD:
             return 0
 
     def fechar_conexao(self):
-        """Fecha a conexão com o MongoDB."""
-        self.cliente_mongo.close()
+        """
+        Fecha a conexão com o MongoDB.
+
+        Como o client é compartilhado pelo processo, chame apenas ao
+        encerrar o programa (ex.: saída do menu principal).
+        """
+        close_mongo_clients()
         print("✓ Conexão com MongoDB fechada")
 
     def deletar_cliente(self, cpf: str) -> bool:
@@ -0,0 +1,225 @@
+"""
+Coalescência (micro-batching) de buscas por chave.
+
+Muitas buscas simultâneas de um único documento (ex.: GET /clientes/{cpf})
+ocupam, cada uma, uma conexão do pool e um round trip ao MongoDB. O
+CoalescedorBuscas junta as chaves pedidas dentro de uma janela curta (ou
+até um máximo de chaves) e resolve todas com uma única consulta em lote
+(ex.: `$in`), devolvendo a cada chamador o seu resultado.
+
+Quem chama fica bloqueado até o lote terminar, então deve rodar fora do
+event loop (handlers `def` da API rodam no threadpool).
+
+Pedidos que chegam durante o encerramento (parar()) não ficam pendurados:
+buscar() levanta CoalescedorParadoError e quem chama faz a busca direta.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+BuscarLote = Callable[[List[Hashable]], Dict[Hashable, object]]
+
+
+class CoalescedorParadoError(RuntimeError):
+    """O coalescedor foi encerrado antes de o pedido entrar em um lote."""
+
+
+class CoalescedorBuscas:
+    """
+    Agrupa buscas individuais em lotes.
+
+    Args:
+        buscar_lote: recebe a lista de chaves distintas e devolve um
+            dicionário chave -> resultado (chaves ausentes resultam em None).
+        janela_ms: tempo máximo que o primeiro pedido de um lote espera
+            por outros antes de o lote ser enviado.
+        max_chaves: envia o lote assim que juntar essa quantidade de chaves.
+    """
+
+    def __init__(
+        self,
+        buscar_lote: BuscarLote,
+        janela_ms: float = 2.0,
+        max_chaves: int = 100,
+        nome: str = "coalescedor",
+    ):
+        self._buscar_lote = buscar_lote
+        self._janela = janela_ms / 1000
+        self._max_chaves = max(1, max_chaves)
+        self._nome = nome
+
+        self._fila: "queue.Queue[Tuple[Hashable, Future, float]]" = queue.Queue()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._lock_metricas = threading.Lock()
+        self._zerar_metricas()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    @property
+    def em_execucao(self) -> bool:
+        return self._thread is not None
+
+    def iniciar(self) -> None:
+        """Sobe a thread que monta e envia os lotes (idempotente)."""
+        if self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name=self._nome, daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        """
+        Encerra a thread; pedidos ainda na fila são resolvidos antes. Os que
+        sobrarem (enfileirados depois que a thread saiu) recebem
+        CoalescedorParadoError.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._parar.set()
+        thread.join(timeout=5)
+        self._thread = None
+
+        while True:
+            try:
+                _, futuro, _ = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if futuro.set_running_or_notify_cancel():
+                futuro.set_exception(CoalescedorParadoError("Coalescedor encerrado."))
+
+    # ------------------------------------------------------------------
+    # Uso
+    # ------------------------------------------------------------------
+    def buscar(self, chave: Hashable, timeout: Optional[float] = None):
+        """
+        Enfileira a chave e espera o resultado do lote em que ela entrar.
+
+        Levanta CoalescedorParadoError se o coalescedor estiver sendo
+        encerrado e o pedido ainda não tiver entrado em um lote, e
+        concurrent.futures.TimeoutError se o lote não terminar a tempo.
+        """
+        futuro: Future = Future()
+        self._fila.put((chave, futuro, time.perf_counter()))
+        # Encerrando: a thread pode já ter saído sem ver este pedido. Se
+        # ele ainda não entrou em um lote, desiste (a thread o ignora).
+        if self._parar.is_set() and futuro.cancel():
+            raise CoalescedorParadoError("Coalescedor encerrado.")
+        try:
+            return futuro.result(timeout=timeout)
+        except FuturesTimeoutError:
+            futuro.cancel()
+            raise
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+    def _zerar_metricas(self) -> None:
+        self._lotes = 0
+        self._pedidos = 0
+        self._chaves = 0
+        self._maior_lote = 0
+        self._espera_total_ms = 0.0
+        self._espera_maxima_ms = 0.0
+        self._erros = 0
+
+    def estatisticas(self) -> dict:
+        """Contadores para ajustar janela_ms / max_chaves."""
+        with self._lock_metricas:
+            return {
+                "em_execucao": self.em_execucao,
+                "janela_ms": self._janela * 1000,
+                "max_chaves": self._max_chaves,
+                "lotes": self._lotes,
+                "pedidos": self._pedidos,
+                "chaves_distintas": self._chaves,
+                "pedidos_por_lote": round(self._pedidos / self._lotes, 2) if self._lotes else 0.0,
+                "maior_lote": self._maior_lote,
+                "espera_media_ms": (
+                    round(self._espera_total_ms / self._pedidos, 3) if self._pedidos else 0.0
+                ),
+                "espera_maxima_ms": round(self._espera_maxima_ms, 3),
+                "erros": self._erros,
+                "fila": self._fila.qsize(),
+            }
+
+    def zerar_estatisticas(self) -> None:
+        with self._lock_metricas:
+            self._zerar_metricas()
+
+    # ------------------------------------------------------------------
+    # Thread de lotes
+    # ------------------------------------------------------------------
+    def _juntar_lote(self) -> List[Tuple[Hashable, Future, float]]:
+        """Espera o primeiro pedido e junta os que chegarem dentro da janela."""
+        try:
+            primeiro = self._fila.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        lote = [primeiro]
+        chaves = {primeiro[0]}
+        limite = time.perf_counter() + self._janela
+
+        while len(chaves) < self._max_chaves:
+            restante = limite - time.perf_counter()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            lote.append(item)
+            chaves.add(item[0])
+
+        return lote
+
+    def _loop(self) -> None:
+        while not (self._parar.is_set() and self._fila.empty()):
+            lote = self._juntar_lote()
+            if lote:
+                self._executar(lote)
+
+    def _executar(self, lote: Iterable[Tuple[Hashable, Future, float]]) -> None:
+        # Pedidos desistidos (cancelados por buscar()) ficam de fora
+        lote = [item for item in lote if item[1].set_running_or_notify_cancel()]
+        if not lote:
+            return
+        chaves = list(dict.fromkeys(chave for chave, _, _ in lote))
+
+        try:
+            resultados = self._buscar_lote(chaves)
+        except Exception as e:
+            with self._lock_metricas:
+                self._erros += 1
+            logger.exception(
+                f"coalescencia_erro lote={len(chaves)}",
+                extra={"event": "coalescencia_erro"},
+            )
+            for _, futuro, _ in lote:
+                futuro.set_exception(e)
+            return
+
+        agora = time.perf_counter()
+        esperas_ms = [(agora - enfileirado_em) * 1000 for _, _, enfileirado_em in lote]
+
+        for chave, futuro, _ in lote:
+            futuro.set_result(resultados.get(chave))
+
+        with self._lock_metricas:
+            self._lotes += 1
+            self._pedidos += len(lote)
+            self._chaves += len(chaves)
+            self._maior_lote = max(self._maior_lote, len(lote))
+            self._espera_total_ms += sum(esperas_ms)
+            self._espera_maxima_ms = max(self._espera_maxima_ms, max(esperas_ms))
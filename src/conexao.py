@@ -1,12 +1,13 @@
-from pymongo import MongoClient
-from config import MONGO_URI  # lê do .env via config.py
+from config import close_mongo_clients, get_mongo_client  # lê do .env via config.py
 
 def conectar_mongodb():
     """
     Conecta ao MongoDB usando a URI centralizada no .env (via config.py).
+
+    Devolve o client compartilhado do processo (não abre um pool novo).
     """
     try:
-        cliente = MongoClient(MONGO_URI)
+        cliente = get_mongo_client()
         # Teste rápido de conectividade
         cliente.admin.command('ping')
         print("✓ Conectado ao MongoDB com sucesso (config.py / .env)!")
@@ -22,5 +23,5 @@ if __name__ == "__main__":
         try:
             print(f"Bancos de dados disponíveis: {cliente.list_database_names()}")
         finally:
-            cliente.close()
+            close_mongo_clients()
             print("✓ Conexão fechada")
@@ -0,0 +1,310 @@
+"""
+Contadores de clientes mantidos a cada escrita (coleção `contadores`).
+
+Totais por dimensão, atualizados com `$inc` nos mesmos caminhos de
+escrita da API e do ClienteCRUD, para que /health, estatísticas e
+relatórios por UF não precisem de count_documents/$group na coleção
+inteira:
+
+- `global`                      → todos os clientes;
+- `uf:<UF>`                     → por estado (UF em maiúsculas);
+- `uf_cidade:<UF>:<cidade_norm>` → por estado + cidade normalizada.
+
+Cada documento: `{"_id", "dimensao", "estado"?, "cidade"?, "total",
+"status": {"ativo": n, "inativo": n, ...}}`. Só entram clientes não
+marcados para exclusão.
+
+Os contadores só são usados na leitura depois da primeira reconciliação
+(o documento `global` ganha `reconciliado_em`); antes disso, quem lê cai
+no count_documents/$group de sempre.
+
+O `$inc` é atômico por documento, mas não há transação entre a escrita
+do cliente e a dos contadores: se o processo cair no meio, a diferença
+é corrigida por reconciliar() (scripts/reconciliar_contadores.py).
+"""
+
+import copy
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+from config import MONGO_COLLECTION_CONTADORES, get_collection
+from logging_config import get_logger
+from src.normalizacao import normalizar_texto
+
+
+logger = get_logger(__name__)
+
+SEM_ESTADO = "(sem estado)"
+SEM_CIDADE = "(sem cidade)"
+
+# Campos do cliente que mudam os contadores (projeção das escritas)
+PROJECAO_CONTADORES = {
+    "status": 1,
+    "endereco.estado": 1,
+    "endereco.cidade": 1,
+    "marcado_para_exclusao": 1,
+}
+
+
+def colecao_contadores(colecao_clientes=None):
+    if colecao_clientes is None:
+        colecao_clientes = get_collection().collection
+    return colecao_clientes.database[MONGO_COLLECTION_CONTADORES]
+
+
+# ----------------------------------------------------------------------
+# Chaves e deltas
+# ----------------------------------------------------------------------
+
+def _chave_status(status) -> str:
+    """Status como nome de campo seguro (sem '.' / '$')."""
+    texto = status.strip().lower() if isinstance(status, str) else ""
+    return re.sub(r"[.$]", "_", texto) or "desconhecido"
+
+
+def _chave_estado(estado) -> str:
+    texto = estado.strip().upper() if isinstance(estado, str) else ""
+    return texto or SEM_ESTADO
+
+
+def _chaves(doc: dict) -> List[Tuple[str, dict]]:
+    """(_id do contador, rótulos do contador) para cada dimensão do cliente."""
+    endereco = doc.get("endereco") or {}
+    estado = _chave_estado(endereco.get("estado"))
+    cidade = endereco.get("cidade") if isinstance(endereco.get("cidade"), str) else None
+    cidade_norm = normalizar_texto(cidade) or SEM_CIDADE
+
+    return [
+        ("global", {"dimensao": "global"}),
+        (f"uf:{estado}", {"dimensao": "uf", "estado": estado}),
+        (
+            f"uf_cidade:{estado}:{cidade_norm}",
+            {"dimensao": "uf_cidade", "estado": estado, "cidade": cidade or SEM_CIDADE},
+        ),
+    ]
+
+
+def _contribuicao(doc: Optional[dict], sinal: int, deltas: dict, rotulos: dict) -> None:
+    if not doc or doc.get("marcado_para_exclusao") is True:
+        return
+    campo_status = f"status.{_chave_status(doc.get('status'))}"
+    for chave, rotulo in _chaves(doc):
+        deltas[chave]["total"] += sinal
+        deltas[chave][campo_status] += sinal
+        rotulos.setdefault(chave, rotulo)
+
+
+def calcular_deltas(
+    transicoes: Iterable[Tuple[Optional[dict], Optional[dict]]],
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, dict]]:
+    """
+    Soma os deltas de várias transições (antes, depois) de clientes.
+
+    antes=None → cliente novo; depois=None ou marcado_para_exclusao → saiu
+    da contagem. Devolve ({_id: {campo: delta}}, {_id: rótulos}) sem
+    campos de delta zero.
+    """
+    deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    rotulos: Dict[str, dict] = {}
+    for antes, depois in transicoes:
+        _contribuicao(antes, -1, deltas, rotulos)
+        _contribuicao(depois, +1, deltas, rotulos)
+
+    limpos = {}
+    for chave, campos in deltas.items():
+        campos = {campo: valor for campo, valor in campos.items() if valor}
+        if campos:
+            limpos[chave] = campos
+    return limpos, rotulos
+
+
+def aplicar_set(doc: dict, campos: dict) -> dict:
+    """Cópia de `doc` com um `$set` aplicado (aceita chaves com ponto)."""
+    novo = copy.deepcopy(doc)
+    for caminho, valor in campos.items():
+        alvo = novo
+        *pais, ultimo = caminho.split(".")
+        for parte in pais:
+            if not isinstance(alvo.get(parte), dict):
+                alvo[parte] = {}
+            alvo = alvo[parte]
+        alvo[ultimo] = valor
+    return novo
+
+
+# ----------------------------------------------------------------------
+# Escrita
+# ----------------------------------------------------------------------
+
+def registrar_escritas(
+    transicoes: Iterable[Tuple[Optional[dict], Optional[dict]]],
+    colecao_clientes=None,
+) -> None:
+    """
+    Aplica nos contadores o efeito das escritas (um bulk_write com $inc).
+
+    Falhas são logadas e não propagam: a escrita do cliente já aconteceu
+    e a diferença é corrigida na próxima reconciliação.
+    """
+    deltas, rotulos = calcular_deltas(transicoes)
+    if not deltas:
+        return
+
+    operacoes = [
+        UpdateOne(
+            {"_id": chave},
+            {"$inc": campos, "$setOnInsert": rotulos[chave]},
+            upsert=True,
+        )
+        for chave, campos in deltas.items()
+    ]
+    try:
+        colecao_contadores(colecao_clientes).bulk_write(operacoes, ordered=False)
+    except Exception:
+        logger.exception(
+            "contadores_erro_atualizacao",
+            extra={"event": "contadores_erro_atualizacao"},
+        )
+
+
+def registrar_escrita(antes: Optional[dict], depois: Optional[dict], colecao_clientes=None) -> None:
+    """Atalho de registrar_escritas para uma única transição."""
+    registrar_escritas([(antes, depois)], colecao_clientes)
+
+
+# ----------------------------------------------------------------------
+# Leitura
+# ----------------------------------------------------------------------
+
+def _global_reconciliado(colecao_clientes=None) -> Optional[dict]:
+    doc = colecao_contadores(colecao_clientes).find_one({"_id": "global"})
+    if doc is None or not doc.get("reconciliado_em"):
+        return None
+    return doc
+
+
+def total_clientes(status: Optional[str] = None, colecao_clientes=None) -> Optional[int]:
+    """
+    Total de clientes (opcionalmente de um status) pelo contador global.
+
+    None se os contadores ainda não foram reconciliados nenhuma vez (quem
+    chama faz o count_documents como antes).
+    """
+    doc = _global_reconciliado(colecao_clientes)
+    if doc is None:
+        return None
+    if status is None:
+        return int(doc.get("total", 0))
+    return int((doc.get("status") or {}).get(_chave_status(status), 0))
+
+
+def listar_contadores(
+    dimensao: str,
+    limite: int = 0,
+    colecao_clientes=None,
+) -> Optional[List[dict]]:
+    """
+    Contadores de uma dimensão ('uf' ou 'uf_cidade'), do maior total para
+    o menor; None se ainda não foram reconciliados nenhuma vez.
+    """
+    if _global_reconciliado(colecao_clientes) is None:
+        return None
+
+    cursor = (
+        colecao_contadores(colecao_clientes)
+        .find({"dimensao": dimensao, "total": {"$gt": 0}})
+        .sort([("total", -1), ("_id", 1)])
+    )
+    if limite > 0:
+        cursor = cursor.limit(limite)
+    return list(cursor)
+
+
+# ----------------------------------------------------------------------
+# Reconciliação
+# ----------------------------------------------------------------------
+
+def _contar_do_zero(colecao_clientes) -> Dict[str, dict]:
+    """Recalcula todos os contadores a partir da coleção de clientes."""
+    novos: Dict[str, dict] = {"global": {"dimensao": "global", "total": 0, "status": {}}}
+    cursor = colecao_clientes.find(
+        {"marcado_para_exclusao": {"$ne": True}},
+        {"_id": 0, **PROJECAO_CONTADORES},
+        batch_size=5000,
+    )
+    for doc in cursor:
+        campo_status = _chave_status(doc.get("status"))
+        for chave, rotulo in _chaves(doc):
+            contador = novos.setdefault(chave, {**rotulo, "total": 0, "status": {}})
+            contador["total"] += 1
+            contador["status"][campo_status] = contador["status"].get(campo_status, 0) + 1
+    return novos
+
+
+def _resumo(doc: Optional[dict]) -> dict:
+    if not doc:
+        return {"total": 0, "status": {}}
+    status = {k: v for k, v in (doc.get("status") or {}).items() if v}
+    return {"total": int(doc.get("total", 0)), "status": status}
+
+
+def reconciliar(aplicar: bool = True, colecao_clientes=None) -> dict:
+    """
+    Recalcula os contadores do zero e compara com os gravados.
+
+    Com aplicar=True, sobrescreve os divergentes, remove os que não
+    existem mais e marca o contador global como reconciliado (liberando a
+    leitura pelos contadores). Devolve o resumo com a lista de divergências.
+
+    Escritas concorrentes durante a varredura podem gerar pequenas
+    diferenças; rode em horário de pouco movimento ou repita.
+    """
+    if colecao_clientes is None:
+        colecao_clientes = get_collection().collection
+    contadores = colecao_contadores(colecao_clientes)
+
+    novos = _contar_do_zero(colecao_clientes)
+    atuais = {doc["_id"]: doc for doc in contadores.find({})}
+
+    divergencias = []
+    operacoes = []
+    for chave in sorted(set(novos) | set(atuais)):
+        esperado = _resumo(novos.get(chave))
+        gravado = _resumo(atuais.get(chave))
+        if esperado == gravado:
+            continue
+
+        divergencias.append(
+            {
+                "contador": chave,
+                "gravado": gravado,
+                "esperado": esperado,
+                "diferenca_total": esperado["total"] - gravado["total"],
+            }
+        )
+        if chave in novos:
+            operacoes.append(ReplaceOne({"_id": chave}, {"_id": chave, **novos[chave]}, upsert=True))
+        else:
+            operacoes.append(DeleteOne({"_id": chave}))
+
+    if aplicar:
+        if operacoes:
+            contadores.bulk_write(operacoes, ordered=False)
+        contadores.update_one(
+            {"_id": "global"},
+            {"$set": {"reconciliado_em": datetime.now(timezone.utc)}},
+        )
+
+    logger.info(
+        f"contadores_reconciliados contadores={len(novos)} divergencias={len(divergencias)}",
+        extra={"event": "contadores_reconciliados"},
+    )
+    return {
+        "contadores": len(novos),
+        "divergencias": divergencias,
+        "aplicado": aplicar,
+    }
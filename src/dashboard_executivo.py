@@ -6,6 +6,7 @@ from datetime import datetime
 import csv
 
 from config import get_collection
+from src import contadores
 
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -45,20 +46,31 @@ def classificar_faixa_etaria(idade: int) -> str:
     return "80+"
 
 
-def gerar_dashboard_executivo() -> None:
-    """Gera um resumo executivo com métricas principais dos clientes."""
+def gerar_dashboard_executivo(destino: Path | None = None) -> list[Path]:
+    """
+    Gera um resumo executivo com métricas principais dos clientes.
+
+    Os CSVs vão para `destino` (default: pasta dados/); devolve os caminhos gerados.
+    """
     bundle = get_collection()
     col = bundle.collection
-    DADOS_DIR.mkdir(exist_ok=True)
+    destino = Path(destino) if destino is not None else DADOS_DIR
+    destino.mkdir(parents=True, exist_ok=True)
 
     print("\n" + "=" * 80)
     print("DASHBOARD EXECUTIVO - CLIENTES")
     print("=" * 80)
 
     # --- Visão geral: totais / status ---
-    total_clientes = col.count_documents({})
-    total_ativos = col.count_documents({"status": "ativo"})
-    total_inativos = col.count_documents({"status": "inativo"})
+    # Pelos contadores incrementais (src/contadores.py); sem eles, conta a coleção
+    total_clientes = contadores.total_clientes(colecao_clientes=col)
+    if total_clientes is not None:
+        total_ativos = contadores.total_clientes("ativo", colecao_clientes=col)
+        total_inativos = contadores.total_clientes("inativo", colecao_clientes=col)
+    else:
+        total_clientes = col.count_documents({})
+        total_ativos = col.count_documents({"status": "ativo"})
+        total_inativos = col.count_documents({"status": "inativo"})
     outros_status = total_clientes - total_ativos - total_inativos
 
     perc_ativos = (total_ativos / total_clientes * 100) if total_clientes else 0.0
@@ -73,12 +85,16 @@ def gerar_dashboard_executivo() -> None:
     print("-" * 80)
 
     # --- Top 10 UFs por quantidade de clientes ---
-    pipeline_uf = [
-        {"$group": {"_id": "$endereco.estado", "qtde": {"$sum": 1}}},
-        {"$sort": {"qtde": -1}},
-        {"$limit": 10},
-    ]
-    resultados_uf = list(col.aggregate(pipeline_uf))
+    contadores_uf = contadores.listar_contadores("uf", 10, colecao_clientes=col)
+    if contadores_uf is not None:
+        resultados_uf = [{"_id": c["estado"], "qtde": c["total"]} for c in contadores_uf]
+    else:
+        pipeline_uf = [
+            {"$group": {"_id": "$endereco.estado", "qtde": {"$sum": 1}}},
+            {"$sort": {"qtde": -1}},
+            {"$limit": 10},
+        ]
+        resultados_uf = list(col.aggregate(pipeline_uf))
 
     print("\nTOP 10 UFs POR QUANTIDADE DE CLIENTES")
     print("-" * 80)
@@ -93,17 +109,24 @@ def gerar_dashboard_executivo() -> None:
         linhas_csv_uf.append([uf, qtde, f"{perc:.2f}"])
 
     # --- Top 10 cidades (cidade + UF) ---
-    pipeline_cidade = [
-        {
-            "$group": {
-                "_id": {"cidade": "$endereco.cidade", "uf": "$endereco.estado"},
-                "qtde": {"$sum": 1},
-            }
-        },
-        {"$sort": {"qtde": -1, "_id.uf": 1, "_id.cidade": 1}},
-        {"$limit": 10},
-    ]
-    resultados_cidade = list(col.aggregate(pipeline_cidade))
+    contadores_cidade = contadores.listar_contadores("uf_cidade", 10, colecao_clientes=col)
+    if contadores_cidade is not None:
+        resultados_cidade = [
+            {"_id": {"cidade": c["cidade"], "uf": c["estado"]}, "qtde": c["total"]}
+            for c in contadores_cidade
+        ]
+    else:
+        pipeline_cidade = [
+            {
+                "$group": {
+                    "_id": {"cidade": "$endereco.cidade", "uf": "$endereco.estado"},
+                    "qtde": {"$sum": 1},
+                }
+            },
+            {"$sort": {"qtde": -1, "_id.uf": 1, "_id.cidade": 1}},
+            {"$limit": 10},
+        ]
+        resultados_cidade = list(col.aggregate(pipeline_cidade))
 
     print("\nTOP 10 CIDADES (TODAS AS UFs)")
     print("-" * 80)
@@ -147,9 +170,9 @@ def gerar_dashboard_executivo() -> None:
         linhas_csv_faixas.append([faixa, qtde, f"{perc:.2f}"])
 
     # --- Exportar CSVs resumidos ---
-    csv_uf = DADOS_DIR / "dashboard_top_ufs.csv"
-    csv_cidades = DADOS_DIR / "dashboard_top_cidades.csv"
-    csv_faixas = DADOS_DIR / "dashboard_faixa_etaria.csv"
+    csv_uf = destino / "dashboard_top_ufs.csv"
+    csv_cidades = destino / "dashboard_top_cidades.csv"
+    csv_faixas = destino / "dashboard_faixa_etaria.csv"
 
     with csv_uf.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f, delimiter=";")
@@ -174,9 +197,7 @@ def gerar_dashboard_executivo() -> None:
     print("\n" + "=" * 80)
     print("✓ DASHBOARD EXECUTIVO GERADO COM SUCESSO")
     print("=" * 80)
-
-    bundle.client.close()
-    print("✓ Conexão com MongoDB fechada")
+    return [csv_uf, csv_cidades, csv_faixas]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,400 @@
+"""
+Execução dos relatórios de /relatorios fora do event loop.
+
+Os relatórios fazem I/O bloqueante no MongoDB (leitura das linhas
+materializadas, $merge com ?fresh=true) e, no fallback, groupbys do
+Pandas sobre o snapshot. Rodando no processo da API, disputam o GIL e o
+threadpool com as rotas de CRUD. O ExecutorRelatorios os envia para um
+pool de processos (spawn) e devolve awaitables para a API:
+
+- fila limitada: no máximo `processos + fila_max` relatórios pendentes;
+  acima disso, FilaCheiaError (a API responde 503) em vez de enfileirar
+  sem limite;
+- timeout por relatório (RELATORIOS_TIMEOUT_SEGUNDOS, sobrescrito por
+  RELATORIOS_TIMEOUTS="faixa_etaria=60,..."): TempoEsgotadoError (504).
+  O processo não é interrompido; a vaga na fila só é liberada quando o
+  cálculo de fato termina, então relatórios lentos não furam o limite;
+- métricas de fila e por relatório em estatisticas()
+  (GET /diagnostico/relatorios).
+
+Cada processo do pool abre o seu próprio MongoClient e mantém o seu
+próprio snapshot de clientes (src/snapshot_clientes.py), recarregado por
+uma thread de fundo do próprio processo (iniciada no primeiro uso). Como
+os avisos de escrita da API não chegam aos processos, cada pedido leva a
+versão de escrita atual (versao_escrita); se mudou desde a última vista,
+o snapshot é marcado como desatualizado e a thread o recarrega
+respeitando SNAPSHOT_INTERVALO_MINIMO_SEGUNDOS, enquanto o pedido usa o
+snapshot anterior. Nesse modo o processo da API não carrega snapshot
+nenhum (usa_processos).
+
+Com RELATORIOS_EXECUTOR_PROCESSOS=0 os relatórios rodam no threadpool do
+próprio processo, com a mesma fila, timeouts e métricas, e usam o
+snapshot do processo da API.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from config import (
+    RELATORIOS_EXECUTOR_FILA_MAX,
+    RELATORIOS_EXECUTOR_PROCESSOS,
+    RELATORIOS_TIMEOUT_SEGUNDOS,
+    RELATORIOS_TIMEOUTS,
+    get_collection,
+)
+from logging_config import get_logger
+from src.relatorios_calculos import (
+    calcular_cidades_inativos,
+    calcular_cidades_mais_inativos,
+    calcular_dominios_email,
+    calcular_faixa_etaria,
+    calcular_status_por_estado,
+    montar_cidades_inativos,
+    montar_cidades_mais_inativos,
+    montar_dominios_email,
+    montar_faixa_etaria,
+    montar_status_por_estado,
+)
+from src.relatorios_materializados import ler_relatorio, materializar_relatorio
+from src.snapshot_clientes import gerenciador_snapshot
+
+
+logger = get_logger(__name__)
+
+
+class FilaCheiaError(RuntimeError):
+    """Fila de relatórios no limite; o pedido foi recusado sem enfileirar."""
+
+
+class TempoEsgotadoError(TimeoutError):
+    """O relatório não terminou dentro do timeout configurado."""
+
+
+# ----------------------------------------------------------------------
+# Lado do processo que calcula (pool ou threadpool)
+# ----------------------------------------------------------------------
+
+# Relatório da API -> (relatório materializado, montar(linhas, **p), calcular(df, **p))
+_RELATORIOS: Dict[str, tuple] = {
+    "faixa_etaria": (
+        "faixa_etaria",
+        lambda linhas: montar_faixa_etaria(linhas),
+        lambda df: calcular_faixa_etaria(df, date.today()),
+    ),
+    "cidades_mais_inativos": (
+        "cidades_status",
+        lambda linhas, limite: montar_cidades_mais_inativos(linhas, limite),
+        lambda df, limite: calcular_cidades_mais_inativos(df, limite),
+    ),
+    "dominios_email": (
+        "dominios_email",
+        lambda linhas: montar_dominios_email(linhas),
+        lambda df: calcular_dominios_email(df),
+    ),
+    "cidades_inativos": (
+        "cidades_status",
+        lambda linhas, min_clientes, limite: montar_cidades_inativos(linhas, min_clientes, limite),
+        lambda df, min_clientes, limite: calcular_cidades_inativos(df, min_clientes, limite),
+    ),
+    "status_por_estado": (
+        "status_por_estado",
+        lambda linhas, min_clientes: montar_status_por_estado(linhas, min_clientes),
+        lambda df, min_clientes: calcular_status_por_estado(df, min_clientes),
+    ),
+}
+
+RELATORIOS_DISPONIVEIS = tuple(_RELATORIOS)
+
+# Última versão de escrita vista pelo snapshot deste processo
+_versao_snapshot: Optional[int] = None
+# True nos processos do pool (definido pelo initializer)
+_em_processo_do_pool = False
+
+
+def _iniciar_processo_do_pool() -> None:
+    global _em_processo_do_pool
+    _em_processo_do_pool = True
+
+
+def calcular_relatorio(relatorio: str, parametros: dict, fresh: bool, versao_escrita: int) -> dict:
+    """
+    Corpo da resposta de um relatório (roda dentro do executor).
+
+    - fresh=true: rematerializa o relatório antes de ler;
+    - com linhas materializadas: `montar_*` sobre elas;
+    - sem linhas materializadas ainda: `calcular_*` sobre o snapshot deste
+      processo; se houve escrita desde a última vez, ele é recarregado em
+      segundo plano e o pedido usa a versão anterior.
+
+    Levanta RelatorioVazioError quando não há dados para o critério.
+    """
+    global _versao_snapshot
+
+    nome_materializado, montar, calcular = _RELATORIOS[relatorio]
+    colecao = get_collection().collection
+
+    if fresh:
+        materializar_relatorio(nome_materializado, colecao)
+
+    dados = ler_relatorio(nome_materializado, colecao)
+    if dados is not None:
+        metadados = dados.metadados()
+        return {
+            **montar(dados.linhas, **parametros),
+            "fonte": "materializado",
+            "computed_at": metadados["computed_at"],
+            "materializado": metadados,
+        }
+
+    if _em_processo_do_pool:
+        # Recarga em segundo plano neste processo (idempotente); só o
+        # primeiro uso espera a carga inicial
+        gerenciador_snapshot.iniciar()
+    if versao_escrita != _versao_snapshot:
+        gerenciador_snapshot.marcar_desatualizado()
+        _versao_snapshot = versao_escrita
+
+    snapshot = gerenciador_snapshot.obter()
+    metadados = snapshot.metadados()
+    return {
+        **calcular(snapshot.dados, **parametros),
+        "fonte": "snapshot",
+        "computed_at": metadados["gerado_em"],
+        "snapshot": metadados,
+    }
+
+
+# ----------------------------------------------------------------------
+# Lado da API
+# ----------------------------------------------------------------------
+
+def _ler_timeouts(texto: str) -> Dict[str, float]:
+    """'faixa_etaria=60,dominios_email=10' -> {'faixa_etaria': 60.0, ...}."""
+    timeouts = {}
+    for item in (texto or "").split(","):
+        if not item.strip():
+            continue
+        nome, _, valor = item.partition("=")
+        try:
+            timeouts[nome.strip()] = float(valor)
+        except ValueError:
+            logger.warning(
+                f"relatorios_timeout_invalido item={item.strip()!r}",
+                extra={"event": "relatorios_timeout_invalido"},
+            )
+    return timeouts
+
+
+class _MetricasRelatorio:
+    __slots__ = ("pedidos", "concluidos", "erros", "timeouts", "recusados", "duracao_total_ms", "duracao_maxima_ms")
+
+    def __init__(self):
+        self.pedidos = 0
+        self.concluidos = 0
+        self.erros = 0
+        self.timeouts = 0
+        self.recusados = 0
+        self.duracao_total_ms = 0.0
+        self.duracao_maxima_ms = 0.0
+
+    def como_dict(self) -> dict:
+        return {
+            "pedidos": self.pedidos,
+            "concluidos": self.concluidos,
+            "erros": self.erros,
+            "timeouts": self.timeouts,
+            "recusados": self.recusados,
+            "duracao_media_ms": (
+                round(self.duracao_total_ms / self.concluidos, 2) if self.concluidos else 0.0
+            ),
+            "duracao_maxima_ms": round(self.duracao_maxima_ms, 2),
+        }
+
+
+class ExecutorRelatorios:
+    """
+    Pool de processos com fila limitada para os relatórios.
+
+    Args:
+        processos: tamanho do pool (0 = threadpool do próprio processo).
+        fila_max: pedidos que podem esperar além dos que estão rodando.
+        timeout_segundos: timeout padrão de cada relatório.
+        timeouts: timeouts específicos por relatório.
+    """
+
+    def __init__(
+        self,
+        processos: int = RELATORIOS_EXECUTOR_PROCESSOS,
+        fila_max: int = RELATORIOS_EXECUTOR_FILA_MAX,
+        timeout_segundos: float = RELATORIOS_TIMEOUT_SEGUNDOS,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self._processos = max(0, processos)
+        self._fila_max = max(0, fila_max)
+        self._capacidade = max(1, self._processos) + self._fila_max
+        self._timeout = timeout_segundos
+        self._timeouts = dict(timeouts) if timeouts is not None else _ler_timeouts(RELATORIOS_TIMEOUTS)
+
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._maior_fila = 0
+        self._versao_escrita = 0
+        self._metricas: Dict[str, _MetricasRelatorio] = {}
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def iniciar(self) -> None:
+        """Sobe o pool de processos (idempotente; também sobe sob demanda)."""
+        with self._lock:
+            self._garantir_pool()
+
+    def parar(self) -> None:
+        """Encerra o pool, descartando o que ainda não começou."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _garantir_pool(self) -> Optional[Executor]:
+        if self._processos and self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._processos,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_iniciar_processo_do_pool,
+            )
+        return self._pool
+
+    @property
+    def usa_processos(self) -> bool:
+        """Relatórios calculados nos processos do pool (cada um com o seu snapshot)."""
+        return self._processos > 0
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def marcar_escrita(self) -> None:
+        """Avisa que houve escrita: os snapshots dos processos ficam velhos."""
+        with self._lock:
+            self._versao_escrita += 1
+
+    def timeout_de(self, relatorio: str) -> float:
+        return self._timeouts.get(relatorio, self._timeout)
+
+    async def executar(self, relatorio: str, parametros: Optional[dict] = None, fresh: bool = False) -> dict:
+        """
+        Calcula o relatório no executor e devolve o corpo da resposta.
+
+        Levanta FilaCheiaError, TempoEsgotadoError ou o erro do cálculo
+        (ex.: RelatorioVazioError).
+        """
+        if relatorio not in _RELATORIOS:
+            raise KeyError(f"Relatório desconhecido: {relatorio}")
+
+        argumentos = (relatorio, dict(parametros or {}), fresh)
+        with self._lock:
+            metricas = self._metricas.setdefault(relatorio, _MetricasRelatorio())
+            metricas.pedidos += 1
+            if self._pendentes >= self._capacidade:
+                metricas.recusados += 1
+                logger.warning(
+                    f"relatorio_fila_cheia relatorio={relatorio} pendentes={self._pendentes}",
+                    extra={"event": "relatorio_fila_cheia"},
+                )
+                raise FilaCheiaError(
+                    f"Fila de relatórios cheia ({self._pendentes} pendentes); tente novamente."
+                )
+            self._pendentes += 1
+            self._maior_fila = max(self._maior_fila, self._pendentes)
+            pool = self._garantir_pool()
+            versao = self._versao_escrita
+
+        inicio = time.perf_counter()
+        if pool is not None:
+            try:
+                futuro = pool.submit(calcular_relatorio, *argumentos, versao)
+            except Exception as e:
+                self._descartar_pool_quebrado(pool, e)
+                with self._lock:
+                    self._pendentes -= 1
+                    metricas.erros += 1
+                raise
+            futuro.add_done_callback(lambda f: self._finalizar(relatorio, inicio, f, pool))
+            aguardavel = asyncio.wrap_future(futuro)
+        else:
+            tarefa = asyncio.ensure_future(run_in_threadpool(calcular_relatorio, *argumentos, versao))
+            tarefa.add_done_callback(lambda f: self._finalizar(relatorio, inicio, f, None))
+            aguardavel = tarefa
+
+        try:
+            # shield: o timeout não cancela o cálculo, que libera a vaga ao terminar
+            return await asyncio.wait_for(asyncio.shield(aguardavel), self.timeout_de(relatorio))
+        except asyncio.TimeoutError:
+            with self._lock:
+                metricas.timeouts += 1
+            logger.warning(
+                f"relatorio_timeout relatorio={relatorio} timeout_s={self.timeout_de(relatorio)}",
+                extra={"event": "relatorio_timeout"},
+            )
+            raise TempoEsgotadoError(
+                f"Relatório {relatorio} não terminou em {self.timeout_de(relatorio):g} s."
+            ) from None
+
+    def _descartar_pool_quebrado(self, pool: Executor, erro: BaseException) -> None:
+        """Um processo do pool morreu: o próximo pedido sobe um pool novo."""
+        if not isinstance(erro, BrokenProcessPool):
+            return
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        logger.error(
+            "relatorios_pool_quebrado",
+            extra={"event": "relatorios_pool_quebrado"},
+        )
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _finalizar(self, relatorio: str, inicio: float, futuro, pool: Optional[Executor]) -> None:
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        excecao = None if futuro.cancelled() else futuro.exception()
+        erro = futuro.cancelled() or excecao is not None
+        if pool is not None and excecao is not None:
+            self._descartar_pool_quebrado(pool, excecao)
+        with self._lock:
+            self._pendentes -= 1
+            metricas = self._metricas[relatorio]
+            if erro:
+                metricas.erros += 1
+            else:
+                metricas.concluidos += 1
+                metricas.duracao_total_ms += duracao_ms
+                metricas.duracao_maxima_ms = max(metricas.duracao_maxima_ms, duracao_ms)
+
+    def estatisticas(self) -> dict:
+        """Ocupação da fila e contadores por relatório."""
+        with self._lock:
+            return {
+                "modo": "processos" if self._processos else "threadpool",
+                "processos": self._processos,
+                "capacidade": self._capacidade,
+                "pendentes": self._pendentes,
+                "maior_fila": self._maior_fila,
+                "versao_escrita": self._versao_escrita,
+                "timeout_padrao_segundos": self._timeout,
+                "timeouts_segundos": dict(self._timeouts),
+                "relatorios": {nome: m.como_dict() for nome, m in self._metricas.items()},
+            }
+
+
+# Instância única do processo da API (pool iniciado no lifespan)
+executor_relatorios = ExecutorRelatorios()
@@ -0,0 +1,444 @@
+"""
+Gerador de clientes em massa para benchmarks (milhões de documentos).
+
+A geração (Faker + CPF) é dividida em lotes distribuídos por um pool de
+processos; cada processo gera o lote e grava com
+insert_many(ordered=False), sem passar pelo ClienteCRUD (nada de
+insert_one nem print por documento).
+
+- Reprodutível: cada lote tem a própria semente (semente global + índice
+  do primeiro documento), então o resultado não depende do número de
+  processos nem da ordem em que os lotes terminam.
+- CPFs válidos e sem repetição: os 9 primeiros dígitos saem de uma
+  permutação dos índices (multiplicação módulo 10^9), então índices
+  diferentes nunca geram o mesmo CPF. Por padrão a numeração começa no
+  total atual da coleção: rodar de novo com a mesma semente acrescenta
+  clientes em vez de repetir os anteriores.
+- Distribuições: "faker" (cidade e UF aleatórias, como o antigo
+  gerar_dados.popular_banco) ou "cidades_reais" (cidades reais por UF,
+  capitais com 3x o peso das demais, como o antigo
+  gerar_clientes_cidades_reais).
+- Os documentos já saem com os campos normalizados e atualizado_em; ao
+  final os contadores incrementais são reconciliados.
+
+Uso:
+
+    python -m src.gerador_massa 1000000
+    python -m src.gerador_massa 20000000 --processos 8 --lote 10000 --distribuicao cidades_reais
+"""
+
+import argparse
+import bisect
+import itertools
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from faker import Faker
+from pymongo.errors import BulkWriteError
+
+from config import (
+    GERADOR_LOTE,
+    GERADOR_PROCESSOS,
+    MONGO_COLLECTION_CLIENTES,
+    get_collection,
+    get_mongo_client,
+)
+from logging_config import get_logger
+from src import contadores
+from src.normalizacao import adicionar_campos_normalizados, carimbar_atualizacao, normalizar_texto
+
+
+logger = get_logger(__name__)
+
+DISTRIBUICAO_FAKER = "faker"
+DISTRIBUICAO_CIDADES_REAIS = "cidades_reais"
+DISTRIBUICOES = (DISTRIBUICAO_FAKER, DISTRIBUICAO_CIDADES_REAIS)
+
+SEMENTE_PADRAO = 42
+
+# Cidades reais por UF (capitais + algumas cidades grandes / turísticas);
+# a primeira de cada lista é a capital
+CIDADES_POR_UF = {
+    "AC": ["Rio Branco", "Cruzeiro do Sul"],
+    "AL": ["Maceió", "Arapiraca"],
+    "AP": ["Macapá", "Santana"],
+    "AM": ["Manaus", "Parintins"],
+    "BA": ["Salvador", "Feira de Santana", "Vitória da Conquista", "Porto Seguro"],
+    "CE": ["Fortaleza", "Juazeiro do Norte", "Sobral"],
+    "DF": ["Brasília"],
+    "ES": ["Vitória", "Vila Velha", "Serra"],
+    "GO": ["Goiânia", "Anápolis", "Aparecida de Goiânia"],
+    "MA": ["São Luís", "Imperatriz"],
+    "MT": ["Cuiabá", "Rondonópolis"],
+    "MS": ["Campo Grande", "Dourados"],
+    "MG": ["Belo Horizonte", "Uberlândia", "Juiz de Fora", "Contagem"],
+    "PA": ["Belém", "Santarém", "Ananindeua"],
+    "PB": ["João Pessoa", "Campina Grande"],
+    "PR": ["Curitiba", "Londrina", "Maringá", "Foz do Iguaçu"],
+    "PE": ["Recife", "Olinda", "Caruaru", "Petrolina"],
+    "PI": ["Teresina", "Parnaíba"],
+    "RJ": ["Rio de Janeiro", "Niterói", "Petrópolis", "Campos dos Goytacazes"],
+    "RN": ["Natal", "Mossoró"],
+    "RS": ["Porto Alegre", "Caxias do Sul", "Pelotas", "Gramado"],
+    "RO": ["Porto Velho", "Ji-Paraná"],
+    "RR": ["Boa Vista"],
+    "SC": ["Florianópolis", "Joinville", "Blumenau", "Chapecó"],
+    "SP": ["São Paulo", "Campinas", "Santos", "São José dos Campos", "Ribeirão Preto"],
+    "SE": ["Aracaju", "Nossa Senhora do Socorro"],
+    "TO": ["Palmas", "Araguaína"],
+}
+
+# Peso de cada cidade na distribuição cidades_reais (proporção do gerador antigo:
+# 3000 clientes por capital, 1000 por cidade não capital)
+PESO_CAPITAL = 3000
+PESO_OUTRAS = 1000
+
+_CIDADES: List[Tuple[str, str]] = [
+    (cidade, uf) for uf, cidades in CIDADES_POR_UF.items() for cidade in cidades
+]
+_PESOS_ACUMULADOS: List[int] = list(
+    itertools.accumulate(
+        PESO_CAPITAL if idx == 0 else PESO_OUTRAS
+        for cidades in CIDADES_POR_UF.values()
+        for idx in range(len(cidades))
+    )
+)
+
+_DDDS = ("11", "21", "31", "41", "51", "61", "71", "81", "85", "91")
+_COMPLEMENTOS = ("", "", "Casa", "Apto {}", "Bloco {}")
+
+# Ímpar e não múltiplo de 5: multiplicar por ele é uma permutação módulo 10^9
+_MULTIPLICADOR_CPF = 387_420_489
+_MODULO_CPF = 10**9
+
+
+# ----------------------------------------------------------------------
+# Geração
+# ----------------------------------------------------------------------
+
+
+def digitos_verificadores_cpf(base: str) -> str:
+    """Os 2 dígitos verificadores dos 9 primeiros dígitos do CPF."""
+    digitos = [int(d) for d in base]
+    for tamanho in (9, 10):
+        soma = sum((tamanho + 1 - i) * digitos[i] for i in range(tamanho))
+        digito = 11 - soma % 11
+        digitos.append(0 if digito > 9 else digito)
+    return "".join(map(str, digitos[9:]))
+
+
+def cpf_do_indice(indice: int, deslocamento: int = 0) -> str:
+    """CPF válido, distinto para cada índice < 10^9 (com o mesmo deslocamento)."""
+    base = f"{(indice * _MULTIPLICADOR_CPF + deslocamento) % _MODULO_CPF:09d}"
+    return base + digitos_verificadores_cpf(base)
+
+
+def deslocamento_cpf(semente: int) -> int:
+    return random.Random(f"cpf:{semente}").randrange(_MODULO_CPF)
+
+
+_fakers = threading.local()
+
+
+def _faker() -> Faker:
+    # Criar um Faker custa milissegundos: um por thread/processo, ressemeado por lote
+    if not hasattr(_fakers, "fake"):
+        _fakers.fake = Faker("pt_BR")
+    return _fakers.fake
+
+
+def gerar_documentos(
+    inicio: int,
+    quantidade: int,
+    semente: int = SEMENTE_PADRAO,
+    distribuicao: str = DISTRIBUICAO_FAKER,
+    agora: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Documentos dos índices [inicio, inicio + quantidade), no formato da
+    coleção (com campos normalizados; atualizado_em é carimbado na
+    gravação). Mesmos argumentos (e mesmo `agora`), mesmos documentos.
+    """
+    if distribuicao not in DISTRIBUICOES:
+        raise ValueError(f"Distribuição inválida: {distribuicao!r} (use {', '.join(DISTRIBUICOES)})")
+
+    semente_lote = f"{semente}:{inicio}"
+    rng = random.Random(semente_lote)
+    fake = _faker()
+    fake.seed_instance(semente_lote)
+    agora = agora or datetime.now()
+    deslocamento = deslocamento_cpf(semente)
+    total_pesos = _PESOS_ACUMULADOS[-1]
+
+    docs = []
+    for indice in range(inicio, inicio + quantidade):
+        primeiro_nome = fake.first_name()
+        sobrenome = fake.last_name()
+        nome = f"{primeiro_nome} {sobrenome}"
+
+        if distribuicao == DISTRIBUICAO_CIDADES_REAIS:
+            cidade, uf = _CIDADES[bisect.bisect_right(_PESOS_ACUMULADOS, rng.randrange(total_pesos))]
+        else:
+            cidade, uf = fake.city(), fake.estado_sigla()
+
+        # Índice no e-mail: único mesmo com nomes repetidos
+        usuario = normalizar_texto(nome).replace(" ", ".")
+        nascimento = agora - timedelta(days=rng.randint(18 * 365, 80 * 365))
+
+        docs.append(
+            adicionar_campos_normalizados(
+                {
+                    "nome": nome,
+                    "cpf": cpf_do_indice(indice, deslocamento),
+                    "email": f"{usuario}.{indice}@{fake.free_email_domain()}",
+                    "telefone": f"({rng.choice(_DDDS)}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                    "data_nascimento": nascimento.strftime("%Y-%m-%d"),
+                    "endereco": {
+                        "rua": fake.street_name(),
+                        "numero": str(rng.randint(1, 9999)),
+                        "complemento": rng.choice(_COMPLEMENTOS).format(rng.randint(1, 500)),
+                        "bairro": fake.bairro(),
+                        "cidade": cidade,
+                        "estado": uf,
+                        "cep": f"{rng.randrange(10**8):08d}",
+                    },
+                    # 90% ativos, 10% inativos
+                    "status": "ativo" if rng.random() < 0.9 else "inativo",
+                    "data_cadastro": agora - timedelta(seconds=rng.randint(86_400, 730 * 86_400)),
+                }
+            )
+        )
+    return docs
+
+
+# ----------------------------------------------------------------------
+# Gravação
+# ----------------------------------------------------------------------
+
+
+def _novo_resultado() -> dict:
+    return {
+        "gerados": 0,
+        "inseridos": 0,
+        "duplicados": 0,
+        "erros": 0,
+        "segundos_geracao": 0.0,
+        "segundos_insercao": 0.0,
+    }
+
+
+def _gerar_e_inserir_lote(
+    database: str,
+    nome_colecao: str,
+    inicio: int,
+    quantidade: int,
+    semente: int,
+    distribuicao: str,
+) -> dict:
+    """Gera e grava um lote (roda em um worker do pool)."""
+    colecao = get_mongo_client()[database][nome_colecao]
+    resultado = _novo_resultado()
+
+    t0 = time.perf_counter()
+    docs = gerar_documentos(inicio, quantidade, semente, distribuicao)
+    t1 = time.perf_counter()
+
+    agora = datetime.now(timezone.utc)
+    for doc in docs:
+        carimbar_atualizacao(doc, agora)
+    try:
+        resultado["inseridos"] = len(colecao.insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        erros = e.details.get("writeErrors", [])
+        resultado["inseridos"] = e.details.get("nInserted", 0)
+        resultado["duplicados"] = sum(1 for erro in erros if erro.get("code") == 11000)
+        resultado["erros"] = len(erros) - resultado["duplicados"]
+        if resultado["erros"]:
+            logger.warning(
+                f"gerador_massa_erros_no_lote inicio={inicio} erros={resultado['erros']} "
+                f"primeiro={next(erro.get('errmsg') for erro in erros if erro.get('code') != 11000)}",
+                extra={"event": "gerador_massa_erros_no_lote"},
+            )
+
+    resultado["gerados"] = len(docs)
+    resultado["segundos_geracao"] = t1 - t0
+    resultado["segundos_insercao"] = time.perf_counter() - t1
+    return resultado
+
+
+def gerar_em_massa(
+    quantidade: int,
+    processos: int = GERADOR_PROCESSOS,
+    lote: int = GERADOR_LOTE,
+    distribuicao: str = DISTRIBUICAO_FAKER,
+    semente: int = SEMENTE_PADRAO,
+    inicio: Optional[int] = None,
+    colecao=None,
+    reconciliar_contadores: bool = True,
+    progresso: Optional[Callable[[dict], None]] = None,
+    intervalo_progresso: float = 5.0,
+) -> dict:
+    """
+    Gera e insere `quantidade` clientes em lotes de `lote` documentos,
+    usando `processos` processos (0 = threads do próprio processo).
+
+    `inicio` é o índice do primeiro documento (padrão: total atual da
+    coleção). Devolve os totais e as taxas ("gerados_por_segundo",
+    "inseridos_por_segundo"); `progresso` recebe o mesmo resumo parcial
+    a cada `intervalo_progresso` segundos.
+    """
+    if distribuicao not in DISTRIBUICOES:
+        raise ValueError(f"Distribuição inválida: {distribuicao!r} (use {', '.join(DISTRIBUICOES)})")
+    if colecao is None:
+        colecao = get_collection().collection
+    if inicio is None:
+        inicio = colecao.estimated_document_count()
+
+    lotes = [
+        (inicio_lote, min(lote, inicio + quantidade - inicio_lote))
+        for inicio_lote in range(inicio, inicio + quantidade, lote)
+    ]
+    if processos > 0:
+        pool = ProcessPoolExecutor(
+            max_workers=min(processos, max(1, len(lotes))),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        workers = processos
+    else:
+        workers = 4
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gerador")
+
+    logger.info(
+        f"gerador_massa_iniciado quantidade={quantidade} lotes={len(lotes)} processos={processos} "
+        f"distribuicao={distribuicao} semente={semente} inicio={inicio}",
+        extra={"event": "gerador_massa_iniciado", "collection": colecao.name},
+    )
+
+    total = _novo_resultado()
+    comeco = time.perf_counter()
+    ultimo_progresso = comeco
+
+    def resumo() -> Dict[str, float]:
+        segundos = max(time.perf_counter() - comeco, 1e-9)
+        return {
+            **total,
+            "segundos": round(segundos, 3),
+            "gerados_por_segundo": round(total["gerados"] / segundos, 1),
+            "inseridos_por_segundo": round(total["inseridos"] / segundos, 1),
+        }
+
+    with pool:
+        pendentes = iter(lotes)
+        em_andamento = set()
+        while True:
+            # No máximo 2 lotes por worker em voo: os lotes ficam no worker, não na fila
+            for inicio_lote, tamanho in itertools.islice(pendentes, 2 * workers - len(em_andamento)):
+                em_andamento.add(
+                    pool.submit(
+                        _gerar_e_inserir_lote,
+                        colecao.database.name,
+                        colecao.name,
+                        inicio_lote,
+                        tamanho,
+                        semente,
+                        distribuicao,
+                    )
+                )
+            if not em_andamento:
+                break
+            prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                for chave, valor in futuro.result().items():
+                    total[chave] += valor
+
+            agora = time.perf_counter()
+            if progresso is not None and agora - ultimo_progresso >= intervalo_progresso:
+                progresso(resumo())
+                ultimo_progresso = agora
+
+    resultado = resumo()
+    if reconciliar_contadores and colecao.name == MONGO_COLLECTION_CLIENTES:
+        # insert_many não passa pelo registro incremental dos contadores
+        contadores.reconciliar(aplicar=True, colecao_clientes=colecao)
+
+    logger.info(
+        f"gerador_massa_concluido gerados={resultado['gerados']} inseridos={resultado['inseridos']} "
+        f"duplicados={resultado['duplicados']} erros={resultado['erros']} "
+        f"gerados_por_segundo={resultado['gerados_por_segundo']} "
+        f"inseridos_por_segundo={resultado['inseridos_por_segundo']}",
+        extra={"event": "gerador_massa_concluido", "collection": colecao.name},
+    )
+    return resultado
+
+
+def imprimir_resultado(resultado: dict) -> None:
+    print(f"\n{'='*60}")
+    print("RESULTADO:")
+    print(f"✓ Clientes inseridos: {resultado['inseridos']:,}")
+    if resultado["duplicados"]:
+        print(f"✗ CPFs já cadastrados (ignorados): {resultado['duplicados']:,}")
+    if resultado["erros"]:
+        print(f"✗ Outros erros (ver log): {resultado['erros']:,}")
+    print(f"⏱  Tempo total: {resultado['segundos']:.1f}s")
+    print(f"🎲 Gerados:   {resultado['gerados_por_segundo']:,.0f} clientes/s")
+    print(f"💾 Inseridos: {resultado['inseridos_por_segundo']:,.0f} clientes/s")
+    tempo_workers = resultado["segundos_geracao"] + resultado["segundos_insercao"]
+    if tempo_workers:
+        print(
+            f"   Tempo dos workers: {resultado['segundos_geracao'] / tempo_workers:.0%} gerando, "
+            f"{resultado['segundos_insercao'] / tempo_workers:.0%} gravando"
+        )
+    print(f"{'='*60}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera clientes fictícios em massa para benchmarks")
+    parser.add_argument("quantidade", type=int, help="clientes a gerar")
+    parser.add_argument(
+        "--processos", type=int, default=GERADOR_PROCESSOS, help="processos (0 = threads do próprio processo)"
+    )
+    parser.add_argument("--lote", type=int, default=GERADOR_LOTE, help="documentos por insert_many")
+    parser.add_argument("--distribuicao", choices=DISTRIBUICOES, default=DISTRIBUICAO_FAKER)
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument(
+        "--inicio", type=int, default=None, help="índice do primeiro cliente (padrão: total atual da coleção)"
+    )
+    parser.add_argument("--colecao", default=None, help="gerar em outra coleção do mesmo banco")
+    args = parser.parse_args(argv)
+
+    colecao = get_collection().collection
+    if args.colecao:
+        colecao = colecao.database[args.colecao]
+
+    print(
+        f"🎲 Gerando {args.quantidade:,} clientes ({args.distribuicao}) em "
+        f"{colecao.database.name}.{colecao.name} com {args.processos} processos..."
+    )
+
+    def mostrar_progresso(parcial):
+        print(
+            f"   {parcial['inseridos']:,}/{args.quantidade:,} inseridos "
+            f"({parcial['inseridos_por_segundo']:,.0f}/s)"
+        )
+
+    resultado = gerar_em_massa(
+        args.quantidade,
+        processos=args.processos,
+        lote=args.lote,
+        distribuicao=args.distribuicao,
+        semente=args.semente,
+        inicio=args.inicio,
+        colecao=colecao,
+        progresso=mostrar_progresso,
+    )
+    imprimir_resultado(resultado)
+    return 1 if resultado["erros"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
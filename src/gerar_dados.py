@@ -1,8 +1,17 @@
 from faker import Faker
-from cliente_model import Cliente
-from cliente_crud import ClienteCRUD
 from datetime import datetime, timedelta
 import random
+from typing import Optional
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.cliente_model import Cliente
+from src.gerador_massa import DISTRIBUICAO_FAKER, gerar_em_massa, imprimir_resultado
 
 # Inicializar Faker com localização brasileira
 fake = Faker('pt_BR')
@@ -78,54 +87,35 @@ def gerar_cliente_aleatorio() -> Cliente:
     
     return cliente
 
-def popular_banco(quantidade: int = 1000):
+def popular_banco(quantidade: int = 1000, processos: Optional[int] = None):
     """
     Popula o banco de dados com clientes fictícios
-    
+
+    Usa o gerador em massa (src/gerador_massa.py): lotes gerados em
+    paralelo e gravados com insert_many, em vez de um insert_one por
+    cliente.
+
     Args:
         quantidade: Número de clientes a serem gerados
+        processos: Processos do gerador (padrão: GERADOR_PROCESSOS)
     """
     print(f"\n{'='*60}")
     print(f"GERADOR DE DADOS FICTÍCIOS - SISTEMA DE CLIENTES")
     print(f"{'='*60}\n")
-    
-    # Conectar ao banco
-    crud = ClienteCRUD()
-    
-    # Verificar quantos clientes já existem
-    total_existente = crud.contar_clientes()
-    print(f"📊 Clientes já cadastrados: {total_existente}")
-    print(f"🎲 Gerando {quantidade} novos clientes fictícios...\n")
-    
-    sucesso = 0
-    erro = 0
-    
-    for i in range(quantidade):
-        try:
-            cliente = gerar_cliente_aleatorio()
-            if crud.criar_cliente(cliente):
-                sucesso += 1
-            else:
-                erro += 1
-            
-            # Mostrar progresso a cada 100 clientes
-            if (i + 1) % 100 == 0:
-                print(f"Progresso: {i + 1}/{quantidade} clientes processados...")
-                
-        except Exception as e:
-            erro += 1
-            print(f"Erro ao gerar cliente {i + 1}: {e}")
-    
-    print(f"\n{'='*60}")
-    print(f"RESULTADO:")
-    print(f"✓ Clientes criados com sucesso: {sucesso}")
-    print(f"✗ Erros (CPF duplicado ou outros): {erro}")
-    print(f"📊 Total de clientes no banco: {crud.contar_clientes()}")
-    print(f"{'='*60}\n")
-    
-    crud.fechar_conexao()
+    print(f"🎲 Gerando {quantidade:,} novos clientes fictícios...\n")
+
+    opcoes = {} if processos is None else {"processos": processos}
+    resultado = gerar_em_massa(
+        quantidade,
+        distribuicao=DISTRIBUICAO_FAKER,
+        progresso=lambda parcial: print(
+            f"Progresso: {parcial['inseridos']:,}/{quantidade:,} clientes inseridos..."
+        ),
+        **opcoes,
+    )
+    imprimir_resultado(resultado)
+    return resultado
 
 # Executar se o arquivo for rodado diretamente
 if __name__ == "__main__":
-    # Gerar 1500 clientes fictícios
     popular_banco(100000)
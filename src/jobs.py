@@ -0,0 +1,511 @@
+"""
+Jobs de relatórios demorados em segundo plano (rotas /jobs da API).
+
+Relatórios que não cabem em uma requisição HTTP síncrona (exportação
+completa, análise avançada com Pandas, dashboard executivo) viram jobs:
+
+- POST /jobs/{relatorio} grava o job na coleção `jobs` e devolve o id;
+- um pool de threads (JOBS_MAX_CONCORRENTES) executa os jobs e grava o
+  progresso no próprio documento;
+- GET /jobs/{id} consulta o estado; GET /jobs/{id}/result baixa o arquivo.
+
+Deduplicação: enquanto um job está pendente/executando, o documento
+guarda `chave_ativa` (relatório + parâmetros), com índice único parcial.
+Um segundo pedido idêntico recebe o job que já está em andamento em vez
+de disparar outro. Ao terminar, `chave_ativa` é removida.
+
+Os arquivos ficam em JOBS_DIRETORIO/<id>/ (compartilhe a pasta se houver
+mais de uma réplica da API). Jobs encerrados há mais de
+JOBS_RETENCAO_HORAS somem: o documento por índice TTL em `concluido_em`,
+a pasta pela limpeza que roda na subida e ao fim de cada job
+(GerenciadorJobs.limpar_expirados). Jobs deste host que estavam rodando quando o
+processo caiu são marcados como erro na próxima subida
+(GerenciadorJobs.iniciar), o que pressupõe um processo da API por host,
+como no Dockerfile.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from config import (
+    JOBS_DIRETORIO,
+    JOBS_FILA_MAX,
+    JOBS_MAX_CONCORRENTES,
+    JOBS_RETENCAO_HORAS,
+    MONGO_COLLECTION_JOBS,
+    get_collection,
+)
+from logging_config import get_logger
+from src.executor_relatorios import FilaCheiaError
+
+
+logger = get_logger(__name__)
+
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+# Intervalo mínimo entre gravações de progresso no MongoDB
+_INTERVALO_PROGRESSO_SEGUNDOS = 1.0
+
+# Identifica o processo que executa o job (recuperação após reinício)
+_HOST = socket.gethostname()
+_EXECUTOR = f"{_HOST}:{os.getpid()}"
+
+Progresso = Callable[[float, str], None]
+
+# Content-Type do download pela extensão do arquivo gerado
+_MEDIA_TYPES = {
+    ".zip": "application/zip",
+    ".csv": "text/csv; charset=utf-8",
+    ".ndjson": "application/x-ndjson",
+}
+
+
+@dataclass(frozen=True)
+class RelatorioJob:
+    """
+    Relatório executável como job.
+
+    `executar(parametros, pasta, progresso)` grava o artefato dentro de
+    `pasta` e devolve o caminho do arquivo final. `validar(parametros)`
+    devolve os parâmetros normalizados ou levanta ValueError.
+    """
+
+    executar: Callable[[dict, Path, Progresso], Path]
+    validar: Optional[Callable[[dict], dict]] = None
+    descricao: str = ""
+
+
+RELATORIOS_JOBS: Dict[str, RelatorioJob] = {}
+
+
+def registrar_relatorio(nome: str, relatorio: RelatorioJob) -> None:
+    RELATORIOS_JOBS[nome] = relatorio
+
+
+def chave_job(relatorio: str, parametros: dict) -> str:
+    """Identidade de um pedido: relatório + parâmetros (ordem das chaves não importa)."""
+    texto = json.dumps({"relatorio": relatorio, "parametros": parametros}, sort_keys=True, default=str)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def compactar(arquivos: List[Path], destino: Path) -> Path:
+    """Junta os arquivos gerados em um .zip (nomes sem a pasta)."""
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for arquivo in arquivos:
+            zf.write(arquivo, arcname=arquivo.name)
+    return destino
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ----------------------------------------------------------------------
+# Relatórios de terminal como jobs
+# ----------------------------------------------------------------------
+
+def _executar_dashboard(parametros: dict, pasta: Path, progresso: Progresso) -> Path:
+    from src.dashboard_executivo import gerar_dashboard_executivo
+
+    progresso(10, "calculando dashboard executivo")
+    arquivos = gerar_dashboard_executivo(destino=pasta / "csv")
+    progresso(90, "compactando")
+    return compactar(arquivos, pasta / "dashboard_executivo.zip")
+
+
+def _executar_analise_avancada(parametros: dict, pasta: Path, progresso: Progresso) -> Path:
+    from scripts.analise_clientes_avancada_pandas import (
+        analise_avancada,
+        carregar_relatorios_materializados,
+    )
+
+    progresso(10, "lendo relatórios materializados")
+    tabelas = carregar_relatorios_materializados()
+    progresso(50, "calculando análises")
+    arquivos = analise_avancada(tabelas, destino=pasta / "csv")
+    if not arquivos:
+        raise LookupError("Nenhum cliente encontrado nos relatórios materializados.")
+    progresso(90, "compactando")
+    return compactar(arquivos, pasta / "analise_avancada.zip")
+
+
+registrar_relatorio(
+    "dashboard_executivo",
+    RelatorioJob(
+        executar=_executar_dashboard,
+        descricao="CSVs do dashboard executivo (top UFs, top cidades, faixa etária).",
+    ),
+)
+registrar_relatorio(
+    "analise_avancada",
+    RelatorioJob(
+        executar=_executar_analise_avancada,
+        descricao="CSVs da análise avançada com Pandas (status, UFs, cidades, faixas, domínios).",
+    ),
+)
+
+
+# ----------------------------------------------------------------------
+# Gerenciador
+# ----------------------------------------------------------------------
+
+def _serializar(job: dict) -> dict:
+    """Documento do job pronto para JSON (datas em ISO, sem campos internos)."""
+    saida = {}
+    for campo, valor in job.items():
+        if campo in ("chave_ativa", "artefato"):
+            continue
+        if isinstance(valor, datetime):
+            if valor.tzinfo is None:
+                valor = valor.replace(tzinfo=timezone.utc)
+            valor = valor.isoformat()
+        saida["id" if campo == "_id" else campo] = valor
+    return saida
+
+
+class GerenciadorJobs:
+    """
+    Cria, executa e consulta jobs.
+
+    Args:
+        max_concorrentes: jobs executando ao mesmo tempo neste processo.
+        fila_max: jobs aguardando além dos que estão executando; acima
+            disso, criar() levanta FilaCheiaError (a API responde 503).
+        diretorio: pasta dos arquivos gerados.
+        retencao_horas: tempo que um job encerrado e seu arquivo ficam
+            disponíveis (0 = para sempre).
+    """
+
+    def __init__(
+        self,
+        max_concorrentes: int = JOBS_MAX_CONCORRENTES,
+        fila_max: int = JOBS_FILA_MAX,
+        diretorio: Path = JOBS_DIRETORIO,
+        retencao_horas: float = JOBS_RETENCAO_HORAS,
+    ):
+        self._max_concorrentes = max(1, max_concorrentes)
+        self._capacidade = self._max_concorrentes + max(0, fila_max)
+        self._diretorio = Path(diretorio)
+        self._retencao_horas = max(0.0, retencao_horas)
+
+        self._colecao = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._indices_ok = False
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def _jobs(self):
+        if self._colecao is None:
+            self._colecao = get_collection().db[MONGO_COLLECTION_JOBS]
+        if not self._indices_ok:
+            # Índice único parcial: só jobs ativos disputam a mesma chave
+            self._colecao.create_index(
+                [("chave_ativa", ASCENDING)],
+                name="chave_ativa_1",
+                unique=True,
+                partialFilterExpression={"chave_ativa": {"$exists": True}},
+            )
+            self._colecao.create_index(
+                [("relatorio", ASCENDING), ("criado_em", DESCENDING)],
+                name="relatorio_criado_em_1",
+            )
+            if self._retencao_horas > 0:
+                self._garantir_indice_ttl()
+            self._indices_ok = True
+        return self._colecao
+
+    def _garantir_indice_ttl(self) -> None:
+        """TTL em concluido_em (só jobs encerrados têm o campo)."""
+        segundos = int(self._retencao_horas * 3600)
+        try:
+            self._colecao.create_index(
+                [("concluido_em", ASCENDING)],
+                name="concluido_em_ttl",
+                expireAfterSeconds=segundos,
+            )
+        except OperationFailure:
+            # Índice já existe com outra retenção: ajusta no lugar
+            self._colecao.database.command(
+                "collMod",
+                self._colecao.name,
+                index={"name": "concluido_em_ttl", "expireAfterSeconds": segundos},
+            )
+
+    def iniciar(self, colecao=None) -> None:
+        """
+        Prepara o pool e marca como erro os jobs deste host que ficaram
+        pendentes/executando de um processo anterior.
+        """
+        if colecao is not None:
+            self._colecao = colecao
+        with self._lock:
+            self._garantir_pool()
+
+        resultado = self._jobs().update_many(
+            {
+                "status": {"$in": [STATUS_PENDENTE, STATUS_EXECUTANDO]},
+                "host": _HOST,
+                "executor": {"$ne": _EXECUTOR},
+            },
+            {
+                "$set": {
+                    "status": STATUS_ERRO,
+                    "erro": "Job interrompido pelo reinício da API.",
+                    "concluido_em": _agora(),
+                },
+                "$unset": {"chave_ativa": ""},
+            },
+        )
+        if resultado.modified_count:
+            logger.warning(
+                f"jobs_interrompidos total={resultado.modified_count}",
+                extra={"event": "jobs_interrompidos"},
+            )
+        self.limpar_expirados()
+
+    def limpar_expirados(self) -> int:
+        """
+        Apaga as pastas (e os documentos) de jobs encerrados há mais de
+        retencao_horas. Pastas sem documento (já removido pelo TTL) saem
+        pela data de modificação. Devolve quantas pastas foram apagadas.
+        """
+        if self._retencao_horas <= 0 or not self._diretorio.is_dir():
+            return 0
+        limite = _agora() - timedelta(hours=self._retencao_horas)
+        jobs = self._jobs()
+
+        removidas = 0
+        for pasta in self._diretorio.iterdir():
+            if not pasta.is_dir():
+                continue
+            job = jobs.find_one({"_id": pasta.name}, {"status": 1, "concluido_em": 1})
+            if job is None:
+                modificada = datetime.fromtimestamp(pasta.stat().st_mtime, timezone.utc)
+                expirado = modificada < limite
+            else:
+                concluido_em = job.get("concluido_em")
+                if concluido_em is not None and concluido_em.tzinfo is None:
+                    concluido_em = concluido_em.replace(tzinfo=timezone.utc)
+                expirado = (
+                    job.get("status") in (STATUS_CONCLUIDO, STATUS_ERRO)
+                    and concluido_em is not None
+                    and concluido_em < limite
+                )
+            if not expirado:
+                continue
+            shutil.rmtree(pasta, ignore_errors=True)
+            jobs.delete_one({"_id": pasta.name})
+            removidas += 1
+
+        if removidas:
+            logger.info(
+                f"jobs_expirados_removidos total={removidas}",
+                extra={"event": "jobs_expirados_removidos"},
+            )
+        return removidas
+
+    def parar(self) -> None:
+        """Encerra o pool; jobs ainda não iniciados ficam para a recuperação."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _garantir_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._max_concorrentes, thread_name_prefix="jobs"
+            )
+        return self._pool
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def criar(self, relatorio: str, parametros: Optional[dict] = None) -> Tuple[dict, bool]:
+        """
+        Cria o job (ou reaproveita um idêntico em andamento).
+
+        Returns:
+            (job serializado, True se foi criado agora / False se deduplicado).
+
+        Raises:
+            KeyError: relatório desconhecido.
+            ValueError: parâmetros inválidos.
+            FilaCheiaError: fila de jobs deste processo no limite.
+        """
+        if relatorio not in RELATORIOS_JOBS:
+            raise KeyError(relatorio)
+        definicao = RELATORIOS_JOBS[relatorio]
+        parametros = dict(parametros or {})
+        if definicao.validar is not None:
+            parametros = definicao.validar(parametros)
+
+        chave = chave_job(relatorio, parametros)
+        jobs = self._jobs()
+
+        existente = jobs.find_one({"chave_ativa": chave})
+        if existente is not None:
+            return _serializar(existente), False
+
+        with self._lock:
+            if self._pendentes >= self._capacidade:
+                raise FilaCheiaError(
+                    f"Fila de jobs cheia ({self._pendentes} pendentes); tente novamente."
+                )
+            self._pendentes += 1
+
+        job = {
+            "_id": str(ObjectId()),
+            "relatorio": relatorio,
+            "parametros": parametros,
+            "chave_ativa": chave,
+            "status": STATUS_PENDENTE,
+            "progresso": 0.0,
+            "mensagem": "aguardando execução",
+            "host": _HOST,
+            "executor": _EXECUTOR,
+            "criado_em": _agora(),
+        }
+        try:
+            jobs.insert_one(job)
+        except DuplicateKeyError:
+            # Outro pedido idêntico ganhou a corrida
+            with self._lock:
+                self._pendentes -= 1
+            existente = jobs.find_one({"chave_ativa": chave})
+            if existente is None:
+                return self.criar(relatorio, parametros)
+            return _serializar(existente), False
+
+        with self._lock:
+            pool = self._garantir_pool()
+        pool.submit(self._executar, job["_id"], relatorio, parametros)
+
+        logger.info(
+            f"job_criado id={job['_id']} relatorio={relatorio}",
+            extra={"event": "job_criado"},
+        )
+        return _serializar(job), True
+
+    def obter(self, job_id: str) -> Optional[dict]:
+        job = self._jobs().find_one({"_id": job_id})
+        return _serializar(job) if job is not None else None
+
+    def resultado(self, job_id: str) -> Optional[Tuple[dict, Optional[Path], str]]:
+        """(job serializado, caminho do arquivo se concluído, media_type) ou None."""
+        job = self._jobs().find_one({"_id": job_id})
+        if job is None:
+            return None
+        artefato = Path(job["artefato"]) if job.get("artefato") else None
+        media_type = _MEDIA_TYPES.get(artefato.suffix if artefato else "", "application/octet-stream")
+        return _serializar(job), artefato, media_type
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "max_concorrentes": self._max_concorrentes,
+                "capacidade": self._capacidade,
+                "pendentes": self._pendentes,
+            }
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    def _executar(self, job_id: str, relatorio: str, parametros: dict) -> None:
+        jobs = self._jobs()
+        pasta = self._diretorio / job_id
+        inicio = time.perf_counter()
+        ultima_gravacao = 0.0
+
+        def progresso(percentual: float, mensagem: str) -> None:
+            nonlocal ultima_gravacao
+            agora = time.monotonic()
+            if agora - ultima_gravacao < _INTERVALO_PROGRESSO_SEGUNDOS:
+                return
+            ultima_gravacao = agora
+            jobs.update_one(
+                {"_id": job_id},
+                {"$set": {"progresso": round(min(max(float(percentual), 0.0), 100.0), 1), "mensagem": mensagem}},
+            )
+
+        try:
+            jobs.update_one(
+                {"_id": job_id},
+                {"$set": {"status": STATUS_EXECUTANDO, "iniciado_em": _agora(), "mensagem": "executando"}},
+            )
+            pasta.mkdir(parents=True, exist_ok=True)
+            artefato = RELATORIOS_JOBS[relatorio].executar(parametros, pasta, progresso)
+
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            jobs.update_one(
+                {"_id": job_id},
+                {
+                    "$set": {
+                        "status": STATUS_CONCLUIDO,
+                        "progresso": 100.0,
+                        "mensagem": "concluído",
+                        "artefato": str(artefato),
+                        "arquivo": artefato.name,
+                        "tamanho_bytes": artefato.stat().st_size,
+                        "duracao_ms": round(duracao_ms, 2),
+                        "concluido_em": _agora(),
+                    },
+                    "$unset": {"chave_ativa": ""},
+                },
+            )
+            logger.info(
+                f"job_concluido id={job_id} relatorio={relatorio} duracao_ms={duracao_ms:.0f}",
+                extra={"event": "job_concluido", "duration_ms": round(duracao_ms, 2)},
+            )
+        except Exception as e:
+            logger.exception(
+                f"job_erro id={job_id} relatorio={relatorio}",
+                extra={"event": "job_erro"},
+            )
+            shutil.rmtree(pasta, ignore_errors=True)
+            jobs.update_one(
+                {"_id": job_id},
+                {
+                    "$set": {"status": STATUS_ERRO, "erro": str(e), "concluido_em": _agora()},
+                    "$unset": {"chave_ativa": ""},
+                },
+            )
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+
+        try:
+            self.limpar_expirados()
+        except Exception:
+            logger.exception(
+                "jobs_limpeza_erro",
+                extra={"event": "jobs_limpeza_erro"},
+            )
+
+
+# Instância única do processo, usada pela API
+gerenciador_jobs = GerenciadorJobs()
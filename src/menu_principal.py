@@ -1,5 +1,6 @@
 from src.cliente_crud import ClienteCRUD
 from src.cliente_model import Cliente
+from src.normalizacao import normalizar_texto
 import os
 from datetime import datetime
 from src.relatorio_faixa_etaria import gerar_relatorio_faixa_etaria
@@ -70,25 +71,13 @@ def exibir_cliente_detalhado(cliente: Cliente):
 
 def menu_buscar_cliente(crud: ClienteCRUD):
     """Menu de busca de clientes"""
-    import unicodedata
-
-    def normalizar(txt: str) -> str:
-        """Remove acentos e converte para minúsculo para comparar."""
-        if not txt:
-            return ""
-        txt = txt.strip().lower()
-        return "".join(
-            c for c in unicodedata.normalize("NFD", txt)
-            if unicodedata.category(c) != "Mn"
-        )
-
     limpar_tela()
     exibir_cabecalho()
     print("BUSCAR CLIENTE\n")
 
     print("1. Buscar por CPF (exato)")
-    print("2. Buscar por nome (contém)")
-    print("3. Buscar por cidade e estado")
+    print("2. Buscar por nome (começa com)")
+    print("3. Buscar por cidade (começa com) e estado")
     print("0. Voltar")
 
     opcao = input("\nEscolha uma opção: ").strip()
@@ -107,11 +96,8 @@ def menu_buscar_cliente(crud: ClienteCRUD):
         pausar()
         return
 
-    # Carrega todos os clientes de uma vez
-    todos = crud.listar_todos(0)  # 0 = sem limite
-
-    if not todos:
-        print("\n✗ Nenhum cliente cadastrado.")
+    if opcao not in ("2", "3"):
+        print("\n✗ Opção inválida.")
         pausar()
         return
 
@@ -120,47 +106,23 @@ def menu_buscar_cliente(crud: ClienteCRUD):
 
     filtrados = []
 
-    # --- Opção 2: nome contém ---
+    # --- Opção 2: nome começa com (filtrado e limitado no MongoDB) ---
     if opcao == "2":
-        termo = input("\nTermo de busca no nome: ").strip()
-        if not termo:
+        termo = input("\nInício do nome: ").strip()
+        if not normalizar_texto(termo):
             print("\n✗ Termo de busca vazio.")
             pausar()
             return
 
-        termo_norm = normalizar(termo)
-        for c in todos:
-            if termo_norm in normalizar(c.nome):
-                filtrados.append(c)
+        filtrados = crud.buscar_por_prefixo_nome(termo, limite=limite)
 
-    # --- Opção 3: cidade/UF ---
-    elif opcao == "3":
+    # --- Opção 3: cidade/UF (filtrado e limitado no MongoDB) ---
+    else:
         print("\nBuscar por cidade e estado (deixe em branco para não filtrar por um campo):")
         cidade_in = input("Cidade: ").strip()
         uf_in = input("UF (ex: SP): ").strip()
 
-        cidade_norm = normalizar(cidade_in)
-        uf_norm = normalizar(uf_in)
-
-        for c in todos:
-            end = c.endereco or {}
-            cidade_cli = normalizar(end.get("cidade", ""))
-            uf_cli = normalizar(end.get("estado", "") or end.get("uf", ""))
-
-            if cidade_norm and cidade_norm not in cidade_cli:
-                continue
-            if uf_norm and uf_norm != uf_cli:
-                continue
-            filtrados.append(c)
-
-    else:
-        print("\n✗ Opção inválida.")
-        pausar()
-        return
-
-    # Aplica limite e exibe
-    if limite > 0:
-        filtrados = filtrados[:limite]
+        filtrados = crud.buscar_por_cidade_uf(cidade_in, uf_in, limite=limite)
 
     if filtrados:
         print(f"\n✓ {len(filtrados)} cliente(s) encontrado(s):\n")
@@ -0,0 +1,951 @@
+"""
+Motor de backup em streaming da coleção de clientes.
+
+Memória constante em qualquer tamanho de base:
+
+- lê a coleção com um cursor do servidor (ordenado por _id, em lotes de
+  BACKUP_BATCH_SIZE), sem montar lista em memória;
+- grava os documentos em chunks de até BACKUP_DOCS_POR_CHUNK documentos,
+  comprimidos (gzip; zstd se o pacote zstandard estiver instalado) à
+  medida que chegam. Formatos:
+    * ndjson: um documento por linha em Extended JSON canônico
+      (bson.json_util; preserva ObjectId, datas e int32/int64/double);
+    * bson: documentos BSON concatenados (cada um já traz o próprio
+      tamanho), copiados crus do servidor, sem decodificar;
+- o SHA-256 de cada chunk é calculado enquanto o arquivo é escrito;
+- no final grava manifesto.json (contagens, _id inicial/final e
+  checksum por chunk). O manifesto é escrito por último e de forma
+  atômica: backup sem manifesto está incompleto.
+
+verificar_backup_streaming() relê cada chunk uma vez, conferindo o
+checksum e decodificando os documentos em fluxo (memória constante).
+ler_documentos() devolve os documentos de um backup, um a um.
+
+Modo paralelo (fazer_backup_paralelo): a coleção é dividida em
+BACKUP_PARTICOES faixas de _id (limites tirados de uma amostra com
+$sample, ou de $bucketAuto), e cada faixa é exportada por um processo
+próprio, com cursor e arquivos próprios (parte-000-00000.ndjson.gz...).
+O manifesto único lista as partições e, em cada chunk, a partição de
+origem, então a restauração também pode rodar por partição em paralelo.
+Como no modo simples, não é uma fotografia de um instante: escritas
+durante o backup podem ou não aparecer.
+
+Incrementais (fazer_backup_incremental): todo caminho de escrita (API,
+ClienteCRUD, gerador em massa e os scripts de manutenção/backfill em
+scripts/) grava atualizado_em (src/normalizacao.py), e todo manifesto
+guarda a marca_dagua (início do backup). Um incremental exporta só os documentos
+com atualizado_em >= marca d'água da base - BACKUP_INCREMENTAL_FOLGA_SEGUNDOS
+(inserções, alterações e soft deletes) e aponta para a base, formando
+uma cadeia completo -> incremental -> incremental... Exclusões físicas
+(delete_many em scripts de manutenção) não aparecem em incrementais.
+reconstruir_backup() junta a cadeia (até um instante, se pedido) em um
+novo backup completo, com a versão mais recente de cada documento.
+
+Estrutura:
+
+    backups/backup_clientes_20250101_120000/
+        manifesto.json
+        chunk-00000.ndjson.gz
+        chunk-00001.ndjson.gz
+        ...
+"""
+
+import hashlib
+import io
+import json
+import gzip
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import bson
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from config import (
+    BACKUP_BATCH_SIZE,
+    BACKUP_COMPRESSAO,
+    BACKUP_DIRETORIO,
+    BACKUP_DOCS_POR_CHUNK,
+    BACKUP_FORMATO,
+    BACKUP_INCREMENTAL_FOLGA_SEGUNDOS,
+    BACKUP_PARTICOES,
+    BACKUP_PROCESSOS,
+    get_collection,
+    get_mongo_client,
+)
+from logging_config import get_logger
+from src.normalizacao import CAMPO_ATUALIZADO_EM
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = get_logger(__name__)
+
+NOME_MANIFESTO = "manifesto.json"
+VERSAO_MANIFESTO = 1
+
+FORMATOS = {"ndjson": ".ndjson", "bson": ".bson"}
+COMPRESSOES = {"gzip": ".gz", "zstd": ".zst", "nenhuma": ""}
+
+_OPCOES_JSON = json_util.CANONICAL_JSON_OPTIONS
+_TAMANHO_BLOCO = 1024 * 1024
+
+
+class BackupInvalidoError(ValueError):
+    """Backup incompleto, corrompido ou com opções inválidas."""
+
+
+def validar_opcoes(formato: str, compressao: str) -> None:
+    if formato not in FORMATOS:
+        raise BackupInvalidoError(f"Formato inválido: {formato!r} (use {', '.join(FORMATOS)})")
+    if compressao not in COMPRESSOES:
+        raise BackupInvalidoError(
+            f"Compressão inválida: {compressao!r} (use {', '.join(COMPRESSOES)})"
+        )
+    if compressao == "zstd" and zstandard is None:
+        raise BackupInvalidoError("Compressão zstd exige o pacote zstandard (pip install zstandard)")
+
+
+def id_para_json(valor):
+    """_id -> valor JSON do manifesto (Extended JSON canônico)."""
+    return json.loads(json_util.dumps(valor, json_options=_OPCOES_JSON))
+
+
+def id_do_json(valor):
+    """Inverso de id_para_json."""
+    return json_util.loads(json.dumps(valor))
+
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ----------------------------------------------------------------------
+# Arquivos com checksum
+# ----------------------------------------------------------------------
+
+
+class _ArquivoComHash(io.RawIOBase):
+    """Repassa leituras/escritas ao arquivo calculando SHA-256 e tamanho."""
+
+    def __init__(self, arquivo):
+        self._arquivo = arquivo
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        self.sha256.update(dados)
+        self.bytes += len(dados)
+        return self._arquivo.write(dados)
+
+    def readinto(self, destino) -> int:
+        dados = self._arquivo.read(len(destino))
+        destino[: len(dados)] = dados
+        self.sha256.update(dados)
+        self.bytes += len(dados)
+        return len(dados)
+
+    def consumir_resto(self) -> None:
+        """Lê o que faltou até o fim do arquivo (para fechar o checksum)."""
+        while self.read(_TAMANHO_BLOCO):
+            pass
+
+    def close(self) -> None:
+        self._arquivo.close()
+        super().close()
+
+
+def _abrir_escrita(caminho: Path, compressao: str):
+    """(arquivo com hash, stream onde escrever os dados sem compressão)."""
+    bruto = _ArquivoComHash(open(caminho, "wb"))
+    if compressao == "gzip":
+        return bruto, gzip.GzipFile(fileobj=bruto, mode="wb", compresslevel=6, mtime=0)
+    if compressao == "zstd":
+        return bruto, zstandard.ZstdCompressor(level=3).stream_writer(bruto, closefd=False)
+    return bruto, bruto
+
+
+def _abrir_leitura(caminho: Path, compressao: str):
+    """(arquivo com hash, stream de onde ler os dados descomprimidos)."""
+    bruto = _ArquivoComHash(open(caminho, "rb"))
+    if compressao == "gzip":
+        return bruto, gzip.GzipFile(fileobj=bruto, mode="rb")
+    if compressao == "zstd":
+        return bruto, zstandard.ZstdDecompressor().stream_reader(bruto, closefd=False)
+    return bruto, io.BufferedReader(bruto, _TAMANHO_BLOCO)
+
+
+def _iterar_stream(stream, formato: str) -> Iterator[dict]:
+    if formato == "bson":
+        yield from bson.decode_file_iter(stream)
+        return
+    texto = io.TextIOWrapper(stream, encoding="utf-8")
+    try:
+        for linha in texto:
+            if linha.strip():
+                yield json_util.loads(linha)
+    finally:
+        # Sem detach, o wrapper fecharia o stream (e o arquivo) ao ser coletado
+        texto.detach()
+
+
+# ----------------------------------------------------------------------
+# Escrita
+# ----------------------------------------------------------------------
+
+
+class EscritorChunks:
+    """
+    Grava documentos em chunks comprimidos e numerados
+    (<prefixo>-00000.ndjson.gz, ...) e devolve a descrição de cada um
+    para o manifesto.
+
+    Uso:
+        with EscritorChunks(diretorio, "ndjson", "gzip") as escritor:
+            for doc in cursor:
+                escritor.escrever(doc)
+        chunks = escritor.chunks
+    """
+
+    def __init__(
+        self,
+        diretorio: Path,
+        formato: str = BACKUP_FORMATO,
+        compressao: str = BACKUP_COMPRESSAO,
+        docs_por_chunk: int = BACKUP_DOCS_POR_CHUNK,
+        prefixo: str = "chunk",
+    ):
+        validar_opcoes(formato, compressao)
+        self.diretorio = Path(diretorio)
+        self.formato = formato
+        self.compressao = compressao
+        self.docs_por_chunk = max(1, docs_por_chunk)
+        self.prefixo = prefixo
+
+        self.chunks: List[dict] = []
+        self.total_documentos = 0
+        self._bruto = None
+        self._stream = None
+        self._atual: Optional[dict] = None
+
+    def _abrir_chunk(self) -> None:
+        nome = (
+            f"{self.prefixo}-{len(self.chunks):05d}"
+            f"{FORMATOS[self.formato]}{COMPRESSOES[self.compressao]}"
+        )
+        self._bruto, self._stream = _abrir_escrita(self.diretorio / nome, self.compressao)
+        self._atual = {"arquivo": nome, "documentos": 0, "bytes_dados": 0}
+
+    def _fechar_chunk(self) -> None:
+        if self._stream is not self._bruto:
+            self._stream.close()
+        self._bruto.close()
+        self._atual["bytes"] = self._bruto.bytes
+        self._atual["sha256"] = self._bruto.sha256.hexdigest()
+        self.chunks.append(self._atual)
+        self._bruto = self._stream = self._atual = None
+
+    def escrever(self, doc) -> None:
+        if self._atual is None:
+            self._abrir_chunk()
+
+        if self.formato == "bson":
+            dados = doc.raw if isinstance(doc, RawBSONDocument) else bson.encode(doc)
+        else:
+            dados = (json_util.dumps(doc, json_options=_OPCOES_JSON) + "\n").encode("utf-8")
+        self._stream.write(dados)
+
+        atual = self._atual
+        if atual["documentos"] == 0:
+            atual["primeiro_id"] = id_para_json(doc["_id"])
+        atual["ultimo_id_bruto"] = doc["_id"]
+        atual["documentos"] += 1
+        atual["bytes_dados"] += len(dados)
+        self.total_documentos += 1
+
+        if atual["documentos"] >= self.docs_por_chunk:
+            self._finalizar_atual()
+
+    def _finalizar_atual(self) -> None:
+        self._atual["ultimo_id"] = id_para_json(self._atual.pop("ultimo_id_bruto"))
+        self._fechar_chunk()
+
+    def fechar(self) -> List[dict]:
+        if self._atual is not None:
+            self._finalizar_atual()
+        return self.chunks
+
+    def __enter__(self) -> "EscritorChunks":
+        return self
+
+    def __exit__(self, tipo, valor, rastreamento) -> None:
+        if tipo is None:
+            self.fechar()
+        elif self._bruto is not None:
+            # Erro no meio: fecha o arquivo sem registrar o chunk
+            self._bruto.close()
+
+
+def exportar_colecao(
+    colecao,
+    diretorio: Path,
+    filtro: Optional[dict] = None,
+    formato: str = BACKUP_FORMATO,
+    compressao: str = BACKUP_COMPRESSAO,
+    docs_por_chunk: int = BACKUP_DOCS_POR_CHUNK,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    prefixo: str = "chunk",
+    progresso: Optional[Callable[[int], None]] = None,
+    intervalo_progresso: int = 10000,
+    ordenacao: Optional[list] = None,
+) -> dict:
+    """
+    Exporta os documentos do filtro (ordem de _id, ou `ordenacao`) para
+    chunks em `diretorio`. Devolve {"documentos", "chunks"}; não grava
+    manifesto.
+    """
+    if formato == "bson":
+        # Documentos crus: o BSON do servidor vai direto para o arquivo
+        colecao = colecao.with_options(
+            codec_options=CodecOptions(document_class=RawBSONDocument)
+        )
+    cursor = colecao.find(filtro or {}, sort=ordenacao or [("_id", 1)], batch_size=batch_size)
+
+    with EscritorChunks(diretorio, formato, compressao, docs_por_chunk, prefixo) as escritor:
+        for doc in cursor:
+            escritor.escrever(doc)
+            if progresso is not None and escritor.total_documentos % intervalo_progresso == 0:
+                progresso(escritor.total_documentos)
+
+    return {"documentos": escritor.total_documentos, "chunks": escritor.chunks}
+
+
+def gravar_manifesto(diretorio: Path, manifesto: dict) -> Path:
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+    caminho = Path(diretorio) / NOME_MANIFESTO
+    temporario = caminho.with_suffix(".json.tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def _criar_diretorio(destino: Optional[Path], nome_colecao: str, sufixo: str = "") -> Path:
+    base = Path(destino or BACKUP_DIRETORIO)
+    base.mkdir(parents=True, exist_ok=True)
+    nome = f"backup_{nome_colecao}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{sufixo}"
+    # Dois backups no mesmo segundo (ex.: incremental logo após o completo)
+    diretorio, tentativa = base / nome, 1
+    while True:
+        try:
+            diretorio.mkdir()
+            return diretorio
+        except FileExistsError:
+            diretorio, tentativa = base / f"{nome}_{tentativa}", tentativa + 1
+
+
+def _montar_manifesto(
+    database: str,
+    nome_colecao: str,
+    formato: str,
+    compressao: str,
+    filtro: Optional[dict],
+    iniciado_em: str,
+    chunks: List[dict],
+    **extras,
+) -> dict:
+    return {
+        "versao": VERSAO_MANIFESTO,
+        "tipo": "completo",
+        "database": database,
+        "colecao": nome_colecao,
+        "formato": formato,
+        "compressao": compressao,
+        "filtro": json.loads(json_util.dumps(filtro or {}, json_options=_OPCOES_JSON)),
+        "iniciado_em": iniciado_em,
+        "concluido_em": _agora(),
+        # Escritas até este instante estão no backup (base dos incrementais)
+        "marca_dagua": iniciado_em,
+        "total_documentos": sum(chunk["documentos"] for chunk in chunks),
+        **extras,
+        "chunks": chunks,
+    }
+
+
+def fazer_backup_streaming(
+    destino: Optional[Path] = None,
+    filtro: Optional[dict] = None,
+    formato: str = BACKUP_FORMATO,
+    compressao: str = BACKUP_COMPRESSAO,
+    docs_por_chunk: int = BACKUP_DOCS_POR_CHUNK,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    colecao=None,
+    progresso: Optional[Callable[[int], None]] = None,
+) -> Path:
+    """
+    Backup completo (ou do filtro) da coleção de clientes em
+    `destino/backup_<coleção>_<timestamp>/`. Devolve o caminho do
+    manifesto.
+    """
+    validar_opcoes(formato, compressao)
+    if colecao is None:
+        colecao = get_collection().collection
+
+    diretorio = _criar_diretorio(destino, colecao.name)
+
+    iniciado_em = _agora()
+    resultado = exportar_colecao(
+        colecao,
+        diretorio,
+        filtro=filtro,
+        formato=formato,
+        compressao=compressao,
+        docs_por_chunk=docs_por_chunk,
+        batch_size=batch_size,
+        progresso=progresso,
+    )
+
+    manifesto = _montar_manifesto(
+        colecao.database.name, colecao.name, formato, compressao, filtro, iniciado_em, resultado["chunks"]
+    )
+    caminho = gravar_manifesto(diretorio, manifesto)
+
+    logger.info(
+        f"backup_concluido documentos={resultado['documentos']} "
+        f"chunks={len(resultado['chunks'])} destino={diretorio}",
+        extra={"event": "backup_concluido", "collection": colecao.name},
+    )
+    return caminho
+
+
+# ----------------------------------------------------------------------
+# Backup paralelo por faixas de _id
+# ----------------------------------------------------------------------
+
+# Documentos amostrados por partição para escolher os limites
+_AMOSTRA_POR_PARTICAO = 100
+
+
+def _combinar_filtro(filtro: Optional[dict], inicio, fim) -> dict:
+    faixa = {}
+    if inicio is not None:
+        faixa["$gte"] = inicio
+    if fim is not None:
+        faixa["$lt"] = fim
+    partes = [f for f in (filtro, {"_id": faixa} if faixa else None) if f]
+    if not partes:
+        return {}
+    return partes[0] if len(partes) == 1 else {"$and": partes}
+
+
+def calcular_particoes(
+    colecao,
+    particoes: int,
+    filtro: Optional[dict] = None,
+    metodo: str = "amostragem",
+) -> List[Tuple[Any, Any]]:
+    """
+    Divide a coleção em até `particoes` faixas [inicio, fim) de _id que
+    cobrem tudo (a primeira começa em None e a última termina em None).
+
+    metodo="amostragem" usa $sample (barato, faixas aproximadas);
+    metodo="bucket_auto" usa $bucketAuto (faixas equilibradas, mas lê
+    todos os _id).
+    """
+    if particoes <= 1:
+        return [(None, None)]
+
+    inicio_pipeline = [{"$match": filtro}] if filtro else []
+    if metodo == "bucket_auto":
+        grupos = colecao.aggregate(
+            inicio_pipeline + [{"$bucketAuto": {"groupBy": "$_id", "buckets": particoes}}],
+            allowDiskUse=True,
+        )
+        limites = [grupo["_id"]["min"] for grupo in grupos][1:]
+    elif metodo == "amostragem":
+        amostra = sorted(
+            doc["_id"]
+            for doc in colecao.aggregate(
+                inicio_pipeline
+                + [
+                    {"$sample": {"size": particoes * _AMOSTRA_POR_PARTICAO}},
+                    {"$project": {"_id": 1}},
+                ]
+            )
+        )
+        limites = [amostra[len(amostra) * k // particoes] for k in range(1, particoes)] if amostra else []
+    else:
+        raise ValueError(f"Método de partição inválido: {metodo!r}")
+
+    # Limites repetidos (poucos documentos) viram uma faixa só
+    limites = [limite for i, limite in enumerate(limites) if i == 0 or limite != limites[i - 1]]
+    bordas = [None, *limites, None]
+    return list(zip(bordas[:-1], bordas[1:]))
+
+
+def _exportar_particao(
+    indice: int,
+    inicio,
+    fim,
+    database: str,
+    nome_colecao: str,
+    diretorio: str,
+    filtro: Optional[dict],
+    formato: str,
+    compressao: str,
+    docs_por_chunk: int,
+    batch_size: int,
+) -> dict:
+    """Exporta uma faixa de _id (roda em um processo do pool)."""
+    colecao = get_mongo_client()[database][nome_colecao]
+    inicio_exportacao = datetime.now(timezone.utc)
+    resultado = exportar_colecao(
+        colecao,
+        Path(diretorio),
+        filtro=_combinar_filtro(filtro, inicio, fim),
+        formato=formato,
+        compressao=compressao,
+        docs_por_chunk=docs_por_chunk,
+        batch_size=batch_size,
+        prefixo=f"parte-{indice:03d}",
+    )
+    resultado["segundos"] = round((datetime.now(timezone.utc) - inicio_exportacao).total_seconds(), 3)
+    return resultado
+
+
+def fazer_backup_paralelo(
+    destino: Optional[Path] = None,
+    filtro: Optional[dict] = None,
+    formato: str = BACKUP_FORMATO,
+    compressao: str = BACKUP_COMPRESSAO,
+    docs_por_chunk: int = BACKUP_DOCS_POR_CHUNK,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    particoes: int = BACKUP_PARTICOES,
+    processos: int = BACKUP_PROCESSOS,
+    metodo_particao: str = "amostragem",
+    colecao=None,
+    progresso: Optional[Callable[[int, dict], None]] = None,
+) -> Path:
+    """
+    Backup com as faixas de _id exportadas em paralelo, um worker por
+    faixa (processos=0 usa threads, útil em testes e bases pequenas).
+
+    progresso(indice, resultado) é chamado a cada partição concluída.
+    Devolve o caminho do manifesto (mesmo formato do backup simples,
+    com a lista de partições).
+    """
+    validar_opcoes(formato, compressao)
+    if colecao is None:
+        colecao = get_collection().collection
+
+    diretorio = _criar_diretorio(destino, colecao.name)
+
+    iniciado_em = _agora()
+    faixas = calcular_particoes(colecao, particoes, filtro, metodo_particao)
+
+    if processos > 0:
+        pool = ProcessPoolExecutor(
+            max_workers=min(processos, len(faixas)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=len(faixas), thread_name_prefix="backup-particao")
+
+    resultados = {}
+    with pool:
+        futuros = {
+            pool.submit(
+                _exportar_particao,
+                indice,
+                inicio,
+                fim,
+                colecao.database.name,
+                colecao.name,
+                str(diretorio),
+                filtro,
+                formato,
+                compressao,
+                docs_por_chunk,
+                batch_size,
+            ): indice
+            for indice, (inicio, fim) in enumerate(faixas)
+        }
+        for futuro in futuros:
+            indice = futuros[futuro]
+            resultados[indice] = futuro.result()
+            if progresso is not None:
+                progresso(indice, resultados[indice])
+
+    chunks = []
+    descricao_particoes = []
+    for indice, (inicio, fim) in enumerate(faixas):
+        resultado = resultados[indice]
+        for chunk in resultado["chunks"]:
+            chunks.append({**chunk, "particao": indice})
+        descricao_particoes.append(
+            {
+                "indice": indice,
+                "inicio": id_para_json(inicio) if inicio is not None else None,
+                "fim": id_para_json(fim) if fim is not None else None,
+                "documentos": resultado["documentos"],
+                "chunks": len(resultado["chunks"]),
+                "segundos": resultado["segundos"],
+            }
+        )
+
+    manifesto = _montar_manifesto(
+        colecao.database.name,
+        colecao.name,
+        formato,
+        compressao,
+        filtro,
+        iniciado_em,
+        chunks,
+        particoes=descricao_particoes,
+    )
+    caminho = gravar_manifesto(diretorio, manifesto)
+    total = manifesto["total_documentos"]
+
+    logger.info(
+        f"backup_paralelo_concluido documentos={total} particoes={len(faixas)} "
+        f"chunks={len(chunks)} destino={diretorio}",
+        extra={"event": "backup_paralelo_concluido", "collection": colecao.name},
+    )
+    return caminho
+
+
+# ----------------------------------------------------------------------
+# Leitura e verificação
+# ----------------------------------------------------------------------
+
+
+def caminho_manifesto(caminho) -> Path:
+    """Aceita o diretório do backup ou o próprio manifesto.json."""
+    caminho = Path(caminho)
+    return caminho / NOME_MANIFESTO if caminho.is_dir() else caminho
+
+
+def ler_manifesto(caminho) -> dict:
+    caminho = caminho_manifesto(caminho)
+    if not caminho.exists():
+        raise BackupInvalidoError(f"Manifesto não encontrado (backup incompleto?): {caminho}")
+    with open(caminho, encoding="utf-8") as f:
+        manifesto = json.load(f)
+    if manifesto.get("versao") != VERSAO_MANIFESTO:
+        raise BackupInvalidoError(f"Versão de manifesto não suportada: {manifesto.get('versao')!r}")
+    validar_opcoes(manifesto["formato"], manifesto["compressao"])
+    return manifesto
+
+
+def ler_chunk(
+    diretorio: Path, chunk: dict, formato: str, compressao: str, verificar: bool = False
+) -> Iterator[dict]:
+    """
+    Documentos de um chunk, um a um. Com verificar=True, confere o
+    checksum ao final da leitura (BackupInvalidoError se não bater; os
+    documentos já entregues não são desfeitos).
+    """
+    bruto, stream = _abrir_leitura(Path(diretorio) / chunk["arquivo"], compressao)
+    try:
+        yield from _iterar_stream(stream, formato)
+        if verificar:
+            bruto.consumir_resto()
+            if bruto.sha256.hexdigest() != chunk["sha256"]:
+                raise BackupInvalidoError(f"{chunk['arquivo']}: checksum diferente do manifesto")
+    finally:
+        bruto.close()
+
+
+def ler_documentos(caminho) -> Iterator[dict]:
+    """Todos os documentos de um backup, na ordem dos chunks."""
+    manifesto = ler_manifesto(caminho)
+    diretorio = caminho_manifesto(caminho).parent
+    for chunk in manifesto["chunks"]:
+        yield from ler_chunk(diretorio, chunk, manifesto["formato"], manifesto["compressao"])
+
+
+def verificar_chunk(diretorio: Path, chunk: dict, formato: str, compressao: str) -> List[str]:
+    """Confere checksum, tamanho e quantidade de documentos de um chunk."""
+    caminho = Path(diretorio) / chunk["arquivo"]
+    if not caminho.exists():
+        return [f"{chunk['arquivo']}: arquivo não encontrado"]
+
+    erros = []
+    bruto, stream = _abrir_leitura(caminho, compressao)
+    documentos = 0
+    try:
+        for _ in _iterar_stream(stream, formato):
+            documentos += 1
+        bruto.consumir_resto()
+    except Exception as e:
+        erros.append(f"{chunk['arquivo']}: erro ao ler ({type(e).__name__}: {e})")
+    finally:
+        bruto.close()
+
+    if not erros:
+        if bruto.sha256.hexdigest() != chunk["sha256"]:
+            erros.append(f"{chunk['arquivo']}: checksum diferente do manifesto")
+        if bruto.bytes != chunk["bytes"]:
+            erros.append(f"{chunk['arquivo']}: {bruto.bytes} bytes, manifesto diz {chunk['bytes']}")
+        if documentos != chunk["documentos"]:
+            erros.append(
+                f"{chunk['arquivo']}: {documentos} documentos, manifesto diz {chunk['documentos']}"
+            )
+    return erros
+
+
+def verificar_backup_streaming(caminho) -> dict:
+    """
+    Verifica um backup chunk a chunk, em memória constante.
+
+    Devolve {"ok", "documentos", "chunks", "erros"}.
+    """
+    try:
+        manifesto = ler_manifesto(caminho)
+    except (BackupInvalidoError, ValueError, KeyError) as e:
+        return {"ok": False, "documentos": 0, "chunks": 0, "erros": [str(e)]}
+
+    diretorio = caminho_manifesto(caminho).parent
+    erros: List[str] = []
+    for chunk in manifesto["chunks"]:
+        erros.extend(verificar_chunk(diretorio, chunk, manifesto["formato"], manifesto["compressao"]))
+
+    documentos = sum(chunk["documentos"] for chunk in manifesto["chunks"])
+    if documentos != manifesto["total_documentos"]:
+        erros.append(
+            f"manifesto: soma dos chunks ({documentos}) difere do total ({manifesto['total_documentos']})"
+        )
+
+    return {
+        "ok": not erros,
+        "documentos": manifesto["total_documentos"],
+        "chunks": len(manifesto["chunks"]),
+        "erros": erros,
+    }
+
+
+# ----------------------------------------------------------------------
+# Backups incrementais e reconstrução
+# ----------------------------------------------------------------------
+
+
+def _data_manifesto(valor: str) -> datetime:
+    data = datetime.fromisoformat(valor)
+    return data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+
+def fazer_backup_incremental(
+    base,
+    destino: Optional[Path] = None,
+    formato: Optional[str] = None,
+    compressao: Optional[str] = None,
+    docs_por_chunk: int = BACKUP_DOCS_POR_CHUNK,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    folga_segundos: float = BACKUP_INCREMENTAL_FOLGA_SEGUNDOS,
+    colecao=None,
+    progresso: Optional[Callable[[int], None]] = None,
+) -> Path:
+    """
+    Backup só do que foi escrito desde a marca d'água de `base` (backup
+    completo ou incremental anterior). Por padrão fica ao lado da base e
+    com o mesmo formato/compressão. Devolve o caminho do manifesto.
+    """
+    manifesto_base = ler_manifesto(base)
+    diretorio_base = caminho_manifesto(base).parent
+    formato = formato or manifesto_base["formato"]
+    compressao = compressao or manifesto_base["compressao"]
+    validar_opcoes(formato, compressao)
+    if colecao is None:
+        colecao = get_collection().collection
+
+    desde = _data_manifesto(manifesto_base["marca_dagua"]) - timedelta(seconds=folga_segundos)
+    filtro = {CAMPO_ATUALIZADO_EM: {"$gte": desde}}
+
+    diretorio = _criar_diretorio(destino or diretorio_base.parent, colecao.name, "_inc")
+    iniciado_em = _agora()
+    resultado = exportar_colecao(
+        colecao,
+        diretorio,
+        filtro=filtro,
+        formato=formato,
+        compressao=compressao,
+        docs_por_chunk=docs_por_chunk,
+        batch_size=batch_size,
+        progresso=progresso,
+        # Segue o índice atualizado_em_1 (sem ordenação em memória)
+        ordenacao=[(CAMPO_ATUALIZADO_EM, 1), ("_id", 1)],
+    )
+
+    manifesto = _montar_manifesto(
+        colecao.database.name,
+        colecao.name,
+        formato,
+        compressao,
+        filtro,
+        iniciado_em,
+        resultado["chunks"],
+        tipo="incremental",
+        base=os.path.relpath(diretorio_base, diretorio),
+        desde=desde.isoformat(),
+    )
+    caminho = gravar_manifesto(diretorio, manifesto)
+
+    logger.info(
+        f"backup_incremental_concluido documentos={resultado['documentos']} "
+        f"desde={desde.isoformat()} destino={diretorio}",
+        extra={"event": "backup_incremental_concluido", "collection": colecao.name},
+    )
+    return caminho
+
+
+def cadeia_backups(caminho) -> List[Tuple[Path, dict]]:
+    """
+    [(diretório, manifesto), ...] do backup completo até `caminho`,
+    seguindo o campo base de cada incremental.
+    """
+    cadeia = []
+    diretorio = caminho_manifesto(caminho).parent
+    while True:
+        manifesto = ler_manifesto(diretorio)
+        cadeia.append((diretorio, manifesto))
+        if manifesto["tipo"] != "incremental":
+            break
+        diretorio = (diretorio / manifesto["base"]).resolve()
+        if any(diretorio == anterior for anterior, _ in cadeia):
+            raise BackupInvalidoError(f"Cadeia de backups em ciclo: {diretorio}")
+    cadeia.reverse()
+    return cadeia
+
+
+def chave_id(valor) -> bytes:
+    return bson.encode({"_id": valor})
+
+
+def versao_documento(doc) -> Optional[float]:
+    """atualizado_em como número comparável (None se ausente)."""
+    valor = doc.get(CAMPO_ATUALIZADO_EM)
+    if not isinstance(valor, datetime):
+        return None
+    return (valor if valor.tzinfo else valor.replace(tzinfo=timezone.utc)).timestamp()
+
+
+# Guarda, por _id, onde está a versão a manter: maior atualizado_em; no
+# empate (ou sem atualizado_em), a lida por último (backup mais novo)
+_SQL_VERSAO = """
+    INSERT INTO versoes (id, atualizado_em, backup, posicao) VALUES (?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        atualizado_em = excluded.atualizado_em,
+        backup = excluded.backup,
+        posicao = excluded.posicao
+    WHERE coalesce(excluded.atualizado_em, -1e300) >= coalesce(versoes.atualizado_em, -1e300)
+"""
+
+
+def reconstruir_backup(
+    caminho,
+    destino: Optional[Path] = None,
+    ate: Optional[datetime] = None,
+    formato: Optional[str] = None,
+    compressao: Optional[str] = None,
+    docs_por_chunk: int = BACKUP_DOCS_POR_CHUNK,
+) -> Path:
+    """
+    Junta a cadeia que termina em `caminho` (completo + incrementais) em
+    um novo backup completo: para cada _id, a versão com maior
+    atualizado_em (no empate, a do backup mais recente). Com `ate`, usa só
+    os backups com marca d'água até esse instante (estado naquele ponto,
+    na granularidade dos backups).
+
+    Um documento alterado durante a exportação de um incremental pode
+    aparecer duas vezes nele (avança no índice atualizado_em_1), a versão
+    antiga primeiro; por isso a escolha é pela versão, não pela ordem.
+
+    Duas passadas pela cadeia: a primeira guarda, em um SQLite temporário
+    em disco (memória constante), onde está a versão escolhida de cada
+    _id; a segunda grava só essas. Devolve o caminho do manifesto novo.
+    """
+    cadeia = cadeia_backups(caminho)
+    if ate is not None:
+        ate = ate if ate.tzinfo else ate.replace(tzinfo=timezone.utc)
+        cadeia = [
+            (diretorio, manifesto)
+            for diretorio, manifesto in cadeia
+            if _data_manifesto(manifesto["marca_dagua"]) <= ate
+        ]
+        if not cadeia:
+            raise BackupInvalidoError(f"Nenhum backup completo com marca d'água até {ate.isoformat()}")
+
+    ultimo = cadeia[-1][1]
+    formato = formato or ultimo["formato"]
+    compressao = compressao or ultimo["compressao"]
+    validar_opcoes(formato, compressao)
+
+    diretorio = _criar_diretorio(
+        destino or cadeia[-1][0].parent, ultimo["colecao"], "_reconstruido"
+    )
+    iniciado_em = _agora()
+
+    with tempfile.TemporaryDirectory(prefix="reconstrucao-") as temporario:
+        versoes = sqlite3.connect(os.path.join(temporario, "versoes.sqlite"))
+        versoes.execute(
+            "CREATE TABLE versoes (id BLOB PRIMARY KEY, atualizado_em REAL, "
+            "backup INTEGER, posicao INTEGER) WITHOUT ROWID"
+        )
+        try:
+            for indice, (origem, _) in enumerate(cadeia):
+                versoes.executemany(
+                    _SQL_VERSAO,
+                    (
+                        (chave_id(doc["_id"]), versao_documento(doc), indice, posicao)
+                        for posicao, doc in enumerate(ler_documentos(origem))
+                    ),
+                )
+
+            with EscritorChunks(diretorio, formato, compressao, docs_por_chunk) as escritor:
+                for indice, (origem, _) in enumerate(cadeia):
+                    for posicao, doc in enumerate(ler_documentos(origem)):
+                        escolhida = versoes.execute(
+                            "SELECT backup, posicao FROM versoes WHERE id = ?", (chave_id(doc["_id"]),)
+                        ).fetchone()
+                        if escolhida == (indice, posicao):
+                            escritor.escrever(doc)
+        finally:
+            versoes.close()
+
+    manifesto = _montar_manifesto(
+        ultimo["database"],
+        ultimo["colecao"],
+        formato,
+        compressao,
+        None,
+        iniciado_em,
+        escritor.chunks,
+        marca_dagua=ultimo["marca_dagua"],
+        reconstruido_de=[os.path.relpath(origem, diretorio) for origem, _ in cadeia],
+    )
+    caminho_novo = gravar_manifesto(diretorio, manifesto)
+
+    logger.info(
+        f"backup_reconstruido documentos={escritor.total_documentos} "
+        f"backups={len(cadeia)} marca_dagua={ultimo['marca_dagua']} destino={diretorio}",
+        extra={"event": "backup_reconstruido", "collection": ultimo["colecao"]},
+    )
+    return caminho_novo
@@ -0,0 +1,76 @@
+"""
+Campos normalizados (minúsculos, sem acento) usados em buscas indexadas.
+
+Buscas por cidade sem diferenciar maiúsculas/acentos não conseguem usar
+índice com `$regex` + `$options: "i"`. Por isso gravamos, em todo caminho
+de escrita, uma cópia normalizada do campo e consultamos essa cópia com
+igualdade ou prefixo ancorado (`^...`), que viram seeks no índice.
+
+Campos mantidos:
+- nome_norm
+- endereco.cidade_norm
+
+Também gravado em todo caminho de escrita (carimbar_atualizacao):
+- atualizado_em: data/hora UTC da última escrita (criação, alteração ou
+  soft delete); é a marca d'água dos backups incrementais
+  (src/motor_backup.py).
+"""
+
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def normalizar_texto(txt: Optional[str]) -> str:
+    """Remove acentos, espaços nas pontas e converte para minúsculo."""
+    if not txt or not isinstance(txt, str):
+        return ""
+    txt = txt.strip().lower()
+    return "".join(
+        c for c in unicodedata.normalize("NFD", txt)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+def filtro_prefixo(txt: str) -> dict:
+    """
+    Filtro de prefixo ancorado sobre um campo normalizado.
+
+    `^` + texto escapado, sem opção "i": o MongoDB transforma em um
+    intervalo no índice (seek), em vez de varrer todos os valores.
+    """
+    return {"$regex": "^" + re.escape(normalizar_texto(txt))}
+
+
+def adicionar_campos_normalizados(dados: dict) -> dict:
+    """
+    Preenche os campos normalizados em um documento novo ou em um $set.
+
+    Aceita tanto `{"endereco": {...}}` (documento completo / endereço
+    inteiro) quanto chaves com ponto (`{"endereco.cidade": ...}`).
+    Altera e devolve o próprio dicionário.
+    """
+    if "nome" in dados:
+        dados["nome_norm"] = normalizar_texto(dados["nome"]) or None
+
+    endereco = dados.get("endereco")
+    if isinstance(endereco, dict):
+        endereco["cidade_norm"] = normalizar_texto(endereco.get("cidade")) or None
+
+    if "endereco.cidade" in dados:
+        dados["endereco.cidade_norm"] = normalizar_texto(dados["endereco.cidade"]) or None
+
+    return dados
+
+
+CAMPO_ATUALIZADO_EM = "atualizado_em"
+
+
+def carimbar_atualizacao(dados: dict, agora: Optional[datetime] = None) -> dict:
+    """
+    Preenche atualizado_em em um documento novo ou em um $set.
+    Altera e devolve o próprio dicionário.
+    """
+    dados[CAMPO_ATUALIZADO_EM] = agora or datetime.now(timezone.utc)
+    return dados
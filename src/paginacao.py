@@ -0,0 +1,83 @@
+"""
+Paginação por cursor (keyset) para listagens ordenadas por nome.
+
+Em vez de `.skip(offset)`, que percorre e descarta todas as entradas do
+índice anteriores à página, o cursor guarda a chave do último documento
+entregue (nome, _id) e a próxima página começa exatamente depois dela.
+
+O cursor é opaco para o cliente da API: um JSON compacto codificado em
+base64 url-safe.
+"""
+
+import base64
+import binascii
+import json
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+# Ordenação estável usada pela listagem: nome ASC, com _id como desempate
+ORDENACAO_KEYSET = [("nome", 1), ("_id", 1)]
+
+
+class CursorInvalidoError(ValueError):
+    """Cursor de paginação malformado ou adulterado."""
+
+
+def codificar_cursor(doc: dict) -> str:
+    """Gera o cursor opaco a partir do último documento de uma página."""
+    payload = {"n": doc.get("nome"), "i": str(doc["_id"])}
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Optional[str], ObjectId]:
+    """
+    Decodifica o cursor opaco em (nome, _id).
+
+    Raises:
+        CursorInvalidoError: se o cursor não puder ser interpretado.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding)
+        payload = json.loads(raw.decode("utf-8"))
+        nome = payload["n"]
+        _id = ObjectId(payload["i"])
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, InvalidId):
+        raise CursorInvalidoError("Cursor de paginação inválido.")
+
+    if nome is not None and not isinstance(nome, str):
+        raise CursorInvalidoError("Cursor de paginação inválido.")
+
+    return nome, _id
+
+
+def filtro_apos_cursor(nome: Optional[str], _id: ObjectId) -> dict:
+    """
+    Monta o filtro que posiciona a consulta logo após (nome, _id).
+
+    Equivale a `(nome, _id) > (nome_cursor, _id_cursor)` na ordenação
+    ORDENACAO_KEYSET, o que permite ao MongoDB fazer um seek direto no
+    índice composto (..., nome, _id).
+
+    O MongoDB só compara valores do mesmo tipo ({"$gt": None} não casa
+    com strings), então com nome null o "depois" é: os demais nulls com
+    _id maior e, em seguida, todos os nomes não nulos (null vem antes de
+    string na ordenação).
+    """
+    if nome is None:
+        return {
+            "$or": [
+                {"nome": {"$ne": None}},
+                {"nome": None, "_id": {"$gt": _id}},
+            ]
+        }
+    return {
+        "$or": [
+            {"nome": {"$gt": nome}},
+            {"nome": nome, "_id": {"$gt": _id}},
+        ]
+    }
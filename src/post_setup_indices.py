@@ -6,10 +6,21 @@ Pode ser executado sempre que o ambiente subir:
     python -m src.post_setup_indices
 """
 
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING
 from pymongo.errors import PyMongoError
 
-from config import get_collection
+from config import MONGO_COLLECTION_CONTADORES, MONGO_COLLECTION_RELATORIOS, get_collection
+
+
+# Índices substituídos:
+# - versões sem _id no final (paginação por cursor);
+# - versões sobre endereco.cidade (filtros de cidade agora usam endereco.cidade_norm)
+INDICES_SUBSTITUIDOS = (
+    "cidade_nome_1",
+    "status_estado_cidade_nome_1",
+    "cidade_nome_id_1",
+    "status_estado_cidade_nome_id_1",
+)
 
 
 def ensure_indexes():
@@ -32,15 +43,18 @@ def ensure_indexes():
         )
         print("✓ Índice em status garantido (status_1)")
 
-        # Índice para buscas por cidade ordenando por nome
+        # Índice para buscas por cidade (normalizada) ordenando por nome.
+        # O _id no final permite paginação por cursor (nome, _id) sem SORT em memória.
+        # Igualdade e prefixo ancorado (^...) em cidade_norm viram seek no índice.
         col.create_index(
             [
-                ("endereco.cidade", ASCENDING),
+                ("endereco.cidade_norm", ASCENDING),
                 ("nome", ASCENDING),
+                ("_id", ASCENDING),
             ],
-            name="cidade_nome_1",
+            name="cidade_norm_nome_id_1",
         )
-        print("✓ Índice em endereco.cidade + nome garantido (cidade_nome_1)")
+        print("✓ Índice em endereco.cidade_norm + nome + _id garantido (cidade_norm_nome_id_1)")
 
         # Índice para combinações de estado + cidade
         col.create_index(
@@ -52,19 +66,91 @@ def ensure_indexes():
         )
         print("✓ Índice em endereco.estado + endereco.cidade garantido (estado_cidade_1)")
 
+        # Busca por UF + cidade (normalizada) ordenando por nome (menu / CRUD)
+        col.create_index(
+            [
+                ("endereco.estado", ASCENDING),
+                ("endereco.cidade_norm", ASCENDING),
+                ("nome", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            name="estado_cidade_norm_nome_id_1",
+        )
+        print("✓ Índice em endereco.estado + endereco.cidade_norm + nome + _id garantido (estado_cidade_norm_nome_id_1)")
+
         # Índice composto pensado para o endpoint GET /clientes
         # Filtro típico: status, estado, cidade
-        # Ordenação: nome ASC
+        # Ordenação: nome ASC, _id ASC (paginação por cursor)
         col.create_index(
             [
                 ("status", ASCENDING),
                 ("endereco.estado", ASCENDING),
-                ("endereco.cidade", ASCENDING),
+                ("endereco.cidade_norm", ASCENDING),
+                ("nome", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            name="status_estado_cidade_norm_nome_id_1",
+        )
+        print("✓ Índice composto para listagem garantido (status_estado_cidade_norm_nome_id_1)")
+
+        # Listagem sem filtros (ou só com filtros não indexados): percorre por nome
+        col.create_index(
+            [
                 ("nome", ASCENDING),
+                ("_id", ASCENDING),
             ],
-            name="status_estado_cidade_nome_1",
+            name="nome_id_1",
         )
-        print("✓ Índice composto para listagem garantido (status_estado_cidade_nome_1)")
+        print("✓ Índice em nome + _id garantido (nome_id_1)")
+
+        # Busca por prefixo do nome normalizado (GET /clientes/busca, menu)
+        col.create_index(
+            [("nome_norm", ASCENDING)],
+            name="nome_norm_1",
+        )
+        print("✓ Índice em nome_norm garantido (nome_norm_1)")
+
+        # Backups incrementais: documentos escritos desde a última marca d'água
+        col.create_index(
+            [("atualizado_em", ASCENDING)],
+            name="atualizado_em_1",
+        )
+        print("✓ Índice em atualizado_em garantido (atualizado_em_1)")
+
+        # Relatórios materializados: leitura das linhas da última execução
+        # e limpeza das execuções antigas
+        relatorios = bundle.db[MONGO_COLLECTION_RELATORIOS]
+        relatorios.create_index(
+            [
+                ("relatorio", ASCENDING),
+                ("tipo", ASCENDING),
+                ("execucao", ASCENDING),
+            ],
+            name="relatorio_tipo_execucao_1",
+        )
+        relatorios.create_index(
+            [
+                ("relatorio", ASCENDING),
+                ("tipo", ASCENDING),
+                ("computed_at", ASCENDING),
+            ],
+            name="relatorio_tipo_computed_at_1",
+        )
+        print(f"✓ Índices de {MONGO_COLLECTION_RELATORIOS} garantidos")
+
+        # Contadores incrementais: maiores UFs / cidades (dashboard, relatório por UF)
+        bundle.db[MONGO_COLLECTION_CONTADORES].create_index(
+            [("dimensao", ASCENDING), ("total", DESCENDING)],
+            name="dimensao_total_1",
+        )
+        print(f"✓ Índice de {MONGO_COLLECTION_CONTADORES} garantido (dimensao_total_1)")
+
+        # Versões antigas ficaram redundantes (prefixo das novas ou campo trocado)
+        existentes = col.index_information()
+        for antigo in INDICES_SUBSTITUIDOS:
+            if antigo in existentes:
+                col.drop_index(antigo)
+                print(f"✓ Índice redundante removido ({antigo})")
 
     except PyMongoError as e:
         print(f"✗ Erro ao criar/garantir índices: {e}")
@@ -7,12 +7,16 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from config import get_collection
+from src.relatorios_materializados import ler_ou_materializar
 
 
 def gerar_relatorio_cidade_status():
-    col = get_collection()
+    """
+    Relatório de clientes por cidade (ativos x inativos).
 
+    Lê as linhas pré-agregadas de relatorios_materializados
+    (relatório cidades_status), materializando na hora se ainda não existirem.
+    """
     print("RELATÓRIO DE CLIENTES POR CIDADE (ATIVOS x INATIVOS)\n")
 
     uf_filtro = input(
@@ -31,37 +35,12 @@ def gerar_relatorio_cidade_status():
         print("\nValor inválido. Usando limite padrão (20).")
         limite = 20
 
-    # 1) Agrega todas as cidades no Mongo (sem filtrar UF aqui)
-    pipeline = [
-        {
-            "$group": {
-                "_id": {
-                    "cidade": "$endereco.cidade",
-                    "uf": "$endereco.estado",
-                },
-                "total": {"$sum": 1},
-                "ativos": {
-                    "$sum": {
-                        "$cond": [{"$eq": ["$status", "ativo"]}, 1, 0]
-                    }
-                },
-                "inativos": {
-                    "$sum": {
-                        "$cond": [{"$eq": ["$status", "inativo"]}, 1, 0]
-                    }
-                },
-            }
-        },
-        {
-            "$sort": {
-                "total": -1,
-                "_id.uf": 1,
-                "_id.cidade": 1,
-            }
-        },
-    ]
-
-    docs = list(col.aggregate(pipeline))
+    # 1) Linhas já agregadas por cidade/UF
+    relatorio = ler_ou_materializar("cidades_status")
+    docs = sorted(
+        relatorio.linhas,
+        key=lambda d: (-d["clientes"], d["estado"], d["cidade"]),
+    )
 
     if not docs:
         print("\n✗ Nenhum cliente encontrado (coleção vazia?).")
@@ -72,14 +51,14 @@ def gerar_relatorio_cidade_status():
         docs = [
             d
             for d in docs
-            if (d["_id"]["uf"] or "").lower() == uf_filtro
+            if (d["estado"] or "").strip().lower() == uf_filtro
         ]
 
         if not docs:
             print("\n✗ Nenhum cliente encontrado para esse filtro.")
             return
 
-    total_geral = sum(d["total"] for d in docs)
+    total_geral = sum(d["clientes"] for d in docs)
 
     # Aplica limite apenas para exibição (não para o CSV)
     if limite > 0:
@@ -87,7 +66,8 @@ def gerar_relatorio_cidade_status():
     else:
         exibidos = docs
 
-    print(f"\nTotal de clientes: {total_geral}\n")
+    print(f"\nTotal de clientes: {total_geral}")
+    print(f"Calculado em: {relatorio.metadados()['computed_at']}\n")
     print(
         "Cidade / UF".ljust(35),
         "|",
@@ -106,11 +86,11 @@ def gerar_relatorio_cidade_status():
     print("-" * 90)
 
     for d in exibidos:
-        cidade = d["_id"]["cidade"] or "(sem cidade)"
-        uf = (d["_id"]["uf"] or "").upper()
-        total = d["total"]
-        ativos = d["ativos"]
-        inativos = d["inativos"]
+        cidade = d["cidade"]
+        uf = d["estado"].upper()
+        total = d["clientes"]
+        ativos = d["ativo"]
+        inativos = d["inativo"]
 
         perc_total = (total / total_geral * 100) if total_geral else 0
         perc_ativos = (ativos / total * 100) if total else 0
@@ -153,11 +133,11 @@ def gerar_relatorio_cidade_status():
             ]
         )
         for d in docs:
-            cidade = d["_id"]["cidade"] or ""
-            uf = (d["_id"]["uf"] or "").upper()
-            total = d["total"]
-            ativos = d["ativos"]
-            inativos = d["inativos"]
+            cidade = d["cidade"]
+            uf = d["estado"].upper()
+            total = d["clientes"]
+            ativos = d["ativo"]
+            inativos = d["inativo"]
 
             perc_total = (total / total_geral * 100) if total_geral else 0
             perc_ativos = (ativos / total * 100) if total else 0
@@ -7,56 +7,45 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from config import get_collection
+from src import contadores
+from src.relatorios_materializados import ler_ou_materializar
 
 
 def gerar_relatorio_uf():
-    """Relatório de clientes por UF, com ativos x inativos."""
-    col = get_collection()
+    """
+    Relatório de clientes por UF, com ativos x inativos.
+
+    Lê os contadores por UF mantidos a cada escrita (src/contadores.py);
+    se ainda não foram reconciliados, usa as linhas pré-agregadas de
+    relatorios_materializados (relatório status_por_estado), materializando
+    na hora se ainda não existirem.
+    """
+    contadores_uf = contadores.listar_contadores("uf")
+    if contadores_uf is not None:
+        docs = [
+            {
+                "estado": c["estado"],
+                "clientes": c["total"],
+                "ativo": c.get("status", {}).get("ativo", 0),
+                "inativo": c.get("status", {}).get("inativo", 0),
+            }
+            for c in contadores_uf
+        ]
+        origem = "contadores incrementais (atualizados a cada escrita)"
+    else:
+        relatorio = ler_ou_materializar("status_por_estado")
+        docs = sorted(relatorio.linhas, key=lambda d: d["clientes"], reverse=True)
+        origem = f"relatório materializado de {relatorio.metadados()['computed_at']}"
 
-    total_geral = col.count_documents({})
+    total_geral = sum(d["clientes"] for d in docs)
 
     if total_geral == 0:
         print("✗ Nenhum cliente cadastrado.")
         return
 
-    # Agrupa por UF (campo endereco.estado)
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$endereco.estado",
-                "total": {"$sum": 1},
-                "ativos": {
-                    "$sum": {
-                        "$cond": [
-                            {"$eq": ["$status", "ativo"]},
-                            1,
-                            0,
-                        ]
-                    }
-                },
-                "inativos": {
-                    "$sum": {
-                        "$cond": [
-                            {"$eq": ["$status", "inativo"]},
-                            1,
-                            0,
-                        ]
-                    }
-                },
-            }
-        },
-        {"$sort": {"total": -1}},
-    ]
-
-    docs = list(col.aggregate(pipeline))
-
-    if not docs:
-        print("✗ Nenhum cliente encontrado no agregador.")
-        return
-
     print("\nRELATÓRIO DE CLIENTES POR UF\n")
-    print(f"Total de clientes: {total_geral}\n")
+    print(f"Total de clientes: {total_geral}")
+    print(f"Origem: {origem}\n")
 
     header = f"{'UF':<4} {'Qtde':>8} {'% total':>8} {'Ativos':>8} {'Inativos':>10} {'% ativos':>10}"
     print(header)
@@ -65,10 +54,10 @@ def gerar_relatorio_uf():
     linhas_csv = []
 
     for d in docs:
-        uf = d["_id"] or "??"
-        total = d["total"]
-        ativos = d.get("ativos", 0)
-        inativos = d.get("inativos", 0)
+        uf = d["estado"] or "??"
+        total = d["clientes"]
+        ativos = d.get("ativo", 0)
+        inativos = d.get("inativo", 0)
 
         perc_total = (total / total_geral * 100) if total_geral else 0
         perc_ativos = (ativos / total * 100) if total else 0
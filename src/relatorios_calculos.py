@@ -0,0 +1,402 @@
+"""
+Cálculo dos relatórios de /relatorios.
+
+Funções puras que devolvem o corpo da resposta a partir de:
+
+- `calcular_*`: o DataFrame do snapshot colunar (ver src/snapshot_clientes.py);
+- `montar_*`: as linhas pré-agregadas de src/relatorios_materializados.py.
+
+As duas famílias produzem o mesmo formato de resposta. Quando não há
+dados para o critério pedido, levantam RelatorioVazioError, que a API
+traduz em 404.
+"""
+
+from datetime import date
+from typing import List
+
+import pandas as pd
+
+from src.relatorios_pipelines import FAIXAS_ETARIAS_LABELS, FAIXAS_ETARIAS_LIMITES
+
+
+class RelatorioVazioError(LookupError):
+    """Não há clientes que atendam ao critério do relatório."""
+
+
+def _percentual(parte: int, total: int) -> float:
+    """Percentual com 2 casas; 0.0 quando o total é zero."""
+    return round(parte / total * 100, 2) if total else 0.0
+
+
+def _texto(serie: pd.Series, vazio: str) -> pd.Series:
+    """Converte uma coluna (categórica) para texto, trocando nulos por `vazio`."""
+    return serie.astype(object).where(serie.notna(), vazio)
+
+
+def calcular_faixa_etaria(df: pd.DataFrame, hoje: date) -> dict:
+    """Distribuição de clientes por faixa etária (a partir de data_nascimento)."""
+    nascimento = df["data_nascimento"].dropna()
+
+    # Idade em anos (aprox.), como no cálculo original em Pandas
+    idade = (pd.Timestamp(hoje) - nascimento).dt.days / 365.25
+
+    faixa = pd.cut(
+        idade,
+        bins=FAIXAS_ETARIAS_LIMITES,
+        labels=FAIXAS_ETARIAS_LABELS,
+        right=False,
+    )
+    contagem = faixa.value_counts().reindex(FAIXAS_ETARIAS_LABELS, fill_value=0)
+    total = int(contagem.sum())
+
+    if total == 0:
+        return {
+            "mensagem": "Nenhum cliente com data_nascimento válida.",
+            "total_clientes": 0,
+            "faixas": [],
+        }
+
+    faixas = [
+        {
+            "faixa_etaria": label,
+            "quantidade": int(quantidade),
+            "percentual": _percentual(int(quantidade), total),
+        }
+        for label, quantidade in contagem.items()
+    ]
+
+    return {
+        "mensagem": "Distribuição por faixa etária calculada com sucesso.",
+        "total_clientes": total,
+        "faixas": faixas,
+    }
+
+
+def calcular_cidades_mais_inativos(df: pd.DataFrame, limite: int) -> dict:
+    """Top N cidades (estado + cidade) com mais clientes inativos."""
+    inativos = df[df["status"] == "inativo"]
+
+    if inativos.empty:
+        return {
+            "mensagem": "Nenhum cliente inativo encontrado.",
+            "total_inativos": 0,
+            "limite": limite,
+            "cidades": [],
+        }
+
+    agrupado = (
+        pd.DataFrame(
+            {
+                "estado": _texto(inativos["estado"], "(sem estado)"),
+                "cidade": _texto(inativos["cidade"], "(sem cidade)"),
+            }
+        )
+        .groupby(["estado", "cidade"])
+        .size()
+        .sort_values(ascending=False)
+    )
+
+    total_inativos = int(len(inativos))
+
+    cidades = [
+        {
+            "estado": estado,
+            "cidade": cidade,
+            "quantidade_inativos": int(quantidade),
+            "percentual": _percentual(int(quantidade), total_inativos),
+        }
+        for (estado, cidade), quantidade in agrupado.head(limite).items()
+    ]
+
+    return {
+        "mensagem": "Top cidades com mais clientes inativos calculado com sucesso.",
+        "total_inativos": total_inativos,
+        "limite": limite,
+        "cidades": cidades,
+    }
+
+
+def calcular_dominios_email(df: pd.DataFrame) -> dict:
+    """Top 10 domínios de e-mail, com quantidade e percentual."""
+    contagem_dominios = df["dominio_email"].value_counts()
+    contagem_dominios = contagem_dominios[contagem_dominios > 0]
+
+    total_com_email = int(contagem_dominios.sum())
+    if total_com_email == 0:
+        raise RelatorioVazioError("Nenhum cliente com e-mail definido.")
+
+    top_dominios = [
+        {
+            "dominio": dominio,
+            "quantidade": int(quantidade),
+            "percentual": _percentual(int(quantidade), total_com_email),
+        }
+        for dominio, quantidade in contagem_dominios.head(10).items()
+    ]
+
+    return {
+        "mensagem": "Top domínios de e-mail calculado com sucesso.",
+        "total_clientes_com_email": total_com_email,
+        "top_dominios": top_dominios,
+    }
+
+
+def _tabela_status(chaves: pd.DataFrame, status: pd.Series) -> pd.DataFrame:
+    """Conta clientes por chave x status, garantindo colunas ativo/inativo/total."""
+    tabela = (
+        chaves.assign(status=status)
+        .groupby([*chaves.columns, "status"])
+        .size()
+        .unstack(fill_value=0)
+    )
+    for coluna in ("ativo", "inativo"):
+        if coluna not in tabela.columns:
+            tabela[coluna] = 0
+    tabela["total"] = tabela["ativo"] + tabela["inativo"]
+    return tabela
+
+
+def calcular_cidades_inativos(df: pd.DataFrame, min_clientes: int, limite: int) -> dict:
+    """Cidades com maior percentual de inativos (mínimo de clientes por cidade)."""
+    tabela = _tabela_status(
+        pd.DataFrame(
+            {
+                "estado": _texto(df["estado"], "(sem estado)"),
+                "cidade": _texto(df["cidade"], "(sem cidade)"),
+            }
+        ),
+        _texto(df["status"], "desconhecido"),
+    )
+
+    tabela = tabela[tabela["total"] >= min_clientes].copy()
+    if tabela.empty:
+        raise RelatorioVazioError(
+            "Nenhuma cidade com quantidade mínima de clientes para o relatório."
+        )
+
+    # total >= min_clientes; com min_clientes=0 pode haver total zero
+    tabela["perc_inativos"] = (
+        (tabela["inativo"] / tabela["total"].where(tabela["total"] > 0)) * 100
+    ).round(2).fillna(0.0)
+    top_cidades = tabela.sort_values(by="perc_inativos", ascending=False).head(limite)
+
+    cidades = [
+        {
+            "estado": estado,
+            "cidade": cidade,
+            "inativo": int(row["inativo"]),
+            "total": int(row["total"]),
+            "perc_inativos": float(row["perc_inativos"]),
+        }
+        for (estado, cidade), row in top_cidades.iterrows()
+    ]
+
+    return {
+        "mensagem": "Ranking de cidades por percentual de inativos calculado com sucesso.",
+        "min_clientes": int(min_clientes),
+        "limite": int(limite),
+        "total_cidades_no_ranking": len(cidades),
+        "cidades": cidades,
+    }
+
+
+def calcular_status_por_estado(df: pd.DataFrame, min_clientes: int) -> dict:
+    """Ativos/inativos por UF, com total e percentuais."""
+    tabela = _tabela_status(
+        pd.DataFrame(
+            {"estado": _texto(df["estado"], "(sem estado)").str.strip().str.upper()}
+        ),
+        _texto(df["status"], "desconhecido").str.strip().str.lower(),
+    )
+
+    if min_clientes > 0:
+        tabela = tabela[tabela["total"] >= min_clientes]
+
+    if tabela.empty:
+        raise RelatorioVazioError("Nenhum estado com clientes para o critério informado.")
+
+    tabela = tabela.sort_values(by="total", ascending=False)
+
+    estados = [
+        {
+            "estado": estado,
+            "ativo": int(row["ativo"]),
+            "inativo": int(row["inativo"]),
+            "total": int(row["total"]),
+            "perc_ativos": _percentual(int(row["ativo"]), int(row["total"])),
+            "perc_inativos": _percentual(int(row["inativo"]), int(row["total"])),
+        }
+        for estado, row in tabela.iterrows()
+    ]
+
+    return {
+        "mensagem": "Status de clientes por estado calculado com sucesso.",
+        "total_geral_clientes": int(len(df)),
+        "min_clientes": int(min_clientes),
+        "total_estados_no_relatorio": len(estados),
+        "estados": estados,
+    }
+
+
+# ----------------------------------------------------------------------
+# A partir das linhas materializadas
+# ----------------------------------------------------------------------
+
+def _com_total(linhas: List[dict]) -> List[dict]:
+    """Acrescenta total = ativo + inativo a cada linha (como em _tabela_status)."""
+    return [{**linha, "total": linha["ativo"] + linha["inativo"]} for linha in linhas]
+
+
+def montar_faixa_etaria(linhas: List[dict]) -> dict:
+    """Mesmo resultado de calcular_faixa_etaria, a partir de {faixa_etaria, quantidade}."""
+    contagem = {linha["faixa_etaria"]: int(linha["quantidade"]) for linha in linhas}
+    total = sum(contagem.get(label, 0) for label in FAIXAS_ETARIAS_LABELS)
+
+    if total == 0:
+        return {
+            "mensagem": "Nenhum cliente com data_nascimento válida.",
+            "total_clientes": 0,
+            "faixas": [],
+        }
+
+    faixas = [
+        {
+            "faixa_etaria": label,
+            "quantidade": contagem.get(label, 0),
+            "percentual": _percentual(contagem.get(label, 0), total),
+        }
+        for label in FAIXAS_ETARIAS_LABELS
+    ]
+
+    return {
+        "mensagem": "Distribuição por faixa etária calculada com sucesso.",
+        "total_clientes": total,
+        "faixas": faixas,
+    }
+
+
+def montar_cidades_mais_inativos(linhas: List[dict], limite: int) -> dict:
+    """Mesmo resultado de calcular_cidades_mais_inativos, a partir de cidades_status."""
+    inativos = [linha for linha in linhas if linha["inativo"] > 0]
+
+    if not inativos:
+        return {
+            "mensagem": "Nenhum cliente inativo encontrado.",
+            "total_inativos": 0,
+            "limite": limite,
+            "cidades": [],
+        }
+
+    total_inativos = sum(linha["inativo"] for linha in inativos)
+    inativos.sort(key=lambda linha: linha["inativo"], reverse=True)
+
+    cidades = [
+        {
+            "estado": linha["estado"],
+            "cidade": linha["cidade"],
+            "quantidade_inativos": int(linha["inativo"]),
+            "percentual": _percentual(int(linha["inativo"]), total_inativos),
+        }
+        for linha in inativos[:limite]
+    ]
+
+    return {
+        "mensagem": "Top cidades com mais clientes inativos calculado com sucesso.",
+        "total_inativos": total_inativos,
+        "limite": limite,
+        "cidades": cidades,
+    }
+
+
+def montar_dominios_email(linhas: List[dict]) -> dict:
+    """Mesmo resultado de calcular_dominios_email, a partir de {dominio, quantidade}."""
+    dominios = sorted(
+        (linha for linha in linhas if linha["quantidade"] > 0),
+        key=lambda linha: linha["quantidade"],
+        reverse=True,
+    )
+
+    total_com_email = sum(int(linha["quantidade"]) for linha in dominios)
+    if total_com_email == 0:
+        raise RelatorioVazioError("Nenhum cliente com e-mail definido.")
+
+    top_dominios = [
+        {
+            "dominio": linha["dominio"],
+            "quantidade": int(linha["quantidade"]),
+            "percentual": _percentual(int(linha["quantidade"]), total_com_email),
+        }
+        for linha in dominios[:10]
+    ]
+
+    return {
+        "mensagem": "Top domínios de e-mail calculado com sucesso.",
+        "total_clientes_com_email": total_com_email,
+        "top_dominios": top_dominios,
+    }
+
+
+def montar_cidades_inativos(linhas: List[dict], min_clientes: int, limite: int) -> dict:
+    """Mesmo resultado de calcular_cidades_inativos, a partir de cidades_status."""
+    tabela = [linha for linha in _com_total(linhas) if linha["total"] >= min_clientes]
+    if not tabela:
+        raise RelatorioVazioError(
+            "Nenhuma cidade com quantidade mínima de clientes para o relatório."
+        )
+
+    for linha in tabela:
+        linha["perc_inativos"] = _percentual(linha["inativo"], linha["total"])
+    tabela.sort(key=lambda linha: linha["perc_inativos"], reverse=True)
+
+    cidades = [
+        {
+            "estado": linha["estado"],
+            "cidade": linha["cidade"],
+            "inativo": int(linha["inativo"]),
+            "total": int(linha["total"]),
+            "perc_inativos": float(linha["perc_inativos"]),
+        }
+        for linha in tabela[:limite]
+    ]
+
+    return {
+        "mensagem": "Ranking de cidades por percentual de inativos calculado com sucesso.",
+        "min_clientes": int(min_clientes),
+        "limite": int(limite),
+        "total_cidades_no_ranking": len(cidades),
+        "cidades": cidades,
+    }
+
+
+def montar_status_por_estado(linhas: List[dict], min_clientes: int) -> dict:
+    """Mesmo resultado de calcular_status_por_estado, a partir de status_por_estado."""
+    tabela = _com_total(linhas)
+    total_geral = sum(int(linha["clientes"]) for linha in tabela)
+
+    if min_clientes > 0:
+        tabela = [linha for linha in tabela if linha["total"] >= min_clientes]
+
+    if not tabela:
+        raise RelatorioVazioError("Nenhum estado com clientes para o critério informado.")
+
+    tabela.sort(key=lambda linha: linha["total"], reverse=True)
+
+    estados = [
+        {
+            "estado": linha["estado"],
+            "ativo": int(linha["ativo"]),
+            "inativo": int(linha["inativo"]),
+            "total": int(linha["total"]),
+            "perc_ativos": _percentual(int(linha["ativo"]), int(linha["total"])),
+            "perc_inativos": _percentual(int(linha["inativo"]), int(linha["total"])),
+        }
+        for linha in tabela
+    ]
+
+    return {
+        "mensagem": "Status de clientes por estado calculado com sucesso.",
+        "total_geral_clientes": total_geral,
+        "min_clientes": int(min_clientes),
+        "total_estados_no_relatorio": len(estados),
+        "estados": estados,
+    }
@@ -0,0 +1,369 @@
+"""
+Relatórios materializados na coleção `relatorios_materializados`.
+
+Cada relatório é uma pipeline de agregação sobre a coleção de clientes
+que termina em `$merge`: o MongoDB grava as linhas já agregadas direto na
+coleção de relatórios, sem trazer documentos de clientes para a
+aplicação. A API e os relatórios de terminal só leem essas linhas.
+
+Documentos gravados:
+
+- linhas: `{"_id": {"relatorio", "execucao", "chave"}, "tipo": "linha",
+  "relatorio", "execucao", "computed_at", ...campos do relatório}`;
+- controle (um por relatório): `{"_id": "execucao:<relatorio>",
+  "tipo": "execucao", "relatorio", "execucao", "computed_at",
+  "duracao_ms", "linhas"}`, apontando para a última execução concluída.
+
+A leitura usa só as linhas da execução apontada pelo controle, então
+nunca mistura duas execuções. Ao fim de cada execução são apagadas as
+linhas anteriores à execução que o controle apontava antes da troca: a
+execução imediatamente anterior fica, para quem leu o controle antigo
+ainda conseguir ler suas linhas. Se mesmo assim a execução lida sumir
+(duas trocas no meio de uma leitura), ler_relatorio relê o controle.
+
+A materialização roda em segundo plano a cada
+RELATORIOS_MATERIALIZAR_INTERVALO_SEGUNDOS (AgendadorMaterializacao), sob
+demanda em POST /relatorios/materializar, ou pelo script:
+
+    python -m scripts.materializar_relatorios
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import (
+    MONGO_COLLECTION_RELATORIOS,
+    RELATORIOS_MATERIALIZAR_INTERVALO_SEGUNDOS,
+    get_collection,
+)
+from logging_config import get_logger
+from src.relatorios_pipelines import (
+    FAIXAS_ETARIAS_LABELS,
+    FAIXAS_ETARIAS_LIMITES,
+    pipeline_faixa_etaria,
+)
+
+
+logger = get_logger(__name__)
+
+_FILTRO_NAO_EXCLUIDO = {"marcado_para_exclusao": {"$ne": True}}
+
+# Releituras do controle quando a execução apontada some durante a leitura
+_LEITURA_TENTATIVAS = 3
+
+
+def _texto(campo: str, vazio: str) -> dict:
+    """Valor do campo, ou `vazio` quando nulo/ausente."""
+    return {"$ifNull": [campo, vazio]}
+
+
+def _conta_se(condicao: dict) -> dict:
+    return {"$sum": {"$cond": [condicao, 1, 0]}}
+
+
+def _pipeline_status_por_estado(hoje: datetime) -> List[dict]:
+    """Ativos/inativos por UF (UF e status normalizados: trim + caixa)."""
+    status = {"$toLower": {"$trim": {"input": _texto("$status", "desconhecido")}}}
+    return [
+        {"$match": _FILTRO_NAO_EXCLUIDO},
+        {
+            "$group": {
+                "_id": {
+                    "$toUpper": {
+                        "$trim": {"input": _texto("$endereco.estado", "(sem estado)")}
+                    }
+                },
+                "clientes": {"$sum": 1},
+                "ativo": _conta_se({"$eq": [status, "ativo"]}),
+                "inativo": _conta_se({"$eq": [status, "inativo"]}),
+            }
+        },
+        {"$set": {"estado": "$_id"}},
+    ]
+
+
+def _pipeline_cidades_status(hoje: datetime) -> List[dict]:
+    """Ativos/inativos por UF + cidade (valores como gravados)."""
+    return [
+        {"$match": _FILTRO_NAO_EXCLUIDO},
+        {
+            "$group": {
+                "_id": {
+                    "estado": _texto("$endereco.estado", "(sem estado)"),
+                    "cidade": _texto("$endereco.cidade", "(sem cidade)"),
+                },
+                "clientes": {"$sum": 1},
+                "ativo": _conta_se({"$eq": ["$status", "ativo"]}),
+                "inativo": _conta_se({"$eq": ["$status", "inativo"]}),
+            }
+        },
+        {"$set": {"estado": "$_id.estado", "cidade": "$_id.cidade"}},
+    ]
+
+
+def _pipeline_dominios_email(hoje: datetime) -> List[dict]:
+    """Quantidade de clientes por domínio de e-mail (parte depois do @)."""
+    email = {"$trim": {"input": "$email"}}
+    return [
+        {"$match": {**_FILTRO_NAO_EXCLUIDO, "email": {"$type": "string"}}},
+        {"$project": {"_id": 0, "email": email}},
+        {"$match": {"email": {"$ne": ""}}},
+        {
+            "$group": {
+                "_id": {
+                    "$trim": {
+                        "input": {
+                            "$toLower": {"$arrayElemAt": [{"$split": ["$email", "@"]}, -1]}
+                        }
+                    }
+                },
+                "quantidade": {"$sum": 1},
+            }
+        },
+        {"$set": {"dominio": "$_id"}},
+    ]
+
+
+def _pipeline_faixa_etaria(hoje: datetime) -> List[dict]:
+    """Clientes por faixa etária ($bucket), com o rótulo da faixa."""
+    return [
+        *pipeline_faixa_etaria(hoje),
+        {"$match": {"_id": {"$ne": "fora_das_faixas"}}},
+        {
+            "$set": {
+                "faixa_etaria": {
+                    "$arrayElemAt": [
+                        FAIXAS_ETARIAS_LABELS,
+                        {"$indexOfArray": [FAIXAS_ETARIAS_LIMITES, "$_id"]},
+                    ]
+                }
+            }
+        },
+    ]
+
+
+# Nome do relatório -> pipeline (recebe a data de referência do cálculo)
+RELATORIOS: Dict[str, Callable[[datetime], List[dict]]] = {
+    "status_por_estado": _pipeline_status_por_estado,
+    "cidades_status": _pipeline_cidades_status,
+    "dominios_email": _pipeline_dominios_email,
+    "faixa_etaria": _pipeline_faixa_etaria,
+}
+
+
+@dataclass(frozen=True)
+class RelatorioMaterializado:
+    """Linhas da última execução concluída de um relatório."""
+
+    relatorio: str
+    linhas: List[dict]
+    computed_at: datetime
+
+    def metadados(self) -> dict:
+        computed_at = self.computed_at
+        if computed_at.tzinfo is None:
+            # PyMongo devolve datetimes "naive" em UTC por padrão
+            computed_at = computed_at.replace(tzinfo=timezone.utc)
+        return {
+            "computed_at": computed_at.isoformat(),
+            "idade_segundos": round(
+                (datetime.now(timezone.utc) - computed_at).total_seconds(), 1
+            ),
+            "total_linhas": len(self.linhas),
+        }
+
+
+def _colecao_relatorios(colecao_clientes):
+    return colecao_clientes.database[MONGO_COLLECTION_RELATORIOS]
+
+
+def _agora_ms() -> datetime:
+    """Agora em UTC, truncado em milissegundos (precisão do BSON)."""
+    agora = datetime.now(timezone.utc)
+    return agora.replace(microsecond=agora.microsecond // 1000 * 1000)
+
+
+def materializar_relatorio(relatorio: str, colecao_clientes=None) -> dict:
+    """
+    Executa a pipeline do relatório com `$merge` na coleção de relatórios,
+    aponta o controle para a nova execução e apaga as linhas antigas.
+    """
+    if relatorio not in RELATORIOS:
+        raise KeyError(f"Relatório desconhecido: {relatorio}")
+
+    if colecao_clientes is None:
+        colecao_clientes = get_collection().collection
+    destino = _colecao_relatorios(colecao_clientes)
+
+    inicio = time.perf_counter()
+    computed_at = _agora_ms()
+    execucao = str(ObjectId())
+    hoje = datetime.combine(date.today(), datetime.min.time())
+
+    pipeline = [
+        *RELATORIOS[relatorio](hoje),
+        {
+            "$set": {
+                "_id": {"relatorio": relatorio, "execucao": execucao, "chave": "$_id"},
+                "tipo": "linha",
+                "relatorio": relatorio,
+                "execucao": execucao,
+                "computed_at": computed_at,
+            }
+        },
+        {
+            "$merge": {
+                "into": MONGO_COLLECTION_RELATORIOS,
+                "on": "_id",
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }
+        },
+    ]
+    # $merge não devolve documentos: o aggregate só precisa ser consumido
+    list(colecao_clientes.aggregate(pipeline, allowDiskUse=True))
+
+    total_linhas = destino.count_documents(
+        {"relatorio": relatorio, "tipo": "linha", "execucao": execucao}
+    )
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+
+    # Só avança o controle se não houver execução mais nova já concluída
+    # (ex.: outro processo da API materializando ao mesmo tempo)
+    try:
+        anterior = destino.find_one_and_update(
+            {"_id": f"execucao:{relatorio}", "computed_at": {"$lt": computed_at}},
+            {
+                "$set": {
+                    "tipo": "execucao",
+                    "relatorio": relatorio,
+                    "execucao": execucao,
+                    "computed_at": computed_at,
+                    "duracao_ms": round(duracao_ms, 2),
+                    "linhas": total_linhas,
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+    except DuplicateKeyError:
+        # Já existe execução mais nova: estas linhas nunca serão lidas
+        destino.delete_many({"relatorio": relatorio, "tipo": "linha", "execucao": execucao})
+    else:
+        # Mantém a execução anterior (leitores que pegaram o controle
+        # antigo ainda estão lendo) e apaga só as que vieram antes dela
+        if anterior is not None:
+            destino.delete_many(
+                {
+                    "relatorio": relatorio,
+                    "tipo": "linha",
+                    "computed_at": {"$lt": anterior["computed_at"]},
+                }
+            )
+
+    logger.info(
+        f"relatorio_materializado relatorio={relatorio} linhas={total_linhas} "
+        f"duracao_ms={duracao_ms:.0f}",
+        extra={
+            "event": "relatorio_materializado",
+            "relatorio": relatorio,
+            "duration_ms": round(duracao_ms, 2),
+        },
+    )
+    return {
+        "relatorio": relatorio,
+        "linhas": total_linhas,
+        "computed_at": computed_at.isoformat(),
+        "duracao_ms": round(duracao_ms, 2),
+    }
+
+
+def materializar(relatorios: Optional[Iterable[str]] = None, colecao_clientes=None) -> List[dict]:
+    """Materializa os relatórios pedidos (todos, se None)."""
+    nomes = list(relatorios) if relatorios is not None else list(RELATORIOS)
+    return [materializar_relatorio(nome, colecao_clientes) for nome in nomes]
+
+
+def ler_relatorio(relatorio: str, colecao_clientes=None) -> Optional[RelatorioMaterializado]:
+    """Linhas da última execução concluída, ou None se nunca foi materializado."""
+    if colecao_clientes is None:
+        colecao_clientes = get_collection().collection
+    origem = _colecao_relatorios(colecao_clientes)
+
+    for _ in range(_LEITURA_TENTATIVAS):
+        controle = origem.find_one({"_id": f"execucao:{relatorio}"})
+        if controle is None:
+            return None
+
+        linhas = list(
+            origem.find(
+                {"relatorio": relatorio, "tipo": "linha", "execucao": controle["execucao"]},
+                {"_id": 0, "tipo": 0, "relatorio": 0, "execucao": 0, "computed_at": 0},
+            )
+        )
+        # Execução apagada entre ler o controle e ler as linhas: relê o controle
+        if linhas or not controle.get("linhas"):
+            break
+    return RelatorioMaterializado(
+        relatorio=relatorio,
+        linhas=linhas,
+        computed_at=controle["computed_at"],
+    )
+
+
+def ler_ou_materializar(relatorio: str, colecao_clientes=None) -> RelatorioMaterializado:
+    """Como ler_relatorio, mas materializa na hora se ainda não existir."""
+    dados = ler_relatorio(relatorio, colecao_clientes)
+    if dados is None:
+        materializar_relatorio(relatorio, colecao_clientes)
+        dados = ler_relatorio(relatorio, colecao_clientes)
+    return dados
+
+
+class AgendadorMaterializacao:
+    """Rematerializa todos os relatórios periodicamente em uma thread."""
+
+    def __init__(self, intervalo_segundos: float = RELATORIOS_MATERIALIZAR_INTERVALO_SEGUNDOS):
+        self._intervalo = intervalo_segundos
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        """Sobe a thread (idempotente; intervalo <= 0 desliga o agendamento)."""
+        if self._thread is not None or self._intervalo <= 0:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="relatorios-materializados", daemon=True
+        )
+        self._thread.start()
+
+    def parar(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._parar.set()
+        thread.join(timeout=5)
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._parar.is_set():
+            try:
+                materializar()
+            except Exception:
+                logger.exception(
+                    "relatorio_materializado_erro",
+                    extra={"event": "relatorio_materializado_erro"},
+                )
+            self._parar.wait(self._intervalo)
+
+
+# Instância única do processo, usada pela API
+agendador_materializacao = AgendadorMaterializacao()
@@ -0,0 +1,94 @@
+"""
+Pipelines de agregação dos relatórios de clientes.
+
+Os relatórios são calculados dentro do MongoDB: só o resultado agregado
+(algumas linhas) trafega pela rede, em vez da coleção inteira.
+"""
+
+from datetime import datetime
+from typing import Iterable, List
+
+
+# Faixas etárias (mesmos cortes dos relatórios em Pandas: [inicio, fim) )
+FAIXAS_ETARIAS_LIMITES = [0, 18, 26, 36, 51, 66, 200]
+FAIXAS_ETARIAS_LABELS = ["0-17", "18-25", "26-35", "36-50", "51-65", "66+"]
+
+# Formatos de data_nascimento encontrados na base (schema usa YYYY-MM-DD;
+# o gerador de cidades reais gravou DD/MM/YYYY)
+FORMATOS_DATA_NASCIMENTO = ["%Y-%m-%d", "%d/%m/%Y"]
+
+
+def _expr_data_nascimento() -> dict:
+    """
+    Expressão que converte data_nascimento (string) em Date, tentando
+    cada formato conhecido; vira null se nenhum formato servir.
+    """
+    expr = None
+    for formato in reversed(FORMATOS_DATA_NASCIMENTO):
+        conversao = {
+            "$dateFromString": {
+                "dateString": "$data_nascimento",
+                "format": formato,
+                "onError": None,
+                "onNull": None,
+            }
+        }
+        expr = conversao if expr is None else {"$ifNull": [conversao, expr]}
+    return expr
+
+
+def pipeline_faixa_etaria(hoje: datetime) -> List[dict]:
+    """
+    Histograma de clientes por faixa etária.
+
+    A idade é calculada como (hoje - data_nascimento) em dias / 365.25,
+    igual ao cálculo feito antes em Pandas, e agrupada com $bucket.
+    Cada documento de saída tem `_id` = limite inferior da faixa e
+    `quantidade`; idades fora das faixas caem em `_id` = "fora_das_faixas".
+    """
+    return [
+        {
+            "$match": {
+                "marcado_para_exclusao": {"$ne": True},
+                "data_nascimento": {"$type": "string"},
+            }
+        },
+        {"$project": {"_id": 0, "nascimento": _expr_data_nascimento()}},
+        {"$match": {"nascimento": {"$ne": None}}},
+        {
+            "$project": {
+                "idade": {
+                    "$divide": [
+                        {
+                            "$dateDiff": {
+                                "startDate": "$nascimento",
+                                "endDate": hoje,
+                                "unit": "day",
+                            }
+                        },
+                        365.25,
+                    ]
+                }
+            }
+        },
+        {
+            "$bucket": {
+                "groupBy": "$idade",
+                "boundaries": FAIXAS_ETARIAS_LIMITES,
+                "default": "fora_das_faixas",
+                "output": {"quantidade": {"$sum": 1}},
+            }
+        },
+    ]
+
+
+def faixas_etarias_do_bucket(docs: Iterable[dict]) -> List[dict]:
+    """
+    Converte a saída do $bucket em uma linha por faixa (todas as faixas,
+    mesmo as vazias), no formato {"faixa_etaria", "quantidade"}.
+    """
+    contagem = {doc["_id"]: int(doc["quantidade"]) for doc in docs}
+    return [
+        {"faixa_etaria": label, "quantidade": contagem.get(limite, 0)}
+        for limite, label in zip(FAIXAS_ETARIAS_LIMITES, FAIXAS_ETARIAS_LABELS)
+    ]
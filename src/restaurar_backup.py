@@ -0,0 +1,601 @@
+"""
+Restauração de backups da coleção de clientes.
+
+Formatos aceitos (detectados automaticamente):
+
+- backup com manifesto (src/motor_backup.py: completo, paralelo,
+  incremental ou reconstruído): diretório ou manifesto.json;
+- JSONL de scripts/export_clientes_backup_json.py (Extended JSON, uma
+  linha por documento; também .jsonl.gz);
+- array JSON antigo de fazer_backup() (json.dump com indent e
+  default=str): lido em fluxo com JSONDecoder.raw_decode, sem carregar o
+  arquivo. _id em texto (24 hex) volta a ser ObjectId e data_cadastro
+  volta a ser datetime; os campos normalizados são recalculados.
+
+Cada documento vira um ReplaceOne(upsert=True) pelo _id (pelo cpf, se o
+documento não tiver _id), enviado em bulk_write(ordered=False) em lotes
+de RESTAURACAO_LOTE. Em backups com manifesto, cada chunk é restaurado
+por um worker (processos, por padrão) e o checksum é conferido; os
+chunks de um incremental vão em ordem, um por vez, e repetições do mesmo
+_id ficam com a versão de maior atualizado_em; nos
+arquivos únicos, a leitura é sequencial e os lotes são gravados por
+RESTAURACAO_WORKERS threads.
+
+O progresso vai para um checkpoint (JSON, gravado de forma atômica):
+chunks concluídos, ou o offset até onde todos os lotes foram gravados.
+Rodar de novo o mesmo comando retoma dali; como tudo é upsert,
+reaplicar um lote é inofensivo. Ao final os contadores incrementais são
+reconciliados (src/contadores.py).
+
+Para uma cadeia completo + incrementais, reconstrua antes
+(scripts/reconstruir_backup.py) ou restaure os backups em ordem.
+
+Uso:
+
+    python -m src.restaurar_backup backups/backup_clientes_20250101_020000
+    python -m src.restaurar_backup backups/clientes_backup_20250101_020000.jsonl
+    python -m src.restaurar_backup backup_clientes_20240101_120000.json --colecao clientes_restaurados
+"""
+
+import argparse
+import codecs
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from config import (
+    MONGO_COLLECTION_CLIENTES,
+    RESTAURACAO_LOTE,
+    RESTAURACAO_PROCESSOS,
+    RESTAURACAO_WORKERS,
+    get_collection,
+    get_mongo_client,
+)
+from logging_config import get_logger
+from src import contadores
+from src.motor_backup import (
+    NOME_MANIFESTO,
+    BackupInvalidoError,
+    caminho_manifesto,
+    chave_id,
+    ler_chunk,
+    ler_manifesto,
+    versao_documento,
+)
+from src.normalizacao import adicionar_campos_normalizados
+
+
+logger = get_logger(__name__)
+
+FONTE_MANIFESTO = "manifesto"
+FONTE_JSONL = "jsonl"
+FONTE_ARRAY = "array_json"
+
+_TAMANHO_BLOCO = 1024 * 1024
+_SEPARADORES_ARRAY = re.compile(r"[ \t\r\n,]*")
+# Intervalo mínimo entre gravações do checkpoint de arquivos únicos
+_INTERVALO_CHECKPOINT_SEGUNDOS = 1.0
+
+
+# ----------------------------------------------------------------------
+# Detecção do formato e leitura
+# ----------------------------------------------------------------------
+
+
+def detectar_fonte(caminho) -> str:
+    caminho = Path(caminho)
+    if caminho.is_dir() or caminho.name == NOME_MANIFESTO:
+        return FONTE_MANIFESTO
+    if not caminho.exists():
+        raise BackupInvalidoError(f"Backup não encontrado: {caminho}")
+
+    with _abrir_arquivo(caminho) as arquivo:
+        inicio = arquivo.read(4096).lstrip()
+    if inicio.startswith(b"["):
+        return FONTE_ARRAY
+    if inicio.startswith(b"{") or not inicio:
+        return FONTE_JSONL
+    raise BackupInvalidoError(f"Formato de backup não reconhecido: {caminho}")
+
+
+def _abrir_arquivo(caminho: Path):
+    """Arquivo em modo binário (descomprimindo .gz); aceita seek para frente."""
+    if caminho.suffix == ".gz":
+        return gzip.open(caminho, "rb")
+    return open(caminho, "rb")
+
+
+def _iterar_jsonl(caminho: Path, inicio: int) -> Iterator[Tuple[dict, int]]:
+    """(documento, offset logo após a linha)."""
+    with _abrir_arquivo(caminho) as arquivo:
+        arquivo.seek(inicio)
+        offset = inicio
+        for linha in arquivo:
+            offset += len(linha)
+            if linha.strip():
+                yield json_util.loads(linha), offset
+
+
+def iterar_array_json(caminho: Path, inicio: int = 0) -> Iterator[Tuple[dict, int]]:
+    """
+    Elementos de um array JSON, em fluxo. Devolve (documento, offset em
+    bytes logo após o elemento).
+
+    A leitura avança uma posição no buffer (raw_decode a partir dela); o
+    trecho já consumido é descartado uma vez por read(), não a cada
+    elemento.
+    """
+    decodificador = json.JSONDecoder()
+    texto = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    posicao = 0
+    offset = inicio  # bytes do arquivo até buffer[posicao]
+    abriu_array = inicio > 0
+    fim_arquivo = False
+
+    with _abrir_arquivo(caminho) as arquivo:
+        arquivo.seek(inicio)
+        while True:
+            # Separadores entre elementos (só ASCII: 1 byte por caractere)
+            fim_separadores = _SEPARADORES_ARRAY.match(buffer, posicao).end()
+            offset += fim_separadores - posicao
+            posicao = fim_separadores
+
+            if posicao < len(buffer):
+                if not abriu_array:
+                    if buffer[posicao] != "[":
+                        raise BackupInvalidoError(f"{caminho}: esperado '[' no início do arquivo")
+                    posicao, offset, abriu_array = posicao + 1, offset + 1, True
+                    continue
+                if buffer[posicao] == "]":
+                    return
+                try:
+                    doc, fim = decodificador.raw_decode(buffer, posicao)
+                except json.JSONDecodeError:
+                    # Elemento incompleto no fim do buffer: lê mais
+                    if fim_arquivo:
+                        raise BackupInvalidoError(f"{caminho}: JSON inválido ou truncado perto do byte {offset}")
+                else:
+                    offset += len(buffer[posicao:fim].encode("utf-8"))
+                    posicao = fim
+                    yield doc, offset
+                    continue
+
+            if fim_arquivo:
+                if abriu_array:
+                    raise BackupInvalidoError(f"{caminho}: array JSON sem ']' final")
+                return
+            bloco = arquivo.read(_TAMANHO_BLOCO)
+            fim_arquivo = not bloco
+            buffer = buffer[posicao:] + texto.decode(bloco, final=fim_arquivo)
+            posicao = 0
+
+
+def _converter_legado(doc: dict) -> dict:
+    """Desfaz o default=str do backup antigo e recalcula os campos normalizados."""
+    _id = doc.get("_id")
+    if isinstance(_id, str) and ObjectId.is_valid(_id):
+        doc["_id"] = ObjectId(_id)
+    data_cadastro = doc.get("data_cadastro")
+    if isinstance(data_cadastro, str):
+        try:
+            doc["data_cadastro"] = datetime.fromisoformat(data_cadastro)
+        except ValueError:
+            pass
+    return adicionar_campos_normalizados(doc)
+
+
+# ----------------------------------------------------------------------
+# Gravação
+# ----------------------------------------------------------------------
+
+
+def _novo_resultado() -> dict:
+    return {"documentos": 0, "inseridos": 0, "substituidos": 0, "erros": 0}
+
+
+def _somar(total: dict, parcial: dict) -> None:
+    for chave in ("documentos", "inseridos", "substituidos", "erros"):
+        total[chave] += parcial[chave]
+
+
+def _filtro_documento(doc: dict) -> dict:
+    return {"_id": doc["_id"]} if "_id" in doc else {"cpf": doc["cpf"]}
+
+
+def _uma_versao_por_documento(docs: List[dict]) -> List[dict]:
+    """
+    Uma versão por documento: a de maior atualizado_em (no empate, a
+    última). Um incremental pode trazer o mesmo _id duas vezes, e em um
+    bulk_write não ordenado a ordem entre as duas operações não é garantida.
+    """
+    escolhidos = {}
+    for doc in docs:
+        chave = chave_id(doc["_id"]) if "_id" in doc else doc["cpf"]
+        atual = escolhidos.get(chave)
+        if atual is None or (versao_documento(doc) or float("-inf")) >= (
+            versao_documento(atual) or float("-inf")
+        ):
+            escolhidos[chave] = doc
+    return list(escolhidos.values())
+
+
+def aplicar_lote(colecao, docs: List[dict]) -> dict:
+    """ReplaceOne(upsert=True) de cada documento, em um bulk_write não ordenado."""
+    operacoes = [
+        ReplaceOne(_filtro_documento(doc), doc, upsert=True) for doc in _uma_versao_por_documento(docs)
+    ]
+    resultado = _novo_resultado()
+    resultado["documentos"] = len(docs)
+    try:
+        gravado = colecao.bulk_write(operacoes, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        gravado = e.details
+        erros = gravado.get("writeErrors", [])
+        resultado["erros"] = len(erros)
+        logger.warning(
+            f"restauracao_erros_no_lote erros={len(erros)} primeiro={erros[0].get('errmsg') if erros else None}",
+            extra={"event": "restauracao_erros_no_lote"},
+        )
+    resultado["inseridos"] = gravado.get("nUpserted", 0)
+    resultado["substituidos"] = gravado.get("nMatched", 0)
+    return resultado
+
+
+def _restaurar_chunk(
+    database: str,
+    nome_colecao: str,
+    diretorio: str,
+    chunk: dict,
+    formato: str,
+    compressao: str,
+    tamanho_lote: int,
+) -> dict:
+    """Restaura um chunk de backup com manifesto (roda em um worker)."""
+    colecao = get_mongo_client()[database][nome_colecao]
+    resultado = _novo_resultado()
+    lote: List[dict] = []
+    for doc in ler_chunk(Path(diretorio), chunk, formato, compressao, verificar=True):
+        lote.append(doc)
+        if len(lote) >= tamanho_lote:
+            _somar(resultado, aplicar_lote(colecao, lote))
+            lote = []
+    if lote:
+        _somar(resultado, aplicar_lote(colecao, lote))
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# Checkpoint
+# ----------------------------------------------------------------------
+
+
+class Checkpoint:
+    """
+    Progresso de uma restauração, gravado de forma atômica em JSON.
+    A identificação (fonte, tamanho, data de modificação e destino)
+    impede retomar com outro arquivo ou em outra coleção.
+    """
+
+    def __init__(self, caminho: Path, identificacao: dict):
+        self.caminho = Path(caminho)
+        self.identificacao = identificacao
+        self.dados = {
+            "identificacao": identificacao,
+            "concluido": False,
+            "offset": 0,
+            "chunks_concluidos": [],
+            "resultado": _novo_resultado(),
+        }
+
+    def carregar(self, reiniciar: bool = False) -> bool:
+        """Carrega o progresso salvo; devolve True se está retomando."""
+        if reiniciar or not self.caminho.exists():
+            return False
+        with open(self.caminho, encoding="utf-8") as f:
+            salvo = json.load(f)
+        if salvo.get("identificacao") != self.identificacao:
+            raise BackupInvalidoError(
+                f"Checkpoint {self.caminho} é de outra restauração (fonte ou destino diferente); "
+                "use --reiniciar para descartá-lo"
+            )
+        self.dados = salvo
+        return True
+
+    def salvar(self) -> None:
+        temporario = self.caminho.with_name(self.caminho.name + ".tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.dados, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho)
+
+
+def _identificacao(fonte: Path, colecao) -> dict:
+    info = fonte.stat()
+    return {
+        "fonte": str(fonte.resolve()),
+        "tamanho": info.st_size,
+        "modificado_em": info.st_mtime,
+        "database": colecao.database.name,
+        "colecao": colecao.name,
+    }
+
+
+def caminho_checkpoint_padrao(caminho, colecao) -> Path:
+    """Ao lado do backup, um por destino (database.coleção)."""
+    caminho = Path(caminho)
+    destino = f"{colecao.database.name}.{colecao.name}"
+    if detectar_fonte(caminho) == FONTE_MANIFESTO:
+        return caminho_manifesto(caminho).parent / f"restauracao-{destino}.json"
+    return caminho.with_name(f"{caminho.name}.restauracao-{destino}.json")
+
+
+# ----------------------------------------------------------------------
+# Restauração
+# ----------------------------------------------------------------------
+
+
+def _restaurar_manifesto(
+    caminho, colecao, checkpoint: Checkpoint, workers: int, processos: bool, tamanho_lote: int, progresso
+) -> None:
+    manifesto = ler_manifesto(caminho)
+    diretorio = caminho_manifesto(caminho).parent
+    concluidos = set(checkpoint.dados["chunks_concluidos"])
+    pendentes = [chunk for chunk in manifesto["chunks"] if chunk["arquivo"] not in concluidos]
+    if not pendentes:
+        return
+
+    def concluir(arquivo: str, parcial: dict) -> None:
+        _somar(checkpoint.dados["resultado"], parcial)
+        checkpoint.dados["chunks_concluidos"].append(arquivo)
+        checkpoint.salvar()
+        if progresso is not None:
+            progresso(checkpoint.dados["resultado"])
+
+    if manifesto.get("tipo") == "incremental":
+        # O mesmo _id pode estar em dois chunks (alterado durante a
+        # exportação), a versão nova depois: chunks em ordem, um por vez,
+        # parando no primeiro erro
+        for chunk in pendentes:
+            parcial = _restaurar_chunk(
+                colecao.database.name,
+                colecao.name,
+                str(diretorio),
+                chunk,
+                manifesto["formato"],
+                manifesto["compressao"],
+                tamanho_lote,
+            )
+            concluir(chunk["arquivo"], parcial)
+        return
+
+    if processos and workers > 0:
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(pendentes)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="restauracao")
+
+    erros_chunks = []
+    with pool:
+        futuros = {
+            pool.submit(
+                _restaurar_chunk,
+                colecao.database.name,
+                colecao.name,
+                str(diretorio),
+                chunk,
+                manifesto["formato"],
+                manifesto["compressao"],
+                tamanho_lote,
+            ): chunk["arquivo"]
+            for chunk in pendentes
+        }
+        for futuro in as_completed(futuros):
+            arquivo = futuros[futuro]
+            try:
+                parcial = futuro.result()
+            except Exception as e:
+                # Chunk fica pendente no checkpoint: a próxima execução tenta de novo
+                erros_chunks.append(f"{arquivo}: {e}")
+                logger.error(
+                    f"restauracao_chunk_erro arquivo={arquivo} erro={e}",
+                    extra={"event": "restauracao_chunk_erro"},
+                )
+                continue
+            concluir(arquivo, parcial)
+
+    if erros_chunks:
+        raise BackupInvalidoError(
+            f"{len(erros_chunks)} chunk(s) não restaurado(s): " + "; ".join(erros_chunks)
+        )
+
+
+def _restaurar_arquivo(
+    caminho: Path, fonte: str, colecao, checkpoint: Checkpoint, workers: int, tamanho_lote: int, progresso
+) -> None:
+    """
+    Lê o arquivo em sequência e grava os lotes em threads. O checkpoint
+    avança só até o fim do último lote de uma sequência contínua de
+    lotes concluídos (lotes terminam fora de ordem).
+    """
+    inicio = checkpoint.dados["offset"]
+    if fonte == FONTE_ARRAY:
+        documentos = ((_converter_legado(doc), fim) for doc, fim in iterar_array_json(caminho, inicio))
+    else:
+        documentos = _iterar_jsonl(caminho, inicio)
+
+    lock = threading.Lock()
+    # Lotes em voo limitados: a leitura não corre muito à frente da gravação
+    vagas = threading.Semaphore(max(1, workers) * 2)
+    concluidos = {}  # sequência -> offset final do lote
+    estado = {"proximo": 0, "salvo_em": 0.0}
+    falhas: List[BaseException] = []
+
+    def concluir(sequencia: int, fim: int, futuro) -> None:
+        vagas.release()
+        with lock:
+            if futuro.exception() is not None:
+                falhas.append(futuro.exception())
+                return
+            _somar(checkpoint.dados["resultado"], futuro.result())
+            concluidos[sequencia] = fim
+            avancou = False
+            while estado["proximo"] in concluidos and not falhas:
+                checkpoint.dados["offset"] = concluidos.pop(estado["proximo"])
+                estado["proximo"] += 1
+                avancou = True
+            agora = time.monotonic()
+            if avancou and agora - estado["salvo_em"] >= _INTERVALO_CHECKPOINT_SEGUNDOS:
+                checkpoint.salvar()
+                estado["salvo_em"] = agora
+                if progresso is not None:
+                    progresso(checkpoint.dados["resultado"])
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="restauracao") as pool:
+        sequencia = 0
+        lote: List[dict] = []
+        fim = inicio
+        for doc, fim in documentos:
+            lote.append(doc)
+            if len(lote) >= tamanho_lote:
+                vagas.acquire()
+                if falhas:
+                    break
+                futuro = pool.submit(aplicar_lote, colecao, lote)
+                futuro.add_done_callback(lambda f, s=sequencia, o=fim: concluir(s, o, f))
+                sequencia, lote = sequencia + 1, []
+        else:
+            if lote:
+                vagas.acquire()
+                futuro = pool.submit(aplicar_lote, colecao, lote)
+                futuro.add_done_callback(lambda f, s=sequencia, o=fim: concluir(s, o, f))
+
+    checkpoint.salvar()
+    if falhas:
+        raise falhas[0]
+
+
+def restaurar_backup(
+    caminho,
+    colecao=None,
+    tamanho_lote: int = RESTAURACAO_LOTE,
+    workers: int = RESTAURACAO_WORKERS,
+    processos: bool = RESTAURACAO_PROCESSOS,
+    checkpoint: Optional[Path] = None,
+    reiniciar: bool = False,
+    reconciliar_contadores: bool = True,
+    progresso: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Restaura um backup (qualquer formato aceito) na coleção de clientes
+    (ou em `colecao`), retomando do checkpoint se houver.
+
+    Devolve {"fonte", "documentos", "inseridos", "substituidos", "erros",
+    "retomado", "segundos"}.
+    """
+    caminho = Path(caminho)
+    fonte = detectar_fonte(caminho)
+    if colecao is None:
+        colecao = get_collection().collection
+
+    arquivo_fonte = caminho_manifesto(caminho) if fonte == FONTE_MANIFESTO else caminho
+    progresso_salvo = Checkpoint(
+        checkpoint or caminho_checkpoint_padrao(caminho, colecao), _identificacao(arquivo_fonte, colecao)
+    )
+    retomado = progresso_salvo.carregar(reiniciar)
+    inicio = time.perf_counter()
+
+    if not progresso_salvo.dados["concluido"]:
+        if fonte == FONTE_MANIFESTO:
+            _restaurar_manifesto(
+                caminho, colecao, progresso_salvo, workers, processos, tamanho_lote, progresso
+            )
+        else:
+            _restaurar_arquivo(caminho, fonte, colecao, progresso_salvo, workers, tamanho_lote, progresso)
+        progresso_salvo.dados["concluido"] = True
+        progresso_salvo.salvar()
+
+        if reconciliar_contadores and colecao.name == MONGO_COLLECTION_CLIENTES:
+            # Escritas fora da API: os contadores incrementais precisam ser refeitos
+            contadores.reconciliar(aplicar=True, colecao_clientes=colecao)
+
+    resultado = {
+        "fonte": fonte,
+        **progresso_salvo.dados["resultado"],
+        "retomado": retomado,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    logger.info(
+        f"restauracao_concluida fonte={fonte} documentos={resultado['documentos']} "
+        f"inseridos={resultado['inseridos']} substituidos={resultado['substituidos']} "
+        f"erros={resultado['erros']} retomado={retomado}",
+        extra={"event": "restauracao_concluida", "collection": colecao.name},
+    )
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Restaura um backup da coleção de clientes")
+    parser.add_argument("backup", type=Path, help="diretório/manifesto, .jsonl(.gz) ou array .json antigo")
+    parser.add_argument("--colecao", default=None, help="restaurar em outra coleção do mesmo banco")
+    parser.add_argument("--lote", type=int, default=RESTAURACAO_LOTE, help="documentos por bulk_write")
+    parser.add_argument("--workers", type=int, default=RESTAURACAO_WORKERS, help="gravações em paralelo")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="arquivo de progresso")
+    parser.add_argument("--reiniciar", action="store_true", help="ignora o checkpoint e começa do zero")
+    parser.add_argument(
+        "--sem-reconciliar", action="store_true", help="não recalcula os contadores ao final"
+    )
+    args = parser.parse_args(argv)
+
+    colecao = get_collection().collection
+    if args.colecao:
+        colecao = colecao.database[args.colecao]
+
+    print(f"📥 Restaurando {args.backup} em {colecao.database.name}.{colecao.name}...")
+
+    def mostrar_progresso(parcial):
+        print(f"   Restaurados: {parcial['documentos']:,}")
+
+    try:
+        resultado = restaurar_backup(
+            args.backup,
+            colecao=colecao,
+            tamanho_lote=args.lote,
+            workers=args.workers,
+            checkpoint=args.checkpoint,
+            reiniciar=args.reiniciar,
+            reconciliar_contadores=not args.sem_reconciliar,
+            progresso=mostrar_progresso,
+        )
+    except BackupInvalidoError as e:
+        print(f"✗ {e}")
+        print("  Rode o mesmo comando de novo para retomar do checkpoint.")
+        return 1
+
+    if resultado["retomado"]:
+        print("✓ Retomado do checkpoint")
+    print(
+        f"✓ {resultado['documentos']:,} documentos ({resultado['inseridos']:,} inseridos, "
+        f"{resultado['substituidos']:,} substituídos) em {resultado['segundos']:.1f}s"
+    )
+    if resultado["erros"]:
+        print(f"✗ {resultado['erros']:,} documentos com erro (ver log)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
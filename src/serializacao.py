@@ -0,0 +1,88 @@
+"""
+Serialização rápida de clientes para as rotas de lista da API.
+
+Os documentos lidos do MongoDB já foram validados na escrita (API e
+$jsonSchema da coleção), então GET /clientes e POST /clientes/lookup não
+precisam montar um ClienteOut por item, revalidar o e-mail e depois
+deixar o FastAPI validar e serializar tudo de novo pelo response_model.
+
+Aqui cada documento vira direto o dicionário com o mesmo formato de
+ClienteOut (mesmos campos, mesma ordem, data_nascimento null e as 7
+chaves de endereco), e a resposta inteira é serializada de uma vez em
+bytes com orjson (em requirements.txt). Se ele não estiver instalado, a
+serialização cai no json da stdlib, com os mesmos separadores do
+JSONResponse do FastAPI: funciona igual, só mais devagar
+(scripts/benchmark_serializacao_clientes.py mostra qual foi usado).
+
+PROJECAO_CLIENTE_OUT traz do banco só os campos usados, o que também
+reduz o volume lido por página.
+
+Benchmark: scripts/benchmark_serializacao_clientes.py
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    # Fallback silencioso para json (ver docstring do módulo)
+    orjson = None
+
+
+CAMPOS_ENDERECO = ("rua", "numero", "complemento", "bairro", "cidade", "estado", "cep")
+
+# Campos de ClienteOut lidos do banco (o cursor de paginação usa nome e _id)
+PROJECAO_CLIENTE_OUT: Dict[str, int] = {
+    "cpf": 1,
+    "nome": 1,
+    "email": 1,
+    "telefone": 1,
+    "status": 1,
+    **{f"endereco.{campo}": 1 for campo in CAMPOS_ENDERECO},
+}
+
+
+def cliente_out_dict(doc: dict) -> dict:
+    """
+    Documento do MongoDB -> dicionário no formato de ClienteOut, sem
+    validação (mesma ordem de campos do modelo).
+    """
+    endereco = doc.get("endereco") or {}
+    return {
+        "nome": doc["nome"],
+        "email": doc["email"],
+        "telefone": doc["telefone"],
+        "status": doc.get("status", "ativo"),
+        "data_nascimento": None,
+        "endereco": {campo: endereco.get(campo) for campo in CAMPOS_ENDERECO},
+        "id": str(doc.get("_id")),
+        "cpf": doc["cpf"],
+    }
+
+
+def clientes_out(docs: Iterable[dict]) -> List[dict]:
+    return [cliente_out_dict(doc) for doc in docs]
+
+
+def json_bytes(conteudo: Any) -> bytes:
+    """Serializa em JSON compacto (UTF-8), como o JSONResponse do FastAPI."""
+    if orjson is not None:
+        return orjson.dumps(conteudo)
+    return json.dumps(
+        conteudo,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def resposta_json(conteudo: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Response já serializada: o FastAPI devolve como está, sem passar pelo
+    response_model (que continua valendo para a documentação OpenAPI).
+    """
+    return Response(content=json_bytes(conteudo), media_type="application/json", headers=headers)
@@ -0,0 +1,115 @@
+"""
+Single-flight para chamadas assíncronas idênticas e simultâneas.
+
+Quando várias requisições pedem a mesma coisa ao mesmo tempo (ex.: dez
+abas do dashboard atualizando /relatorios/status-por-estado no mesmo
+segundo), só a primeira dispara o cálculo; as demais aguardam a mesma
+tarefa e recebem o mesmo resultado. Opcionalmente, o resultado fica
+guardado por um TTL curto (CacheLRU), então uma rajada custa um cálculo
+em vez de N.
+
+executar() roda no event loop (sem locks): use a partir de handlers
+`async def`. invalidar() pode ser chamado de qualquer thread (escritas
+nos handlers síncronos). O resultado é compartilhado entre os
+chamadores: não altere.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.cache import CacheLRU
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas com a mesma chave em uma única execução.
+
+    Args:
+        ttl_segundos: por quanto tempo o resultado de uma execução bem
+            sucedida continua sendo servido (<= 0 = só deduplica o que
+            está em andamento).
+        tamanho_maximo: máximo de resultados guardados.
+    """
+
+    def __init__(self, ttl_segundos: float = 2.0, tamanho_maximo: int = 256):
+        self._resultados = CacheLRU(
+            tamanho_maximo=tamanho_maximo if ttl_segundos > 0 else 0,
+            ttl_segundos=ttl_segundos,
+        )
+        self._em_andamento: Dict[Hashable, asyncio.Future] = {}
+        # Incrementada a cada invalidar(): um cálculo que começou antes não
+        # pode guardar resultado antigo
+        self._geracao = 0
+
+        self.chamadas = 0
+        self.execucoes = 0
+        self.compartilhadas = 0
+        self.do_cache = 0
+
+    async def executar(
+        self,
+        chave: Hashable,
+        funcao: Callable[[], Awaitable[Any]],
+        usar_cache: bool = True,
+    ) -> Any:
+        """
+        Resultado de `funcao()` para a chave, compartilhando a execução em
+        andamento (e, com usar_cache, o resultado recente).
+
+        Erros são repassados a todos os que aguardavam e não são guardados.
+        usar_cache=False força uma execução nova, sem ler nem compartilhar.
+        """
+        self.chamadas += 1
+
+        if usar_cache:
+            resultado = self._resultados.obter(chave)
+            if resultado is not None:
+                self.do_cache += 1
+                return resultado
+
+            tarefa = self._em_andamento.get(chave)
+            if tarefa is not None:
+                self.compartilhadas += 1
+                # shield: quem desistir (cliente desconectou) não cancela os outros
+                return await asyncio.shield(tarefa)
+
+        self.execucoes += 1
+        geracao = self._geracao
+        tarefa = asyncio.ensure_future(funcao())
+
+        if usar_cache:
+            self._em_andamento[chave] = tarefa
+
+            def finalizar(concluida: asyncio.Future) -> None:
+                if self._em_andamento.get(chave) is concluida:
+                    self._em_andamento.pop(chave, None)
+                if (
+                    not concluida.cancelled()
+                    and concluida.exception() is None
+                    and geracao == self._geracao
+                ):
+                    self._resultados.guardar(chave, concluida.result())
+
+            tarefa.add_done_callback(finalizar)
+
+        return await asyncio.shield(tarefa)
+
+    def invalidar(self) -> None:
+        """
+        Descarta os resultados guardados (chamar após escritas). Cálculos
+        em andamento terminam para quem já aguardava, mas pedidos novos
+        disparam outro cálculo.
+        """
+        self._geracao += 1
+        self._resultados.limpar()
+        self._em_andamento.clear()
+
+    def estatisticas(self) -> dict:
+        return {
+            "chamadas": self.chamadas,
+            "execucoes": self.execucoes,
+            "compartilhadas": self.compartilhadas,
+            "do_cache": self.do_cache,
+            "em_andamento": len(self._em_andamento),
+            "resultados": self._resultados.estatisticas(),
+        }
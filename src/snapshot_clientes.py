@@ -0,0 +1,290 @@
+"""
+Snapshot colunar em memória da base de clientes, compartilhado pelos
+endpoints de /relatorios.
+
+Em vez de montar um DataFrame completo a partir do MongoDB a cada
+requisição, o snapshot é carregado uma vez (só as colunas usadas pelos
+relatórios) e recarregado em segundo plano:
+
+- a cada SNAPSHOT_INTERVALO_SEGUNDOS; e/ou
+- logo após escritas da API (respeitando SNAPSHOT_INTERVALO_MINIMO_SEGUNDOS).
+
+Colunas de texto (status, estado, cidade, domínio do e-mail) são
+guardadas como categóricas, montadas por codificação de dicionário durante
+a leitura do cursor, e a data de nascimento como datetime64.
+"""
+
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    SNAPSHOT_INTERVALO_MINIMO_SEGUNDOS,
+    SNAPSHOT_INTERVALO_SEGUNDOS,
+    get_collection,
+)
+from logging_config import get_logger
+from src.relatorios_pipelines import FORMATOS_DATA_NASCIMENTO
+
+
+logger = get_logger(__name__)
+
+# Projeção mínima: só o que os relatórios usam
+_PROJECAO_SNAPSHOT = {
+    "_id": 0,
+    "status": 1,
+    "email": 1,
+    "data_nascimento": 1,
+    "endereco.estado": 1,
+    "endereco.cidade": 1,
+}
+
+_BATCH_SIZE_SNAPSHOT = 5000
+
+
+class _ColunaDicionario:
+    """
+    Coluna codificada por dicionário: cada valor distinto ganha um código
+    inteiro e a coluna guarda só os códigos (int32). Valores None viram -1.
+    """
+
+    def __init__(self):
+        self.codigos = array("i")
+        self.valores: dict = {}
+
+    def adicionar(self, valor) -> None:
+        if valor is None:
+            self.codigos.append(-1)
+            return
+        codigo = self.valores.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            self.valores[valor] = codigo
+        self.codigos.append(codigo)
+
+    def codigos_numpy(self) -> np.ndarray:
+        return np.frombuffer(self.codigos, dtype=np.int32)
+
+    def categorical(self) -> pd.Categorical:
+        # dict preserva a ordem de inserção, que é a ordem dos códigos
+        return pd.Categorical.from_codes(
+            self.codigos_numpy(), categories=list(self.valores)
+        )
+
+
+def _dominio_email(email) -> Optional[str]:
+    """Domínio do e-mail (parte depois do @), em minúsculas; None se vazio."""
+    if not isinstance(email, str):
+        return None
+    email = email.strip()
+    if not email:
+        return None
+    return email.split("@")[-1].lower().strip()
+
+
+def _converter_datas(coluna: _ColunaDicionario) -> np.ndarray:
+    """
+    Converte a coluna de datas (strings) em datetime64, parseando cada
+    valor distinto uma única vez e expandindo pelos códigos.
+    """
+    distintas = pd.Series(list(coluna.valores), dtype=object)
+    convertidas = pd.Series(pd.NaT, index=distintas.index, dtype="datetime64[ns]")
+    for formato in FORMATOS_DATA_NASCIMENTO:
+        faltando = convertidas.isna()
+        if not faltando.any():
+            break
+        convertidas[faltando] = pd.to_datetime(
+            distintas[faltando], format=formato, errors="coerce"
+        )
+
+    # Posição extra no fim para o código -1 (sem data)
+    tabela = np.append(
+        convertidas.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns")
+    )
+    return tabela[coluna.codigos_numpy()]
+
+
+@dataclass(frozen=True)
+class SnapshotClientes:
+    """Foto imutável das colunas de clientes usadas pelos relatórios."""
+
+    dados: pd.DataFrame
+    gerado_em: datetime
+    duracao_ms: float
+
+    @property
+    def idade_segundos(self) -> float:
+        return (datetime.now(timezone.utc) - self.gerado_em).total_seconds()
+
+    def metadados(self) -> dict:
+        """Informações do snapshot devolvidas junto com os relatórios."""
+        return {
+            "gerado_em": self.gerado_em.isoformat(),
+            "idade_segundos": round(self.idade_segundos, 1),
+            "total_linhas": int(len(self.dados)),
+        }
+
+
+def carregar_snapshot(colecao=None) -> SnapshotClientes:
+    """Lê a coleção (ignorando marcados para exclusão) e monta o snapshot."""
+    if colecao is None:
+        colecao = get_collection().collection
+
+    inicio = time.perf_counter()
+    gerado_em = datetime.now(timezone.utc)
+
+    status = _ColunaDicionario()
+    estado = _ColunaDicionario()
+    cidade = _ColunaDicionario()
+    dominio = _ColunaDicionario()
+    nascimento = _ColunaDicionario()
+
+    cursor = colecao.find(
+        {"marcado_para_exclusao": {"$ne": True}},
+        _PROJECAO_SNAPSHOT,
+        batch_size=_BATCH_SIZE_SNAPSHOT,
+    )
+    for doc in cursor:
+        endereco = doc.get("endereco") or {}
+        status.adicionar(doc.get("status"))
+        estado.adicionar(endereco.get("estado"))
+        cidade.adicionar(endereco.get("cidade"))
+        dominio.adicionar(_dominio_email(doc.get("email")))
+        data = doc.get("data_nascimento")
+        nascimento.adicionar(data if isinstance(data, str) else None)
+
+    dados = pd.DataFrame(
+        {
+            "status": status.categorical(),
+            "estado": estado.categorical(),
+            "cidade": cidade.categorical(),
+            "dominio_email": dominio.categorical(),
+            "data_nascimento": _converter_datas(nascimento),
+        }
+    )
+
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    return SnapshotClientes(dados=dados, gerado_em=gerado_em, duracao_ms=duracao_ms)
+
+
+class GerenciadorSnapshot:
+    """
+    Mantém o snapshot atual e o recarrega em segundo plano.
+
+    Sem a thread de fundo (ex.: testes, scripts), obter() recarrega na hora
+    quando o snapshot está desatualizado ou mais velho que o intervalo.
+    """
+
+    def __init__(
+        self,
+        carregar: Callable[[], SnapshotClientes] = carregar_snapshot,
+        intervalo_segundos: float = SNAPSHOT_INTERVALO_SEGUNDOS,
+        intervalo_minimo_segundos: float = SNAPSHOT_INTERVALO_MINIMO_SEGUNDOS,
+    ):
+        self._carregar = carregar
+        self._intervalo = intervalo_segundos
+        self._intervalo_minimo = intervalo_minimo_segundos
+
+        self._snapshot: Optional[SnapshotClientes] = None
+        self._geracao = 0
+        self._lock_recarga = threading.Lock()
+        self._desatualizado = False
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def obter(self) -> SnapshotClientes:
+        """Retorna o snapshot atual (carregando-o se ainda não existir)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.atualizar()
+
+        if self._thread is None and (
+            self._desatualizado or snapshot.idade_segundos >= self._intervalo
+        ):
+            return self.atualizar()
+
+        return snapshot
+
+    def atualizar(self) -> SnapshotClientes:
+        """Recarrega o snapshot do MongoDB (uma recarga por vez)."""
+        geracao_vista = self._geracao
+        with self._lock_recarga:
+            # Outra thread recarregou enquanto esperávamos o lock
+            if self._geracao != geracao_vista and self._snapshot is not None:
+                return self._snapshot
+
+            self._desatualizado = False
+            snapshot = self._carregar()
+            self._snapshot = snapshot
+            self._geracao += 1
+
+        logger.info(
+            f"snapshot_clientes_atualizado linhas={len(snapshot.dados)} "
+            f"duracao_ms={snapshot.duracao_ms:.0f}",
+            extra={
+                "event": "snapshot_clientes_atualizado",
+                "total_clientes": int(len(snapshot.dados)),
+                "duration_ms": round(snapshot.duracao_ms, 2),
+            },
+        )
+        return snapshot
+
+    def marcar_desatualizado(self) -> None:
+        """Sinaliza que houve escrita; a próxima recarga acontece em breve."""
+        self._desatualizado = True
+        self._acordar.set()
+
+    def iniciar(self) -> None:
+        """Sobe a thread de recarga em segundo plano (idempotente)."""
+        if self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="snapshot-clientes", daemon=True
+        )
+        self._thread.start()
+
+    def parar(self) -> None:
+        """Encerra a thread de recarga."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._parar.set()
+        self._acordar.set()
+        thread.join(timeout=5)
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._parar.is_set():
+            if self._snapshot is not None:
+                # Dorme até o intervalo ou até um aviso de escrita
+                self._acordar.wait(timeout=self._intervalo)
+                self._acordar.clear()
+                if self._parar.is_set():
+                    break
+
+                # Agrupa rajadas de escrita: no máximo uma recarga por intervalo mínimo
+                espera = self._intervalo_minimo - self._snapshot.idade_segundos
+                if espera > 0 and self._parar.wait(espera):
+                    break
+
+            try:
+                self.atualizar()
+            except Exception:
+                logger.exception(
+                    "snapshot_clientes_erro",
+                    extra={"event": "snapshot_clientes_erro"},
+                )
+                # Evita loop apertado se o Mongo estiver fora
+                self._parar.wait(self._intervalo_minimo or 1)
+
+
+# Instância única do processo, usada pela API
+gerenciador_snapshot = GerenciadorSnapshot()
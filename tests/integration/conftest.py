@@ -66,12 +66,21 @@ def limpar_colecao(mongo_collection):
     """
     Limpa a coleção de clientes antes e depois de CADA teste de integração.
 
-    Isso garante isolamento entre testes.
+    Isso garante isolamento entre testes. O cache de CPF do processo
+    e os contadores incrementais também são descartados, já que
+    delete_many não passa pela API.
     """
+    from src import cache_clientes
+    from src.contadores import colecao_contadores
+
     # Antes do teste
     mongo_collection.delete_many({})
+    colecao_contadores(mongo_collection).delete_many({})
+    cache_clientes.invalidar_tudo()
 
     yield
 
     # Depois do teste
     mongo_collection.delete_many({})
+    colecao_contadores(mongo_collection).delete_many({})
+    cache_clientes.invalidar_tudo()
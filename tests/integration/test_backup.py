@@ -0,0 +1,350 @@
+# tests/integration/test_backup.py
+import json
+
+import pytest
+
+
+def _inserir_clientes(mongo_collection, quantidade):
+    mongo_collection.insert_many(
+        [
+            {
+                "cpf": f"{80000000000 + i:011d}",
+                "nome": f"Cliente Backup {i:03d}",
+                "email": f"backup{i}@example.com",
+                "telefone": "11900000000",
+                "status": "ativo" if i % 2 else "inativo",
+                "endereco": {"cidade": "Recife", "estado": "PE"},
+            }
+            for i in range(quantidade)
+        ]
+    )
+
+
+def test_backup_streaming_em_chunks_com_manifesto_e_verificacao(mongo_collection, tmp_path):
+    """
+    Cenário:
+      - Backup de 25 clientes em chunks de 10 (3 chunks comprimidos)
+      - Manifesto traz contagens e checksum por chunk
+      - Verificação em streaming passa e os documentos voltam iguais
+      - Chunk corrompido é detectado
+    """
+    from src.motor_backup import (
+        fazer_backup_streaming,
+        ler_documentos,
+        ler_manifesto,
+        verificar_backup_streaming,
+    )
+
+    _inserir_clientes(mongo_collection, 25)
+
+    manifesto_path = fazer_backup_streaming(
+        tmp_path, formato="ndjson", compressao="gzip", docs_por_chunk=10, colecao=mongo_collection
+    )
+    manifesto = ler_manifesto(manifesto_path)
+
+    assert manifesto["total_documentos"] == 25
+    assert [c["documentos"] for c in manifesto["chunks"]] == [10, 10, 5]
+    assert all(len(c["sha256"]) == 64 for c in manifesto["chunks"])
+    assert manifesto["chunks"][0]["arquivo"].endswith(".ndjson.gz")
+
+    resultado = verificar_backup_streaming(manifesto_path)
+    assert resultado == {"ok": True, "documentos": 25, "chunks": 3, "erros": []}
+
+    originais = {doc["_id"]: doc for doc in mongo_collection.find()}
+    restaurados = list(ler_documentos(manifesto_path.parent))
+    assert len(restaurados) == 25
+    assert all(dict(doc) == originais[doc["_id"]] for doc in restaurados)
+
+    # Corrompe o segundo chunk (mantendo o tamanho)
+    chunk = manifesto_path.parent / manifesto["chunks"][1]["arquivo"]
+    dados = bytearray(chunk.read_bytes())
+    dados[-12] ^= 0xFF
+    chunk.write_bytes(bytes(dados))
+
+    resultado = verificar_backup_streaming(manifesto_path)
+    assert resultado["ok"] is False
+    assert any(manifesto["chunks"][1]["arquivo"] in erro for erro in resultado["erros"])
+
+
+def test_backup_paralelo_por_faixas_de_id(mongo_collection, tmp_path):
+    """
+    Cenário:
+      - 3 faixas de _id exportadas em paralelo (threads, para usar o mesmo banco do teste)
+      - Cada documento aparece em exatamente uma partição
+      - Manifesto único lista as partições e o backup verifica
+    """
+    from src.motor_backup import (
+        calcular_particoes,
+        fazer_backup_paralelo,
+        ler_documentos,
+        ler_manifesto,
+        verificar_backup_streaming,
+    )
+
+    _inserir_clientes(mongo_collection, 60)
+
+    faixas = calcular_particoes(mongo_collection, 3)
+    assert faixas[0][0] is None and faixas[-1][1] is None
+    assert all(fim == faixas[i + 1][0] for i, (_, fim) in enumerate(faixas[:-1]))
+
+    manifesto_path = fazer_backup_paralelo(
+        tmp_path, particoes=3, processos=0, docs_por_chunk=15, colecao=mongo_collection
+    )
+    manifesto = ler_manifesto(manifesto_path)
+
+    assert manifesto["total_documentos"] == 60
+    assert 1 < len(manifesto["particoes"]) <= 3
+    assert sum(p["documentos"] for p in manifesto["particoes"]) == 60
+    assert all(c["arquivo"].startswith(f"parte-{c['particao']:03d}-") for c in manifesto["chunks"])
+
+    ids = [doc["_id"] for doc in ler_documentos(manifesto_path)]
+    assert sorted(ids) == sorted(doc["_id"] for doc in mongo_collection.find({}, {"_id": 1}))
+    assert verificar_backup_streaming(manifesto_path)["ok"] is True
+
+
+@pytest.mark.parametrize("compressao", ["gzip", "nenhuma"])
+def test_escritor_de_chunks_bson(tmp_path, compressao):
+    """
+    Cenário:
+      - Documentos gravados em BSON (o backup real copia o BSON cru do servidor)
+      - Leitura e verificação em streaming devolvem os mesmos documentos
+    """
+    from bson import ObjectId
+
+    from src.motor_backup import (
+        EscritorChunks,
+        gravar_manifesto,
+        ler_documentos,
+        verificar_backup_streaming,
+    )
+
+    docs = [{"_id": ObjectId(), "cpf": f"{i:011d}", "valor": i * 1.5} for i in range(7)]
+    with EscritorChunks(tmp_path, "bson", compressao, docs_por_chunk=3) as escritor:
+        for doc in docs:
+            escritor.escrever(doc)
+
+    gravar_manifesto(
+        tmp_path,
+        {
+            "versao": 1,
+            "tipo": "completo",
+            "formato": "bson",
+            "compressao": compressao,
+            "total_documentos": escritor.total_documentos,
+            "chunks": escritor.chunks,
+        },
+    )
+
+    assert [c["documentos"] for c in escritor.chunks] == [3, 3, 1]
+    assert list(ler_documentos(tmp_path)) == docs
+    assert verificar_backup_streaming(tmp_path)["ok"] is True
+
+
+def test_backup_sem_manifesto_e_invalido(tmp_path):
+    from src.motor_backup import verificar_backup_streaming
+
+    (tmp_path / "chunk-00000.ndjson.gz").write_bytes(b"")
+    resultado = verificar_backup_streaming(tmp_path)
+    assert resultado["ok"] is False
+    assert "Manifesto" in resultado["erros"][0]
+
+    (tmp_path / "manifesto.json").write_text(json.dumps({"versao": 99}))
+    assert verificar_backup_streaming(tmp_path)["ok"] is False
+
+
+def test_backup_incremental_e_reconstrucao_da_cadeia(client, mongo_collection, tmp_path):
+    """
+    Cenário:
+      - Backup completo, depois escritas pela API (criação, alteração, soft delete)
+      - Incremental captura só os documentos escritos desde a marca d'água
+      - Reconstrução (completo + incremental) bate com o estado atual da coleção
+      - Com --ate anterior ao incremental, a reconstrução volta ao estado do completo
+    """
+    from datetime import datetime, timedelta
+
+    from src.motor_backup import (
+        cadeia_backups,
+        fazer_backup_incremental,
+        fazer_backup_streaming,
+        ler_documentos,
+        ler_manifesto,
+        reconstruir_backup,
+    )
+
+    _inserir_clientes(mongo_collection, 10)
+    completo = fazer_backup_streaming(tmp_path, colecao=mongo_collection)
+
+    payload = {
+        "cpf": "81000000001",
+        "nome": "Cliente Novo",
+        "email": "novo@example.com",
+        "telefone": "11911111111",
+        "endereco": {"cidade": "Natal", "estado": "RN"},
+    }
+    assert client.post("/clientes", json=payload).status_code == 201
+    assert client.patch("/clientes/80000000001", json={"nome": "Nome Alterado"}).status_code == 200
+    assert client.delete("/clientes/80000000002").status_code == 204
+
+    incremental = fazer_backup_incremental(completo, folga_segundos=0, colecao=mongo_collection)
+    manifesto = ler_manifesto(incremental)
+    assert manifesto["tipo"] == "incremental"
+    assert sorted(doc["cpf"] for doc in ler_documentos(incremental)) == [
+        "80000000001",
+        "80000000002",
+        "81000000001",
+    ]
+    assert [m["tipo"] for _, m in cadeia_backups(incremental)] == ["completo", "incremental"]
+
+    def estado(docs):
+        return {
+            doc["cpf"]: (doc["nome"], doc.get("marcado_para_exclusao", False))
+            for doc in docs
+        }
+
+    reconstruido = reconstruir_backup(incremental, destino=tmp_path / "pitr")
+    assert estado(ler_documentos(reconstruido)) == estado(mongo_collection.find())
+    assert ler_manifesto(reconstruido)["total_documentos"] == 11
+
+    antes_do_incremental = datetime.fromisoformat(manifesto["marca_dagua"]) - timedelta(microseconds=1)
+    no_completo = reconstruir_backup(incremental, destino=tmp_path / "pitr", ate=antes_do_incremental)
+    assert estado(ler_documentos(no_completo)) == estado(ler_documentos(completo))
+
+
+def test_restauracao_dos_tres_formatos_com_retomada(mongo_collection, tmp_path):
+    """
+    Cenário:
+      - Backup com manifesto, JSONL (export_clientes_backup_json) e array
+        JSON antigo (default=str) restaurados em uma coleção vazia
+      - _id e data_cadastro do array antigo voltam aos tipos originais
+      - Restauração interrompida retoma do offset salvo no checkpoint
+    """
+    from datetime import datetime
+
+    from bson import ObjectId, json_util
+
+    from src.motor_backup import fazer_backup_streaming
+    from src.restaurar_backup import (
+        FONTE_ARRAY,
+        FONTE_JSONL,
+        FONTE_MANIFESTO,
+        Checkpoint,
+        _identificacao,
+        iterar_array_json,
+        caminho_checkpoint_padrao,
+        detectar_fonte,
+        restaurar_backup,
+    )
+
+    _inserir_clientes(mongo_collection, 23)
+    mongo_collection.update_many({}, {"$set": {"data_cadastro": datetime(2024, 5, 1, 12, 30)}})
+    originais = sorted(mongo_collection.find(), key=lambda d: d["cpf"])
+    destino = mongo_collection.database["clientes_restaurados"]
+
+    manifesto = fazer_backup_streaming(tmp_path / "completo", docs_por_chunk=10, colecao=mongo_collection)
+    jsonl = tmp_path / "clientes_backup.jsonl"
+    jsonl.write_text("".join(json_util.dumps(doc) + "\n" for doc in originais), encoding="utf-8")
+    array = tmp_path / "backup_clientes.json"
+    array.write_text(json.dumps(originais, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+
+    assert detectar_fonte(manifesto.parent) == FONTE_MANIFESTO
+    assert detectar_fonte(jsonl) == FONTE_JSONL
+    assert detectar_fonte(array) == FONTE_ARRAY
+
+    def restaurados():
+        return sorted(destino.find({}, {"nome_norm": 0, "endereco.cidade_norm": 0}), key=lambda d: d["cpf"])
+
+    for caminho in (manifesto.parent, jsonl, array):
+        destino.delete_many({})
+        resultado = restaurar_backup(caminho, colecao=destino, tamanho_lote=4, workers=3, processos=False)
+        assert resultado["documentos"] == 23 and resultado["erros"] == 0
+        assert resultado["inseridos"] == 23
+        assert restaurados() == originais
+        assert isinstance(destino.find_one()["_id"], ObjectId)
+
+    # Já concluído: rodar de novo não regrava nada
+    assert restaurar_backup(array, colecao=destino, processos=False)["retomado"] is True
+
+    # Simula uma interrupção depois do 10º documento do array
+    offset = [fim for _, fim in iterar_array_json(array, 0)][9]
+    checkpoint = Checkpoint(caminho_checkpoint_padrao(array, destino), _identificacao(array, destino))
+    checkpoint.dados["offset"] = offset
+    checkpoint.salvar()
+    destino.delete_many({})
+
+    resultado = restaurar_backup(array, colecao=destino, tamanho_lote=4, processos=False)
+    assert resultado["retomado"] is True
+    assert sorted(doc["cpf"] for doc in destino.find()) == [doc["cpf"] for doc in originais[10:]]
+
+
+def test_incremental_com_id_repetido_fica_com_a_versao_mais_nova(mongo_collection, tmp_path):
+    """
+    Cenário:
+      - Incremental traz o mesmo _id duas vezes (alterado durante a
+        exportação), a versão antiga no primeiro chunk
+      - Reconstrução e restauração ficam com a de maior atualizado_em,
+        mesmo quando as duas caem no mesmo lote
+    """
+    from datetime import datetime, timedelta, timezone
+
+    from src.motor_backup import (
+        EscritorChunks,
+        fazer_backup_incremental,
+        fazer_backup_streaming,
+        gravar_manifesto,
+        ler_documentos,
+        ler_manifesto,
+        reconstruir_backup,
+    )
+    from src.restaurar_backup import aplicar_lote, restaurar_backup
+
+    agora = datetime.now(timezone.utc).replace(microsecond=0)
+    _inserir_clientes(mongo_collection, 3)
+    mongo_collection.update_many({}, {"$set": {"atualizado_em": agora - timedelta(hours=1)}})
+    completo = fazer_backup_streaming(tmp_path, colecao=mongo_collection)
+
+    mongo_collection.update_one(
+        {"cpf": "80000000001"}, {"$set": {"nome": "Versão Nova", "atualizado_em": agora + timedelta(seconds=2)}}
+    )
+    incremental = fazer_backup_incremental(completo, folga_segundos=0, colecao=mongo_collection)
+    (nova,) = list(ler_documentos(incremental))
+    intermediaria = {**nova, "nome": "Versão Intermediária", "atualizado_em": agora + timedelta(seconds=1)}
+
+    manifesto = ler_manifesto(incremental)
+    with EscritorChunks(
+        incremental.parent, manifesto["formato"], manifesto["compressao"], docs_por_chunk=1, prefixo="repetido"
+    ) as escritor:
+        escritor.escrever(intermediaria)
+        escritor.escrever(nova)
+    gravar_manifesto(incremental.parent, {**manifesto, "total_documentos": 2, "chunks": escritor.chunks})
+
+    reconstruido = reconstruir_backup(incremental, destino=tmp_path / "pitr")
+    nomes = {doc["cpf"]: doc["nome"] for doc in ler_documentos(reconstruido)}
+    assert len(nomes) == 3 and nomes["80000000001"] == "Versão Nova"
+
+    destino = mongo_collection.database["clientes_restaurados"]
+    destino.delete_many({})
+    restaurar_backup(completo, colecao=destino, processos=False)
+    restaurar_backup(incremental, colecao=destino, workers=3, processos=False)
+    assert destino.find_one({"cpf": "80000000001"})["nome"] == "Versão Nova"
+
+    aplicar_lote(destino, [nova, intermediaria])
+    assert destino.find_one({"cpf": "80000000001"})["nome"] == "Versão Nova"
+
+
+def test_verificar_backup_antigo_em_fluxo(tmp_path, capsys):
+    """
+    Cenário:
+      - Array JSON antigo é conferido elemento a elemento (sem json.load)
+      - Arquivo truncado é apontado como inválido
+    """
+    from src.backup_banco import verificar_backup
+
+    arquivo = tmp_path / "backup_clientes_20240101_120000.json"
+    docs = [{"_id": f"{i:024x}", "cpf": f"{i:011d}", "nome": f"Cliente {i}"} for i in range(5)]
+    arquivo.write_text(json.dumps(docs, indent=2), encoding="utf-8")
+
+    assert verificar_backup(str(arquivo)) is True
+    assert "Registros encontrados: 5" in capsys.readouterr().out
+
+    arquivo.write_text(json.dumps(docs, indent=2)[:-40], encoding="utf-8")
+    assert verificar_backup(str(arquivo)) is False
@@ -1,4 +1,6 @@
 # tests/integration/test_clientes_api.py
+import json
+
 
 def test_criar_cliente_salva_no_mongo(client, mongo_collection):
     """
@@ -185,3 +187,718 @@ def test_criar_cliente_payload_invalido_schema_jsonschema(client, mongo_collecti
     assert response.status_code == 400
     assert "schema" in response.json()["detail"].lower() or "payload" in response.json()["detail"].lower()
     assert mongo_collection.count_documents({}) == 0
+
+
+def test_listar_clientes_paginacao_por_cursor(client, mongo_collection):
+    """
+    Cenário:
+      - Cria três clientes com nomes em ordem conhecida
+      - Lista com limit=2 e recebe o header X-Next-Cursor
+      - Usa o cursor para buscar a página seguinte, que traz só o terceiro
+    """
+    for i, nome in enumerate(["Ana Cursor", "Bruno Cursor", "Carla Cursor"]):
+        payload = {
+            "cpf": f"4444444444{i}",
+            "nome": nome,
+            "email": f"cursor{i}@example.com",
+            "telefone": "11999990004",
+            "status": "ativo",
+            "endereco": {"cidade": "Campinas", "estado": "SP"},
+        }
+        assert client.post("/clientes", json=payload).status_code == 201
+
+    resp_p1 = client.get("/clientes", params={"limit": 2})
+    assert resp_p1.status_code == 200
+    assert [c["nome"] for c in resp_p1.json()] == ["Ana Cursor", "Bruno Cursor"]
+
+    cursor = resp_p1.headers.get("X-Next-Cursor")
+    assert cursor
+
+    resp_p2 = client.get("/clientes", params={"limit": 2, "cursor": cursor})
+    assert resp_p2.status_code == 200
+    assert [c["nome"] for c in resp_p2.json()] == ["Carla Cursor"]
+    # Última página: não há próximo cursor
+    assert "X-Next-Cursor" not in resp_p2.headers
+
+    # Cursor adulterado é rejeitado
+    resp_invalido = client.get("/clientes", params={"cursor": "nao-e-um-cursor"})
+    assert resp_invalido.status_code == 400
+
+
+def test_listar_clientes_cursor_passa_por_nomes_nulos(client, mongo_collection):
+    """
+    Cenário:
+      - Dois documentos antigos sem nome (null) e dois com nome
+      - Paginando de 1 em 1, o cursor com nome null não encerra a
+        listagem: todos os quatro aparecem, nulls primeiro
+    """
+    base = {
+        "email": "nulo@example.com",
+        "telefone": "11999990004",
+        "status": "ativo",
+        "endereco": {"cidade": "Campinas", "estado": "SP"},
+    }
+    mongo_collection.insert_many(
+        [
+            {**base, "cpf": "43333333330", "nome": None},
+            {**base, "cpf": "43333333331", "nome": None},
+            {**base, "cpf": "43333333332", "nome": "Ana Nula"},
+            {**base, "cpf": "43333333333", "nome": "Bia Nula"},
+        ]
+    )
+
+    cpfs = []
+    params = {"limit": 1}
+    while True:
+        resp = client.get("/clientes", params=params)
+        assert resp.status_code == 200
+        cpfs += [c["cpf"] for c in resp.json()]
+        if "X-Next-Cursor" not in resp.headers:
+            break
+        params = {"limit": 1, "cursor": resp.headers["X-Next-Cursor"]}
+        assert len(cpfs) <= 4
+
+    assert cpfs == ["43333333330", "43333333331", "43333333332", "43333333333"]
+
+
+def test_criar_clientes_em_lote_reporta_resultado_por_item(client, mongo_collection):
+    """
+    Cenário:
+      - Envia POST /clientes/bulk com 2 clientes válidos, 1 CPF repetido
+        e 1 item inválido (sem telefone), em lotes de 2
+      - Confere o resultado por item e que só os válidos foram gravados
+    """
+    # Conflito depende do índice único em cpf (ver src/post_setup_indices.py)
+    mongo_collection.create_index("cpf", unique=True)
+
+    base = {
+        "nome": "Cliente Lote",
+        "email": "lote@example.com",
+        "telefone": "11999990005",
+        "status": "ativo",
+        "endereco": {"cidade": "Santos", "estado": "SP"},
+    }
+    itens = [
+        {**base, "cpf": "55555555550"},
+        {**base, "cpf": "55555555551"},
+        {**base, "cpf": "55555555550"},  # CPF repetido no próprio payload
+        {k: v for k, v in base.items() if k != "telefone"} | {"cpf": "55555555552"},
+    ]
+
+    resp = client.post("/clientes/bulk", params={"batch_size": 2}, json=itens)
+    assert resp.status_code == 200
+    body = resp.json()
+
+    assert body["total"] == 4
+    assert body["criados"] == 2
+    assert body["conflitos"] == 1
+    assert body["invalidos"] == 1
+    assert [item["status"] for item in body["itens"]] == [
+        "criado",
+        "criado",
+        "conflito",
+        "invalido",
+    ]
+    assert mongo_collection.count_documents({}) == 2
+
+
+
+def test_criar_clientes_em_lote_recusa_corpo_grande_demais(client, mongo_collection, monkeypatch):
+    """
+    Cenário:
+      - Reduz BULK_MAX_ITENS e BULK_MAX_BYTES
+      - Envia lotes acima de cada limite (array JSON e NDJSON)
+      - Espera 413 sem nenhum cliente gravado
+    """
+    from src import api
+
+    base = {
+        "nome": "Cliente Lote",
+        "email": "lote@example.com",
+        "telefone": "11999990005",
+        "status": "ativo",
+        "endereco": {"cidade": "Santos", "estado": "SP"},
+    }
+    itens = [{**base, "cpf": f"5666666666{i}"} for i in range(3)]
+
+    monkeypatch.setattr(api, "BULK_MAX_ITENS", 2)
+    resp = client.post("/clientes/bulk", json=itens)
+    assert resp.status_code == 413
+    resp = client.post(
+        "/clientes/bulk",
+        content="\n".join(json.dumps(item) for item in itens),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 413
+
+    monkeypatch.setattr(api, "BULK_MAX_ITENS", 100)
+    monkeypatch.setattr(api, "BULK_MAX_BYTES", 64)
+    resp = client.post("/clientes/bulk", json=itens)
+    assert resp.status_code == 413
+
+    assert mongo_collection.count_documents({}) == 0
+
+def test_exportar_clientes_ndjson_e_csv(client, mongo_collection):
+    """
+    Cenário:
+      - Cria um cliente ativo em SP e um inativo no RJ
+      - Exporta com filtro status=ativo em NDJSON e em CSV
+      - Confere que só o cliente ativo aparece nos dois formatos
+    """
+    for cpf, status_cliente, cidade, uf in [
+        ("66666666660", "ativo", "São Paulo", "SP"),
+        ("66666666661", "inativo", "Rio de Janeiro", "RJ"),
+    ]:
+        payload = {
+            "cpf": cpf,
+            "nome": f"Cliente Export {cpf}",
+            "email": f"export{cpf}@example.com",
+            "telefone": "11999990006",
+            "status": status_cliente,
+            "endereco": {"cidade": cidade, "estado": uf},
+        }
+        assert client.post("/clientes", json=payload).status_code == 201
+
+    resp_ndjson = client.get("/clientes/export", params={"status": "ativo"})
+    assert resp_ndjson.status_code == 200
+    assert resp_ndjson.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(linha) for linha in resp_ndjson.text.splitlines()]
+    assert [linha["cpf"] for linha in linhas] == ["66666666660"]
+    assert linhas[0]["endereco"]["cidade"] == "São Paulo"
+
+    resp_csv = client.get("/clientes/export", params={"format": "csv", "status": "ativo"})
+    assert resp_csv.status_code == 200
+    linhas_csv = resp_csv.text.splitlines()
+    assert linhas_csv[0].startswith("id;cpf;nome")
+    assert len(linhas_csv) == 2
+    assert ";66666666660;" in linhas_csv[1]
+
+
+def test_listar_clientes_cidade_ignora_acentos_e_maiusculas(client, mongo_collection):
+    """
+    Cenário:
+      - Cria clientes em "São Paulo" e "São José dos Campos"
+      - cidade="sao" (prefixo, sem acento) traz os dois
+      - cidade="SAO PAULO" com cidade_exata=true traz só o de São Paulo
+    """
+    for cpf, cidade in [("55555555550", "São Paulo"), ("55555555551", "São José dos Campos")]:
+        payload = {
+            "cpf": cpf,
+            "nome": f"Cliente {cidade}",
+            "email": f"cidade{cpf[-1]}@example.com",
+            "telefone": "11999990005",
+            "status": "ativo",
+            "endereco": {"cidade": cidade, "estado": "SP"},
+        }
+        assert client.post("/clientes", json=payload).status_code == 201
+
+    doc = mongo_collection.find_one({"cpf": "55555555550"})
+    assert doc["endereco"]["cidade_norm"] == "sao paulo"
+
+    resp_prefixo = client.get("/clientes", params={"cidade": "sao"})
+    assert resp_prefixo.status_code == 200
+    cpfs_prefixo = {c["cpf"] for c in resp_prefixo.json()}
+    assert {"55555555550", "55555555551"} <= cpfs_prefixo
+
+    resp_exata = client.get(
+        "/clientes", params={"cidade": "SAO PAULO", "cidade_exata": "true"}
+    )
+    assert resp_exata.status_code == 200
+    cpfs_exata = {c["cpf"] for c in resp_exata.json()}
+    assert "55555555550" in cpfs_exata
+    assert "55555555551" not in cpfs_exata
+
+
+def test_buscar_clientes_por_prefixo_do_nome(client, mongo_collection):
+    """
+    Cenário:
+      - Cria "Érica Prefixo" e "Erico Prefixo" e "Bruna Prefixo"
+      - /clientes/busca?nome=eric traz os dois primeiros (sem acento/maiúscula)
+      - Após um novo cadastro, o cache do prefixo é descartado
+    """
+    nomes = ["Érica Prefixo", "Erico Prefixo", "Bruna Prefixo"]
+    for i, nome in enumerate(nomes):
+        payload = {
+            "cpf": f"6666666666{i}",
+            "nome": nome,
+            "email": f"prefixo{i}@example.com",
+            "telefone": "11999990006",
+            "status": "ativo",
+            "endereco": {"cidade": "Santos", "estado": "SP"},
+        }
+        assert client.post("/clientes", json=payload).status_code == 201
+
+    resp = client.get("/clientes/busca", params={"nome": "eric"})
+    assert resp.status_code == 200
+    assert resp.headers["X-Cache"] == "MISS"
+    assert [c["nome"] for c in resp.json()] == ["Érica Prefixo", "Erico Prefixo"]
+    assert resp.json()[0]["cidade"] == "Santos"
+
+    assert client.get("/clientes/busca", params={"nome": "ERIC"}).headers["X-Cache"] == "HIT"
+
+    payload = {
+        "cpf": "66666666669",
+        "nome": "Eric Novo",
+        "email": "prefixo9@example.com",
+        "telefone": "11999990006",
+        "status": "ativo",
+        "endereco": {"cidade": "Santos", "estado": "SP"},
+    }
+    assert client.post("/clientes", json=payload).status_code == 201
+
+    resp = client.get("/clientes/busca", params={"nome": "eric"})
+    assert resp.headers["X-Cache"] == "MISS"
+    assert len(resp.json()) == 3
+
+
+def test_lookup_de_clientes_por_lista_de_cpfs(client, mongo_collection):
+    """
+    Cenário:
+      - Cria dois clientes e exclui (soft delete) um deles
+      - POST /clientes/lookup com os dois CPFs + um inexistente
+      - Só o cliente ativo vem em encontrados; os demais em nao_encontrados
+    """
+    for cpf in ("77777777770", "77777777771"):
+        payload = {
+            "cpf": cpf,
+            "nome": f"Cliente Lookup {cpf[-1]}",
+            "email": f"lookup{cpf[-1]}@example.com",
+            "telefone": "11999990007",
+            "status": "ativo",
+            "endereco": {"cidade": "Santos", "estado": "SP"},
+        }
+        assert client.post("/clientes", json=payload).status_code == 201
+
+    assert client.delete("/clientes/77777777771").status_code == 204
+
+    resp = client.post(
+        "/clientes/lookup",
+        json={"cpfs": ["99999999999", "77777777770", "77777777771", "77777777770"]},
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [c["cpf"] for c in body["encontrados"]] == ["77777777770"]
+    assert body["nao_encontrados"] == ["99999999999", "77777777771"]
+
+    assert client.post("/clientes/lookup", json={"cpfs": []}).status_code == 400
+
+
+def test_obter_cliente_por_cpf_com_coalescencia(client, mongo_collection):
+    """
+    Cenário:
+      - Liga o coalescedor de GET /clientes/{cpf} (COALESCER_CPF_ATIVO)
+      - Busca um CPF existente e um inexistente
+      - Os resultados são os mesmos do caminho direto e os contadores sobem
+    """
+    from src import api
+
+    payload = {
+        "cpf": "88888888880",
+        "nome": "Cliente Coalescido",
+        "email": "coalescido@example.com",
+        "telefone": "11999990008",
+        "status": "ativo",
+        "endereco": {"cidade": "Santos", "estado": "SP"},
+    }
+    assert client.post("/clientes", json=payload).status_code == 201
+
+    api._coalescedor_cpf.zerar_estatisticas()
+    api._coalescedor_cpf.iniciar()
+    try:
+        resp = client.get("/clientes/88888888880")
+        assert resp.status_code == 200
+        assert resp.json()["nome"] == payload["nome"]
+
+        assert client.get("/clientes/00000000000").status_code == 404
+
+        stats = client.get("/diagnostico/coalescencia").json()
+        assert stats["em_execucao"] is True
+        assert stats["pedidos"] == 2
+        assert stats["lotes"] >= 1
+    finally:
+        api._coalescedor_cpf.parar()
+
+
+def test_coalescedor_encerrando_nao_deixa_pedido_pendurado():
+    """
+    Cenário:
+      - Pedido feito com o coalescedor já encerrando falha na hora com
+        CoalescedorParadoError (a API cai na busca direta), sem esperar
+        o timeout
+      - Pedido que entrou na fila depois que a thread saiu é resolvido
+        por parar()
+    """
+    import time
+    from concurrent.futures import Future
+
+    import pytest
+
+    from src.coalescencia import CoalescedorBuscas, CoalescedorParadoError
+
+    coalescedor = CoalescedorBuscas(lambda chaves: {c: c * 2 for c in chaves}, janela_ms=1)
+    coalescedor.iniciar()
+    assert coalescedor.buscar(2, timeout=1) == 4
+    coalescedor.parar()
+
+    inicio = time.perf_counter()
+    with pytest.raises(CoalescedorParadoError):
+        coalescedor.buscar(3, timeout=5)
+    assert time.perf_counter() - inicio < 1
+
+    coalescedor.iniciar()
+    thread = coalescedor._thread
+    coalescedor._parar.set()
+    thread.join(timeout=5)
+    futuro = Future()
+    coalescedor._fila.put((5, futuro, time.perf_counter()))
+    coalescedor.parar()
+    assert isinstance(futuro.exception(timeout=0), CoalescedorParadoError)
+
+
+def test_obter_cliente_por_cpf_usa_cache_e_invalida_na_escrita(client, mongo_collection):
+    """
+    Cenário:
+      - A segunda leitura do mesmo CPF vem do cache (acertos sobem)
+      - PATCH invalida a entrada: a leitura seguinte já traz o dado novo
+      - DELETE (soft) invalida: o CRUD deixa de encontrar o cliente
+    """
+    from src.cliente_crud import ClienteCRUD
+
+    payload = {
+        "cpf": "99999999990",
+        "nome": "Cliente Cache",
+        "email": "cache@example.com",
+        "telefone": "11999990009",
+        "status": "ativo",
+        "endereco": {"cidade": "Santos", "estado": "SP"},
+    }
+    assert client.post("/clientes", json=payload).status_code == 201
+
+    acertos_antes = client.get("/diagnostico/cache-cpf").json()["acertos"]
+    assert client.get("/clientes/99999999990").status_code == 200
+    assert client.get("/clientes/99999999990").status_code == 200
+    assert client.get("/diagnostico/cache-cpf").json()["acertos"] == acertos_antes + 1
+
+    resp = client.patch("/clientes/99999999990", json={"nome": "Cliente Cache Novo"})
+    assert resp.status_code == 200
+    assert client.get("/clientes/99999999990").json()["nome"] == "Cliente Cache Novo"
+
+    crud = ClienteCRUD()
+    assert crud.buscar_por_cpf("99999999990").nome == "Cliente Cache Novo"
+    assert client.delete("/clientes/99999999990").status_code == 204
+    assert crud.buscar_por_cpf("99999999990") is None
+
+
+def test_contadores_incrementais_acompanham_as_escritas(client, mongo_collection):
+    """
+    Cenário:
+      - Sem reconciliação, /health conta a coleção
+      - Depois de reconciliar, POST / bulk / PATCH / DELETE mantêm os
+        contadores global, por UF e por UF + cidade
+      - Uma nova reconciliação não encontra divergências
+    """
+    from src import contadores
+
+    def cliente(cpf, status, cidade, estado):
+        return {
+            "cpf": cpf,
+            "nome": f"Cliente {cpf}",
+            "email": f"{cpf}@example.com",
+            "telefone": "11999990000",
+            "status": status,
+            "endereco": {"cidade": cidade, "estado": estado},
+        }
+
+    assert client.post("/clientes", json=cliente("88888888801", "ativo", "Santos", "SP")).status_code == 201
+    assert contadores.total_clientes(colecao_clientes=mongo_collection) is None
+    assert client.get("/health").json()["total_clientes"] == 1
+
+    assert contadores.reconciliar(colecao_clientes=mongo_collection)["aplicado"] is True
+
+    resp = client.post(
+        "/clientes/bulk",
+        json=[
+            cliente("88888888802", "ativo", "São Paulo", "SP"),
+            cliente("88888888803", "inativo", "Curitiba", "PR"),
+        ],
+    )
+    assert resp.status_code == 200
+    assert client.patch("/clientes/88888888801", json={"status": "inativo"}).status_code == 200
+    assert client.delete("/clientes/88888888802").status_code == 204
+
+    col = contadores.colecao_contadores(mongo_collection)
+    global_ = col.find_one({"_id": "global"})
+    assert global_["total"] == 2
+    assert global_["status"].get("ativo", 0) == 0
+    assert global_["status"]["inativo"] == 2
+    assert col.find_one({"_id": "uf:SP"})["total"] == 1
+    assert col.find_one({"_id": "uf_cidade:SP:sao paulo"})["total"] == 0
+    assert client.get("/health").json()["total_clientes"] == 2
+
+    ufs = contadores.listar_contadores("uf", colecao_clientes=mongo_collection)
+    assert {c["estado"]: c["total"] for c in ufs} == {"SP": 1, "PR": 1}
+
+    assert contadores.reconciliar(aplicar=False, colecao_clientes=mongo_collection)["divergencias"] == []
+
+
+def test_job_de_exportacao_com_progresso_download_e_deduplicacao(client, mongo_collection, monkeypatch, tmp_path):
+    """
+    Cenário:
+      - POST /jobs/export_clientes cria o job (202) e o pool o executa
+      - GET /jobs/{id} chega a concluido; /result baixa o CSV
+      - Pedido idêntico a um job ainda ativo devolve o mesmo job (deduplicado)
+      - Parâmetro inválido → 400; relatório desconhecido → 404
+    """
+    import time
+
+    from src.jobs import chave_job, gerenciador_jobs
+
+    monkeypatch.setattr(gerenciador_jobs, "_diretorio", tmp_path)
+    jobs = mongo_collection.database["jobs"]
+    jobs.delete_many({})
+    try:
+        for cpf in ("77777777701", "77777777702"):
+            payload = {
+                "cpf": cpf,
+                "nome": f"Cliente Job {cpf}",
+                "email": f"job{cpf}@example.com",
+                "telefone": "11999990000",
+                "status": "ativo",
+                "endereco": {"cidade": "Campinas", "estado": "SP"},
+            }
+            assert client.post("/clientes", json=payload).status_code == 201
+
+        resp = client.post("/jobs/export_clientes", json={"formato": "csv", "estado": "SP"})
+        assert resp.status_code == 202
+        job_id = resp.json()["id"]
+
+        for _ in range(100):
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] in ("concluido", "erro"):
+                break
+            time.sleep(0.05)
+        assert job["status"] == "concluido", job
+        assert job["progresso"] == 100.0
+
+        resp = client.get(job["resultado_url"])
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert "77777777701" in resp.text and "77777777702" in resp.text
+
+        # Job idêntico ainda em andamento
+        parametros = {"formato": "ndjson", "status": None, "estado": None, "cidade": None, "cidade_exata": False}
+        jobs.insert_one(
+            {
+                "_id": "job-ativo",
+                "relatorio": "export_clientes",
+                "parametros": parametros,
+                "chave_ativa": chave_job("export_clientes", parametros),
+                "status": "executando",
+            }
+        )
+        resp = client.post("/jobs/export_clientes", json={"formato": "ndjson"})
+        assert resp.status_code == 200
+        assert resp.json()["id"] == "job-ativo"
+        assert resp.json()["deduplicado"] is True
+        assert client.get("/jobs/job-ativo/result").status_code == 409
+
+        assert client.post("/jobs/export_clientes", json={"formato": "xml"}).status_code == 400
+        assert client.post("/jobs/nao_existe").status_code == 404
+    finally:
+        jobs.drop()
+
+
+
+def test_jobs_encerrados_expiram_com_a_retencao(mongo_collection, tmp_path):
+    """
+    Cenário:
+      - Retenção de 1 hora; jobs concluído antigo, concluído recente,
+        em execução antigo e uma pasta órfã antiga (documento já
+        removido pelo TTL)
+      - limpar_expirados apaga só o concluído antigo e a pasta órfã
+      - A coleção ganha o índice TTL em concluido_em
+    """
+    import os
+    from datetime import datetime, timedelta, timezone
+
+    from src.jobs import GerenciadorJobs
+
+    jobs = mongo_collection.database["jobs"]
+    jobs.drop()
+    gerenciador = GerenciadorJobs(diretorio=tmp_path, retencao_horas=1)
+    gerenciador._colecao = jobs
+    # Só o índice TTL: o mongomock não respeita o filtro parcial do
+    # índice único em chave_ativa
+    gerenciador._garantir_indice_ttl()
+    gerenciador._indices_ok = True
+    try:
+        agora = datetime.now(timezone.utc)
+        antigo = agora - timedelta(hours=2)
+        jobs.insert_many(
+            [
+                {"_id": "velho", "status": "concluido", "concluido_em": antigo},
+                {"_id": "novo", "status": "concluido", "concluido_em": agora},
+                {"_id": "rodando", "status": "executando", "criado_em": antigo},
+            ]
+        )
+        for nome in ("velho", "novo", "rodando", "orfao"):
+            (tmp_path / nome).mkdir()
+            (tmp_path / nome / "saida.csv").write_text("cpf\n")
+        # Pastas escritas junto com a conclusão do job
+        for nome in ("velho", "rodando", "orfao"):
+            os.utime(tmp_path / nome, (antigo.timestamp(), antigo.timestamp()))
+
+        assert gerenciador.limpar_expirados() == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["novo", "rodando"]
+        assert sorted(j["_id"] for j in jobs.find()) == ["novo", "rodando"]
+
+        ttl = jobs.index_information()["concluido_em_ttl"]
+        assert ttl["expireAfterSeconds"] == 3600
+    finally:
+        jobs.drop()
+
+def test_metrics_expoe_latencia_por_template_de_rota(client):
+    """
+    Cenário:
+      - GET /clientes/{cpf} com CPFs diferentes gera uma única série,
+        rotulada pelo template da rota
+      - /metrics traz contador por status, histograma e gauge em andamento
+    """
+    client.get("/clientes/00000000001")
+    client.get("/clientes/00000000002")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    texto = resp.text
+
+    assert '# TYPE http_request_duration_seconds histogram' in texto
+    assert 'http_requests_total{method="GET",route="/clientes/{cpf}",status_code="404"}' in texto
+    assert 'route="/clientes/{cpf}",le="+Inf"' in texto
+    assert "00000000001" not in texto
+    assert "# TYPE http_requests_in_progress gauge" in texto
+    assert "# TYPE mongodb_command_duration_seconds histogram" in texto
+
+
+def test_comandos_mongo_atribuidos_a_requisicao_e_log_de_lentos(client, caplog):
+    """
+    Cenário:
+      - A API devolve o X-Request-ID recebido (ou gera um)
+      - Comandos concluídos dentro da requisição somam mongo_ms/mongo_comandos
+      - Comando acima do limite é logado com o formato do filtro, sem os valores
+    """
+    from types import SimpleNamespace
+
+    import monitoramento_mongo
+
+    resp = client.get("/clientes/00000000001", headers={"X-Request-ID": "req-teste"})
+    assert resp.headers["X-Request-ID"] == "req-teste"
+    assert client.get("/metrics").headers["X-Request-ID"]
+
+    ouvinte = monitoramento_mongo.OuvinteComandosLentos(limite_lento_ms=50)
+    comando = {"find": "clientes", "filter": {"cpf": "12345678901", "status": {"$in": ["ativo"]}}}
+    inicio = SimpleNamespace(connection_id=("localhost", 27017), request_id=1, command=comando)
+    fim = SimpleNamespace(
+        connection_id=("localhost", 27017),
+        request_id=1,
+        command_name="find",
+        database_name="teste",
+        duration_micros=120_000,
+    )
+
+    token = monitoramento_mongo.iniciar_requisicao("req-lenta")
+    with caplog.at_level("WARNING"):
+        ouvinte.started(inicio)
+        ouvinte.succeeded(fim)
+    campos = monitoramento_mongo.encerrar_requisicao(token)
+
+    assert campos == {"mongo_comandos": 1, "mongo_ms": 120.0}
+    registro = next(r for r in caplog.records if getattr(r, "event", None) == "mongo_comando_lento")
+    assert registro.request_id == "req-lenta"
+    assert registro.mongo_collection == "clientes"
+    assert registro.mongo_filtro == {"cpf": "?", "status": {"$in": ["?"]}}
+    assert "12345678901" not in registro.getMessage()
+
+
+def test_logging_em_fila_com_amostragem_e_descarte():
+    """
+    Cenário:
+      - Amostragem por event descarta INFO, mas nunca WARNING
+      - Fila cheia descarta (sem bloquear) e conta em log_records_dropped_total
+    """
+    import logging
+    import queue
+
+    import logging_config
+
+    def registro(nivel, event):
+        rec = logging.LogRecord("teste", nivel, __file__, 1, "msg %s", ("x",), None)
+        rec.event = event
+        return rec
+
+    filtro = logging_config.FiltroAmostragem({"cliente_get_success": 0.0})
+    amostrados_antes = logging_config.logs_descartados.valor(reason="amostragem")
+    assert filtro.filter(registro(logging.INFO, "cliente_get_success")) is False
+    assert filtro.filter(registro(logging.WARNING, "cliente_get_success")) is True
+    assert filtro.filter(registro(logging.INFO, "outro_evento")) is True
+    assert logging_config.logs_descartados.valor(reason="amostragem") == amostrados_antes + 1
+
+    fila = queue.Queue(maxsize=1)
+    handler = logging_config._QueueHandlerLimitado(fila)
+    cheia_antes = logging_config.logs_descartados.valor(reason="fila_cheia")
+    handler.handle(registro(logging.INFO, "a"))
+    handler.handle(registro(logging.INFO, "b"))
+    assert fila.qsize() == 1
+    assert fila.get_nowait().msg == "msg x"
+    assert logging_config.logs_descartados.valor(reason="fila_cheia") == cheia_antes + 1
+
+
+def test_listagem_rapida_tem_o_mesmo_formato_de_cliente_out(client, mongo_collection):
+    """
+    Cenário:
+      - GET /clientes e POST /clientes/lookup serializam direto do documento
+      - O JSON é igual ao que o ClienteOut (caminho antigo) produziria
+    """
+    from src.api import _doc_to_cliente_out
+
+    mongo_collection.insert_many(
+        [
+            {
+                "cpf": "70000000001",
+                "nome": "Ana Rápida",
+                "email": "ana@example.com",
+                "telefone": "11900000001",
+                "status": "ativo",
+                "data_nascimento": "1990-05-01",
+                "endereco": {"cidade": "Campinas", "estado": "SP", "cidade_norm": "campinas"},
+                "nome_norm": "ana rapida",
+            },
+            {
+                "cpf": "70000000002",
+                "nome": "Bruno Sem Endereço",
+                "email": "bruno@example.com",
+                "telefone": "11900000002",
+            },
+        ]
+    )
+    esperado = {
+        doc["cpf"]: _doc_to_cliente_out(doc).model_dump(mode="json")
+        for doc in mongo_collection.find({"cpf": {"$in": ["70000000001", "70000000002"]}})
+    }
+
+    resp = client.get("/clientes", params={"limit": 200})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    recebidos = {c["cpf"]: c for c in resp.json() if c["cpf"] in esperado}
+    assert recebidos == esperado
+    assert list(recebidos["70000000001"]) == list(esperado["70000000001"])
+
+    resp = client.get("/clientes", params={"limit": 1})
+    assert resp.headers.get("X-Next-Cursor")
+
+    resp = client.post("/clientes/lookup", json={"cpfs": ["70000000002", "70000000001", "99999999999"]})
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "encontrados": [esperado["70000000002"], esperado["70000000001"]],
+        "nao_encontrados": ["99999999999"],
+    }
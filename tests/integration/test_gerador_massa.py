@@ -0,0 +1,52 @@
+# tests/integration/test_gerador_massa.py
+from datetime import datetime
+
+import pytest
+
+
+pytest.importorskip("faker")
+
+
+def test_gerador_em_massa_lotes_paralelos_com_cpfs_unicos(mongo_collection):
+    """
+    Cenário:
+      - 50 clientes em lotes de 7, gravados por threads (mesmo banco do teste)
+      - CPFs válidos e únicos, campos normalizados e atualizado_em preenchidos
+      - Segunda execução continua a numeração (sem CPFs repetidos)
+      - Contadores reconciliados ao final
+      - Mesma semente e mesmo índice geram os mesmos documentos
+    """
+    from src import contadores
+    from src.gerador_massa import (
+        CIDADES_POR_UF,
+        DISTRIBUICAO_CIDADES_REAIS,
+        digitos_verificadores_cpf,
+        gerar_documentos,
+        gerar_em_massa,
+    )
+
+    resultado = gerar_em_massa(50, processos=0, lote=7, colecao=mongo_collection)
+    assert resultado["gerados"] == resultado["inseridos"] == 50
+    assert resultado["duplicados"] == resultado["erros"] == 0
+    assert resultado["inseridos_por_segundo"] > 0
+
+    resultado = gerar_em_massa(
+        20, processos=0, lote=7, distribuicao=DISTRIBUICAO_CIDADES_REAIS, colecao=mongo_collection
+    )
+    assert resultado["inseridos"] == 20
+
+    docs = list(mongo_collection.find())
+    cpfs = [doc["cpf"] for doc in docs]
+    assert len(set(cpfs)) == 70
+    assert all(cpf[9:] == digitos_verificadores_cpf(cpf[:9]) for cpf in cpfs)
+    assert all(doc["nome_norm"] and doc["endereco"]["cidade_norm"] and doc["atualizado_em"] for doc in docs)
+    assert all(len(doc["data_nascimento"]) == 10 for doc in docs)
+
+    cidades_reais = {cidade for cidades in CIDADES_POR_UF.values() for cidade in cidades}
+    assert sum(doc["endereco"]["cidade"] in cidades_reais for doc in docs) >= 20
+
+    assert contadores.total_clientes(colecao_clientes=mongo_collection) == 70
+
+    agora = datetime(2025, 1, 1)
+    assert gerar_documentos(100, 5, semente=7, agora=agora) == gerar_documentos(100, 5, semente=7, agora=agora)
+    assert gerar_documentos(100, 5, semente=7, agora=agora) != gerar_documentos(100, 5, semente=8, agora=agora)
@@ -0,0 +1,267 @@
+# tests/integration/test_relatorios_api.py
+from datetime import date
+
+
+def _payload(cpf: str, data_nascimento=None, **extra):
+    payload = {
+        "cpf": cpf,
+        "nome": f"Cliente Relatório {cpf}",
+        "email": f"relatorio{cpf}@example.com",
+        "telefone": "11999990007",
+        "status": "ativo",
+        "endereco": {"cidade": "São Paulo", "estado": "SP"},
+    }
+    if data_nascimento:
+        payload["data_nascimento"] = data_nascimento
+    payload.update(extra)
+    return payload
+
+
+def _anos_atras(anos: int) -> str:
+    # 1º de janeiro de (ano atual - anos): idade entre `anos` e `anos + 1`
+    return date(date.today().year - anos, 1, 1).isoformat()
+
+
+def test_relatorio_faixa_etaria_pelo_snapshot(client):
+    """
+    Cenário:
+      - Cria clientes de ~10 e ~30 anos e um sem data de nascimento
+      - GET /relatorios/faixa-etaria (ainda não materializado) calcula
+        sobre o snapshot e devolve as seis faixas, contando só quem tem
+        data válida
+    """
+    assert client.post("/clientes", json=_payload("77777777770", _anos_atras(10))).status_code == 201
+    assert client.post("/clientes", json=_payload("77777777771", _anos_atras(30))).status_code == 201
+    assert client.post("/clientes", json=_payload("77777777772")).status_code == 201
+
+    resp = client.get("/relatorios/faixa-etaria")
+    assert resp.status_code == 200
+    body = resp.json()
+
+    assert body["total_clientes"] == 2
+    faixas = {f["faixa_etaria"]: f["quantidade"] for f in body["faixas"]}
+    assert list(faixas) == ["0-17", "18-25", "26-35", "36-50", "51-65", "66+"]
+    assert faixas["0-17"] == 1
+    assert faixas["26-35"] == 1
+
+
+def test_relatorio_status_por_estado_usa_snapshot_atualizado(client):
+    """
+    Cenário:
+      - Cria 2 ativos e 1 inativo em SP, 1 inativo no RJ
+      - GET /relatorios/status-por-estado reflete as escritas e
+        informa a idade do snapshot usado
+    """
+    clientes = [
+        ("88888888880", "ativo", "SP"),
+        ("88888888881", "ativo", "SP"),
+        ("88888888882", "inativo", "SP"),
+        ("88888888883", "inativo", "RJ"),
+    ]
+    for cpf, status_cliente, uf in clientes:
+        payload = _payload(cpf, status=status_cliente, endereco={"cidade": "X", "estado": uf})
+        assert client.post("/clientes", json=payload).status_code == 201
+
+    resp = client.get("/relatorios/status-por-estado")
+    assert resp.status_code == 200
+    body = resp.json()
+
+    assert body["total_geral_clientes"] == 4
+    estados = {e["estado"]: e for e in body["estados"]}
+    assert estados["SP"]["ativo"] == 2
+    assert estados["SP"]["inativo"] == 1
+    assert estados["SP"]["perc_ativos"] == 66.67
+    assert estados["RJ"]["total"] == 1
+
+    assert body["snapshot"]["total_linhas"] == 4
+    assert body["snapshot"]["idade_segundos"] >= 0
+
+
+def test_pipeline_faixa_etaria_bate_com_o_calculo_no_snapshot(client, mongo_collection):
+    """
+    Cenário:
+      - Clientes em várias faixas, um com data DD/MM/YYYY (gerador antigo)
+        e um sem data de nascimento
+      - A materialização de faixa_etaria (pipeline_faixa_etaria, $bucket)
+        dá as mesmas faixas que calcular_faixa_etaria sobre o snapshot
+    """
+    import pytest
+
+    from src.relatorios_calculos import calcular_faixa_etaria, montar_faixa_etaria
+    from src.relatorios_materializados import ler_relatorio, materializar_relatorio
+    from src.snapshot_clientes import carregar_snapshot
+
+    relatorios = mongo_collection.database["relatorios_materializados"]
+    relatorios.drop()
+    try:
+        for cpf, anos in (("44444444440", 10), ("44444444441", 30), ("44444444442", 30), ("44444444443", 70)):
+            assert client.post("/clientes", json=_payload(cpf, _anos_atras(anos))).status_code == 201
+        assert client.post("/clientes", json=_payload("44444444444")).status_code == 201
+        mongo_collection.insert_one(
+            {**_payload("44444444445"), "data_nascimento": f"01/01/{date.today().year - 40}"}
+        )
+
+        try:
+            materializar_relatorio("faixa_etaria", mongo_collection)
+        except NotImplementedError as e:
+            # mongomock não implementa $dateFromString
+            pytest.skip(f"backend sem suporte à pipeline: {e}")
+
+        materializado = montar_faixa_etaria(ler_relatorio("faixa_etaria", mongo_collection).linhas)
+        esperado = calcular_faixa_etaria(carregar_snapshot(mongo_collection).dados, date.today())
+        assert materializado == esperado
+        assert materializado["total_clientes"] == 5
+    finally:
+        relatorios.drop()
+
+
+def test_relatorio_status_por_estado_materializado(client, mongo_collection):
+    """
+    Cenário:
+      - Cria 2 clientes em SP e materializa status_por_estado ($merge)
+      - O GET passa a ler as linhas materializadas (com computed_at)
+      - Uma escrita nova só aparece após ?fresh=true
+    """
+    relatorios = mongo_collection.database["relatorios_materializados"]
+    relatorios.drop()
+    try:
+        for cpf in ("66666666660", "66666666661"):
+            assert client.post("/clientes", json=_payload(cpf)).status_code == 201
+
+        resp = client.post("/relatorios/materializar", params={"relatorio": "status_por_estado"})
+        assert resp.status_code == 200
+        assert resp.json()["relatorios"][0]["linhas"] == 1
+
+        body = client.get("/relatorios/status-por-estado").json()
+        assert body["fonte"] == "materializado"
+        assert body["computed_at"]
+        assert body["total_geral_clientes"] == 2
+
+        payload = _payload("66666666662", status="inativo")
+        assert client.post("/clientes", json=payload).status_code == 201
+
+        body = client.get("/relatorios/status-por-estado").json()
+        assert body["total_geral_clientes"] == 2
+
+        body = client.get("/relatorios/status-por-estado", params={"fresh": "true"}).json()
+        assert body["total_geral_clientes"] == 3
+        assert body["estados"][0]["inativo"] == 1
+
+        # A execução anterior fica para quem ainda lê o controle antigo;
+        # as de antes dela são apagadas: 2 execuções de 1 linha + 1 controle
+        filtro_linhas = {"relatorio": "status_por_estado", "tipo": "linha"}
+        execucao_anterior = relatorios.find_one(
+            {"_id": "execucao:status_por_estado"}
+        )["execucao"]
+        assert relatorios.count_documents({"relatorio": "status_por_estado"}) == 3
+        assert client.post(
+            "/relatorios/materializar", params={"relatorio": "status_por_estado"}
+        ).status_code == 200
+        assert relatorios.count_documents({"relatorio": "status_por_estado"}) == 3
+        assert relatorios.count_documents({**filtro_linhas, "execucao": execucao_anterior}) == 1
+
+        resp = client.post("/relatorios/materializar", params={"relatorio": "nao_existe"})
+        assert resp.status_code == 400
+    finally:
+        relatorios.drop()
+
+
+def test_relatorios_rodam_no_executor_com_metricas(client):
+    """
+    Cenário:
+      - GET de um relatório passa pelo executor de relatórios
+      - /diagnostico/relatorios conta o pedido e a fila volta a zero
+      - Relatório sem dados para o critério continua respondendo 404
+    """
+    assert client.post("/clientes", json=_payload("55555555550")).status_code == 201
+
+    antes = client.get("/diagnostico/relatorios").json()["relatorios"]
+    pedidos_antes = antes.get("dominios_email", {}).get("pedidos", 0)
+
+    resp = client.get("/relatorios/dominios-email")
+    assert resp.status_code == 200
+    assert resp.json()["fonte"] in ("materializado", "snapshot")
+
+    diagnostico = client.get("/diagnostico/relatorios").json()
+    assert diagnostico["pendentes"] == 0
+    assert diagnostico["relatorios"]["dominios_email"]["pedidos"] == pedidos_antes + 1
+    assert diagnostico["relatorios"]["dominios_email"]["concluidos"] >= 1
+
+    resp = client.get("/relatorios/cidades-inativos", params={"min_clientes": 1000})
+    assert resp.status_code == 404
+
+
+def test_relatorios_identicos_simultaneos_compartilham_um_calculo():
+    """
+    Cenário:
+      - Dez chamadas simultâneas com a mesma chave disparam um só cálculo
+      - Dentro do TTL, a próxima chamada vem do resultado guardado
+      - invalidar() (escrita) e usar_cache=False forçam cálculo novo
+    """
+    import asyncio
+
+    from src.single_flight import SingleFlight
+
+    calculos = 0
+
+    async def calcular():
+        nonlocal calculos
+        calculos += 1
+        await asyncio.sleep(0.05)
+        return {"total": calculos}
+
+    async def cenario():
+        single_flight = SingleFlight(ttl_segundos=60)
+        chave = ("status_por_estado", (("min_clientes", 0),))
+
+        resultados = await asyncio.gather(
+            *(single_flight.executar(chave, calcular) for _ in range(10))
+        )
+        assert calculos == 1
+        assert all(r == {"total": 1} for r in resultados)
+
+        assert await single_flight.executar(chave, calcular) == {"total": 1}
+        assert single_flight.estatisticas()["do_cache"] == 1
+
+        single_flight.invalidar()
+        assert await single_flight.executar(chave, calcular) == {"total": 2}
+        assert await single_flight.executar(chave, calcular, usar_cache=False) == {"total": 3}
+
+    asyncio.run(cenario())
+
+
+def test_snapshot_com_recarga_em_segundo_plano_nao_recarrega_no_pedido():
+    """
+    Cenário (como nos processos do pool de relatórios):
+      - Com a thread de recarga rodando, uma escrita marca o snapshot como
+        desatualizado e obter() segue devolvendo o anterior, sem recarregar
+        dentro do pedido
+      - A thread recarrega depois do intervalo mínimo
+    """
+    import time
+    from datetime import datetime, timezone
+
+    import pandas as pd
+
+    from src.snapshot_clientes import GerenciadorSnapshot, SnapshotClientes
+
+    cargas = []
+
+    def carregar():
+        cargas.append(time.monotonic())
+        return SnapshotClientes(dados=pd.DataFrame(), gerado_em=datetime.now(timezone.utc), duracao_ms=0.0)
+
+    gerenciador = GerenciadorSnapshot(carregar, intervalo_segundos=60, intervalo_minimo_segundos=0.2)
+    gerenciador.iniciar()
+    try:
+        primeiro = gerenciador.obter()
+        gerenciador.marcar_desatualizado()
+        assert gerenciador.obter() is primeiro
+
+        limite = time.monotonic() + 5
+        while gerenciador.obter() is primeiro and time.monotonic() < limite:
+            time.sleep(0.02)
+        assert gerenciador.obter() is not primeiro
+        assert len(cargas) == 2
+    finally:
+        gerenciador.parar()